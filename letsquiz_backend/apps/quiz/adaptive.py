@@ -0,0 +1,193 @@
+"""
+Adaptive difficulty sessions.
+
+Questions are placed on a logistic (Rasch-style) scale by their empirical
+correct rate: a question answered correctly by a share ``r`` of players has
+difficulty ``b = logit(1 - r)``, and a player of ability ``theta`` answers it
+correctly with probability ``sigmoid(theta - b)``. Rates come from the
+QuestionStat counters, shrunk towards a prior per difficulty label so rarely
+answered questions do not jump to the ends of the scale.
+
+For each category, an ``AbilityIndex`` sorts the eligible questions by rate
+into ``ADAPTIVE_BUCKET_COUNT`` equal-width buckets. It is built with one query,
+shared through the cache, and held in process memory for
+``ADAPTIVE_INDEX_TTL`` seconds. Picking the next question is then a bucket
+lookup around the rate the player should get right half of the time
+(``sigmoid(-theta)``), walking outwards when the nearest bucket is exhausted.
+"""
+import logging
+import math
+import random
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+
+from core.redis_utils import cache_get, cache_set
+
+from .category_tree import get_allowed_category_ids, get_descendant_ids
+from .level1_config import normalize_label, normalize_question_key, playable_question_q
+from .models import Question
+
+logger = logging.getLogger(__name__)
+
+# Expected correct rate of a question with no recorded answers, by difficulty label
+DIFFICULTY_PRIOR_RATES = {
+    'easy': 0.8,
+    'medium': 0.6,
+    'quiz genius': 0.4,
+}
+DEFAULT_PRIOR_RATE = 0.6
+# Pseudo-answers the prior is worth when blending with recorded counters
+PRIOR_WEIGHT = 10
+
+ABILITY_LIMIT = 4.0
+RATE_FLOOR, RATE_CEILING = 0.02, 0.98
+
+# A pick scans this many questions of a bucket before falling back to a full filter
+_SAMPLE_TRIES = 8
+
+
+def _sigmoid(value: float) -> float:
+    return 1.0 / (1.0 + math.exp(-value))
+
+
+def _clamp_rate(rate: float) -> float:
+    return min(RATE_CEILING, max(RATE_FLOOR, rate))
+
+
+def question_difficulty(rate: float) -> float:
+    """Position of a question with correct rate ``rate`` on the ability scale."""
+    rate = _clamp_rate(rate)
+    return math.log((1.0 - rate) / rate)
+
+
+def target_rate(ability: float) -> float:
+    """Correct rate of the questions a player of ``ability`` gets right half of the time."""
+    return _sigmoid(-ability)
+
+
+def update_ability(ability: float, rate: float, is_correct: bool, answered: int) -> float:
+    """
+    One Elo-style step: move the estimate by the surprise of the outcome.
+    The step shrinks with the number of answers so the estimate settles.
+    """
+    expected = _sigmoid(ability - question_difficulty(rate))
+    step = max(0.4, 1.5 / math.sqrt(max(1, answered)))
+    ability += step * ((1.0 if is_correct else 0.0) - expected)
+    return max(-ABILITY_LIMIT, min(ABILITY_LIMIT, ability))
+
+
+def prior_rate(difficulty_label: Optional[str]) -> float:
+    return DIFFICULTY_PRIOR_RATES.get(normalize_label(difficulty_label or ''), DEFAULT_PRIOR_RATE)
+
+
+def blended_rate(attempts: int, correct: int, difficulty_label: Optional[str]) -> float:
+    """Recorded correct rate shrunk towards the difficulty prior."""
+    prior = prior_rate(difficulty_label)
+    return (correct + prior * PRIOR_WEIGHT) / (attempts + PRIOR_WEIGHT)
+
+
+class AbilityIndex:
+    """Eligible questions of one category bucketed by correct rate."""
+
+    def __init__(self, entries: Iterable[Tuple[int, float]], bucket_count: int):
+        self.bucket_count = max(1, bucket_count)
+        self.rates: Dict[int, float] = {}
+        self.buckets: List[List[int]] = [[] for _ in range(self.bucket_count)]
+        for question_id, rate in sorted(entries, key=lambda entry: entry[1]):
+            self.rates[question_id] = rate
+            self.buckets[self.bucket_of(rate)].append(question_id)
+
+    def __len__(self):
+        return len(self.rates)
+
+    def bucket_of(self, rate: float) -> int:
+        return min(self.bucket_count - 1, max(0, int(rate * self.bucket_count)))
+
+    def rate_of(self, question_id: int, default: float = DEFAULT_PRIOR_RATE) -> float:
+        return self.rates.get(question_id, default)
+
+    def _pick_from_bucket(self, bucket: List[int], exclude: set) -> Optional[int]:
+        if not bucket:
+            return None
+        for _ in range(min(_SAMPLE_TRIES, len(bucket))):
+            question_id = random.choice(bucket)
+            if question_id not in exclude:
+                return question_id
+        remaining = [question_id for question_id in bucket if question_id not in exclude]
+        return random.choice(remaining) if remaining else None
+
+    def pick(self, ability: float, exclude: Iterable[int] = ()) -> Optional[int]:
+        """A question near the player's ability, skipping ``exclude``; None when exhausted."""
+        exclude = set(exclude)
+        start = self.bucket_of(target_rate(ability))
+        for distance in range(self.bucket_count):
+            # Alternate above/below the target bucket, nearest first
+            for bucket_index in ((start + distance, start - distance) if distance else (start,)):
+                if 0 <= bucket_index < self.bucket_count:
+                    question_id = self._pick_from_bucket(self.buckets[bucket_index], exclude)
+                    if question_id is not None:
+                        return question_id
+        return None
+
+
+def _index_cache_key(category_id: Optional[int]) -> str:
+    return f"adaptive_index:c{category_id or 'all'}"
+
+
+def load_index_entries(category_id: Optional[int] = None) -> List[Tuple[int, float]]:
+    """(question_id, blended rate) for every eligible question, one per distinct wording."""
+    queryset = Question.objects.filter(
+        playable_question_q(),
+        category_id__in=get_allowed_category_ids(),
+    )
+    if category_id:
+        queryset = queryset.filter(category_id__in=get_descendant_ids(category_id))
+
+    entries = []
+    seen_texts = set()
+    rows = queryset.order_by('id').values_list(
+        'id', 'question_text', 'difficulty__label', 'stat__attempts', 'stat__correct',
+    )
+    for question_id, question_text, difficulty_label, attempts, correct in rows:
+        text_key = normalize_question_key(question_text)
+        if text_key in seen_texts:
+            continue
+        seen_texts.add(text_key)
+        entries.append((question_id, round(blended_rate(attempts or 0, correct or 0, difficulty_label), 4)))
+    return entries
+
+
+_local_indexes: Dict[Optional[int], Tuple[float, AbilityIndex]] = {}
+_local_lock = threading.Lock()
+
+
+def get_ability_index(category_id: Optional[int] = None) -> AbilityIndex:
+    """The category's index from process memory, the shared cache, or the database."""
+    ttl = getattr(settings, 'ADAPTIVE_INDEX_TTL', 300)
+    now = time.monotonic()
+    with _local_lock:
+        cached = _local_indexes.get(category_id)
+    if cached is not None and now - cached[0] < ttl:
+        return cached[1]
+
+    cache_key = _index_cache_key(category_id)
+    entries = cache_get(cache_key)
+    if entries is None:
+        entries = load_index_entries(category_id)
+        cache_set(cache_key, entries, ttl)
+
+    index = AbilityIndex(
+        ((int(question_id), float(rate)) for question_id, rate in entries),
+        getattr(settings, 'ADAPTIVE_BUCKET_COUNT', 20),
+    )
+    with _local_lock:
+        _local_indexes[category_id] = (now, index)
+    return index
+
+
+def clear_local_indexes():
+    with _local_lock:
+        _local_indexes.clear()
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import User, Question 
+from .models import User, Question, Category, Tag
 
 
 
@@ -15,3 +15,12 @@ class CustomUserAdmin(UserAdmin):
 
 admin.site.register(User, CustomUserAdmin)
 admin.site.register(Question)
+
+
+class CategoryAdmin(admin.ModelAdmin):
+    list_display = ('name', 'parent')
+    list_filter = ('parent',)
+
+
+admin.site.register(Category, CategoryAdmin)
+admin.site.register(Tag)
@@ -1,4 +1,6 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.db.models.signals import post_migrate
 
 
 class QuizConfig(AppConfig):
@@ -8,3 +10,12 @@ class QuizConfig(AppConfig):
     def ready(self):
         """Import signals when app is ready"""
         import apps.quiz.signals
+
+        if getattr(settings, 'CACHE_WARMUP_ON_MIGRATE', False):
+            post_migrate.connect(warm_cache_after_migrate, sender=self)
+
+
+def warm_cache_after_migrate(sender, **kwargs):
+    """Warm caches once migrations have been applied (deploy-time hook)"""
+    from apps.quiz.cache_warmup import warm_on_boot
+    warm_on_boot()
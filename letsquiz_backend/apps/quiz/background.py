@@ -0,0 +1,39 @@
+"""
+Background work that should not run on the request thread.
+
+With ``TASK_BROKER_ENABLED`` the work is queued to its Celery task. Without a
+broker (the Level 1 default) - or when publishing fails - it runs on a daemon
+thread in the calling process instead, so it still happens. Publishing itself
+is done on that thread too, since it blocks while the broker is unreachable.
+"""
+import logging
+import threading
+import time
+from typing import Callable
+
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+def run_in_background(task, fallback: Callable[[], object], name: str, countdown: int = 0):
+    """Queue ``task`` (a Celery task) after ``countdown`` seconds, or run ``fallback()`` in this process."""
+    threading.Thread(target=_run, args=(task, fallback, countdown), name=name, daemon=True).start()
+
+
+def _run(task, fallback: Callable[[], object], countdown: int):
+    if getattr(settings, 'TASK_BROKER_ENABLED', False):
+        try:
+            task.apply_async(countdown=countdown)
+            return
+        except Exception as e:
+            logger.warning(f"Could not queue {task.name}, running it in this process: {e}")
+    if countdown:
+        time.sleep(countdown)
+    try:
+        fallback()
+    except Exception as e:
+        logger.error(f"Background {task.name} failed: {e}", exc_info=True)
+    finally:
+        close_old_connections()
@@ -0,0 +1,198 @@
+"""
+Compressed bitmaps over question ordinals (a small Roaring-style layout).
+
+Ordinals are split into chunks of 65,536 by their high bits. Each chunk is
+stored either as a sorted ``array('H')`` of its low 16 bits (at most
+``ARRAY_LIMIT`` members, two bytes each) or, when denser, as one Python int
+used as a 65,536-bit bitset (8 KiB). Sparse tags therefore cost about two
+bytes per question and dense ones a fixed 8 KiB per chunk, and AND/OR/AND NOT
+work chunk by chunk: set operations for two arrays, C-level int operations
+for two bitsets, and a byte-table probe when mixing the two.
+"""
+import random
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Union
+
+CHUNK_BITS = 16
+CHUNK_SIZE = 1 << CHUNK_BITS
+CHUNK_MASK = CHUNK_SIZE - 1
+CHUNK_BYTES = CHUNK_SIZE // 8
+# Above this many members a chunk is cheaper as a bitset (4096 * 2 bytes = 8 KiB)
+ARRAY_LIMIT = 4096
+
+Container = Union[array, int]
+
+# Set bit positions of every byte value
+_BYTE_BITS = [tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256)]
+
+
+def _positions(bits: int) -> List[int]:
+    data = bits.to_bytes(CHUNK_BYTES, 'little')
+    return [index << 3 | bit for index, byte in enumerate(data) if byte for bit in _BYTE_BITS[byte]]
+
+
+def _as_bits(container: Container) -> int:
+    if isinstance(container, int):
+        return container
+    data = bytearray(CHUNK_BYTES)
+    for low in container:
+        data[low >> 3] |= 1 << (low & 7)
+    return int.from_bytes(data, 'little')
+
+
+def _cardinality(container: Container) -> int:
+    return container.bit_count() if isinstance(container, int) else len(container)
+
+
+def _from_bits(bits: int) -> Container:
+    if bits.bit_count() > ARRAY_LIMIT:
+        return bits
+    return array('H', _positions(bits))
+
+
+def _from_set(members) -> Container:
+    if len(members) > ARRAY_LIMIT:
+        return _as_bits(members)
+    return array('H', sorted(members))
+
+
+def _filter(members: array, bits: int, keep: bool) -> Container:
+    data = bits.to_bytes(CHUNK_BYTES, 'little')
+    return array('H', [low for low in members if bool(data[low >> 3] >> (low & 7) & 1) is keep])
+
+
+def _and(left: Container, right: Container) -> Container:
+    if isinstance(left, int) and isinstance(right, int):
+        return _from_bits(left & right)
+    if isinstance(left, int):
+        return _filter(right, left, True)
+    if isinstance(right, int):
+        return _filter(left, right, True)
+    return _from_set(set(left).intersection(right))
+
+
+def _or(left: Container, right: Container) -> Container:
+    if isinstance(left, int) or isinstance(right, int):
+        return _as_bits(left) | _as_bits(right)
+    return _from_set(set(left).union(right))
+
+
+def _and_not(left: Container, right: Container) -> Container:
+    if isinstance(left, int):
+        bits = _as_bits(right)
+        return _from_bits(left ^ (left & bits))
+    if isinstance(right, int):
+        return _filter(left, right, False)
+    return _from_set(set(left).difference(right))
+
+
+class Bitmap:
+    """An immutable set of non-negative ints; operators return new bitmaps."""
+    __slots__ = ('chunks',)
+
+    def __init__(self, chunks: Dict[int, Container] = None):
+        # Empty chunks are never stored
+        self.chunks = chunks or {}
+
+    @classmethod
+    def from_sorted(cls, ordinals: Iterable[int]) -> 'Bitmap':
+        """Build from ascending ordinals."""
+        grouped: Dict[int, array] = {}
+        for ordinal in ordinals:
+            high = ordinal >> CHUNK_BITS
+            members = grouped.get(high)
+            if members is None:
+                members = grouped[high] = array('H')
+            members.append(ordinal & CHUNK_MASK)
+        return cls({
+            high: _as_bits(members) if len(members) > ARRAY_LIMIT else members
+            for high, members in grouped.items()
+        })
+
+    def __len__(self):
+        return sum(_cardinality(container) for container in self.chunks.values())
+
+    def __bool__(self):
+        return bool(self.chunks)
+
+    def __contains__(self, ordinal: int) -> bool:
+        container = self.chunks.get(ordinal >> CHUNK_BITS)
+        if container is None:
+            return False
+        low = ordinal & CHUNK_MASK
+        if isinstance(container, int):
+            return bool(container >> low & 1)
+        position = bisect_left(container, low)
+        return position < len(container) and container[position] == low
+
+    def _combine(self, other: 'Bitmap', operation, keep_left: bool, keep_right: bool) -> 'Bitmap':
+        chunks = {}
+        for high in self.chunks.keys() | other.chunks.keys():
+            left, right = self.chunks.get(high), other.chunks.get(high)
+            if left is None or right is None:
+                if left is not None and keep_left:
+                    chunks[high] = left
+                elif right is not None and keep_right:
+                    chunks[high] = right
+                continue
+            container = operation(left, right)
+            if _cardinality(container):
+                chunks[high] = container
+        return Bitmap(chunks)
+
+    def __and__(self, other: 'Bitmap') -> 'Bitmap':
+        return self._combine(other, _and, False, False)
+
+    def __or__(self, other: 'Bitmap') -> 'Bitmap':
+        return self._combine(other, _or, True, True)
+
+    def __sub__(self, other: 'Bitmap') -> 'Bitmap':
+        return self._combine(other, _and_not, True, False)
+
+    def to_list(self) -> List[int]:
+        ordinals = []
+        for high in sorted(self.chunks):
+            container = self.chunks[high]
+            base = high << CHUNK_BITS
+            lows = _positions(container) if isinstance(container, int) else container
+            ordinals.extend(base | low for low in lows)
+        return ordinals
+
+    def sample(self, count: int) -> List[int]:
+        """Up to ``count`` distinct random members; only the chunks hit are expanded."""
+        sizes = [(high, _cardinality(container)) for high, container in sorted(self.chunks.items())]
+        total = sum(size for _, size in sizes)
+        ranks = sorted(random.sample(range(total), min(count, total)))
+        picked = []
+        offset = 0
+        rank_index = 0
+        for high, size in sizes:
+            if rank_index == len(ranks):
+                break
+            if ranks[rank_index] >= offset + size:
+                offset += size
+                continue
+            container = self.chunks[high]
+            lows = _positions(container) if isinstance(container, int) else container
+            base = high << CHUNK_BITS
+            while rank_index < len(ranks) and ranks[rank_index] < offset + size:
+                picked.append(base | lows[ranks[rank_index] - offset])
+                rank_index += 1
+            offset += size
+        random.shuffle(picked)
+        return picked
+
+    def nbytes(self) -> int:
+        """Approximate payload size (array items or bitset bytes)."""
+        return sum(
+            CHUNK_BYTES if isinstance(container, int) else container.itemsize * len(container)
+            for container in self.chunks.values()
+        )
+
+
+def union_all(bitmaps: Iterable[Bitmap]) -> Bitmap:
+    result = Bitmap()
+    for bitmap in bitmaps:
+        result = result | bitmap
+    return result
@@ -0,0 +1,217 @@
+"""
+Bulk question changes for content editors (staff-only ``/internal/questions/bulk/``).
+
+A request carries upserts, re-categorizations and deletes. Each kind is applied
+in batches of ``batch_size`` rows, one transaction per batch, with
+``bulk_create``/``bulk_update``/queryset deletes instead of per-row saves. The
+whole run sits in ``deferred_question_invalidation``: the per-row signals that
+still fire (deletes) and the categories touched by the bulk writes are
+collected and invalidated once, after the last batch commits, instead of one
+cache sweep per edited question.
+
+Questions keep the seed identity columns current (``seed_key`` and
+``content_hash``, as seed_questions.py computes them), so a later seed run
+matches edited seeded questions by key and a changed seed entry still wins.
+"""
+import logging
+import time
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+
+from .cache_utils import deferred_question_invalidation, invalidate_question_data
+from .level1_config import canonicalize_difficulty_label
+from .models import Category, DifficultyLevel, Question
+from .tag_index import parse_tags, set_question_tags
+
+logger = logging.getLogger(__name__)
+
+QUESTION_FIELDS = ['question_text', 'correct_answer', 'answer_options', 'metadata_json', 'is_curated', 'is_fallback']
+UPDATE_FIELDS = ['category', 'difficulty', 'seed_key', 'content_hash'] + QUESTION_FIELDS
+
+
+class BulkQuestionError(ValueError):
+    """A request that cannot be applied as a whole (unknown category or difficulty)."""
+
+
+def new_bulk_report() -> Dict:
+    return {
+        'created': 0,
+        'updated': 0,
+        'recategorized': 0,
+        'deleted': 0,
+        'created_ids': [],
+        'missing_ids': [],
+        'invalidated_categories': [],
+        'batches': [],
+        'total_ms': 0.0,
+    }
+
+
+def _batches(items: List, size: int) -> Iterable[List]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def resolve_references(upserts: List[Dict], moves: List[Dict]) -> Dict[str, DifficultyLevel]:
+    """Check every referenced category exists; map each difficulty given to its level (created on first use)."""
+    category_ids = {item['category_id'] for item in upserts if 'category_id' in item}
+    category_ids.update(move['category_id'] for move in moves)
+    known = set(Category.objects.filter(id__in=category_ids).values_list('id', flat=True))
+    unknown = sorted(category_ids - known)
+    if unknown:
+        raise BulkQuestionError(f"Unknown category ids: {unknown}")
+
+    levels = {}
+    difficulties = {}
+    for raw in {item['difficulty'] for item in upserts if 'difficulty' in item}:
+        canonical = canonicalize_difficulty_label(raw)
+        if not canonical:
+            raise BulkQuestionError(f'Difficulty level "{raw}" is not allowed.')
+        if canonical not in levels:
+            levels[canonical], _ = DifficultyLevel.objects.get_or_create(label=canonical)
+        difficulties[raw] = levels[canonical]
+    return difficulties
+
+
+def _apply_fields(question: Question, item: Dict, difficulties: Dict[str, DifficultyLevel]):
+    if 'category_id' in item:
+        question.category_id = item['category_id']
+    if 'difficulty' in item:
+        question.difficulty = difficulties[item['difficulty']]
+    for field in QUESTION_FIELDS:
+        if field in item:
+            setattr(question, field, item[field])
+    if 'tags' in item:
+        # Kept in metadata as seed_questions does, so the content hash covers them
+        metadata = question.metadata_json if isinstance(question.metadata_json, dict) else {}
+        question.metadata_json = {**metadata, 'tags': parse_tags(item['tags'])}
+    question.stamp_seed_identity()
+
+
+def _upsert_batch(items: List[Dict], difficulties, user, affected: set, report: Dict):
+    existing = Question.objects.in_bulk([item['id'] for item in items if 'id' in item])
+    to_create, to_update, tagged = [], [], []
+    for item in items:
+        if 'id' in item:
+            question = existing.get(item['id'])
+            if question is None:
+                report['missing_ids'].append(item['id'])
+                continue
+            affected.add(question.category_id)
+            to_update.append(question)
+        else:
+            # Editor-created questions are playable (curated) unless the entry says otherwise;
+            # never seeded, or a pruning seed run would delete them
+            question = Question(is_curated=True, created_by=user)
+            to_create.append(question)
+        _apply_fields(question, item, difficulties)
+        affected.add(question.category_id)
+        if 'tags' in item:
+            tagged.append(question)
+
+    with transaction.atomic():
+        created = Question.objects.bulk_create(to_create)
+        if to_update:
+            Question.objects.bulk_update(to_update, UPDATE_FIELDS)
+        if created and created[0].pk is None:
+            # Backends without RETURNING: look the new rows up by their seed key (newest wins);
+            # seeded questions with the same key are never what was just created
+            created_ids = dict(Question.objects.filter(
+                seed_key__in=[question.seed_key for question in created],
+                is_seeded=False,
+            ).order_by('id').values_list('seed_key', 'id'))
+            for question in created:
+                question.pk = created_ids.get(question.seed_key)
+        set_question_tags({
+            question.pk: question.metadata_json['tags']
+            for question in tagged if question.pk
+        })
+
+    report['created'] += len(created)
+    report['updated'] += len(to_update)
+    report['created_ids'].extend(question.pk for question in created if question.pk)
+
+
+def _recategorize_batch(question_ids: List[int], category_id: int, affected: set, report: Dict):
+    with transaction.atomic():
+        questions = list(Question.objects.filter(id__in=question_ids).select_for_update())
+        found = {question.id for question in questions}
+        report['missing_ids'].extend(question_id for question_id in question_ids if question_id not in found)
+        for question in questions:
+            affected.add(question.category_id)
+            question.category_id = category_id
+            question.stamp_seed_identity()
+        Question.objects.bulk_update(questions, ['category', 'seed_key', 'content_hash'])
+    affected.add(category_id)
+    report['recategorized'] += len(questions)
+
+
+def _delete_batch(question_ids: List[int], affected: set, report: Dict):
+    with transaction.atomic():
+        rows = Question.objects.filter(id__in=question_ids)
+        category_by_id = dict(rows.values_list('id', 'category_id'))
+        # Cascades to session questions and stats rows; only questions are counted
+        _, deleted_by_model = rows.delete()
+    affected.update(category_by_id.values())
+    report['deleted'] += deleted_by_model.get(Question._meta.label, 0)
+    report['missing_ids'].extend(question_id for question_id in question_ids if question_id not in category_by_id)
+
+
+def apply_bulk_question_changes(
+    upserts: List[Dict] = (),
+    moves: List[Dict] = (),
+    delete_ids: List[int] = (),
+    batch_size: Optional[int] = None,
+    user=None,
+    report: Optional[Dict] = None,
+) -> Dict:
+    """
+    Apply upserts, then re-categorizations (``{'question_ids', 'category_id'}``),
+    then deletes, each in batches of ``batch_size`` rows per transaction.
+    ``report`` (see ``new_bulk_report``) is filled in as batches commit, so a
+    caller passing its own still sees what was applied if a batch fails.
+    """
+    report = report if report is not None else new_bulk_report()
+    batch_size = batch_size or settings.BULK_QUESTION_BATCH_SIZE
+    upserts, moves, delete_ids = list(upserts), list(moves), list(delete_ids)
+    difficulties = resolve_references(upserts, moves)
+    if user is not None and not user.is_authenticated:
+        user = None
+
+    affected = set()
+    started = time.monotonic()
+
+    def timed(operation: str, size: int, apply, *args):
+        batch_started = time.monotonic()
+        apply(*args)
+        report['batches'].append({
+            'operation': operation,
+            'size': size,
+            'ms': round((time.monotonic() - batch_started) * 1000, 1),
+        })
+
+    with deferred_question_invalidation():
+        try:
+            for batch in _batches(upserts, batch_size):
+                timed('upsert', len(batch), _upsert_batch, batch, difficulties, user, affected, report)
+            for move in moves:
+                for batch in _batches(move['question_ids'], batch_size):
+                    timed('recategorize', len(batch), _recategorize_batch, batch, move['category_id'], affected, report)
+            for batch in _batches(delete_ids, batch_size):
+                timed('delete', len(batch), _delete_batch, batch, affected, report)
+        finally:
+            # Bulk writes send no signals; queue what committed so far, flushed once on exit
+            affected.discard(None)
+            for category_id in affected:
+                invalidate_question_data(category_id)
+            report['invalidated_categories'] = sorted(affected)
+            report['total_ms'] = round((time.monotonic() - started) * 1000, 1)
+
+    logger.info(
+        f"Bulk question changes: created={report['created']} updated={report['updated']} "
+        f"recategorized={report['recategorized']} deleted={report['deleted']} "
+        f"in {len(report['batches'])} batches, {report['total_ms']}ms"
+    )
+    return report
@@ -2,9 +2,16 @@
 Cache management utilities for quiz data
 """
 import logging
+import threading
+from contextlib import contextmanager
 from typing import Optional, List
 from django.core.cache import cache
-from core.redis_utils import cache_delete, get_redis_client
+from django.db import transaction
+from core.redis_utils import (
+    cache_delete,
+    cache_delete_many,
+    get_redis_client,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -101,14 +108,15 @@ def invalidate_all_quiz_cache():
                 "letsquiz_dev:session_details:*"
             ]
             
-            total_deleted = 0
+            # Resolve every pattern in one pipelined round trip, then delete in one more
+            pipe = redis_client.pipeline(transaction=False)
             for pattern in patterns:
-                keys = redis_client.keys(pattern)
-                if keys:
-                    redis_client.delete(*keys)
-                    total_deleted += len(keys)
+                pipe.keys(pattern)
+            keys = [key for matched in pipe.execute() for key in matched]
+            if keys:
+                redis_client.delete(*keys)
             
-            logger.info(f"Invalidated {total_deleted} cache entries")
+            logger.info(f"Invalidated {len(keys)} cache entries")
             
         except Exception as e:
             logger.error(f"Error invalidating all quiz cache: {e}")
@@ -120,54 +128,104 @@ def invalidate_all_quiz_cache():
 
 def warm_questions_cache(category_ids: Optional[List[int]] = None, difficulties: Optional[List[str]] = None):
     """Pre-warm the questions cache with popular combinations"""
-    from apps.quiz.quiz_views import get_questions_from_cache_or_db
-    from apps.quiz.models import Category, DifficultyLevel
-    
-    # Get actual category IDs from database if not provided
-    if not category_ids:
-        category_ids = list(Category.objects.values_list('id', flat=True))
-    
-    # Get actual difficulty labels from database if not provided
-    if not difficulties:
-        difficulties = list(DifficultyLevel.objects.values_list('label', flat=True))
-    
-    counts = [5, 10, 15, 20]  # Popular question counts
-    
-    warmed_count = 0
-    for category_id in category_ids:
-        for difficulty in difficulties:
-            for count in counts:
-                try:
-                    get_questions_from_cache_or_db(
-                        category_id=category_id,
-                        difficulty=difficulty,
-                        count=count
-                    )
-                    warmed_count += 1
-                except Exception as e:
-                    logger.error(f"Error warming cache for cat:{category_id}, diff:{difficulty}, count:{count}: {e}")
-    
-    
-    logger.info(f"Warmed {warmed_count} cache entries")
+    from apps.quiz.cache_warmup import WarmupPlan, run_warmup
+
+    plan = WarmupPlan.from_settings(
+        namespaces=['questions'],
+        category_ids=category_ids,
+        difficulties=difficulties,
+    )
+    return run_warmup(plan)
 
 
 # Utility functions to be called from Django signals or admin actions
+_deferred = threading.local()
+
+
+@contextmanager
+def deferred_question_invalidation():
+    """
+    Collect question/category invalidations triggered inside the block (e.g. by
+    signals during a bulk import) and run them once on exit instead of per row,
+    after the surrounding transaction commits (immediately outside one).
+    """
+    outermost = getattr(_deferred, 'category_ids', None) is None
+    if outermost:
+        _deferred.category_ids = set()
+    try:
+        yield
+    finally:
+        if outermost:
+            category_ids, _deferred.category_ids = _deferred.category_ids, None
+            if category_ids:
+                transaction.on_commit(lambda: _flush_question_invalidation(category_ids))
+
+
+def _flush_question_invalidation(category_ids):
+    # One category: scoped pattern; several: a single full sweep
+    invalidate_questions_cache(_question_cache_scope(next(iter(category_ids))) if len(category_ids) == 1 else None)
+    invalidate_categories_cache()
+    _rebuild_question_bank()
+    _mark_tag_index_stale()
+    logger.info(f"Invalidated question data for {len(category_ids)} categories")
+
+
+def invalidate_question_data(category_id: Optional[int]):
+    """Question/category caches for a category (deferred inside deferred_question_invalidation)"""
+    pending = getattr(_deferred, 'category_ids', None)
+    if pending is not None:
+        pending.add(category_id)
+        return
+    invalidate_questions_cache(_question_cache_scope(category_id))
+    invalidate_categories_cache()
+    _rebuild_question_bank()
+    _mark_tag_index_stale()
+
+
+def _question_cache_scope(category_id: Optional[int]) -> Optional[int]:
+    """A sub-topic's questions are also cached under its ancestors: sweep everything."""
+    if not category_id:
+        return None
+    from .category_tree import get_category_tree
+
+    try:
+        return category_id if len(get_category_tree().ancestor_ids(category_id)) == 1 else None
+    except Exception as e:
+        logger.warning(f"Could not resolve category {category_id} ancestors, invalidating all questions: {e}")
+        return None
+
+
+def _rebuild_question_bank():
+    from .question_bank import rebuild_on_commit
+
+    rebuild_on_commit()
+
+
+def _mark_tag_index_stale():
+    from .tag_index import mark_tag_index_stale
+
+    mark_tag_index_stale()
+
+
 def on_question_created_or_updated(question_instance):
     """Called when a question is created or updated"""
-    invalidate_questions_cache(question_instance.category.id)
-    invalidate_categories_cache()
+    invalidate_question_data(question_instance.category_id)
 
 
 def on_question_deleted(question_instance):
     """Called when a question is deleted"""
-    invalidate_questions_cache(question_instance.category.id)
-    invalidate_categories_cache()
+    invalidate_question_data(question_instance.category_id)
+
+
+def on_question_tags_changed(category_id: Optional[int]):
+    """Called when tags are added to or removed from questions"""
+    invalidate_question_data(category_id)
 
 
 def on_category_updated(category_instance):
     """Called when a category is updated"""
-    invalidate_categories_cache()
-    invalidate_questions_cache(category_instance.id)
+    # A rename or move changes what every ancestor's samples contain
+    invalidate_question_data(None)
 
 
 # User data cache invalidation functions
@@ -182,10 +240,15 @@ def invalidate_user_profile_cache(user_id: int):
         logger.warning(f"Failed to invalidate user profile cache for user {user_id}")
 
 
+def get_user_stats_cache_keys(user_id: int) -> List[str]:
+    """All-time and windowed user statistics cache keys"""
+    from .stats_aggregates import STATS_WINDOWS
+    return [f"user_stats:{user_id}"] + [f"user_stats:{user_id}:{window}" for window in STATS_WINDOWS]
+
+
 def invalidate_user_stats_cache(user_id: int):
-    """Invalidate user statistics cache"""
-    cache_key = f"user_stats:{user_id}"
-    success = cache_delete(cache_key)
+    """Invalidate user statistics cache (all-time and every window)"""
+    success = cache_delete_many(get_user_stats_cache_keys(user_id))
     if success:
         logger.info(f"Invalidated user stats cache for user {user_id}")
     else:
@@ -202,23 +265,47 @@ def invalidate_user_sessions_list_cache(user_id: int):
         logger.warning(f"Failed to invalidate user sessions cache for user {user_id}")
 
 
+def get_user_cache_keys(user_id: int) -> List[str]:
+    """Cache keys holding per-user profile, stats and session list data"""
+    return [
+        f"user_profile:{user_id}",
+        *get_user_stats_cache_keys(user_id),
+        f"user_sessions:{user_id}",
+    ]
+
+
 def invalidate_all_user_cache(user_id: int):
     """Invalidate all cache entries for a specific user"""
-    invalidate_user_profile_cache(user_id)
-    invalidate_user_stats_cache(user_id)
-    invalidate_user_sessions_list_cache(user_id)
-    logger.info(f"Invalidated all cache entries for user {user_id}")
+    success = cache_delete_many(get_user_cache_keys(user_id))
+    if success:
+        logger.info(f"Invalidated all cache entries for user {user_id}")
+    else:
+        logger.warning(f"Failed to invalidate cache entries for user {user_id}")
+
+
+def invalidate_deleted_session_cache(session_id: int, user_id: Optional[int] = None):
+    """Invalidate session details/results and the owner's user caches in one round trip"""
+    keys = [f"session_details:{session_id}", f"session_results:{session_id}"]
+    if user_id:
+        keys.extend(get_user_cache_keys(user_id))
+    success = cache_delete_many(keys)
+    if success:
+        logger.info(f"Invalidated caches for deleted session {session_id}")
+    else:
+        logger.warning(f"Failed to invalidate caches for deleted session {session_id}")
 
 
 def on_quiz_session_completed(session_instance):
     """Called when a quiz session is completed - invalidates user caches"""
-    if session_instance.user:
-        user_id = session_instance.user.id
-        invalidate_all_user_cache(user_id)
-        logger.info(f"Invalidated user caches after quiz completion for user {user_id}")
-    
-    # Also invalidate the specific session cache
-    invalidate_session_cache(session_instance.id)
+    keys = [f"session_details:{session_instance.id}"]
+    if session_instance.user_id:
+        keys.extend(get_user_cache_keys(session_instance.user_id))
+
+    # User caches and the specific session cache go in a single round trip
+    if cache_delete_many(keys):
+        logger.info(f"Invalidated session and user caches after quiz completion for session {session_instance.id}")
+    else:
+        logger.warning(f"Failed to invalidate caches after quiz completion for session {session_instance.id}")
 
 
 def on_user_profile_updated(user_instance):
@@ -0,0 +1,266 @@
+"""
+Parallel, time-budgeted cache warm-up engine.
+
+A ``WarmupPlan`` describes which namespaces and combinations to warm and how
+much time and concurrency the run may use. ``run_warmup`` skips entries that
+are already cached (one batched lookup per namespace), loads the rest on a
+bounded thread pool and writes them back in one batched call per namespace.
+
+Entry points: ``manage_cache --action warm``, the optional post_migrate hook
+(``CACHE_WARMUP_ON_MIGRATE``) and the gunicorn ``when_ready`` hook in
+``gunicorn.conf.py``, which warms the master before workers are forked.
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+from core.redis_utils import cache_get_many, cache_set_many
+
+logger = logging.getLogger(__name__)
+
+WARMUP_NAMESPACES = ('questions', 'categories', 'user_stats')
+DEFAULT_QUESTION_COUNTS = [5, 10, 15, 20]  # Popular question counts
+
+
+@dataclass
+class WarmupPlan:
+    """What to warm and how much time/concurrency the warm-up may use."""
+    namespaces: List[str] = field(default_factory=lambda: ['questions', 'categories'])
+    category_ids: Optional[List[int]] = None
+    difficulties: Optional[List[str]] = None
+    counts: List[int] = field(default_factory=lambda: list(DEFAULT_QUESTION_COUNTS))
+    # user_stats: warm users with a session in the last ``active_user_days`` days
+    user_ids: Optional[List[int]] = None
+    active_user_days: int = 7
+    max_users: int = 200
+    time_budget: float = 30.0  # seconds
+    concurrency: int = 4
+
+    @classmethod
+    def from_settings(cls, **overrides) -> 'WarmupPlan':
+        plan = cls(
+            time_budget=getattr(settings, 'CACHE_WARMUP_TIME_BUDGET', 30.0),
+            concurrency=getattr(settings, 'CACHE_WARMUP_CONCURRENCY', 4),
+        )
+        for name, value in overrides.items():
+            if value is not None:
+                setattr(plan, name, value)
+        return plan
+
+
+@dataclass
+class WarmupItem:
+    namespace: str
+    cache_key: str
+    label: str
+    loader: Callable[[], Any]
+    timeout: int
+    status: str = 'pending'  # cached | warmed | empty | skipped | failed
+    elapsed_ms: float = 0.0
+    error: str = ''
+
+
+def _question_items(plan: WarmupPlan) -> List[WarmupItem]:
+    from apps.quiz.models import Category, DifficultyLevel
+    from apps.quiz.quiz_views import (
+        CACHE_TIMEOUT_QUESTIONS,
+        get_questions_cache_key,
+        load_questions_from_db,
+    )
+
+    # Get actual category IDs / difficulty labels from database if not provided
+    category_ids = plan.category_ids or list(Category.objects.values_list('id', flat=True))
+    difficulties = plan.difficulties or list(DifficultyLevel.objects.values_list('label', flat=True))
+
+    items = []
+    for category_id in category_ids:
+        for difficulty in difficulties:
+            for count in plan.counts:
+                items.append(WarmupItem(
+                    namespace='questions',
+                    cache_key=get_questions_cache_key(category_id=category_id, difficulty=difficulty, count=count),
+                    label=f"cat:{category_id}, diff:{difficulty}, count:{count}",
+                    loader=lambda c=category_id, d=difficulty, n=count: load_questions_from_db(
+                        category_id=c, difficulty=d, count=n
+                    ),
+                    timeout=CACHE_TIMEOUT_QUESTIONS,
+                ))
+    return items
+
+
+def _category_items(plan: WarmupPlan) -> List[WarmupItem]:
+    from apps.quiz.quiz_views import (
+        CACHE_TIMEOUT_CATEGORIES,
+        CATEGORIES_CACHE_KEY,
+        load_categories_from_db,
+    )
+
+    return [WarmupItem(
+        namespace='categories',
+        cache_key=CATEGORIES_CACHE_KEY,
+        label='with_questions',
+        loader=load_categories_from_db,
+        timeout=CACHE_TIMEOUT_CATEGORIES,
+    )]
+
+
+def _user_stats_items(plan: WarmupPlan) -> List[WarmupItem]:
+    from apps.quiz.models import QuizSession
+    from apps.quiz.stats_aggregates import read_user_stats
+    from apps.quiz.user_stats_views import CACHE_TIMEOUT_USER_STATS
+
+    user_ids = plan.user_ids
+    if user_ids is None:
+        since = timezone.now() - timedelta(days=plan.active_user_days)
+        user_ids = list(
+            QuizSession.objects
+            .filter(user__isnull=False, started_at__gte=since)
+            .order_by('user_id')
+            .values_list('user_id', flat=True)
+            .distinct()[:plan.max_users]
+        )
+
+    return [
+        WarmupItem(
+            namespace='user_stats',
+            cache_key=f"user_stats:{user_id}",
+            label=f"user:{user_id}",
+            loader=lambda u=user_id: read_user_stats(u),
+            timeout=CACHE_TIMEOUT_USER_STATS,
+        )
+        for user_id in user_ids
+    ]
+
+
+ITEM_BUILDERS: Dict[str, Callable[[WarmupPlan], List[WarmupItem]]] = {
+    'questions': _question_items,
+    'categories': _category_items,
+    'user_stats': _user_stats_items,
+}
+
+
+def _load_item(item: WarmupItem, deadline: float) -> Tuple[WarmupItem, Any]:
+    """Run one loader on a pool thread; the thread's DB connection is closed afterwards."""
+    if time.monotonic() >= deadline:
+        item.status = 'skipped'
+        return item, None
+
+    started = time.perf_counter()
+    try:
+        data = item.loader()
+        item.status = 'warmed' if data is not None else 'empty'
+        return item, data
+    except Exception as e:
+        item.status = 'failed'
+        item.error = str(e)
+        logger.error(f"Error warming {item.namespace} cache for {item.label}: {e}")
+        return item, None
+    finally:
+        item.elapsed_ms = (time.perf_counter() - started) * 1000
+        connections.close_all()
+
+
+def run_warmup(plan: Optional[WarmupPlan] = None) -> Dict[str, Any]:
+    """
+    Execute a warm-up plan and return a report with per-item timings.
+    Items not started before the time budget expires are reported as skipped.
+    """
+    plan = plan or WarmupPlan.from_settings()
+    started = time.monotonic()
+    deadline = started + plan.time_budget
+
+    unknown = [namespace for namespace in plan.namespaces if namespace not in ITEM_BUILDERS]
+    if unknown:
+        raise ValueError(f"Unknown warm-up namespaces: {', '.join(unknown)}")
+
+    items: List[WarmupItem] = []
+    for namespace in plan.namespaces:
+        items.extend(ITEM_BUILDERS[namespace](plan))
+
+    # One batched lookup to skip entries that are already warm
+    cached = cache_get_many(item.cache_key for item in items)
+    pending = []
+    for item in items:
+        if cached.get(item.cache_key):
+            item.status = 'cached'
+        else:
+            pending.append(item)
+
+    results: Dict[str, Dict[str, Any]] = {}
+    if pending:
+        executor = ThreadPoolExecutor(max_workers=max(1, plan.concurrency), thread_name_prefix='cache-warmup')
+        try:
+            futures = [executor.submit(_load_item, item, deadline) for item in pending]
+            done, not_done = wait(futures, timeout=max(0.0, deadline - time.monotonic()))
+            for future in not_done:
+                future.cancel()
+        finally:
+            # Loaders already running are allowed to finish; queued ones are dropped
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        for future in futures:
+            if future.cancelled():
+                continue
+            item, data = future.result()
+            if item.status == 'warmed':
+                results.setdefault(item.namespace, {})[item.cache_key] = (data, item.timeout)
+
+    for item in pending:
+        if item.status == 'pending':
+            item.status = 'skipped'
+
+    # One batched write per namespace (TTLs are per namespace)
+    for namespace, entries in results.items():
+        timeout = next(iter(entries.values()))[1]
+        if not cache_set_many({key: data for key, (data, _) in entries.items()}, timeout):
+            logger.warning(f"Failed to write {len(entries)} warmed {namespace} cache entries")
+            for item in pending:
+                if item.namespace == namespace and item.status == 'warmed':
+                    item.status = 'failed'
+                    item.error = 'cache write failed'
+
+    report = {
+        'elapsed_ms': round((time.monotonic() - started) * 1000, 1),
+        'time_budget': plan.time_budget,
+        'concurrency': plan.concurrency,
+        'totals': {},
+        'items': [
+            {
+                'namespace': item.namespace,
+                'item': item.label,
+                'status': item.status,
+                'elapsed_ms': round(item.elapsed_ms, 1),
+                **({'error': item.error} if item.error else {}),
+            }
+            for item in items
+        ],
+    }
+    for item in items:
+        totals = report['totals'].setdefault(item.namespace, {})
+        totals[item.status] = totals.get(item.status, 0) + 1
+
+    logger.info(f"Cache warm-up finished in {report['elapsed_ms']}ms: {report['totals']}")
+    return report
+
+
+def warm_on_boot():
+    """Warm-up entry point for process start (gunicorn master, post_migrate)."""
+    try:
+        plan = WarmupPlan.from_settings(namespaces=list(getattr(
+            settings, 'CACHE_WARMUP_NAMESPACES', ['questions', 'categories']
+        )))
+        return run_warmup(plan)
+    except Exception as e:
+        # Warm-up is an optimization; never block startup or migrations on it
+        logger.error(f"Cache warm-up on boot failed: {e}", exc_info=True)
+        return None
+    finally:
+        # Do not leak DB connections into forked workers
+        connections.close_all()
@@ -0,0 +1,198 @@
+"""
+Category hierarchy backed by a closure table.
+
+``Category.parent`` builds the tree (Science -> Physics -> Optics) and
+``CategoryClosure`` stores every (ancestor, descendant, depth) pair, including
+each category with itself. It is maintained on save (signals.py): a new
+category copies its parent's ancestor links, a moved one has its subtree's
+links to the old ancestors replaced with links to the new ones. So:
+
+- "questions under Science" is one indexed semi-join,
+  ``Question.objects.filter(questions_under_q(science_id))``;
+- sampling filters on ``category_id__in=get_descendant_ids(science_id)``, a
+  set read from the cached tree snapshot without touching the closure table.
+
+The snapshot (category names and all closure pairs, two queries) is shared
+through the cache and kept in process memory for ``CATEGORY_TREE_TTL``
+seconds; category changes clear it. Level 1 categories are the allowed root
+names plus everything under them (``get_allowed_category_ids``).
+"""
+import logging
+import threading
+import time
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from core.redis_utils import cache_delete, cache_get, cache_set
+
+from .level1_config import get_allowed_category_names
+from .models import Category, CategoryClosure
+
+logger = logging.getLogger(__name__)
+
+CATEGORY_TREE_CACHE_KEY = "categories:tree"
+
+
+class CategoryTree:
+    """Descendant and ancestor id sets of every category, from one snapshot."""
+
+    def __init__(self, names: Dict[int, str], links: List[Tuple[int, int]]):
+        self.names = names
+        descendants: Dict[int, set] = {}
+        ancestors: Dict[int, set] = {}
+        for ancestor_id, descendant_id in links:
+            descendants.setdefault(ancestor_id, set()).add(descendant_id)
+            ancestors.setdefault(descendant_id, set()).add(ancestor_id)
+        self._descendants = {category_id: frozenset(ids) for category_id, ids in descendants.items()}
+        self._ancestors = {category_id: frozenset(ids) for category_id, ids in ancestors.items()}
+
+        allowed_names = set(get_allowed_category_names())
+        allowed = set()
+        for category_id, name in names.items():
+            if name in allowed_names:
+                allowed |= self.descendant_ids(category_id)
+        self.allowed_ids = frozenset(allowed)
+
+    def descendant_ids(self, category_id: int) -> FrozenSet[int]:
+        """The category and everything under it."""
+        return self._descendants.get(category_id) or frozenset((category_id,))
+
+    def ancestor_ids(self, category_id: int) -> FrozenSet[int]:
+        """The category and everything above it."""
+        return self._ancestors.get(category_id) or frozenset((category_id,))
+
+
+def load_tree_snapshot() -> Dict:
+    return {
+        'names': list(Category.objects.values_list('id', 'name')),
+        'links': list(CategoryClosure.objects.values_list('ancestor_id', 'descendant_id')),
+    }
+
+
+def _tree_from_snapshot(snapshot: Dict) -> CategoryTree:
+    return CategoryTree(
+        {int(category_id): name for category_id, name in snapshot['names']},
+        [(int(ancestor_id), int(descendant_id)) for ancestor_id, descendant_id in snapshot['links']],
+    )
+
+
+def load_category_tree() -> CategoryTree:
+    """A tree read from the database now, bypassing both caches."""
+    return _tree_from_snapshot(load_tree_snapshot())
+
+
+_local_tree: Optional[Tuple[float, CategoryTree]] = None
+_local_lock = threading.Lock()
+
+
+def get_category_tree() -> CategoryTree:
+    """The tree from process memory, the shared cache, or the database."""
+    global _local_tree
+    ttl = getattr(settings, 'CATEGORY_TREE_TTL', 60)
+    now = time.monotonic()
+    with _local_lock:
+        cached = _local_tree
+    if cached is not None and now - cached[0] < ttl:
+        return cached[1]
+
+    snapshot = cache_get(CATEGORY_TREE_CACHE_KEY)
+    if snapshot is None:
+        snapshot = load_tree_snapshot()
+        cache_set(CATEGORY_TREE_CACHE_KEY, snapshot, ttl)
+
+    tree = _tree_from_snapshot(snapshot)
+    with _local_lock:
+        _local_tree = (now, tree)
+    return tree
+
+
+def clear_category_tree():
+    global _local_tree
+    with _local_lock:
+        _local_tree = None
+    cache_delete(CATEGORY_TREE_CACHE_KEY)
+
+
+def get_descendant_ids(category_id: int) -> FrozenSet[int]:
+    return get_category_tree().descendant_ids(category_id)
+
+
+def get_allowed_category_ids() -> FrozenSet[int]:
+    """Level 1 categories: the allowed root names and all of their sub-topics."""
+    return get_category_tree().allowed_ids
+
+
+def questions_under_q(category_id: int, prefix: str = '') -> Q:
+    """Questions in the category or any sub-topic: one semi-join on the closure table's ancestor index."""
+    return Q(**{
+        f"{prefix}category_id__in": CategoryClosure.objects.filter(ancestor_id=category_id).values('descendant_id'),
+    })
+
+
+# Closure maintenance
+
+def would_create_cycle(category_id: Optional[int], parent_id: Optional[int]) -> bool:
+    if not category_id or not parent_id:
+        return False
+    return parent_id == category_id or CategoryClosure.objects.filter(
+        ancestor_id=category_id, descendant_id=parent_id
+    ).exists()
+
+
+def _links_above(parent_id: Optional[int]) -> List[Tuple[int, int]]:
+    if not parent_id:
+        return []
+    return list(CategoryClosure.objects.filter(descendant_id=parent_id).values_list('ancestor_id', 'depth'))
+
+
+def link_category(category: Category):
+    """Closure rows of a new category: itself, then each of its parent's ancestors one level further."""
+    CategoryClosure.objects.bulk_create(
+        [CategoryClosure(ancestor_id=category.id, descendant_id=category.id, depth=0)]
+        + [
+            CategoryClosure(ancestor_id=ancestor_id, descendant_id=category.id, depth=depth + 1)
+            for ancestor_id, depth in _links_above(category.parent_id)
+        ],
+        ignore_conflicts=True,
+    )
+
+
+@transaction.atomic
+def move_category(category: Category):
+    """Re-link a category's subtree under its current parent."""
+    subtree = list(CategoryClosure.objects.filter(ancestor_id=category.id).values_list('descendant_id', 'depth'))
+    subtree_ids = [descendant_id for descendant_id, _ in subtree]
+    # Detach: drop every link from outside the subtree into it
+    CategoryClosure.objects.filter(descendant_id__in=subtree_ids).exclude(ancestor_id__in=subtree_ids).delete()
+    CategoryClosure.objects.bulk_create([
+        CategoryClosure(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=above + below + 1)
+        for ancestor_id, above in _links_above(category.parent_id)
+        for descendant_id, below in subtree
+    ])
+    logger.info(f"Moved category {category.id} ({len(subtree_ids)} categories) under {category.parent_id}")
+
+
+@transaction.atomic
+def rebuild_closure() -> int:
+    """
+    Recompute every closure row from the parent links, for writes that bypass
+    the save signals (snapshot import). Returns the number of rows written.
+    """
+    parents = dict(Category.objects.values_list('id', 'parent_id'))
+    rows = []
+    for category_id in parents:
+        ancestor_id, depth, seen = category_id, 0, set()
+        while ancestor_id is not None:
+            if ancestor_id in seen:
+                raise ValueError(f"Category {category_id} is its own ancestor")
+            seen.add(ancestor_id)
+            rows.append(CategoryClosure(ancestor_id=ancestor_id, descendant_id=category_id, depth=depth))
+            ancestor_id, depth = parents.get(ancestor_id), depth + 1
+    CategoryClosure.objects.all().delete()
+    CategoryClosure.objects.bulk_create(rows, batch_size=1000)
+    clear_category_tree()
+    logger.info(f"Rebuilt category closure: {len(parents)} categories, {len(rows)} links")
+    return len(rows)
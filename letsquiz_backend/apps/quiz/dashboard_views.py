@@ -0,0 +1,137 @@
+"""
+Aggregated dashboard endpoint.
+
+Serves profile, lifetime stats and the first history page in one request.
+Section caches are read with one batched lookup (the same keys the individual
+endpoints use); misses are computed concurrently on a bounded thread pool,
+each loader using and then closing its own thread's DB connection.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from django.conf import settings
+from django.db import connections
+
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+
+from core.redis_utils import cache_get_many, cache_set_many
+
+from .stats_aggregates import read_user_stats
+from .user_stats_views import (
+    CACHE_TIMEOUT_USER_PROFILE,
+    CACHE_TIMEOUT_USER_SESSIONS,
+    CACHE_TIMEOUT_USER_STATS,
+    assemble_user_profile,
+    get_user_sessions_page,
+    load_group_participation,
+    load_solo_aggregates,
+)
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'DASHBOARD_MAX_WORKERS', 4),
+                thread_name_prefix='dashboard',
+            )
+        return _executor
+
+
+def _run_loader(loader: Callable[[], Any]) -> Any:
+    try:
+        return loader()
+    finally:
+        # Pool threads outlive requests; don't leave their connections open
+        connections.close_all()
+
+
+def run_concurrently(loaders: Dict[str, Callable[[], Any]]) -> Dict[str, Any]:
+    """Run independent loaders on the shared pool and return their results by name."""
+    if len(loaders) == 1:
+        name, loader = next(iter(loaders.items()))
+        return {name: loader()}
+    executor = _get_executor()
+    futures = {name: executor.submit(_run_loader, loader) for name, loader in loaders.items()}
+    return {name: future.result() for name, future in futures.items()}
+
+
+def build_dashboard(user) -> Dict[str, Any]:
+    """Assemble the dashboard payload, computing only the sections missing from cache."""
+    keys = {
+        'profile': f"user_profile:{user.id}",
+        'stats': f"user_stats:{user.id}",
+        'history': f"user_sessions:{user.id}",
+    }
+    cached = cache_get_many(keys.values())
+    sections = {name: cached.get(key) for name, key in keys.items()}
+
+    loaders = {}
+    if not sections['profile']:
+        loaders['solo'] = lambda: load_solo_aggregates(user.id)
+        loaders['group'] = lambda: load_group_participation(user.id)
+    if not sections['stats']:
+        loaders['stats'] = lambda: read_user_stats(user.id)
+    if not sections['history']:
+        loaders['history'] = lambda: get_user_sessions_page(user.id)
+
+    results = run_concurrently(loaders) if loaders else {}
+
+    to_cache = {}
+    if 'solo' in results:
+        sections['profile'] = assemble_user_profile(user, results['solo'], results['group'])
+        to_cache[CACHE_TIMEOUT_USER_PROFILE] = {keys['profile']: sections['profile']}
+    if 'stats' in results:
+        sections['stats'] = results['stats']
+        to_cache.setdefault(CACHE_TIMEOUT_USER_STATS, {})[keys['stats']] = sections['stats']
+    if 'history' in results:
+        sections['history'] = results['history']
+        to_cache.setdefault(CACHE_TIMEOUT_USER_SESSIONS, {})[keys['history']] = sections['history']
+    for timeout, entries in to_cache.items():
+        cache_set_many(entries, timeout)
+
+    overall = sections['stats']['overall_stats']
+    recent = sections['history']['results']
+    return {
+        **sections,
+        'summary': {
+            'total_quizzes': sections['profile']['total_quizzes'],
+            'total_score': sections['profile']['total_score'],
+            'accuracy': overall['accuracy'],
+            'last_played_at': recent[0]['started_at'] if recent else None,
+        },
+        'cached_sections': sorted(name for name in keys if cached.get(keys[name])),
+    }
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_user_dashboard_view(request, userId):
+    """API endpoint returning profile, stats and the first history page in one response."""
+    try:
+        # Only allow users to access their own dashboard
+        if request.user.id != userId:
+            return Response({
+                'error': 'Not authorized to access this data.',
+                'code': 'permission_denied'
+            }, status=status.HTTP_403_FORBIDDEN)
+
+        return Response(build_dashboard(request.user), status=status.HTTP_200_OK)
+
+    except Exception as e:
+        logger.error(f"Error building user dashboard: {e}", exc_info=True)
+        return Response({
+            'error': 'Error retrieving dashboard.',
+            'code': 'server_error'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -0,0 +1,611 @@
+"""
+Degraded mode: keep quizzes playable while the database is slow or down.
+
+- ``call_with_deadline`` runs a gameplay query on a small thread pool and waits
+  at most ``DEGRADED_DB_DEADLINE`` seconds. A timeout or a connection-level
+  error (OperationalError/InterfaceError) opens a breaker for
+  ``DEGRADED_COOLDOWN`` seconds, during which gameplay reads skip the database
+  entirely and ``DatabaseUnavailable`` is raised at once.
+- ``FallbackPool`` is an in-memory set of question payloads (QuestionSerializer
+  shape): ``is_fallback`` questions plus up to ``FALLBACK_POOL_PER_GROUP``
+  questions per (category, difficulty) from the bundled seed file. It is loaded
+  at worker start, refreshed in the background every ``FALLBACK_POOL_REFRESH``
+  seconds and, when the database cannot be reached, built from the file alone.
+  Questions and answer checks are served from it while degraded.
+- Quiz saves that cannot reach the database are appended to a local spool file
+  (``DEGRADED_SAVE_SPOOL``) and replayed through ``QuizSessionSaveSerializer``
+  once the database answers again (in the background, or with
+  ``manage.py replay_degraded_saves``). Replay progress is kept per record, and
+  saves that fail for other reasons are set aside in ``<spool>.rejected``.
+"""
+import json
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - POSIX only, like the question bank
+    fcntl = None
+
+from django.conf import settings
+from django.db import InterfaceError, OperationalError, close_old_connections, connection, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.models import TokenUser
+
+from .category_tree import get_allowed_category_ids
+from .level1_config import (
+    canonicalize_difficulty_label,
+    get_allowed_category_names,
+    get_allowed_difficulty_labels,
+    normalize_label,
+    normalize_question_key,
+)
+from .seed_io import iter_seed_entries, question_seed_key
+from .serializers import normalize_answer_text
+
+logger = logging.getLogger(__name__)
+
+# Errors meaning "the database is unreachable", as opposed to bad data
+DB_UNAVAILABLE_ERRORS = (OperationalError, InterfaceError)
+
+# Bundled questions with no stored counterpart get ids from here up, far above
+# any real id (URL converters only accept non-negative ints)
+SYNTHETIC_ID_BASE = 1 << 40
+
+
+class DatabaseUnavailable(Exception):
+    """The database missed its deadline, failed, or the breaker is open."""
+
+
+def degraded_mode_enabled() -> bool:
+    return getattr(settings, 'DEGRADED_MODE_ENABLED', True)
+
+
+class DatabaseHealth:
+    """Process-wide breaker over gameplay database calls."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.open_until = 0.0
+        self.last_success = 0.0
+        self.failures = 0
+
+    def is_open(self) -> bool:
+        return time.monotonic() < self.open_until
+
+    def record_failure(self, reason: str):
+        with self._lock:
+            was_open = self.is_open()
+            self.failures += 1
+            self.open_until = time.monotonic() + getattr(settings, 'DEGRADED_COOLDOWN', 15)
+        if not was_open:
+            logger.warning(f"Database unavailable ({reason}); serving gameplay in degraded mode")
+
+    def record_success(self):
+        with self._lock:
+            self.last_success = time.monotonic()
+            self.open_until = 0.0
+        maybe_replay_saves()
+
+    def recently_ok(self) -> bool:
+        return time.monotonic() - self.last_success < getattr(settings, 'DEGRADED_PROBE_INTERVAL', 5)
+
+
+health = DatabaseHealth()
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+_in_deadline_thread = threading.local()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    # Created lazily per process: gunicorn may fork after the app is imported
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'DEGRADED_DB_WORKERS', 8),
+                thread_name_prefix='db-deadline',
+            )
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def _run_in_deadline_thread(func: Callable, args, kwargs):
+    _in_deadline_thread.active = True
+    try:
+        return func(*args, **kwargs)
+    finally:
+        _in_deadline_thread.active = False
+        close_old_connections()
+
+
+def call_with_deadline(func: Callable, *args, **kwargs):
+    """
+    ``func(*args, **kwargs)`` bounded by DEGRADED_DB_DEADLINE seconds.
+
+    Raises DatabaseUnavailable on timeout, on a connection-level database
+    error, or straight away while the breaker is open. Calls nested inside
+    another deadline call run inline.
+    """
+    if not degraded_mode_enabled() or getattr(_in_deadline_thread, 'active', False):
+        return func(*args, **kwargs)
+    if health.is_open():
+        raise DatabaseUnavailable('breaker open')
+
+    future = _get_executor().submit(_run_in_deadline_thread, func, args, kwargs)
+    try:
+        result = future.result(timeout=settings.DEGRADED_DB_DEADLINE)
+    except FutureTimeout:
+        # The query keeps its thread until it returns; nothing waits for it
+        health.record_failure(f"no answer within {settings.DEGRADED_DB_DEADLINE}s")
+        raise DatabaseUnavailable('deadline exceeded')
+    except DB_UNAVAILABLE_ERRORS as e:
+        health.record_failure(f"{type(e).__name__}: {e}")
+        raise DatabaseUnavailable(str(e)) from e
+    health.record_success()
+    return result
+
+
+def _probe():
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+
+
+def ensure_database_responsive():
+    """Raise DatabaseUnavailable unless a deadline-bound query succeeded recently or a probe does now."""
+    if not degraded_mode_enabled():
+        return
+    if health.is_open():
+        raise DatabaseUnavailable('breaker open')
+    if not health.recently_ok():
+        call_with_deadline(_probe)
+
+
+class FallbackPool:
+    """Question payloads grouped by (category name, difficulty label), with local answer checks."""
+
+    def __init__(self, payloads: List[Dict], sources: Dict[str, int]):
+        self.payloads = {payload['id']: payload for payload in payloads}
+        self.sources = sources
+        self.loaded_at = time.monotonic()
+        self.groups: Dict[Tuple[str, str], List[int]] = {}
+        self.category_names: Dict[int, str] = {}
+        for payload in payloads:
+            category, difficulty = payload['category'], payload['difficulty']
+            key = (normalize_label(category['name']), difficulty['label'])
+            self.groups.setdefault(key, []).append(payload['id'])
+            if category.get('id') is not None:
+                self.category_names[category['id']] = key[0]
+
+    def __len__(self):
+        return len(self.payloads)
+
+    def sample(self, category_id: Optional[int] = None, difficulty: Optional[str] = None, count: int = 10):
+        """Up to ``count`` payloads with unique texts and shuffled options; None for an invalid difficulty."""
+        difficulty_label = None
+        if difficulty:
+            difficulty_label = canonicalize_difficulty_label(difficulty)
+            if not difficulty_label:
+                return None
+
+        category_name = None
+        # A pool built without the database knows no category ids: serve any category
+        if category_id and self.category_names:
+            category_name = self.category_names.get(category_id)
+            if category_name is None:
+                return []
+
+        candidates = [
+            question_id
+            for (name, label), question_ids in self.groups.items()
+            if (category_name is None or name == category_name)
+            and (difficulty_label is None or label == difficulty_label)
+            for question_id in question_ids
+        ]
+        random.shuffle(candidates)
+        questions, seen_texts = [], set()
+        for question_id in candidates:
+            payload = self.payloads[question_id]
+            text_key = normalize_question_key(payload['question_text'])
+            if text_key in seen_texts:
+                continue
+            seen_texts.add(text_key)
+            options = list(payload['answer_options'])
+            random.shuffle(options)
+            questions.append({**payload, 'answer_options': options})
+            if len(questions) >= count:
+                break
+        return questions
+
+    def correct_answer(self, question_id: int) -> Optional[str]:
+        payload = self.payloads.get(question_id)
+        return payload['correct_answer'] if payload else None
+
+
+def is_synthetic_question_id(question_id: int) -> bool:
+    return question_id >= SYNTHETIC_ID_BASE
+
+
+def fallback_questions_file() -> Path:
+    return Path(getattr(settings, 'FALLBACK_QUESTIONS_FILE', '') or settings.LEVEL1_SEED_FILE)
+
+
+def _file_entries(per_group: int) -> List[Dict]:
+    """Valid allowed entries from the bundled file, at most ``per_group`` per (category, difficulty)."""
+    allowed_categories = {normalize_label(name): name for name in get_allowed_category_names()}
+    allowed_difficulties = set(get_allowed_difficulty_labels())
+    per_pool: Dict[Tuple[str, str], int] = {}
+    entries = []
+    path = fallback_questions_file()
+    try:
+        for entry in iter_seed_entries(path):
+            if not isinstance(entry, dict):
+                continue
+            category = allowed_categories.get(normalize_label(entry.get('category') or ''))
+            difficulty = canonicalize_difficulty_label(entry.get('difficulty') or '')
+            text = (entry.get('question_text') or '').strip()
+            answer = (entry.get('correct_answer') or '').strip()
+            options = [str(option) for option in entry.get('options') or []]
+            if not category or difficulty not in allowed_difficulties or not text or not answer:
+                continue
+            if not any(normalize_answer_text(option) == normalize_answer_text(answer) for option in options):
+                continue
+            pool = (category, difficulty)
+            if per_pool.get(pool, 0) >= per_group:
+                continue
+            per_pool[pool] = per_pool.get(pool, 0) + 1
+            entries.append({
+                'category': category,
+                'difficulty': difficulty,
+                'question_text': text,
+                'correct_answer': answer,
+                'answer_options': options,
+                'metadata_json': entry.get('metadata') if isinstance(entry.get('metadata'), dict) else {},
+            })
+    except (OSError, ValueError) as e:
+        logger.error(f"Could not read fallback questions from {path}: {e}")
+    return entries
+
+
+def _database_payloads(entries: List[Dict]) -> Tuple[List[Dict], Dict[Tuple[str, str, str], Tuple[int, int, int]]]:
+    """QuestionSerializer payloads of ``is_fallback`` questions, and file entry -> (question, category, difficulty) ids."""
+    from .models import Category, DifficultyLevel, Question
+    from .serializers import QuestionSerializer
+
+    allowed_categories = get_allowed_category_names()
+    payloads = [
+        QuestionSerializer(question).data
+        for question in (
+            Question.objects
+            .filter(is_fallback=True, category_id__in=get_allowed_category_ids())
+            .select_related('category', 'difficulty')
+        )
+    ]
+
+    category_ids = {
+        name: category_id
+        for category_id, name in Category.objects.filter(name__in=allowed_categories).values_list('id', 'name')
+    }
+    difficulty_ids = {}
+    for difficulty_id, label in DifficultyLevel.objects.values_list('id', 'label'):
+        difficulty_ids.setdefault(canonicalize_difficulty_label(label), difficulty_id)
+
+    keys = {}
+    for entry in entries:
+        category_id = category_ids.get(entry['category'])
+        difficulty_id = difficulty_ids.get(entry['difficulty'])
+        if category_id and difficulty_id:
+            keys[question_seed_key(entry['question_text'], category_id, difficulty_id)] = (
+                (entry['category'], entry['difficulty'], entry['question_text']), category_id, difficulty_id,
+            )
+    resolved = {}
+    seed_keys = list(keys)
+    for start in range(0, len(seed_keys), 500):
+        for seed_key, question_id in Question.objects.filter(
+            seed_key__in=seed_keys[start:start + 500]
+        ).values_list('seed_key', 'id'):
+            entry_key, category_id, difficulty_id = keys[seed_key]
+            resolved[entry_key] = (question_id, category_id, difficulty_id)
+    return payloads, resolved
+
+
+def load_fallback_pool(use_database: bool = True) -> FallbackPool:
+    """Build the pool from ``is_fallback`` questions and the bundled file (file only without the database)."""
+    per_group = getattr(settings, 'FALLBACK_POOL_PER_GROUP', 50)
+    entries = _file_entries(per_group)
+    payloads, resolved = [], {}
+    if use_database:
+        try:
+            payloads, resolved = call_with_deadline(_database_payloads, entries)
+        except DatabaseUnavailable as e:
+            logger.warning(f"Fallback pool built from the bundled file only: {e}")
+
+    sources = {'database': len(payloads), 'file': 0}
+    seen_ids = {payload['id'] for payload in payloads}
+    seen_texts = {normalize_question_key(payload['question_text']) for payload in payloads}
+    next_synthetic_id = SYNTHETIC_ID_BASE
+    for entry in entries:
+        text_key = normalize_question_key(entry['question_text'])
+        if text_key in seen_texts:
+            continue
+        # Entries matched to a stored question keep its id, so answers and replayed saves resolve
+        question_id, category_id, difficulty_id = resolved.get(
+            (entry['category'], entry['difficulty'], entry['question_text']), (None, None, None)
+        )
+        if question_id is None or question_id in seen_ids:
+            question_id, next_synthetic_id = next_synthetic_id, next_synthetic_id + 1
+        seen_ids.add(question_id)
+        seen_texts.add(text_key)
+        sources['file'] += 1
+        payloads.append({
+            'id': question_id,
+            'category': {'id': category_id, 'name': entry['category']},
+            'difficulty': {'id': difficulty_id, 'label': entry['difficulty']},
+            'question_text': entry['question_text'],
+            'correct_answer': entry['correct_answer'],
+            'answer_options': entry['answer_options'],
+            'metadata_json': entry['metadata_json'],
+        })
+
+    for payload in payloads:
+        payload['difficulty'] = {
+            **payload['difficulty'],
+            'label': canonicalize_difficulty_label(payload['difficulty']['label']) or payload['difficulty']['label'],
+        }
+    pool = FallbackPool(payloads, sources)
+    logger.info(f"Loaded fallback question pool: {len(pool)} questions ({sources})")
+    return pool
+
+
+_pool: Optional[FallbackPool] = None
+_pool_lock = threading.Lock()
+_refreshing = threading.Event()
+
+
+def warm_fallback_pool() -> FallbackPool:
+    """(Re)load the pool now; called at worker start."""
+    global _pool
+    pool = load_fallback_pool(use_database=not health.is_open())
+    with _pool_lock:
+        _pool = pool
+    return pool
+
+
+def _refresh_in_background():
+    try:
+        warm_fallback_pool()
+    except Exception as e:
+        logger.error(f"Fallback pool refresh failed: {e}", exc_info=True)
+    finally:
+        _refreshing.clear()
+        close_old_connections()
+
+
+def get_fallback_pool() -> FallbackPool:
+    """The loaded pool; built from the file on first use while degraded, refreshed in the background when stale."""
+    with _pool_lock:
+        pool = _pool
+    if pool is None:
+        return warm_fallback_pool()
+    stale = time.monotonic() - pool.loaded_at > getattr(settings, 'FALLBACK_POOL_REFRESH', 600)
+    if stale and not health.is_open() and not _refreshing.is_set():
+        _refreshing.set()
+        threading.Thread(target=_refresh_in_background, name='fallback-pool-refresh', daemon=True).start()
+    return pool
+
+
+class DegradedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that still identifies the user while the database is
+    down: the user lookup is skipped (breaker open) or fails, and a TokenUser
+    built from the token claims is returned instead.
+    """
+
+    def get_user(self, validated_token):
+        if degraded_mode_enabled() and health.is_open():
+            return TokenUser(validated_token)
+        try:
+            return super().get_user(validated_token)
+        except DB_UNAVAILABLE_ERRORS as e:
+            if not degraded_mode_enabled():
+                raise
+            health.record_failure(f"{type(e).__name__}: {e}")
+            return TokenUser(validated_token)
+
+
+def save_spool_path() -> str:
+    return getattr(settings, 'DEGRADED_SAVE_SPOOL', '') or os.path.join(
+        tempfile.gettempdir(), 'letsquiz-degraded-saves.jsonl'
+    )
+
+
+def _lock(handle):
+    if fcntl is not None:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+
+
+def _append_records(records: List[Dict]):
+    path = save_spool_path()
+    lines = ''.join(json.dumps(record, default=str, separators=(',', ':')) + '\n' for record in records)
+    while True:
+        with open(path, 'a', encoding='utf-8') as handle:
+            _lock(handle)
+            # A replay may have renamed the file while we waited for the lock
+            if os.path.exists(path) and os.fstat(handle.fileno()).st_ino == os.stat(path).st_ino:
+                handle.write(lines)
+                handle.flush()
+                os.fsync(handle.fileno())
+                return
+
+
+def queue_quiz_save(user, data: Dict):
+    """Spool a validated quiz save for replay once the database is back."""
+    user_id = getattr(user, 'id', None) if user is not None and user.is_authenticated else None
+    _append_records([{'user_id': user_id, 'data': data, 'received_at': timezone.now().isoformat()}])
+    logger.warning(f"Quiz save queued for replay (user {user_id}); database unavailable")
+
+
+def _replay_request(user_id: Optional[int]):
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.models import AnonymousUser
+
+    user = get_user_model().objects.filter(id=user_id).first() if user_id else None
+    return SimpleNamespace(user=user or AnonymousUser())
+
+
+def _reject(record: Dict, reason: str):
+    """Set aside a save that fails for a reason other than the database being down."""
+    entry = {**record, 'rejected_reason': reason, 'rejected_at': timezone.now().isoformat()}
+    with open(f"{save_spool_path()}.rejected", 'a', encoding='utf-8') as handle:
+        _lock(handle)
+        handle.write(json.dumps(entry, default=str, separators=(',', ':')) + '\n')
+        handle.flush()
+        os.fsync(handle.fileno())
+
+
+def _read_offset(path: str) -> int:
+    try:
+        with open(path, encoding='utf-8') as handle:
+            return int(handle.read().strip() or 0)
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def _write_offset(path: str, offset: int):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as handle:
+        handle.write(str(offset))
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(tmp_path, path)
+
+
+def _replay_record(record: Dict, result: Dict[str, int]):
+    """Replay one spooled save; DB_UNAVAILABLE_ERRORS propagate, anything else is rejected."""
+    from .models import Question
+    from .serializers import QuizSessionSaveSerializer
+
+    try:
+        serializer = QuizSessionSaveSerializer(
+            data=record['data'], context={'request': _replay_request(record.get('user_id'))}
+        )
+        if not serializer.is_valid():
+            logger.error(f"Rejecting queued quiz save from {record.get('received_at')}: {serializer.errors}")
+            _reject(record, json.dumps(serializer.errors, default=str))
+            result['invalid'] += 1
+            return
+        # The save path skips unknown ids, which would leave a session whose score counts
+        # questions it does not hold; synthetic ids only ever existed in the fallback pool
+        question_ids = [question['id'] for question in serializer.validated_data['questions']]
+        stored = set(Question.objects.filter(id__in=question_ids).values_list('id', flat=True))
+        unknown = [question_id for question_id in question_ids if question_id not in stored]
+        if unknown:
+            reason = f"Questions not in the database (fallback pool only or deleted): {unknown}"
+            logger.error(f"Rejecting queued quiz save from {record.get('received_at')}: {reason}")
+            _reject(record, reason)
+            result['rejected'] += 1
+            return
+        # All of a save or none of it, so a failed one can be retried or rejected cleanly
+        with transaction.atomic():
+            serializer.save()
+        result['replayed'] += 1
+    except DB_UNAVAILABLE_ERRORS:
+        raise
+    except Exception as e:
+        logger.error(f"Rejecting queued quiz save from {record.get('received_at')}: {e}", exc_info=True)
+        _reject(record, f"{type(e).__name__}: {e}")
+        result['rejected'] += 1
+
+
+def replay_queued_saves() -> Dict[str, int]:
+    """
+    Replay spooled saves in order. The byte offset of the next record is
+    persisted after each one, so a crash or a database error resumes after the
+    last committed save instead of replaying it again; saves that fail for any
+    other reason go to ``<spool>.rejected`` and the replay moves on.
+    """
+    result = {'replayed': 0, 'invalid': 0, 'rejected': 0, 'pending': 0}
+    path = save_spool_path()
+    claimed = f"{path}.replaying"
+    offset_path = f"{claimed}.offset"
+    with open(f"{path}.lock", 'a') as replay_lock:
+        if fcntl is not None:
+            try:
+                fcntl.flock(replay_lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return result  # Another process is replaying
+        if not os.path.exists(claimed):
+            if not os.path.exists(path):
+                return result
+            # Hold the append lock so no writer is mid-line on the file being claimed
+            with open(path, 'a', encoding='utf-8') as handle:
+                _lock(handle)
+                os.replace(path, claimed)
+            if os.path.exists(offset_path):
+                os.remove(offset_path)  # Left over from a finished file whose removal was interrupted
+
+        offset = _read_offset(offset_path)
+        with open(claimed, 'rb') as handle:
+            handle.seek(offset)
+            for line in iter(handle.readline, b''):
+                try:
+                    record = json.loads(line) if line.strip() else None
+                except ValueError:
+                    # A torn line (crash mid-write) cannot be replayed
+                    _reject({'raw': line.decode('utf-8', 'replace')}, 'Unreadable spool line')
+                    result['invalid'] += 1
+                    record = None
+                if record is not None:
+                    try:
+                        _replay_record(record, result)
+                    except DB_UNAVAILABLE_ERRORS as e:
+                        # Resume from this record next time
+                        health.record_failure(f"{type(e).__name__}: {e}")
+                        result['pending'] = 1 + sum(1 for rest in handle if rest.strip())
+                        break
+                offset += len(line)
+                _write_offset(offset_path, offset)
+        if not result['pending']:
+            os.remove(claimed)
+            if os.path.exists(offset_path):
+                os.remove(offset_path)
+
+    if any(result.values()):
+        logger.info(f"Replayed queued quiz saves: {result}")
+    return result
+
+
+_last_replay_check = 0.0
+
+
+def _replay_in_background():
+    try:
+        replay_queued_saves()
+    except Exception as e:
+        logger.error(f"Replaying queued quiz saves failed: {e}", exc_info=True)
+    finally:
+        close_old_connections()
+
+
+def maybe_replay_saves():
+    """Start a background replay at most every DEGRADED_REPLAY_INTERVAL seconds when saves are queued."""
+    global _last_replay_check
+    now = time.monotonic()
+    if now - _last_replay_check < getattr(settings, 'DEGRADED_REPLAY_INTERVAL', 30):
+        return
+    _last_replay_check = now
+    path = save_spool_path()
+    if os.path.exists(path) or os.path.exists(f"{path}.replaying"):
+        threading.Thread(target=_replay_in_background, name='degraded-save-replay', daemon=True).start()
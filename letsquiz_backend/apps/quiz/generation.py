@@ -0,0 +1,372 @@
+"""
+Question-generation pipeline for LLMGenerationTask.
+
+1. ``check_pool_depths`` counts playable questions per allowed (category,
+   difficulty) with one grouped query and enqueues a Pending task for every
+   pool below ``GENERATION_POOL_MIN`` that has no open task yet.
+2. ``claim_generation_tasks`` marks due Pending tasks Running, at most
+   ``GENERATION_MAX_CONCURRENCY`` Running at once. A claim is a conditional
+   UPDATE, so concurrent dispatchers never run a task twice. Tasks left
+   Running past ``GENERATION_TASK_TIMEOUT`` (a dead worker) count as a failed
+   attempt.
+3. ``run_generation_task`` asks the configured generator for one batch,
+   validates the entries, drops exact duplicates (seed key) and near
+   duplicates (near_duplicates.py) of the bank and of each other, and
+   bulk-inserts the rest as ``is_generated`` questions. A failed attempt is
+   retried with exponential backoff until ``GENERATION_MAX_RETRIES``.
+
+The generator is the dotted path in ``QUESTION_GENERATOR`` (empty disables the
+pipeline). ``StubQuestionGenerator`` is deterministic and offline, so the whole
+pipeline runs without network access. Celery beat drives steps 1-2 (tasks.py),
+and a quiz request short of questions queues an extra step 1 on a worker;
+``manage.py generate_questions`` runs them in-process.
+"""
+import abc
+import logging
+import random
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from core.redis_utils import cache_get, cache_set
+
+from .cache_utils import deferred_question_invalidation, invalidate_question_data
+from .level1_config import (
+    canonicalize_difficulty_label,
+    get_allowed_category_names,
+    get_allowed_difficulty_labels,
+    playable_question_q,
+)
+from .models import Category, DifficultyLevel, LLMGenerationTask, Question
+from .near_duplicates import NearDuplicateIndex, find_near_duplicate, remember_question
+from .seed_io import question_content_hash, question_seed_key
+from .serializers import normalize_answer_text
+
+logger = logging.getLogger(__name__)
+
+OPEN_STATUSES = ('Pending', 'Running')
+
+REFILL_QUEUED_KEY = "generation:refill_queued"
+REFILL_DEBOUNCE = 60
+MAX_FAILED_COOLDOWN = timedelta(days=1)
+
+
+class GenerationError(Exception):
+    """A generator could not produce a batch; the task is retried with backoff."""
+
+
+class QuestionGenerator(abc.ABC):
+    """
+    Produces candidate questions for one (category, difficulty).
+
+    ``generate`` returns dicts with ``question_text``, ``correct_answer``,
+    ``options`` and optional ``metadata`` (the seed file entry shape). Any
+    exception, preferably GenerationError, fails the attempt and is retried.
+    """
+    name = 'base'
+
+    @abc.abstractmethod
+    def generate(self, category: str, difficulty: str, count: int, seed: str) -> List[Dict]:
+        """Up to ``count`` candidate questions; the same ``seed`` should give the same batch."""
+
+
+class StubQuestionGenerator(QuestionGenerator):
+    """Deterministic offline generator: the same seed always yields the same questions."""
+    name = 'stub'
+
+    _SYLLABLES = ('ka', 'lo', 'mi', 'ten', 'ra', 'vos', 'du', 'pel', 'zan', 'or', 'ith', 'bu', 'ser', 'nol', 'tri')
+    _TEMPLATES = (
+        'In {category}, what is the {0} {1} of {2}?',
+        'Which {1} of {2} is the most {0}?',
+        'Who first described the {0} {1} found in {2}?',
+    )
+
+    def _word(self, rng: random.Random) -> str:
+        return ''.join(rng.choice(self._SYLLABLES) for _ in range(rng.randint(3, 4)))
+
+    def generate(self, category: str, difficulty: str, count: int, seed: str) -> List[Dict]:
+        rng = random.Random(f"{category}|{difficulty}|{seed}")
+        questions = []
+        for _ in range(count):
+            words = [self._word(rng) for _ in range(3)]
+            answers = [self._word(rng).capitalize() for _ in range(4)]
+            questions.append({
+                'question_text': rng.choice(self._TEMPLATES).format(*words, category=category),
+                'correct_answer': answers[0],
+                'options': rng.sample(answers, len(answers)),
+                'metadata': {'stub': True},
+            })
+        return questions
+
+
+_generator: Optional[QuestionGenerator] = None
+_generator_path = None
+
+
+def get_generator() -> Optional[QuestionGenerator]:
+    """The configured generator instance, or None when generation is disabled."""
+    global _generator, _generator_path
+    path = getattr(settings, 'QUESTION_GENERATOR', '')
+    if not path:
+        return None
+    if _generator is None or _generator_path != path:
+        _generator = import_string(path)()
+        _generator_path = path
+    return _generator
+
+
+def check_pool_depths() -> List[LLMGenerationTask]:
+    """
+    Enqueue a generation task for every allowed pool below GENERATION_POOL_MIN
+    without an open one or a recent failure (see ``_cooling_down_pools``).
+    """
+    if get_generator() is None:
+        return []
+    pool_min = settings.GENERATION_POOL_MIN
+    batch_size = settings.GENERATION_BATCH_SIZE
+
+    categories = list(Category.objects.filter(name__in=get_allowed_category_names()))
+    difficulties = list(DifficultyLevel.objects.filter(label__in=get_allowed_difficulty_labels()))
+    depths = {
+        (row['category_id'], row['difficulty_id']): row['questions']
+        for row in (
+            Question.objects.filter(playable_question_q(), category__in=categories, difficulty__in=difficulties)
+            .values('category_id', 'difficulty_id')
+            .annotate(questions=Count('id'))
+        )
+    }
+    open_pools = set(
+        LLMGenerationTask.objects.filter(status__in=OPEN_STATUSES).values_list('category_id', 'difficulty_id')
+    )
+    open_pools |= _cooling_down_pools()
+
+    tasks = []
+    for category in categories:
+        for difficulty in difficulties:
+            pool = (category.id, difficulty.id)
+            depth = depths.get(pool, 0)
+            if depth >= pool_min or pool in open_pools:
+                continue
+            tasks.append(LLMGenerationTask(
+                category=category,
+                difficulty=difficulty,
+                requested_count=min(batch_size, pool_min - depth),
+            ))
+    if tasks:
+        LLMGenerationTask.objects.bulk_create(tasks)
+        logger.info(f"Enqueued {len(tasks)} question generation tasks for low pools")
+    return tasks
+
+
+def _cooling_down_pools() -> set:
+    """
+    Pools whose last task ended Failed less than GENERATION_FAILED_COOLDOWN ago,
+    the cooldown doubling for each Failed task of the pool in the last day, so
+    a pool the generator keeps failing on is not retried every beat.
+    """
+    now = timezone.now()
+    cooling = set()
+    for row in (
+        LLMGenerationTask.objects
+        .filter(status='Failed', completed_at__gte=now - MAX_FAILED_COOLDOWN)
+        .values('category_id', 'difficulty_id')
+        .annotate(failures=Count('id'), last_failed_at=Max('completed_at'))
+    ):
+        cooldown = timedelta(seconds=settings.GENERATION_FAILED_COOLDOWN * 2 ** min(row['failures'] - 1, 16))
+        if now < row['last_failed_at'] + min(cooldown, MAX_FAILED_COOLDOWN):
+            cooling.add((row['category_id'], row['difficulty_id']))
+    return cooling
+
+
+def request_pool_refill():
+    """
+    A session could not be started for lack of questions: check pool depths in
+    the background (best-effort; one request per REFILL_DEBOUNCE seconds does).
+    With a broker a worker checks and the beat dispatcher generates; without
+    one this process checks and runs the generation tasks itself.
+    """
+    if get_generator() is None or cache_get(REFILL_QUEUED_KEY):
+        return
+    from .background import run_in_background
+    from .tasks import check_question_pools
+
+    cache_set(REFILL_QUEUED_KEY, True, timeout=REFILL_DEBOUNCE)
+    run_in_background(check_question_pools, _refill_pools_here, 'generation-refill')
+
+
+def _refill_pools_here():
+    if check_pool_depths():
+        run_pending_generation_tasks()
+
+
+def _backoff(retry_count: int) -> timedelta:
+    base = settings.GENERATION_RETRY_BACKOFF
+    return timedelta(seconds=min(base * 2 ** max(0, retry_count - 1), 3600))
+
+
+def _record_failure(task: LLMGenerationTask, error: str):
+    task.retry_count += 1
+    task.started_at = None
+    if task.retry_count >= settings.GENERATION_MAX_RETRIES:
+        task.status = 'Failed'
+        task.completed_at = timezone.now()
+        task.next_attempt_at = None
+    else:
+        task.status = 'Pending'
+        task.next_attempt_at = timezone.now() + _backoff(task.retry_count)
+    task.task_result = {'error': error, 'attempts': task.retry_count}
+    task.save(update_fields=['retry_count', 'status', 'started_at', 'completed_at', 'next_attempt_at', 'task_result'])
+    logger.warning(
+        f"Generation task {task.id} failed (attempt {task.retry_count}, now {task.status}): {error}"
+    )
+
+
+def _requeue_stale_tasks():
+    cutoff = timezone.now() - timedelta(seconds=settings.GENERATION_TASK_TIMEOUT)
+    for task in LLMGenerationTask.objects.filter(status='Running', started_at__lt=cutoff):
+        _record_failure(task, 'Timed out while running')
+
+
+def claim_generation_tasks() -> List[int]:
+    """Mark due Pending tasks Running, keeping at most GENERATION_MAX_CONCURRENCY running."""
+    _requeue_stale_tasks()
+    slots = settings.GENERATION_MAX_CONCURRENCY - LLMGenerationTask.objects.filter(status='Running').count()
+    if slots <= 0:
+        return []
+
+    now = timezone.now()
+    due = (
+        LLMGenerationTask.objects
+        .filter(status='Pending')
+        .exclude(next_attempt_at__gt=now)
+        .order_by('triggered_at', 'id')
+        .values_list('id', flat=True)[:slots]
+    )
+    claimed = []
+    for task_id in due:
+        # Conditional update: a concurrent dispatcher that got there first updates nothing
+        if LLMGenerationTask.objects.filter(id=task_id, status='Pending').update(status='Running', started_at=now):
+            claimed.append(task_id)
+    return claimed
+
+
+def _normalize_generated(entry) -> Optional[Dict]:
+    if not isinstance(entry, dict):
+        return None
+    question_text = (entry.get('question_text') or '').strip()
+    correct_answer = (entry.get('correct_answer') or '').strip()
+    options = entry.get('options') or []
+    metadata = entry.get('metadata') if isinstance(entry.get('metadata'), dict) else {}
+    if not question_text or not correct_answer or len(correct_answer) > 255 or not isinstance(options, list):
+        return None
+    options = [str(option).strip() for option in options if str(option).strip()]
+    if not any(normalize_answer_text(option) == normalize_answer_text(correct_answer) for option in options):
+        return None
+    return {
+        'question_text': question_text,
+        'correct_answer': correct_answer,
+        'answer_options': options,
+        'metadata_json': metadata,
+    }
+
+
+def run_generation_task(task_id: int) -> Dict:
+    """Generate, dedupe and insert one batch for a claimed (Running) task."""
+    task = LLMGenerationTask.objects.select_related('category', 'difficulty').get(id=task_id)
+    if task.status != 'Running':
+        return {'skipped': task.status}
+
+    generator = get_generator()
+    if generator is None:
+        _record_failure(task, 'Question generation is disabled (QUESTION_GENERATOR is empty)')
+        return task.task_result
+
+    category, difficulty = task.category, task.difficulty
+    difficulty_label = canonicalize_difficulty_label(difficulty.label) or difficulty.label
+    try:
+        entries = generator.generate(
+            category.name,
+            difficulty_label,
+            task.requested_count or settings.GENERATION_BATCH_SIZE,
+            seed=f"{task.id}:{task.retry_count}",
+        )
+    except Exception as e:
+        _record_failure(task, f"{type(e).__name__}: {e}")
+        return task.task_result
+
+    result = {'generator': generator.name, 'generated': len(entries), 'invalid': 0, 'duplicates': 0, 'near_duplicates': 0}
+    candidates = []
+    for entry in entries:
+        fields = _normalize_generated(entry)
+        if fields is None:
+            result['invalid'] += 1
+            continue
+        candidates.append((question_seed_key(fields['question_text'], category.id, difficulty.id), fields))
+
+    existing_keys = set(
+        Question.objects.filter(seed_key__in=[seed_key for seed_key, _ in candidates]).values_list('seed_key', flat=True)
+    )
+    batch_index = NearDuplicateIndex(settings.NEAR_DUPLICATE_THRESHOLD)
+    accepted = []
+    for seed_key, fields in candidates:
+        if seed_key in existing_keys:
+            result['duplicates'] += 1
+            continue
+        text, answer = fields['question_text'], fields['correct_answer']
+        if find_near_duplicate(text, answer, category.id) or batch_index.find(text, answer):
+            result['near_duplicates'] += 1
+            continue
+        existing_keys.add(seed_key)
+        batch_index.add(len(accepted), text, answer)
+        fields['metadata_json'] = {
+            **fields['metadata_json'],
+            'source': 'generated',
+            'generator': generator.name,
+            'generation_task': task.id,
+        }
+        accepted.append(Question(
+            category=category,
+            difficulty=difficulty,
+            is_generated=True,
+            seed_key=seed_key,
+            content_hash=question_content_hash(seed_key, answer, fields['answer_options'], fields['metadata_json']),
+            **fields,
+        ))
+
+    with deferred_question_invalidation():
+        with transaction.atomic():
+            created = Question.objects.bulk_create(accepted)
+            result['accepted'] = len(created)
+            result['question_ids'] = [question.pk for question in created if question.pk]
+            task.status = 'Success'
+            task.completed_at = timezone.now()
+            task.next_attempt_at = None
+            task.task_result = result
+            task.save(update_fields=['status', 'completed_at', 'next_attempt_at', 'task_result'])
+        if created:
+            # bulk_create sends no signals
+            invalidate_question_data(category.id)
+
+    for question in created:
+        if question.pk:
+            remember_question(question)
+    logger.info(
+        f"Generation task {task.id} ({category.name}/{difficulty.label}): "
+        f"{result['accepted']} of {result['generated']} questions accepted"
+    )
+    return result
+
+
+def run_pending_generation_tasks() -> List[Dict]:
+    """Claim and run due tasks in this process (management command / tests)."""
+    results = []
+    while True:
+        claimed = claim_generation_tasks()
+        if not claimed:
+            return results
+        results.extend(run_generation_task(task_id) for task_id in claimed)
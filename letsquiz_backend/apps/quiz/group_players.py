@@ -0,0 +1,72 @@
+"""
+Linking group players to registered users.
+
+Group players are entered by name; when a name is a registered user's email
+the player row gets ``user`` set so profile queries can use the indexed FK
+instead of matching names across the whole GroupPlayer table.
+"""
+import logging
+from typing import Dict, Iterable, Optional
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from .models import GroupPlayer
+
+logger = logging.getLogger(__name__)
+
+
+def resolve_player_user_ids(names: Iterable[str], user_model=None) -> Dict[str, int]:
+    """Map player names that are registered emails to user ids with one query."""
+    user_model = user_model or get_user_model()
+    names = {name for name in names if name and '@' in name}
+    if not names:
+        return {}
+    return dict(user_model.objects.filter(email__in=names).values_list('email', 'id'))
+
+
+def link_players(players: Iterable[GroupPlayer]):
+    """Set ``user_id`` on unsaved player instances whose names match a user's email."""
+    players = list(players)
+    user_ids = resolve_player_user_ids(player.name for player in players)
+    for player in players:
+        player.user_id = user_ids.get(player.name)
+    return players
+
+
+def backfill_group_player_users(batch_size: int = 1000, dry_run: bool = False, models: Optional[Dict] = None) -> int:
+    """
+    Link existing unlinked group players to users, walking the table in
+    primary-key batches. ``models`` lets data migrations pass historical
+    models. Returns the number of players linked (or linkable, on dry run).
+    """
+    player_model = (models or {}).get('GroupPlayer', GroupPlayer)
+    user_model = (models or {}).get('User') or get_user_model()
+
+    linked = 0
+    last_id = 0
+    while True:
+        batch = list(
+            player_model.objects
+            .filter(user__isnull=True, id__gt=last_id)
+            .order_by('id')
+            .values_list('id', 'name')[:batch_size]
+        )
+        if not batch:
+            break
+        last_id = batch[-1][0]
+
+        user_ids = resolve_player_user_ids((name for _, name in batch), user_model=user_model)
+        by_user = {}
+        for player_id, name in batch:
+            if name in user_ids:
+                by_user.setdefault(user_ids[name], []).append(player_id)
+
+        if not dry_run:
+            with transaction.atomic():
+                for user_id, player_ids in by_user.items():
+                    player_model.objects.filter(id__in=player_ids).update(user_id=user_id)
+        linked += sum(len(player_ids) for player_ids in by_user.values())
+
+    logger.info(f"{'Found' if dry_run else 'Linked'} {linked} group players to user accounts")
+    return linked
@@ -0,0 +1,106 @@
+"""
+Streaming export of a user's complete quiz history as NDJSON.
+
+Sessions, their questions and their group players are read with three
+ordered ``.iterator()`` queries (server-side cursors on PostgreSQL) and
+merged by session id, so memory stays bounded by one session regardless of
+how much history the user has. Each output line is one session with its
+questions and players nested.
+"""
+import json
+from itertools import groupby
+from typing import Dict, Iterator, List
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import GroupPlayer, QuizSession, QuizSessionQuestion
+
+EXPORT_CHUNK_SIZE = 1000
+
+
+def _grouped_by_session(rows: Iterator[Dict]) -> Iterator:
+    """Yield (session_id, [rows]) from rows ordered by quiz_session_id."""
+    for session_id, group in groupby(rows, key=lambda row: row.pop('quiz_session_id')):
+        yield session_id, list(group)
+
+
+class _SessionRows:
+    """Forward-only cursor over grouped child rows, advanced in step with sessions."""
+
+    def __init__(self, rows: Iterator[Dict]):
+        self._groups = _grouped_by_session(rows)
+        self._current = next(self._groups, None)
+
+    def take(self, session_id: int) -> List[Dict]:
+        # Skip groups for sessions not in the export (cannot happen with matching filters)
+        while self._current is not None and self._current[0] < session_id:
+            self._current = next(self._groups, None)
+        if self._current is not None and self._current[0] == session_id:
+            rows = self._current[1]
+            self._current = next(self._groups, None)
+            return rows
+        return []
+
+
+def iter_user_history(user_id: int, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[Dict]:
+    """Yield one dict per session owned by the user, oldest first, with nested questions/players."""
+    sessions = (
+        QuizSession.objects
+        .filter(user_id=user_id)
+        .order_by('id')
+        .values(
+            'id', 'started_at', 'completed_at', 'score', 'is_group_session',
+            'category__name', 'difficulty__label',
+        )
+        .iterator(chunk_size=chunk_size)
+    )
+    questions = _SessionRows(
+        QuizSessionQuestion.objects
+        .filter(quiz_session__user_id=user_id)
+        .order_by('quiz_session_id', 'id')
+        .values(
+            'quiz_session_id', 'question_id', 'question__question_text',
+            'question__category__name', 'question__difficulty__label', 'question__correct_answer',
+            'selected_answer', 'is_correct', 'answered_at',
+        )
+        .iterator(chunk_size=chunk_size)
+    )
+    players = _SessionRows(
+        GroupPlayer.objects
+        .filter(quiz_session__user_id=user_id)
+        .order_by('quiz_session_id', 'id')
+        .values('quiz_session_id', 'name', 'score', 'answers', 'correct_answers', 'errors')
+        .iterator(chunk_size=chunk_size)
+    )
+
+    for session in sessions:
+        session_id = session['id']
+        yield {
+            'session_id': session_id,
+            'started_at': session['started_at'],
+            'completed_at': session['completed_at'],
+            'score': session['score'],
+            'is_group_session': session['is_group_session'],
+            'category': session['category__name'],
+            'difficulty': session['difficulty__label'],
+            'questions': [
+                {
+                    'question_id': row['question_id'],
+                    'question': row['question__question_text'],
+                    'category': row['question__category__name'],
+                    'difficulty': row['question__difficulty__label'],
+                    'correct_answer': row['question__correct_answer'],
+                    'selected_answer': row['selected_answer'],
+                    'is_correct': row['is_correct'],
+                    'answered_at': row['answered_at'],
+                }
+                for row in questions.take(session_id)
+            ],
+            'group_players': players.take(session_id) if session['is_group_session'] else None,
+        }
+
+
+def iter_user_history_ndjson(user_id: int, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[str]:
+    """Yield the export as NDJSON lines (each terminated by a newline)."""
+    for record in iter_user_history(user_id, chunk_size=chunk_size):
+        yield json.dumps(record, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
@@ -0,0 +1,96 @@
+import logging
+
+from django.db import DatabaseError
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser
+
+from core.cache_metrics import get_aggregated_stats
+
+from .bulk_questions import BulkQuestionError, apply_bulk_question_changes, new_bulk_report
+from .question_stats import question_difficulty_report
+from .serializers import BulkQuestionChangesSerializer
+
+logger = logging.getLogger(__name__)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def cache_stats_view(request):
+    """Internal endpoint exposing cache hit/miss/latency counters aggregated across workers."""
+    include_workers = request.query_params.get('workers') in ('1', 'true')
+    return Response(get_aggregated_stats(include_workers=include_workers), status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def question_difficulty_report_view(request):
+    """
+    Internal endpoint listing questions by global correct rate for content editors.
+    Query params: ``order`` (hardest|easiest), ``min_attempts``, ``limit``, ``category``.
+    """
+    order = request.query_params.get('order', 'hardest')
+    if order not in ('hardest', 'easiest'):
+        return Response({
+            'error': 'order must be "hardest" or "easiest".',
+            'code': 'validation_error'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        min_attempts = int(request.query_params.get('min_attempts', 20))
+        limit = min(int(request.query_params.get('limit', 20)), 200)
+        category = request.query_params.get('category')
+        category_id = int(category) if category else None
+    except ValueError:
+        return Response({
+            'error': 'min_attempts, limit and category must be integers.',
+            'code': 'validation_error'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({
+        'order': order,
+        'min_attempts': min_attempts,
+        'questions': question_difficulty_report(order=order, min_attempts=min_attempts, limit=limit, category_id=category_id),
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def bulk_question_changes_view(request):
+    """
+    Internal endpoint for content editors: bulk upsert, re-categorize and delete questions.
+    Body: ``upsert`` (entries, with ``id`` to update), ``recategorize``
+    (``[{"question_ids": [...], "category_id": n}]``), ``delete`` (ids), optional ``batch_size``.
+    Question caches are invalidated once per request, after the last batch commits.
+    """
+    serializer = BulkQuestionChangesSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response({
+            'error': 'Invalid bulk question changes.',
+            'code': 'validation_error',
+            'details': serializer.errors,
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    data = serializer.validated_data
+    report = new_bulk_report()
+    try:
+        apply_bulk_question_changes(
+            upserts=data.get('upsert', []),
+            moves=data.get('recategorize', []),
+            delete_ids=data.get('delete', []),
+            batch_size=data.get('batch_size'),
+            user=request.user,
+            report=report,
+        )
+    except BulkQuestionError as e:
+        return Response({'error': str(e), 'code': 'validation_error'}, status=status.HTTP_400_BAD_REQUEST)
+    except DatabaseError as e:
+        # Batches committed before the failure stay applied (and invalidated); the report lists them
+        logger.error(f"Bulk question changes failed after {len(report['batches'])} batches: {e}", exc_info=True)
+        return Response({
+            'error': 'A batch failed; earlier batches were applied.',
+            'code': 'bulk_apply_failed',
+            'report': report,
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    return Response(report, status=status.HTTP_200_OK)
@@ -0,0 +1,439 @@
+"""
+Leaderboards keyed by category, difficulty and time window.
+
+Each completed solo session adds its score to the user's entry on every board
+it belongs to: {its category, all categories} x {its difficulty, all
+difficulties} x {daily, weekly, all-time}. Boards live in Redis sorted sets
+(ZINCRBY / ZREVRANGE / ZREVRANK) when Redis is enabled. Otherwise each process
+keeps them in an indexable skiplist, loaded from the database on first use
+and refreshed every ``LEADERBOARD_LOCAL_REFRESH`` seconds so gunicorn workers
+converge on pushes made by their siblings. Top-N and rank lookups are
+O(log n) in both backends.
+"""
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from core.redis_utils import get_redis_client
+
+from .models import QuizSession
+
+logger = logging.getLogger(__name__)
+
+LEADERBOARD_WINDOWS = ('daily', 'weekly', 'all')
+DEFAULT_LEADERBOARD_SIZE = 10
+MAX_LEADERBOARD_SIZE = 100
+
+# Redis TTLs so finished daily/weekly boards age out on their own
+WINDOW_TTLS = {
+    'daily': 2 * 24 * 60 * 60,
+    'weekly': 8 * 24 * 60 * 60,
+    'all': None,
+}
+
+
+def board_period(window: str, when: Optional[datetime] = None) -> str:
+    """Period id of the board covering ``when`` (UTC day, ISO week, or 'all')."""
+    day = timezone.localtime(when or timezone.now(), dt_timezone.utc).date()
+    if window == 'daily':
+        return day.strftime('%Y%m%d')
+    if window == 'weekly':
+        year, week, _ = day.isocalendar()
+        return f"{year}W{week:02d}"
+    return 'all'
+
+
+def window_start(window: str, when: Optional[datetime] = None) -> Optional[datetime]:
+    """Inclusive UTC start of the period covering ``when``; None for all-time."""
+    if window == 'all':
+        return None
+    day = timezone.localtime(when or timezone.now(), dt_timezone.utc).date()
+    if window == 'weekly':
+        day -= timedelta(days=day.weekday())
+    return datetime(day.year, day.month, day.day, tzinfo=dt_timezone.utc)
+
+
+def board_key(window: str, period: str, category_id: Optional[int] = None, difficulty_id: Optional[int] = None) -> str:
+    return f"leaderboard:{window}:{period}:c{category_id or 'all'}:d{difficulty_id or 'all'}"
+
+
+def parse_board_key(key: str) -> Tuple[str, str, Optional[int], Optional[int]]:
+    _, window, period, category, difficulty = key.split(':')
+    category_id = None if category == 'call' else int(category[1:])
+    difficulty_id = None if difficulty == 'dall' else int(difficulty[1:])
+    return window, period, category_id, difficulty_id
+
+
+def session_board_keys(quiz_session: QuizSession) -> List[str]:
+    """Every board a completed session contributes to."""
+    keys = []
+    for window in LEADERBOARD_WINDOWS:
+        period = board_period(window, quiz_session.completed_at)
+        for category_id in {quiz_session.category_id, None}:
+            for difficulty_id in {quiz_session.difficulty_id, None}:
+                keys.append(board_key(window, period, category_id, difficulty_id))
+    return keys
+
+
+class _SkiplistNode:
+    __slots__ = ('key', 'next', 'span')
+
+    def __init__(self, key, level: int):
+        self.key = key
+        self.next = [None] * level
+        self.span = [0] * level
+
+
+class IndexableSkiplist:
+    """
+    Ordered set with O(log n) insert, remove, rank and rank-to-key lookups
+    (each forward link stores how many nodes it skips, as in Redis' zskiplist).
+    """
+    MAX_LEVEL = 32
+    P = 0.25
+
+    def __init__(self):
+        self._head = _SkiplistNode(None, self.MAX_LEVEL)
+        self._level = 1
+        self._length = 0
+
+    def __len__(self):
+        return self._length
+
+    def _random_level(self) -> int:
+        level = 1
+        while level < self.MAX_LEVEL and random.random() < self.P:
+            level += 1
+        return level
+
+    def insert(self, key):
+        update = [None] * self.MAX_LEVEL
+        rank = [0] * self.MAX_LEVEL
+        node = self._head
+        for i in reversed(range(self._level)):
+            rank[i] = rank[i + 1] if i + 1 < self._level else 0
+            while node.next[i] is not None and node.next[i].key < key:
+                rank[i] += node.span[i]
+                node = node.next[i]
+            update[i] = node
+
+        level = self._random_level()
+        if level > self._level:
+            for i in range(self._level, level):
+                rank[i] = 0
+                update[i] = self._head
+                self._head.span[i] = self._length
+            self._level = level
+
+        new = _SkiplistNode(key, level)
+        for i in range(level):
+            new.next[i] = update[i].next[i]
+            update[i].next[i] = new
+            new.span[i] = update[i].span[i] - (rank[0] - rank[i])
+            update[i].span[i] = (rank[0] - rank[i]) + 1
+        for i in range(level, self._level):
+            update[i].span[i] += 1
+        self._length += 1
+
+    def remove(self, key) -> bool:
+        update = [None] * self.MAX_LEVEL
+        node = self._head
+        for i in reversed(range(self._level)):
+            while node.next[i] is not None and node.next[i].key < key:
+                node = node.next[i]
+            update[i] = node
+
+        target = node.next[0]
+        if target is None or target.key != key:
+            return False
+        for i in range(self._level):
+            if update[i].next[i] is target:
+                update[i].span[i] += target.span[i] - 1
+                update[i].next[i] = target.next[i]
+            else:
+                update[i].span[i] -= 1
+        while self._level > 1 and self._head.next[self._level - 1] is None:
+            self._level -= 1
+        self._length -= 1
+        return True
+
+    def rank(self, key) -> Optional[int]:
+        """1-based position of ``key``, or None if absent."""
+        traversed = 0
+        node = self._head
+        for i in reversed(range(self._level)):
+            while node.next[i] is not None and node.next[i].key <= key:
+                traversed += node.span[i]
+                node = node.next[i]
+        if node is not self._head and node.key == key:
+            return traversed
+        return None
+
+    def slice(self, start: int, count: int) -> List:
+        """Keys at 0-based positions [start, start + count)."""
+        if start >= self._length or count <= 0:
+            return []
+        traversed = 0
+        node = self._head
+        target = start + 1
+        for i in reversed(range(self._level)):
+            while node.next[i] is not None and traversed + node.span[i] <= target:
+                traversed += node.span[i]
+                node = node.next[i]
+        keys = []
+        while node is not None and len(keys) < count:
+            keys.append(node.key)
+            node = node.next[0]
+        return keys
+
+
+class _LocalBoard:
+    """One board: member -> score plus a skiplist ordered by (-score, member)."""
+
+    def __init__(self, scores: Dict[int, float]):
+        self.loaded_at = time.monotonic()
+        self.scores: Dict[int, float] = {}
+        self.order = IndexableSkiplist()
+        for member, score in scores.items():
+            self.incr(member, score)
+
+    def incr(self, member: int, delta: float):
+        old = self.scores.get(member)
+        if old is not None:
+            self.order.remove((-old, member))
+        score = (old or 0) + delta
+        self.scores[member] = score
+        self.order.insert((-score, member))
+
+    def top(self, limit: int) -> List[Tuple[int, float]]:
+        return [(member, -negative) for negative, member in self.order.slice(0, limit)]
+
+    def rank(self, member: int) -> Optional[Tuple[int, float]]:
+        score = self.scores.get(member)
+        if score is None:
+            return None
+        return self.order.rank((-score, member)), score
+
+
+class LocalLeaderboardStore:
+    """Per-process boards used when Redis is disabled."""
+
+    def __init__(self):
+        self._boards: Dict[str, _LocalBoard] = {}
+        self._lock = threading.Lock()
+
+    def _refresh_interval(self) -> float:
+        return getattr(settings, 'LEADERBOARD_LOCAL_REFRESH', 60)
+
+    def _board(self, key: str) -> _LocalBoard:
+        with self._lock:
+            board = self._boards.get(key)
+        if board is None or time.monotonic() - board.loaded_at >= self._refresh_interval():
+            board = _LocalBoard(load_board_scores(*parse_board_key(key)))
+            with self._lock:
+                self._boards[key] = board
+        return board
+
+    def incr(self, keys: List[str], member: int, delta: float):
+        with self._lock:
+            # Boards not loaded yet will read this session from the database
+            for key in keys:
+                board = self._boards.get(key)
+                if board is not None:
+                    board.incr(member, delta)
+
+    def top(self, key: str, limit: int) -> List[Tuple[int, float]]:
+        board = self._board(key)
+        with self._lock:
+            return board.top(limit)
+
+    def rank(self, key: str, member: int) -> Optional[Tuple[int, float]]:
+        board = self._board(key)
+        with self._lock:
+            return board.rank(member)
+
+    def replace(self, prefix: str, boards: Dict[str, Dict[int, float]]):
+        fresh = {key: _LocalBoard(scores) for key, scores in boards.items()}
+        with self._lock:
+            for key in [key for key in self._boards if key.startswith(prefix)]:
+                del self._boards[key]
+            self._boards.update(fresh)
+
+    def clear(self):
+        with self._lock:
+            self._boards = {}
+
+
+class RedisLeaderboardStore:
+    """Boards as Redis sorted sets."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def incr(self, keys: List[str], member: int, delta: float):
+        pipe = self.client.pipeline(transaction=False)
+        for key in keys:
+            pipe.zincrby(key, delta, member)
+            ttl = WINDOW_TTLS[parse_board_key(key)[0]]
+            if ttl:
+                pipe.expire(key, ttl)
+        pipe.execute()
+
+    def top(self, key: str, limit: int) -> List[Tuple[int, float]]:
+        return [(int(member), score) for member, score in self.client.zrevrange(key, 0, limit - 1, withscores=True)]
+
+    def rank(self, key: str, member: int) -> Optional[Tuple[int, float]]:
+        pipe = self.client.pipeline(transaction=False)
+        pipe.zrevrank(key, member)
+        pipe.zscore(key, member)
+        rank, score = pipe.execute()
+        if rank is None:
+            return None
+        return rank + 1, score
+
+    def replace(self, prefix: str, boards: Dict[str, Dict[int, float]]):
+        # Build each board under a temporary key and swap it in atomically
+        pipe = self.client.pipeline(transaction=False)
+        for key in self.client.scan_iter(f"{prefix}*"):
+            if key not in boards:
+                pipe.delete(key)
+        for key, scores in boards.items():
+            if not scores:
+                pipe.delete(key)
+                continue
+            tmp_key = f"{key}:rebuild"
+            pipe.delete(tmp_key)
+            pipe.zadd(tmp_key, scores)
+            ttl = WINDOW_TTLS[parse_board_key(key)[0]]
+            if ttl:
+                pipe.expire(tmp_key, ttl)
+            pipe.rename(tmp_key, key)
+        pipe.execute()
+
+
+_local_store = LocalLeaderboardStore()
+
+
+def get_store():
+    client = get_redis_client()
+    if client is not None:
+        return RedisLeaderboardStore(client)
+    return _local_store
+
+
+def _eligible_sessions():
+    return QuizSession.objects.filter(user__isnull=False, is_group_session=False, completed_at__isnull=False)
+
+
+def load_board_scores(window: str, period: str, category_id: Optional[int], difficulty_id: Optional[int]) -> Dict[int, float]:
+    """Scores of one board computed from the database (fallback loads)."""
+    sessions = _eligible_sessions()
+    if window != 'all':
+        if window == 'daily':
+            start = datetime.strptime(period, '%Y%m%d').replace(tzinfo=dt_timezone.utc)
+            end = start + timedelta(days=1)
+        else:
+            year, week = period.split('W')
+            start = datetime.fromisocalendar(int(year), int(week), 1).replace(tzinfo=dt_timezone.utc)
+            end = start + timedelta(days=7)
+        sessions = sessions.filter(completed_at__gte=start, completed_at__lt=end)
+    if category_id:
+        sessions = sessions.filter(category_id=category_id)
+    if difficulty_id:
+        sessions = sessions.filter(difficulty_id=difficulty_id)
+    return {
+        row['user_id']: float(row['total'] or 0)
+        for row in sessions.values('user_id').annotate(total=Sum('score'))
+    }
+
+
+def _push(quiz_session: QuizSession, sign: int):
+    if not quiz_session.user_id or quiz_session.is_group_session or not quiz_session.completed_at:
+        return
+    keys = session_board_keys(quiz_session)
+    delta = sign * quiz_session.score
+    try:
+        get_store().incr(keys, quiz_session.user_id, delta)
+    except Exception as e:
+        # Leaderboards are derived data; a rebuild repairs missed pushes
+        logger.warning(f"Failed to update leaderboards for session {quiz_session.id}: {e}")
+
+
+def record_session_completed(quiz_session: QuizSession):
+    """Add a completed session's score to its boards once the transaction commits."""
+    transaction.on_commit(lambda: _push(quiz_session, 1))
+
+
+def record_session_removed(quiz_session: QuizSession):
+    """Take a deleted session's score back off its boards once the transaction commits."""
+    transaction.on_commit(lambda: _push(quiz_session, -1))
+
+
+def get_leaderboard(
+    window: str = 'all',
+    category_id: Optional[int] = None,
+    difficulty_id: Optional[int] = None,
+    limit: int = DEFAULT_LEADERBOARD_SIZE,
+    user_id: Optional[int] = None,
+) -> Dict:
+    """Top ``limit`` entries of a board plus the requesting user's own rank."""
+    period = board_period(window)
+    key = board_key(window, period, category_id, difficulty_id)
+    store = get_store()
+
+    top = store.top(key, limit)
+    names = dict(
+        get_user_model().objects
+        .filter(id__in=[member for member, _ in top])
+        .values_list('id', 'username')
+    )
+    result = {
+        'window': window,
+        'period': period,
+        'category_id': category_id,
+        'difficulty_id': difficulty_id,
+        'entries': [
+            {'rank': index + 1, 'user_id': member, 'username': names.get(member), 'score': int(score)}
+            for index, (member, score) in enumerate(top)
+        ],
+    }
+    if user_id is not None:
+        mine = store.rank(key, user_id)
+        result['me'] = {'rank': mine[0], 'score': int(mine[1])} if mine else None
+    return result
+
+
+def rebuild_leaderboards(windows=LEADERBOARD_WINDOWS, now: Optional[datetime] = None) -> Dict[str, int]:
+    """
+    Recompute the current period of each window from QuizSession with one
+    grouped query per window and swap the boards in. Returns boards per window.
+    """
+    now = now or timezone.now()
+    written = {}
+    for window in windows:
+        period = board_period(window, now)
+        sessions = _eligible_sessions()
+        start = window_start(window, now)
+        if start is not None:
+            sessions = sessions.filter(completed_at__gte=start)
+
+        boards: Dict[str, Dict[int, float]] = {}
+        for row in sessions.values('user_id', 'category_id', 'difficulty_id').annotate(total=Sum('score')):
+            for category_id in {row['category_id'], None}:
+                for difficulty_id in {row['difficulty_id'], None}:
+                    scores = boards.setdefault(board_key(window, period, category_id, difficulty_id), {})
+                    scores[row['user_id']] = scores.get(row['user_id'], 0) + float(row['total'] or 0)
+
+        get_store().replace(f"leaderboard:{window}:{period}:", boards)
+        written[window] = len(boards)
+        logger.info(f"Rebuilt {len(boards)} {window} leaderboards for period {period}")
+    return written
@@ -0,0 +1,67 @@
+import logging
+
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from rest_framework import status
+from rest_framework.permissions import AllowAny
+
+from .leaderboard import (
+    DEFAULT_LEADERBOARD_SIZE,
+    LEADERBOARD_WINDOWS,
+    MAX_LEADERBOARD_SIZE,
+    get_leaderboard,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _optional_int(value):
+    return int(value) if value not in (None, '', 'all') else None
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def get_leaderboard_view(request):
+    """
+    API endpoint for a leaderboard. Query params: ``window`` (daily, weekly,
+    all), optional ``category`` / ``difficulty`` ids and ``limit``.
+    Authenticated users also get their own rank as ``me``.
+    """
+    window = request.query_params.get('window', 'all')
+    if window not in LEADERBOARD_WINDOWS:
+        return Response({
+            'error': f"Invalid window. Use one of: {', '.join(LEADERBOARD_WINDOWS)}.",
+            'code': 'invalid_window'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        category_id = _optional_int(request.query_params.get('category'))
+        difficulty_id = _optional_int(request.query_params.get('difficulty'))
+        limit = int(request.query_params.get('limit', DEFAULT_LEADERBOARD_SIZE))
+    except ValueError:
+        return Response({
+            'error': 'category, difficulty and limit must be integers.',
+            'code': 'validation_error'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    if not 1 <= limit <= MAX_LEADERBOARD_SIZE:
+        return Response({
+            'error': f'limit must be between 1 and {MAX_LEADERBOARD_SIZE}.',
+            'code': 'invalid_limit'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        data = get_leaderboard(
+            window=window,
+            category_id=category_id,
+            difficulty_id=difficulty_id,
+            limit=limit,
+            user_id=request.user.id if request.user.is_authenticated else None,
+        )
+        return Response(data, status=status.HTTP_200_OK)
+    except Exception as e:
+        logger.error(f"Error retrieving leaderboard: {e}", exc_info=True)
+        return Response({
+            'error': 'Error retrieving leaderboard.',
+            'code': 'server_error'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
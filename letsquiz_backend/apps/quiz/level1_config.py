@@ -2,6 +2,7 @@ import re
 from typing import List, Optional, Set
 
 from django.conf import settings
+from django.db.models import Q
 
 DEFAULT_LEVEL1_CATEGORIES = ["Science", "History", "Geography"]
 DEFAULT_LEVEL1_DIFFICULTIES = ["Easy", "Medium", "Quiz Genius"]
@@ -21,6 +22,15 @@ def get_allowed_category_names() -> List[str]:
     return [name.strip() for name in categories if name and name.strip()]
 
 
+def playable_question_q(prefix: str = "") -> Q:
+    """Questions served in gameplay: seeded ones plus accepted generated and editor-created ones."""
+    return (
+        Q(**{f"{prefix}is_seeded": True})
+        | Q(**{f"{prefix}is_generated": True})
+        | Q(**{f"{prefix}is_curated": True})
+    )
+
+
 def get_allowed_difficulty_labels() -> List[str]:
     difficulties = getattr(settings, "LEVEL1_ALLOWED_DIFFICULTIES", DEFAULT_LEVEL1_DIFFICULTIES)
     return [label.strip() for label in difficulties if label and label.strip()]
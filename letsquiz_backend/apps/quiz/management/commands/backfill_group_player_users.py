@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from apps.quiz.group_players import backfill_group_player_users
+
+
+class Command(BaseCommand):
+    help = 'Link existing group players whose name is a registered email to that user account.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Group players scanned per batch (default: 1000).',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many players would be linked.',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        linked = backfill_group_player_users(batch_size=options['batch_size'], dry_run=dry_run)
+        verb = 'would be linked' if dry_run else 'linked'
+        self.stdout.write(self.style.SUCCESS(f'{linked} group player(s) {verb} to user accounts.'))
@@ -0,0 +1,100 @@
+"""
+Benchmark near-duplicate detection as the question bank grows.
+
+Generates synthetic questions in memory (no database writes) from random
+content words, with a fixed share rephrased (same content words and answer in
+a different sentence), and times one ``find_near_duplicate_groups`` pass per size. The
+planted rephrasings give the recall; any other group is a false positive.
+"""
+import random
+import resource
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.quiz.near_duplicates import DEFAULT_THRESHOLD, find_near_duplicate_groups
+
+_SYLLABLES = [
+    'ka', 'lo', 'mi', 'ten', 'ra', 'vos', 'du', 'pel', 'zan', 'or', 'ith', 'bu', 'qua', 'ser', 'nol',
+    'tri', 'ga', 'mon', 'el', 'fy', 'dra', 'ci', 'ump', 'hal', 'yo', 'wen', 'ost', 'pri', 'jas', 'ek',
+]
+# Question templates and a rephrasing of each (same content words, new order)
+_TEMPLATES = [
+    ('What is the {0} {1} of {2}?', 'Of {2}, which {1} is {0}?'),
+    ('Which {1} of {2} is the most {0}?', 'What is the most {0} {1} of {2}?'),
+    ('Who discovered the {0} {1} in {2}?', 'The {0} {1} in {2} was discovered by whom?'),
+    ('In which year was the {0} {1} of {2} founded?', 'When was the {0} {1} of {2} founded?'),
+]
+
+
+def _synthetic_rows(count: int, rephrase_share: float, seed: int):
+    """(id, category_id, text, answer) rows and the planted (original, copy) id pairs."""
+    rng = random.Random(seed)
+    vocabulary = [
+        ''.join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4)))
+        for _ in range(max(2000, count // 20))
+    ]
+    planted = []
+    rows = []
+    for question_id in range(1, count + 1):
+        if rows and rng.random() < rephrase_share:
+            original_id, category_id, _, answer, (words, template) = rows[rng.randrange(len(rows))]
+            rows.append((question_id, category_id, template[1].format(*words), answer, (words, template)))
+            planted.append((original_id, question_id))
+            continue
+        words = [rng.choice(vocabulary) for _ in range(3)]
+        template = rng.choice(_TEMPLATES)
+        answer = ' '.join(rng.choice(vocabulary) for _ in range(rng.randint(1, 2)))
+        rows.append((question_id, rng.randint(1, 3), template[0].format(*words), answer, (words, template)))
+    return [row[:4] for row in rows], planted
+
+
+class Command(BaseCommand):
+    help = 'Time MinHash/LSH near-duplicate detection over growing synthetic question banks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=str,
+            default='10000,100000,1000000',
+            help='Comma-separated question counts to measure at.',
+        )
+        parser.add_argument(
+            '--rephrase-share',
+            type=float,
+            default=0.02,
+            help='Share of questions generated as rephrasings of an earlier one (default: 0.02).',
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=DEFAULT_THRESHOLD,
+            help=f'Similarity threshold (default: {DEFAULT_THRESHOLD}).',
+        )
+        parser.add_argument('--seed', type=int, default=7, help='Random seed for the synthetic bank.')
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(size) for size in options['sizes'].split(',') if size.strip())
+        self.stdout.write(
+            f"{'questions':>10} {'seconds':>9} {'us/question':>12} {'groups':>8} "
+            f"{'recall':>7} {'false':>6} {'max RSS MB':>11}"
+        )
+        for size in sizes:
+            rows, planted = _synthetic_rows(size, options['rephrase_share'], options['seed'])
+            started = time.perf_counter()
+            groups = find_near_duplicate_groups(rows, options['threshold'])
+            elapsed = time.perf_counter() - started
+            del rows
+
+            group_of = {question_id: index for index, group in enumerate(groups) for question_id in group}
+            found = sum(
+                1 for original, copy in planted
+                if original in group_of and group_of.get(copy) == group_of[original]
+            )
+            planted_ids = {question_id for pair in planted for question_id in pair}
+            false_groups = sum(1 for group in groups if not planted_ids.intersection(group))
+            max_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+            self.stdout.write(
+                f"{size:>10} {elapsed:>9.2f} {elapsed / size * 1e6:>12.1f} {len(groups):>8} "
+                f"{found / len(planted) if planted else 1:>7.1%} {false_groups:>6} {max_rss_mb:>11.0f}"
+            )
@@ -0,0 +1,114 @@
+"""
+Benchmark profile aggregation as group history grows.
+
+Inserts synthetic group sessions (a small, fixed share involving the
+benchmark user) inside a transaction that is rolled back, and times the
+linked-FK profile query against the legacy name-to-email match.
+"""
+import statistics
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Sum
+
+from apps.quiz.models import GroupPlayer, QuizSession
+from apps.quiz.user_stats_views import build_user_profile
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _legacy_group_totals(user):
+    """Pre-link profile lookup: unindexed name match plus a distinct subquery join."""
+    user_group_players = GroupPlayer.objects.filter(name=user.email)
+    sessions = QuizSession.objects.filter(group_players__in=user_group_players).distinct().count()
+    score = user_group_players.aggregate(Sum('score'))['score__sum'] or 0
+    return sessions, score
+
+
+class Command(BaseCommand):
+    help = 'Time profile aggregation (linked FK vs legacy name match) for growing group histories.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=str,
+            default='1000,10000,50000',
+            help='Comma-separated cumulative group session counts to measure at.',
+        )
+        parser.add_argument(
+            '--players',
+            type=int,
+            default=4,
+            help='Players per synthetic group session (default: 4).',
+        )
+        parser.add_argument(
+            '--user-sessions',
+            type=int,
+            default=20,
+            help='Group sessions the benchmark user takes part in (default: 20).',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=20,
+            help='Timed runs per measurement; the median is reported (default: 20).',
+        )
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(size) for size in options['sizes'].split(',') if size.strip())
+        try:
+            with transaction.atomic():
+                self._run(sizes, options['players'], options['user_sessions'], options['repeat'])
+                raise _Rollback()
+        except _Rollback:
+            self.stdout.write('Synthetic data rolled back.')
+
+    def _run(self, sizes, players_per_session, user_sessions, repeat):
+        User = get_user_model()
+        email = f"bench-{uuid.uuid4().hex[:8]}@example.com"
+        user = User.objects.create(email=email, username=email)
+
+        # The benchmark user's own participation stays constant across sizes
+        self._insert_sessions(user_sessions, players_per_session, user)
+
+        self.stdout.write(f"{'group sessions':>15} {'linked ms':>10} {'legacy ms':>10}")
+        inserted = user_sessions
+        for size in sizes:
+            if size > inserted:
+                self._insert_sessions(size - inserted, players_per_session, None)
+                inserted = size
+            linked_ms = self._time(lambda: build_user_profile(user), repeat)
+            legacy_ms = self._time(lambda: _legacy_group_totals(user), repeat)
+            self.stdout.write(f"{inserted:>15} {linked_ms:>10.2f} {legacy_ms:>10.2f}")
+
+    def _insert_sessions(self, count, players_per_session, user, batch_size=2000):
+        for start in range(0, count, batch_size):
+            sessions = QuizSession.objects.bulk_create([
+                QuizSession(score=0, is_group_session=True)
+                for _ in range(min(batch_size, count - start))
+            ])
+            players = []
+            for session in sessions:
+                for index in range(players_per_session):
+                    is_user = user is not None and index == 0
+                    players.append(GroupPlayer(
+                        quiz_session=session,
+                        name=user.email if is_user else f"player-{session.id}-{index}",
+                        user=user if is_user else None,
+                        score=index,
+                    ))
+            GroupPlayer.objects.bulk_create(players, batch_size=batch_size)
+
+    def _time(self, func, repeat):
+        func()  # warm
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
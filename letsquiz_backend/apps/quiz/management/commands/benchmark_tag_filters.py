@@ -0,0 +1,107 @@
+"""
+Benchmark tag filter latency as the question bank grows.
+
+Builds a ``TagIndex`` over synthetic questions in memory (no database reads)
+where tag popularity follows a Zipf-like curve, then times AND, OR and NOT
+filters (each followed by sampling a quiz) against a per-question scan of
+tag sets, the cost of filtering without the index.
+"""
+import random
+import resource
+import time
+from array import array
+
+from django.core.management.base import BaseCommand
+
+from apps.quiz.tag_index import TagIndex, _group_ordinals
+
+DIFFICULTIES = ['easy', 'medium', 'quiz genius']
+
+
+def _synthetic_index(count: int, tag_count: int, seed: int):
+    """A TagIndex over ``count`` questions and each question's tag set (for the scan baseline)."""
+    rng = random.Random(seed)
+    tags = [f"tag-{rank}" for rank in range(tag_count)]
+    weights = [1 / (rank + 1) for rank in range(tag_count)]
+    tag_sets = []
+    tag_pairs, category_pairs, difficulty_pairs = [], [], []
+    for ordinal in range(count):
+        question_tags = frozenset(rng.choices(tags, weights, k=rng.randint(1, 4)))
+        tag_sets.append(question_tags)
+        tag_pairs.extend((tag, ordinal) for tag in question_tags)
+        category_pairs.append((rng.randint(1, 10), ordinal))
+        difficulty_pairs.append((rng.choice(DIFFICULTIES), ordinal))
+
+    started = time.perf_counter()
+    index = TagIndex(
+        array('Q', range(1, count + 1)),
+        _group_ordinals(tag_pairs),
+        _group_ordinals(category_pairs),
+        _group_ordinals(difficulty_pairs),
+    )
+    return index, tag_sets, time.perf_counter() - started, len(tag_pairs)
+
+
+class Command(BaseCommand):
+    help = 'Time bitmap tag filters (AND/OR/NOT plus sampling) over growing synthetic question banks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=str,
+            default='10000,100000,1000000',
+            help='Comma-separated question counts to measure at.',
+        )
+        parser.add_argument('--tags', type=int, default=200, help='Distinct tags (default: 200).')
+        parser.add_argument('--repeat', type=int, default=50, help='Runs per filter (default: 50).')
+        parser.add_argument('--count', type=int, default=10, help='Questions sampled per filter (default: 10).')
+        parser.add_argument('--seed', type=int, default=7, help='Random seed for the synthetic bank.')
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(size) for size in options['sizes'].split(',') if size.strip())
+        count = options['count']
+
+        self.stdout.write(
+            f"{'questions':>10} {'build s':>8} {'filter':>6} {'matches':>8} {'us/filter':>10} "
+            f"{'us/scan':>10} {'bitmap KB':>10} {'id list KB':>11} {'max RSS MB':>11}"
+        )
+        for size in sizes:
+            index, tag_sets, build_seconds, postings = _synthetic_index(size, options['tags'], options['seed'])
+            medium = set(index.difficulties['medium'].to_list())
+            # Popular, mid-ranked and rare tags, so filters cross dense and sparse bitmaps;
+            # each with the equivalent per-question test for the scan baseline
+            filters = {
+                'AND': (
+                    {'tags': ['tag-0', 'tag-5']},
+                    lambda tags, ordinal: 'tag-0' in tags and 'tag-5' in tags,
+                ),
+                'OR': (
+                    {'any_tags': ['tag-3', 'tag-20', 'tag-150']},
+                    lambda tags, ordinal: bool(tags & {'tag-3', 'tag-20', 'tag-150'}),
+                ),
+                'NOT': (
+                    {'tags': ['tag-1'], 'exclude_tags': ['tag-0'], 'difficulty_labels': ['medium']},
+                    lambda tags, ordinal: 'tag-1' in tags and 'tag-0' not in tags and ordinal in medium,
+                ),
+            }
+
+            for name, (criteria, matches) in filters.items():
+                started = time.perf_counter()
+                for _ in range(options['repeat']):
+                    candidates = index.resolve(**criteria)
+                    index.sample_ids(candidates, count)
+                filter_us = (time.perf_counter() - started) / options['repeat'] * 1e6
+
+                scan_runs = max(1, options['repeat'] // 10)
+                started = time.perf_counter()
+                for _ in range(scan_runs):
+                    matched = [ordinal for ordinal, tags in enumerate(tag_sets) if matches(tags, ordinal)]
+                    random.sample(matched, min(count, len(matched)))
+                scan_us = (time.perf_counter() - started) / scan_runs * 1e6
+
+                max_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+                self.stdout.write(
+                    f"{size:>10} {build_seconds:>8.2f} {name:>6} {len(candidates):>8} {filter_us:>10.0f} "
+                    f"{scan_us:>10.0f} {index.nbytes() / 1024:>10.0f} {postings * 8 / 1024:>11.0f} {max_rss_mb:>11.0f}"
+                )
+            del index, tag_sets, medium, filters
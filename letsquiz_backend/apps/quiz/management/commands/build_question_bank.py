@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from apps.quiz.question_bank import build_question_bank, default_bank_path
+
+
+class Command(BaseCommand):
+    help = 'Build the memory-mapped question bank file used when QUESTION_BANK_MMAP is enabled.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            type=str,
+            default='',
+            help=f'Bank file to (re)write atomically. Defaults to QUESTION_BANK_PATH or {default_bank_path()}.',
+        )
+
+    def handle(self, *args, **options):
+        report = build_question_bank(options['path'] or None)
+        self.stdout.write(self.style.SUCCESS(
+            f"Built question bank version {report['version']} at {report['path']}: "
+            f"{report['questions']} questions, {report['bytes']} bytes in {report['elapsed_ms']}ms."
+        ))
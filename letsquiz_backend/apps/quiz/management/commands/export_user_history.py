@@ -0,0 +1,45 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth import get_user_model
+
+from apps.quiz.history_export import EXPORT_CHUNK_SIZE, iter_user_history_ndjson
+
+
+class Command(BaseCommand):
+    help = "Stream a user's complete quiz history as NDJSON (one session per line)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, required=True, help='User ID to export.')
+        parser.add_argument(
+            '--output',
+            type=str,
+            help='File to write to. Defaults to stdout.',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=EXPORT_CHUNK_SIZE,
+            help=f'Rows fetched per database round trip (default: {EXPORT_CHUNK_SIZE}).',
+        )
+
+    def handle(self, *args, **options):
+        user_id = options['user']
+        if not get_user_model().objects.filter(id=user_id).exists():
+            raise CommandError(f'User {user_id} does not exist.')
+
+        lines = iter_user_history_ndjson(user_id, chunk_size=options['chunk_size'])
+        if not options.get('output'):
+            sessions = self._write(sys.stdout, lines)
+            return
+
+        with open(options['output'], 'w', encoding='utf-8') as output:
+            sessions = self._write(output, lines)
+        self.stderr.write(self.style.SUCCESS(f"Exported {sessions} session(s) for user {user_id} to {options['output']}."))
+
+    def _write(self, output, lines) -> int:
+        count = 0
+        for line in lines:
+            output.write(line)
+            count += 1
+        return count
@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.quiz.generation import check_pool_depths, get_generator, run_pending_generation_tasks
+from apps.quiz.level1_config import canonicalize_difficulty_label
+from apps.quiz.models import Category, DifficultyLevel, LLMGenerationTask
+
+
+class Command(BaseCommand):
+    help = 'Enqueue question generation for low pools and run due generation tasks in this process.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--category',
+            type=str,
+            default='',
+            help='Enqueue one task for this category name (requires --difficulty) instead of checking pool depths.',
+        )
+        parser.add_argument('--difficulty', type=str, default='', help='Difficulty label for --category.')
+        parser.add_argument(
+            '--count',
+            type=int,
+            default=0,
+            help='Questions to request for --category (default: GENERATION_BATCH_SIZE).',
+        )
+        parser.add_argument(
+            '--enqueue-only',
+            action='store_true',
+            help='Create tasks without running them (leave them to the Celery workers).',
+        )
+
+    def handle(self, *args, **options):
+        if get_generator() is None:
+            raise CommandError('Question generation is disabled: set QUESTION_GENERATOR to a generator class path.')
+
+        if options['category']:
+            label = canonicalize_difficulty_label(options['difficulty'])
+            category = Category.objects.filter(name=options['category']).first()
+            difficulty = DifficultyLevel.objects.filter(label=label).first() if label else None
+            if category is None or difficulty is None:
+                raise CommandError('Unknown --category or --difficulty.')
+            LLMGenerationTask.objects.create(
+                category=category,
+                difficulty=difficulty,
+                requested_count=options['count'] or settings.GENERATION_BATCH_SIZE,
+            )
+            self.stdout.write(f'Enqueued 1 generation task for {category.name}/{difficulty.label}.')
+        else:
+            tasks = check_pool_depths()
+            self.stdout.write(f'Enqueued {len(tasks)} generation tasks for pools below {settings.GENERATION_POOL_MIN}.')
+
+        if options['enqueue_only']:
+            return
+
+        results = run_pending_generation_tasks()
+        accepted = sum(result.get('accepted', 0) for result in results)
+        failed = sum(1 for result in results if 'error' in result)
+        self.stdout.write(self.style.SUCCESS(
+            f'Ran {len(results)} generation tasks: {accepted} questions accepted, {failed} failed attempts.'
+        ))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.quiz.snapshots import SNAPSHOT_BATCH_SIZE, SnapshotError, import_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Bulk-load a question-bank snapshot (COPY on PostgreSQL, executemany on SQLite).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--input', type=str, required=True, help='Snapshot file written by export_question_snapshot.')
+        parser.add_argument(
+            '--replace',
+            action='store_true',
+            help='Delete existing questions first (cascades to session questions and question stats).',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=SNAPSHOT_BATCH_SIZE,
+            help=f'Rows loaded per batch (default: {SNAPSHOT_BATCH_SIZE}).',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            report = import_snapshot(
+                options['input'],
+                replace=options['replace'],
+                batch_size=max(1, options['batch_size']),
+            )
+        except SnapshotError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Loaded {report['questions']} questions ({report['categories']} categories, "
+            f"{report['difficulties']} difficulty levels, {report['tags']} tags, "
+            f"{report['question_tags']} question links) from a snapshot taken at "
+            f"{report['snapshot_created_at']} in {report['elapsed_s']}s."
+        ))
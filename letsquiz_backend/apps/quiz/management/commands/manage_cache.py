@@ -5,10 +5,11 @@ from django.core.management.base import BaseCommand
 from django.core.cache import cache
 from apps.quiz.cache_utils import (
     invalidate_all_quiz_cache,
-    warm_questions_cache,
     invalidate_questions_cache,
     invalidate_categories_cache
 )
+from apps.quiz.cache_warmup import WARMUP_NAMESPACES, WarmupPlan, run_warmup
+from core.cache_metrics import get_aggregated_stats
 from core.redis_utils import get_redis_client, is_redis_available
 
 
@@ -28,6 +29,27 @@ class Command(BaseCommand):
             type=int,
             help='Category ID for specific operations'
         )
+        parser.add_argument(
+            '--namespaces',
+            type=str,
+            default='questions,categories',
+            help=f'Comma-separated namespaces to warm ({", ".join(WARMUP_NAMESPACES)})'
+        )
+        parser.add_argument(
+            '--budget',
+            type=float,
+            help='Warm-up time budget in seconds (default: CACHE_WARMUP_TIME_BUDGET)'
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            help='Warm-up thread pool size (default: CACHE_WARMUP_CONCURRENCY)'
+        )
+        parser.add_argument(
+            '--verbose-items',
+            action='store_true',
+            help='Print per-item warm-up timings'
+        )
 
     def handle(self, *args, **options):
         action = options['action']
@@ -45,7 +67,7 @@ class Command(BaseCommand):
         elif action == 'invalidate':
             self.invalidate_cache(category_id)
         elif action == 'warm':
-            self.warm_cache(category_id)
+            self.warm_cache(category_id, options)
         elif action == 'stats':
             self.show_cache_stats()
 
@@ -110,16 +132,40 @@ class Command(BaseCommand):
             invalidate_all_quiz_cache()
             self.stdout.write(self.style.SUCCESS('✓ All quiz cache invalidated'))
 
-    def warm_cache(self, category_id=None):
+    def warm_cache(self, category_id=None, options=None):
         """Warm cache with popular combinations"""
-        if category_id:
-            self.stdout.write(f'Warming cache for category {category_id}...')
-            warm_questions_cache([category_id])
-        else:
-            self.stdout.write('Warming cache for all categories...')
-            warm_questions_cache()
+        options = options or {}
+        namespaces = [name.strip() for name in options.get('namespaces', 'questions').split(',') if name.strip()]
+        plan = WarmupPlan.from_settings(
+            namespaces=namespaces,
+            category_ids=[category_id] if category_id else None,
+            time_budget=options.get('budget'),
+            concurrency=options.get('concurrency'),
+        )
+
+        target = f'category {category_id}' if category_id else 'all categories'
+        self.stdout.write(
+            f'Warming {", ".join(plan.namespaces)} cache for {target} '
+            f'(budget {plan.time_budget}s, concurrency {plan.concurrency})...'
+        )
+        try:
+            report = run_warmup(plan)
+        except ValueError as e:
+            self.stdout.write(self.style.ERROR(f'✗ {e}'))
+            return
+
+        if options.get('verbose_items'):
+            for item in report['items']:
+                line = f"  [{item['status']:>7}] {item['namespace']:<12} {item['item']:<40} {item['elapsed_ms']:>8.1f}ms"
+                if item.get('error'):
+                    line += f"  {item['error']}"
+                self.stdout.write(line)
+
+        for namespace, totals in report['totals'].items():
+            summary = ', '.join(f'{status}={count}' for status, count in sorted(totals.items()))
+            self.stdout.write(f'  {namespace}: {summary}')
         
-        self.stdout.write(self.style.SUCCESS('✓ Cache warming completed'))
+        self.stdout.write(self.style.SUCCESS(f"✓ Cache warming completed in {report['elapsed_ms']}ms"))
 
     def show_cache_stats(self):
         """Show cache statistics"""
@@ -154,5 +200,41 @@ class Command(BaseCommand):
                 self.stdout.write(self.style.ERROR(f"Error getting Redis stats: {e}"))
         else:
             self.stdout.write(self.style.WARNING("Redis not available - cannot show detailed stats"))
+
+        self.show_cache_metrics()
         
         self.stdout.write(self.style.SUCCESS('✓ Cache statistics displayed'))
+
+    def show_cache_metrics(self):
+        """Show hit/miss/latency counters aggregated across workers"""
+        stats = get_aggregated_stats()
+        self.stdout.write(self.style.HTTP_INFO(
+            f"Cache metrics ({stats['worker_count']} worker snapshot(s)):"
+        ))
+        for worker, backend in stats['backends'].items():
+            self.stdout.write(
+                f"  {worker} {backend['backend']}: {backend['entries']} entries, "
+                f"{backend['bytes']}/{backend['max_bytes']} bytes"
+            )
+            for namespace, data in backend['namespaces'].items():
+                budget = data['budget_bytes'] if data['budget_bytes'] is not None else '-'
+                self.stdout.write(
+                    f"    {namespace:<18} entries={data['entries']} bytes={data['bytes']}/{budget} "
+                    f"evictions={data['evictions']} expirations={data['expirations']} rejected={data['rejected']}"
+                )
+
+        if not stats['namespaces']:
+            self.stdout.write("  No cache activity recorded yet")
+            return
+
+        self.stdout.write(
+            f"  {'Namespace':<20} {'Hits':>8} {'Misses':>8} {'Hit %':>7} {'Sets':>8} {'Avg get ms':>11} {'Avg set ms':>11}"
+        )
+        for namespace, data in stats['namespaces'].items():
+            hit_pct = f"{data['hit_ratio'] * 100:.1f}" if data['hit_ratio'] is not None else '-'
+            avg_get = f"{data['avg_get_ms']:.3f}" if data['avg_get_ms'] is not None else '-'
+            avg_set = f"{data['avg_set_ms']:.3f}" if data['avg_set_ms'] is not None else '-'
+            self.stdout.write(
+                f"  {namespace:<20} {data['hits']:>8} {data['misses']:>8} {hit_pct:>7} "
+                f"{data['sets']:>8} {avg_get:>11} {avg_set:>11}"
+            )
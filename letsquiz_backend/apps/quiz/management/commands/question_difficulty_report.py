@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from apps.quiz.question_stats import flush_question_stats, question_difficulty_report
+
+
+class Command(BaseCommand):
+    help = 'List questions by global correct rate (hardest or easiest first) for content review.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--order', choices=['hardest', 'easiest'], default='hardest')
+        parser.add_argument('--min-attempts', type=int, default=20, help='Ignore questions with fewer answers (default: 20).')
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument('--category', type=int, help='Only questions in this category ID.')
+
+    def handle(self, *args, **options):
+        # Include answers still sitting in the Redis buffer
+        flush_question_stats()
+
+        rows = question_difficulty_report(
+            order=options['order'],
+            min_attempts=options['min_attempts'],
+            limit=options['limit'],
+            category_id=options.get('category'),
+        )
+        if not rows:
+            self.stdout.write(self.style.WARNING('No questions with enough attempts yet.'))
+            return
+
+        self.stdout.write(f"{'rate':>6} {'attempts':>8}  {'id':>6}  category / difficulty  question")
+        for row in rows:
+            self.stdout.write(
+                f"{row['correct_rate']:>5.1f}% {row['attempts']:>8}  {row['question_id']:>6}  "
+                f"{row['category']} / {row['difficulty']}  {row['question'][:80]}"
+            )
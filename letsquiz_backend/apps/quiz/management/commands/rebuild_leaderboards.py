@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from apps.quiz.leaderboard import LEADERBOARD_WINDOWS, rebuild_leaderboards
+
+
+class Command(BaseCommand):
+    help = 'Rebuild current daily/weekly/all-time leaderboards from completed quiz sessions.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--window',
+            choices=LEADERBOARD_WINDOWS,
+            action='append',
+            dest='windows',
+            help='Only rebuild this window (repeatable). Defaults to all windows.',
+        )
+
+    def handle(self, *args, **options):
+        windows = options.get('windows') or LEADERBOARD_WINDOWS
+        written = rebuild_leaderboards(windows=windows)
+        for window, boards in written.items():
+            self.stdout.write(self.style.SUCCESS(f'{window}: {boards} board(s) rebuilt.'))
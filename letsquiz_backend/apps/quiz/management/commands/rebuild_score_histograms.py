@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.quiz.score_histograms import rebuild_score_histograms
+
+
+class Command(BaseCommand):
+    help = 'Rebuild results-page score histograms from completed solo quiz sessions.'
+
+    def handle(self, *args, **options):
+        buckets = rebuild_score_histograms()
+        self.stdout.write(self.style.SUCCESS(f'Score histograms rebuilt: {buckets} bucket(s).'))
@@ -0,0 +1,36 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.quiz.stats_aggregates import rebuild_daily_stats, rebuild_user_stats
+
+
+class Command(BaseCommand):
+    help = 'Rebuild per-user stat aggregates (totals, per-category, per-difficulty, daily rollups) from quiz history.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=int,
+            action='append',
+            dest='user_ids',
+            help='Only rebuild this user ID (repeatable). Defaults to all users.',
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            help='Only rebuild daily rollups for the last N days. Defaults to all history.',
+        )
+
+    def handle(self, *args, **options):
+        user_ids = options.get('user_ids')
+        target = f"users {', '.join(map(str, user_ids))}" if user_ids else 'all users'
+        self.stdout.write(self.style.SUCCESS(f'Rebuilding stat aggregates for {target}...'))
+
+        rebuilt = rebuild_user_stats(user_ids=user_ids)
+        since = timezone.now().date() - timedelta(days=options['days'] - 1) if options.get('days') else None
+        # Both rebuilds drop the rebuilt users' cached profile/stats/history on commit
+        daily_rows = rebuild_daily_stats(user_ids=user_ids, since=since)
+
+        self.stdout.write(self.style.SUCCESS(f'Stat aggregates rebuilt for {rebuilt} user(s), {daily_rows} daily rollup row(s).'))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from apps.quiz.degraded import replay_queued_saves, save_spool_path
+
+
+class Command(BaseCommand):
+    help = 'Replay quiz saves spooled while the database was unavailable (degraded mode).'
+
+    def handle(self, *args, **options):
+        result = replay_queued_saves()
+        self.stdout.write(self.style.SUCCESS(
+            f"Replayed {result['replayed']} queued quiz saves from {save_spool_path()} "
+            f"({result['invalid']} invalid, {result['rejected']} rejected to {save_spool_path()}.rejected, "
+            f"{result['pending']} pending)."
+        ))
@@ -1,20 +1,32 @@
-import json
+import time
 from pathlib import Path
 
 from django.conf import settings
 from django.core.management.base import BaseCommand
 from django.db import transaction
+from django.db.models import Count, Min
 
+from apps.quiz.cache_utils import deferred_question_invalidation, invalidate_question_data
 from apps.quiz.level1_config import (
     canonicalize_difficulty_label,
     get_allowed_category_names,
-    normalize_question_key,
 )
-from apps.quiz.models import Category, DifficultyLevel, Question
+from apps.quiz.models import Category, DifficultyLevel, Question, SeedManifest
+from apps.quiz.near_duplicates import find_near_duplicate_groups
+from apps.quiz.seed_io import (
+    SeedFormatError,
+    file_sha256,
+    iter_seed_entries,
+    question_content_hash,
+    question_seed_key,
+)
+from apps.quiz.tag_index import parse_tags, set_question_tags
+
+UPDATE_FIELDS = ['correct_answer', 'answer_options', 'metadata_json', 'is_seeded', 'content_hash']
 
 
 class Command(BaseCommand):
-    help = 'Seed Level 1 quiz questions idempotently from JSON with optional cleanup.'
+    help = 'Seed Level 1 quiz questions idempotently from JSON (optionally gzipped) with optional cleanup.'
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -38,6 +50,28 @@ class Command(BaseCommand):
             action='store_true',
             help='Delete duplicate seeded questions by normalized text/category/difficulty key.',
         )
+        parser.add_argument(
+            '--near-dedupe',
+            action='store_true',
+            help='Delete seeded questions that rephrase an older one (MinHash/LSH, same category).',
+        )
+        parser.add_argument(
+            '--near-threshold',
+            type=float,
+            default=None,
+            help='Shingle similarity (0-1) for --near-dedupe (default: NEAR_DUPLICATE_THRESHOLD).',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Entries upserted (bulk_create/bulk_update) and committed per transaction.',
+        )
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Ignore the manifest and content hashes; compare every entry field by field.',
+        )
 
     def _resolve_data_path(self, explicit_path: str) -> Path:
         if explicit_path:
@@ -47,8 +81,170 @@ class Command(BaseCommand):
             return configured
         return (Path.cwd() / configured).resolve()
 
-    @transaction.atomic
+    def _normalize_entry(self, entry, allowed_categories):
+        """Validated (category_name, difficulty_label, fields) for an entry, or None to skip."""
+        if not isinstance(entry, dict):
+            return None
+        category_name = (entry.get('category') or '').strip()
+        difficulty_label = (entry.get('difficulty') or '').strip()
+        question_text = (entry.get('question_text') or '').strip()
+        correct_answer = (entry.get('correct_answer') or '').strip()
+        metadata = entry.get('metadata', {})
+        answer_options = entry.get('options', [])
+
+        if not all([category_name, difficulty_label, question_text, correct_answer]):
+            return None
+
+        if category_name not in allowed_categories:
+            # Intentionally skip non-Level 1 categories.
+            return None
+
+        canonical_difficulty = canonicalize_difficulty_label(difficulty_label)
+        if not canonical_difficulty:
+            return None
+
+        if not isinstance(answer_options, list):
+            answer_options = []
+        if not isinstance(metadata, dict):
+            metadata = {}
+        # Tags may sit at the top level or in metadata; stored normalized in metadata so the content hash covers them
+        tags = parse_tags(entry.get('tags') or metadata.get('tags'))
+        if tags:
+            metadata = {**metadata, 'tags': tags}
+
+        return category_name, canonical_difficulty, {
+            'question_text': question_text,
+            'correct_answer': correct_answer,
+            'answer_options': answer_options,
+            'metadata_json': metadata,
+        }
+
+    def _apply_batch(self, batch, full, kept_ids, touched_category_ids):
+        """
+        Upsert one batch of (seed_key, content_hash, category, difficulty, fields)
+        rows in its own transaction. Entries whose content hash is already stored
+        are unchanged and cost nothing beyond one indexed lookup for the batch;
+        only the rest are matched by seed key and written.
+        """
+        unchanged_hashes = set()
+        if not full:
+            for question_id, content_hash in Question.objects.filter(
+                is_seeded=True,
+                content_hash__in=[content_hash for _, content_hash, *_ in batch],
+            ).values_list('id', 'content_hash'):
+                unchanged_hashes.add(content_hash)
+                kept_ids.add(question_id)
+
+        pending = [row for row in batch if row[1] not in unchanged_hashes]
+        if not pending:
+            return 0, 0, len(batch)
+
+        existing_by_key = {}
+        for question in Question.objects.filter(
+            is_seeded=True,
+            seed_key__in=[seed_key for seed_key, *_ in pending],
+        ).order_by('id'):
+            existing_by_key.setdefault(question.seed_key, question)
+
+        to_create = []
+        to_update = []
+        unchanged = len(batch) - len(pending)
+        for seed_key, content_hash, category, difficulty, fields in pending:
+            existing = existing_by_key.get(seed_key)
+            if existing is None:
+                to_create.append(Question(
+                    category=category,
+                    difficulty=difficulty,
+                    is_seeded=True,
+                    seed_key=seed_key,
+                    content_hash=content_hash,
+                    **fields,
+                ))
+                continue
+
+            kept_ids.add(existing.id)
+            changed = existing.content_hash != content_hash
+            for field, value in fields.items():
+                if getattr(existing, field) != value:
+                    setattr(existing, field, value)
+                    changed = True
+            if changed:
+                existing.content_hash = content_hash
+                to_update.append(existing)
+            else:
+                unchanged += 1
+
+        with transaction.atomic():
+            created = Question.objects.bulk_create(to_create)
+            if to_update:
+                Question.objects.bulk_update(to_update, UPDATE_FIELDS)
+
+            if created and created[0].pk is None:
+                # Backends without RETURNING: look the new rows up by their seed key
+                created_ids = dict(Question.objects.filter(
+                    is_seeded=True,
+                    seed_key__in=[question.seed_key for question in created],
+                ).values_list('seed_key', 'id'))
+                for question in created:
+                    question.pk = created_ids.get(question.seed_key)
+            kept_ids.update(question.pk for question in created if question.pk)
+
+            # Tag links follow metadata_json['tags'] of every written row
+            set_question_tags({
+                question.pk: question.metadata_json.get('tags') or []
+                for question in created + to_update if question.pk
+            })
+
+        for question in to_create + to_update:
+            touched_category_ids.add(question.category_id)
+        return len(to_create), len(to_update), unchanged
+
+    def _seeded_count(self, allowed_categories) -> int:
+        return Question.objects.filter(is_seeded=True, category__name__in=allowed_categories).count()
+
+    def _delete_duplicates(self, allowed_categories) -> int:
+        """Keep the oldest row per seed key (one grouped query to find duplicates)."""
+        seeded = Question.objects.filter(is_seeded=True, category__name__in=allowed_categories).exclude(seed_key='')
+        duplicated = (
+            seeded.values('seed_key')
+            .annotate(rows=Count('id'), keep_id=Min('id'))
+            .filter(rows__gt=1)
+        )
+        deleted = 0
+        for group in duplicated:
+            count, _ = seeded.filter(seed_key=group['seed_key']).exclude(id=group['keep_id']).delete()
+            deleted += count
+        return deleted
+
+    def _delete_near_duplicates(self, allowed_categories, threshold) -> int:
+        """Keep the oldest question of each near-duplicate cluster; report the rest."""
+        seeded = Question.objects.filter(is_seeded=True, category__name__in=allowed_categories)
+        started = time.monotonic()
+        rows = seeded.values_list('id', 'category_id', 'question_text', 'correct_answer').iterator(chunk_size=5000)
+        groups = find_near_duplicate_groups(rows, threshold)
+        self.stdout.write(
+            f'Near-duplicate scan found {len(groups)} clusters in {time.monotonic() - started:.2f}s '
+            f'(threshold {threshold:.2f}).'
+        )
+
+        delete_ids = [question_id for ids in groups for question_id in ids[1:]]
+        deleted = 0
+        for start in range(0, len(delete_ids), 500):
+            chunk = seeded.filter(id__in=delete_ids[start:start + 500])
+            for question_id, question_text in chunk.values_list('id', 'question_text'):
+                self.stdout.write(f'  near-duplicate #{question_id}: {question_text}')
+            _, per_model = chunk.delete()
+            deleted += per_model.get(Question._meta.label, 0)
+        if deleted:
+            self.stdout.write('Remove these entries from the seed file too, or the next run inserts them again.')
+        return deleted
+
     def handle(self, *args, **options):
+        # Per-row cache invalidation from signals is deferred to one pass at the end
+        with deferred_question_invalidation():
+            self._sync(options)
+
+    def _sync(self, options):
         self.stdout.write(self.style.SUCCESS('Starting Level 1 seed sync...'))
 
         data_file_path = self._resolve_data_path(options.get('data_file', ''))
@@ -56,127 +252,118 @@ class Command(BaseCommand):
             self.stdout.write(self.style.ERROR(f'Seed data file not found at: {data_file_path}'))
             return
 
-        with data_file_path.open('r', encoding='utf-8') as f:
-            raw_entries = json.load(f)
-
-        if not isinstance(raw_entries, list):
-            self.stdout.write(self.style.ERROR('Seed data must be a JSON array of question objects.'))
-            return
+        batch_size = max(1, options['batch_size'])
+        full = options['full']
 
         allowed_categories = set(get_allowed_category_names())
         if not allowed_categories:
             self.stdout.write(self.style.ERROR('LEVEL1_ALLOWED_CATEGORIES is empty. Refusing to seed.'))
             return
 
+        file_hash = file_sha256(data_file_path)
+        cleanup_requested = (
+            options['dedupe'] or options['near_dedupe'] or options['prune_stale_seeded'] or options['prune_non_level1']
+        )
+        # Only the most recent run counts: seeding any other file in between changes the bank
+        last_manifest = SeedManifest.objects.order_by('-applied_at', '-id').first()
+        if (
+            not full
+            and not cleanup_requested
+            and last_manifest is not None
+            and last_manifest.file_hash == file_hash
+            and last_manifest.seeded_questions == self._seeded_count(allowed_categories)
+        ):
+            self.stdout.write(self.style.SUCCESS(
+                f'Seed file unchanged since {last_manifest.applied_at:%Y-%m-%d %H:%M:%S} '
+                f'({last_manifest.entries} entries); nothing to do. Use --full to re-compare.'
+            ))
+            return
+
         category_cache = {
             cat.name: cat for cat in Category.objects.filter(name__in=allowed_categories)
         }
         difficulty_cache = {d.label: d for d in DifficultyLevel.objects.all()}
 
-        normalized_seen_keys = set()
+        seen_seed_keys = set()
         kept_ids = set()
+        touched_category_ids = set()
+        processed_count = 0
         created_count = 0
         updated_count = 0
+        unchanged_count = 0
         skipped_count = 0
 
-        existing_seeded = (
-            Question.objects
-            .filter(is_seeded=True, category__name__in=allowed_categories)
-            .select_related('category', 'difficulty')
-        )
-        existing_by_key = {}
-        duplicate_ids = []
-        for question in existing_seeded:
-            key = (
-                normalize_question_key(question.question_text),
-                question.category_id,
-                question.difficulty_id,
-            )
-            if key in existing_by_key:
-                duplicate_ids.append(question.id)
-                continue
-            existing_by_key[key] = question
-
-        for entry in raw_entries:
-            category_name = (entry.get('category') or '').strip()
-            difficulty_label = (entry.get('difficulty') or '').strip()
-            question_text = (entry.get('question_text') or '').strip()
-            correct_answer = (entry.get('correct_answer') or '').strip()
-            metadata = entry.get('metadata', {})
-            answer_options = entry.get('options', [])
-
-            if not all([category_name, difficulty_label, question_text, correct_answer]):
-                skipped_count += 1
-                continue
-
-            if category_name not in allowed_categories:
-                # Intentionally skip non-Level 1 categories.
-                skipped_count += 1
-                continue
+        started = time.monotonic()
+        batch = []
 
-            canonical_difficulty = canonicalize_difficulty_label(difficulty_label)
-            if not canonical_difficulty:
-                skipped_count += 1
-                continue
+        def flush_batch():
+            nonlocal created_count, updated_count, unchanged_count
+            created, updated, unchanged = self._apply_batch(batch, full, kept_ids, touched_category_ids)
+            created_count += created
+            updated_count += updated
+            unchanged_count += unchanged
+            batch.clear()
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f'Processed {processed_count} entries '
+                f'(created={created_count}, updated={updated_count}, unchanged={unchanged_count}, '
+                f'skipped={skipped_count}) '
+                f'- {processed_count / elapsed if elapsed else 0:.0f} entries/s'
+            )
 
-            if category_name not in category_cache:
-                category_cache[category_name] = Category.objects.create(name=category_name)
-                self.stdout.write(self.style.SUCCESS(f'Created category: {category_name}'))
-            category = category_cache[category_name]
+        try:
+            for entry in iter_seed_entries(data_file_path):
+                processed_count += 1
+                normalized = self._normalize_entry(entry, allowed_categories)
+                if normalized is None:
+                    skipped_count += 1
+                    continue
+                category_name, canonical_difficulty, fields = normalized
 
-            if canonical_difficulty not in difficulty_cache:
-                difficulty_cache[canonical_difficulty] = DifficultyLevel.objects.create(label=canonical_difficulty)
-                self.stdout.write(self.style.SUCCESS(f'Created difficulty level: {canonical_difficulty}'))
-            difficulty = difficulty_cache[canonical_difficulty]
+                if category_name not in category_cache:
+                    category_cache[category_name] = Category.objects.create(name=category_name)
+                    self.stdout.write(self.style.SUCCESS(f'Created category: {category_name}'))
+                category = category_cache[category_name]
 
-            if not isinstance(answer_options, list):
-                answer_options = []
-            if not isinstance(metadata, dict):
-                metadata = {}
+                if canonical_difficulty not in difficulty_cache:
+                    difficulty_cache[canonical_difficulty] = DifficultyLevel.objects.create(label=canonical_difficulty)
+                    self.stdout.write(self.style.SUCCESS(f'Created difficulty level: {canonical_difficulty}'))
+                difficulty = difficulty_cache[canonical_difficulty]
 
-            key = (normalize_question_key(question_text), category.id, difficulty.id)
-            if key in normalized_seen_keys:
-                continue
-            normalized_seen_keys.add(key)
+                seed_key = question_seed_key(fields['question_text'], category.id, difficulty.id)
+                if seed_key in seen_seed_keys:
+                    continue
+                seen_seed_keys.add(seed_key)
+                content_hash = question_content_hash(
+                    seed_key, fields['correct_answer'], fields['answer_options'], fields['metadata_json'],
+                )
 
-            existing = existing_by_key.get(key)
-            if existing:
-                changed = False
-                if existing.correct_answer != correct_answer:
-                    existing.correct_answer = correct_answer
-                    changed = True
-                if existing.answer_options != answer_options:
-                    existing.answer_options = answer_options
-                    changed = True
-                if existing.metadata_json != metadata:
-                    existing.metadata_json = metadata
-                    changed = True
-                if not existing.is_seeded:
-                    existing.is_seeded = True
-                    changed = True
-
-                if changed:
-                    existing.save(update_fields=['correct_answer', 'answer_options', 'metadata_json', 'is_seeded'])
-                    updated_count += 1
-                kept_ids.add(existing.id)
-                continue
+                batch.append((seed_key, content_hash, category, difficulty, fields))
+                if len(batch) >= batch_size:
+                    flush_batch()
+            if batch:
+                flush_batch()
+        except SeedFormatError as e:
+            self.stdout.write(self.style.ERROR(str(e)))
+            self.stdout.write(self.style.WARNING(
+                f'Stopped after {processed_count} entries; batches already applied were kept.'
+            ))
+            return
 
-            created = Question.objects.create(
-                category=category,
-                difficulty=difficulty,
-                question_text=question_text,
-                correct_answer=correct_answer,
-                answer_options=answer_options,
-                metadata_json=metadata,
-                is_seeded=True,
-            )
-            existing_by_key[key] = created
-            kept_ids.add(created.id)
-            created_count += 1
+        removed_count = 0
+        if options['dedupe']:
+            deleted = self._delete_duplicates(allowed_categories)
+            removed_count += deleted
+            if deleted:
+                self.stdout.write(self.style.WARNING(f'Deduped seeded duplicates: {deleted} rows deleted.'))
 
-        if options['dedupe'] and duplicate_ids:
-            deleted, _ = Question.objects.filter(id__in=duplicate_ids).delete()
-            self.stdout.write(self.style.WARNING(f'Deduped seeded duplicates: {deleted} rows deleted.'))
+        if options['near_dedupe']:
+            threshold = options['near_threshold']
+            if threshold is None:
+                threshold = settings.NEAR_DUPLICATE_THRESHOLD
+            deleted = self._delete_near_duplicates(allowed_categories, threshold)
+            removed_count += deleted
+            self.stdout.write(self.style.WARNING(f'Removed near-duplicate seeded questions: {deleted}'))
 
         if options['prune_stale_seeded']:
             stale_qs = Question.objects.filter(
@@ -186,6 +373,7 @@ class Command(BaseCommand):
             stale_count = stale_qs.count()
             if stale_count:
                 stale_qs.delete()
+            removed_count += stale_count
             self.stdout.write(self.style.WARNING(f'Pruned stale seeded questions: {stale_count}'))
 
         if options['prune_non_level1']:
@@ -203,9 +391,29 @@ class Command(BaseCommand):
                 f'Deleted empty non-Level 1 categories: {deleted_categories}'
             ))
 
+        # bulk_create/bulk_update send no signals; queue their categories explicitly
+        for category_id in touched_category_ids:
+            invalidate_question_data(category_id)
+
+        SeedManifest.objects.create(
+            data_file=str(data_file_path),
+            file_hash=file_hash,
+            entries=processed_count,
+            created=created_count,
+            updated=updated_count,
+            unchanged=unchanged_count,
+            removed=removed_count,
+            skipped=skipped_count,
+            seeded_questions=self._seeded_count(allowed_categories),
+        )
+
+        elapsed = time.monotonic() - started
         self.stdout.write(
             self.style.SUCCESS(
                 'Seed sync completed. '
-                f'Created={created_count}, Updated={updated_count}, Skipped={skipped_count}.'
+                f'Created={created_count}, Updated={updated_count}, Unchanged={unchanged_count}, '
+                f'Removed={removed_count}, Skipped={skipped_count}. '
+                f'{processed_count} entries in {elapsed:.2f}s '
+                f'({processed_count / elapsed if elapsed else 0:.0f} entries/s).'
             )
-        )
\ No newline at end of file
+        )
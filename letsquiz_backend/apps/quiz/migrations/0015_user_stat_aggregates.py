@@ -0,0 +1,62 @@
+# Generated by Django 4.2.1 on 2026-10-19 13:28
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_user_stats(apps, schema_editor):
+    from apps.quiz.stats_aggregates import rebuild_user_stats
+
+    rebuild_user_stats(models={
+        name: apps.get_model('quiz', name)
+        for name in ('QuizSession', 'QuizSessionQuestion', 'UserStatTotals', 'UserCategoryStat', 'UserDifficultyStat')
+    })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0014_question_seed_cat_diff_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStatTotals',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_quizzes', models.IntegerField(default=0)),
+                ('total_score', models.IntegerField(default=0)),
+                ('total_questions', models.IntegerField(default=0)),
+                ('correct_answers', models.IntegerField(default=0)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stat_totals', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='UserDifficultyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_questions', models.IntegerField(default=0)),
+                ('correct_answers', models.IntegerField(default=0)),
+                ('difficulty', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='user_stats', to='quiz.difficultylevel')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='difficulty_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'difficulty')},
+            },
+        ),
+        migrations.CreateModel(
+            name='UserCategoryStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_questions', models.IntegerField(default=0)),
+                ('correct_answers', models.IntegerField(default=0)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='user_stats', to='quiz.category')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='category_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'category')},
+            },
+        ),
+        migrations.RunPython(backfill_user_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.1 on 2026-10-19 13:29
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_daily_stats(apps, schema_editor):
+    from apps.quiz.stats_aggregates import rebuild_daily_stats
+
+    rebuild_daily_stats(models={
+        name: apps.get_model('quiz', name)
+        for name in ('QuizSession', 'QuizSessionQuestion', 'UserDailyStat')
+    })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0015_user_stat_aggregates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserDailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('quizzes', models.IntegerField(default=0)),
+                ('score', models.IntegerField(default=0)),
+                ('total_questions', models.IntegerField(default=0)),
+                ('correct_answers', models.IntegerField(default=0)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='daily_user_stats', to='quiz.category')),
+                ('difficulty', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='daily_user_stats', to='quiz.difficultylevel')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'day'], name='user_daily_stat_user_day_idx')],
+                'unique_together': {('user', 'day', 'category', 'difficulty')},
+            },
+        ),
+        migrations.RunPython(backfill_daily_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.1 on 2026-10-19 13:32
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_group_player_users(apps, schema_editor):
+    from apps.quiz.group_players import backfill_group_player_users as backfill
+
+    backfill(models={
+        'GroupPlayer': apps.get_model('quiz', 'GroupPlayer'),
+        'User': apps.get_model('quiz', 'User'),
+    })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0016_user_daily_stat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='groupplayer',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='group_players', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(backfill_group_player_users, migrations.RunPython.noop),
+    ]
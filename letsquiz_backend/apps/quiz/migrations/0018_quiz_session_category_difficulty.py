@@ -0,0 +1,40 @@
+# Generated by Django 4.2.1 on 2026-10-19 13:33
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_session_category_difficulty(apps, schema_editor):
+    QuizSession = apps.get_model('quiz', 'QuizSession')
+    QuizSessionQuestion = apps.get_model('quiz', 'QuizSessionQuestion')
+
+    first_question = QuizSessionQuestion.objects.filter(quiz_session=models.OuterRef('pk')).order_by('id')
+    QuizSession.objects.update(
+        category_id=models.Subquery(first_question.values('question__category_id')[:1]),
+        difficulty_id=models.Subquery(first_question.values('question__difficulty_id')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0017_group_player_user'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizsession',
+            name='category',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='quiz_sessions', to='quiz.category'),
+        ),
+        migrations.AddField(
+            model_name='quizsession',
+            name='difficulty',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='quiz_sessions', to='quiz.difficultylevel'),
+        ),
+        migrations.AddIndex(
+            model_name='quizsession',
+            index=models.Index(fields=['user', 'started_at', 'id'], name='quiz_session_user_started_idx'),
+        ),
+        migrations.RunPython(backfill_session_category_difficulty, migrations.RunPython.noop),
+    ]
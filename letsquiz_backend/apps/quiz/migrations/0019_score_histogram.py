@@ -0,0 +1,58 @@
+# Generated by Django 4.2.1 on 2026-10-19 13:39
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_score_histograms(apps, schema_editor):
+    # Inline rather than score_histograms.rebuild_score_histograms, so later changes there can't break it
+    QuizSession = apps.get_model('quiz', 'QuizSession')
+    ScoreHistogramBucket = apps.get_model('quiz', 'ScoreHistogramBucket')
+
+    buckets = {}
+    sessions = (
+        QuizSession.objects
+        .filter(is_group_session=False, completed_at__isnull=False)
+        .annotate(question_count=models.Count('session_questions'))
+        .filter(question_count__gt=0)
+        .values_list('category_id', 'difficulty_id', 'question_count', 'score')
+    )
+    for category_id, difficulty_id, question_count, score in sessions.iterator(chunk_size=2000):
+        key = (category_id, difficulty_id, question_count, max(0, min(score, question_count)))
+        buckets[key] = buckets.get(key, 0) + 1
+
+    ScoreHistogramBucket.objects.bulk_create([
+        ScoreHistogramBucket(
+            category_id=category_id,
+            difficulty_id=difficulty_id,
+            question_count=question_count,
+            score=score,
+            sessions=count,
+        )
+        for (category_id, difficulty_id, question_count, score), count in buckets.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0018_quiz_session_category_difficulty'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoreHistogramBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('question_count', models.PositiveIntegerField()),
+                ('score', models.PositiveIntegerField()),
+                ('sessions', models.IntegerField(default=0)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='score_buckets', to='quiz.category')),
+                ('difficulty', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='score_buckets', to='quiz.difficultylevel')),
+            ],
+            options={
+                'unique_together': {('category', 'difficulty', 'question_count', 'score')},
+            },
+        ),
+        migrations.RunPython(backfill_score_histograms, migrations.RunPython.noop),
+    ]
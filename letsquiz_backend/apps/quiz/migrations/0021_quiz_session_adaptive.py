@@ -0,0 +1,28 @@
+# Generated by Django 4.2.1 on 2026-10-19 13:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0020_question_stat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizsession',
+            name='ability',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='quizsession',
+            name='is_adaptive',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='quizsession',
+            name='target_question_count',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
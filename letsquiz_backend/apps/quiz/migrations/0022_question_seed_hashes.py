@@ -0,0 +1,46 @@
+# Generated by Django 4.2.1 on 2026-10-19 13:46
+
+from django.db import migrations, models
+
+
+def backfill_question_hashes(apps, schema_editor):
+    from apps.quiz.seed_io import backfill_question_hashes as backfill
+
+    backfill(models={'Question': apps.get_model('quiz', 'Question')})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0021_quiz_session_adaptive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeedManifest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data_file', models.CharField(max_length=500)),
+                ('file_hash', models.CharField(db_index=True, max_length=64)),
+                ('entries', models.IntegerField(default=0)),
+                ('created', models.IntegerField(default=0)),
+                ('updated', models.IntegerField(default=0)),
+                ('unchanged', models.IntegerField(default=0)),
+                ('removed', models.IntegerField(default=0)),
+                ('skipped', models.IntegerField(default=0)),
+                ('seeded_questions', models.IntegerField(default=0)),
+                ('applied_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='seed_key',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=40),
+        ),
+        migrations.RunPython(backfill_question_hashes, migrations.RunPython.noop),
+    ]
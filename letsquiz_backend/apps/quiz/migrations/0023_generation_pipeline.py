@@ -0,0 +1,51 @@
+# Generated by Django 4.2.1 on 2026-10-19 14:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0022_question_seed_hashes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='llmgenerationtask',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='llmgenerationtask',
+            name='next_attempt_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='llmgenerationtask',
+            name='requested_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='llmgenerationtask',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='is_generated',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AlterField(
+            model_name='llmgenerationtask',
+            name='status',
+            field=models.CharField(choices=[('Pending', 'Pending'), ('Running', 'Running'), ('Success', 'Success'), ('Failed', 'Failed')], default='Pending', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='llmgenerationtask',
+            index=models.Index(fields=['status', 'next_attempt_at'], name='gen_task_status_next_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['is_generated', 'category', 'difficulty'], name='question_gen_cat_diff_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.1 on 2026-10-19 14:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def link_existing_categories(apps, schema_editor):
+    # Every existing category is a root: only its depth-0 self link
+    Category = apps.get_model('quiz', 'Category')
+    CategoryClosure = apps.get_model('quiz', 'CategoryClosure')
+    CategoryClosure.objects.bulk_create(
+        [CategoryClosure(ancestor_id=category_id, descendant_id=category_id, depth=0)
+         for category_id in Category.objects.values_list('id', flat=True)],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0023_generation_pipeline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='children', to='quiz.category'),
+        ),
+        migrations.CreateModel(
+            name='CategoryClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveSmallIntegerField(default=0)),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='quiz.category')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='quiz.category')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['descendant', 'depth'], name='category_closure_desc_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='categoryclosure',
+            constraint=models.UniqueConstraint(fields=('ancestor', 'descendant'), name='category_closure_pair_uniq'),
+        ),
+        migrations.RunPython(link_existing_categories, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 4.2.1 on 2026-10-19 14:40
+
+import re
+
+from django.db import migrations, models
+
+
+def tags_from_metadata(apps, schema_editor):
+    """Promote ``metadata_json["tags"]`` lists to Tag rows."""
+    Question = apps.get_model('quiz', 'Question')
+    Tag = apps.get_model('quiz', 'Tag')
+    Through = Question.tags.through
+
+    names_by_question = {}
+    for question_id, metadata in Question.objects.filter(metadata_json__has_key='tags').values_list('id', 'metadata_json'):
+        tags = metadata.get('tags') if isinstance(metadata, dict) else None
+        if isinstance(tags, str):
+            tags = [tags]
+        names = {
+            re.sub(r'\s+', ' ', re.sub(r'[_\-]+', ' ', str(tag).strip().lower()))[:50]
+            for tag in tags or []
+        }
+        names.discard('')
+        if names:
+            names_by_question[question_id] = names
+    if not names_by_question:
+        return
+
+    all_names = set().union(*names_by_question.values())
+    Tag.objects.bulk_create([Tag(name=name) for name in all_names], ignore_conflicts=True)
+    tag_ids = dict(Tag.objects.filter(name__in=all_names).values_list('name', 'id'))
+    Through.objects.bulk_create(
+        [
+            Through(question_id=question_id, tag_id=tag_ids[name])
+            for question_id, names in names_by_question.items()
+            for name in names
+        ],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0024_category_hierarchy'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='tags',
+            field=models.ManyToManyField(blank=True, related_name='questions', to='quiz.tag'),
+        ),
+        migrations.RunPython(tags_from_metadata, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.1 on 2026-10-19 14:58
+
+from django.db import migrations, models
+
+
+def rebuild_daily_stats(apps, schema_editor):
+    # Drops rows duplicated under NULL dims before the partial constraints are added
+    from apps.quiz.stats_aggregates import rebuild_daily_stats
+
+    rebuild_daily_stats(models={
+        name: apps.get_model('quiz', name)
+        for name in ('QuizSession', 'QuizSessionQuestion', 'UserDailyStat')
+    })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0025_question_tags'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='userdailystat',
+            unique_together=set(),
+        ),
+        migrations.RunPython(rebuild_daily_stats, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='userdailystat',
+            constraint=models.UniqueConstraint(condition=models.Q(('category__isnull', False), ('difficulty__isnull', False)), fields=('user', 'day', 'category', 'difficulty'), name='user_daily_stat_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='userdailystat',
+            constraint=models.UniqueConstraint(condition=models.Q(('category__isnull', False), ('difficulty__isnull', True)), fields=('user', 'day', 'category'), name='user_daily_stat_no_difficulty_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='userdailystat',
+            constraint=models.UniqueConstraint(condition=models.Q(('category__isnull', True), ('difficulty__isnull', False)), fields=('user', 'day', 'difficulty'), name='user_daily_stat_no_category_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='userdailystat',
+            constraint=models.UniqueConstraint(condition=models.Q(('category__isnull', True), ('difficulty__isnull', True)), fields=('user', 'day'), name='user_daily_stat_no_dims_uniq'),
+        ),
+    ]
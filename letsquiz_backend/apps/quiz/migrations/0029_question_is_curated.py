@@ -0,0 +1,34 @@
+# Generated by Django 4.2.1 on 2026-10-19 15:11
+
+from django.db import migrations, models
+
+
+def move_editor_questions_to_curated(apps, schema_editor):
+    # Only the bulk question API sets created_by; its questions were marked seeded until now
+    Question = apps.get_model('quiz', 'Question')
+    Question.objects.filter(is_seeded=True, created_by__isnull=False).update(is_seeded=False, is_curated=True)
+
+
+def move_curated_questions_to_seeded(apps, schema_editor):
+    Question = apps.get_model('quiz', 'Question')
+    Question.objects.filter(is_curated=True).update(is_seeded=True, is_curated=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0028_index_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='is_curated',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['is_curated', 'category', 'difficulty'], name='question_cur_cat_diff_idx'),
+        ),
+        migrations.RunPython(move_editor_questions_to_curated, move_curated_questions_to_seeded),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 4.2.1 on 2026-10-19 15:17
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def merge_duplicate_buckets(apps, schema_editor):
+    # Buckets with a NULL category/difficulty could be created twice; fold each
+    # duplicate set into its oldest row before the partial constraints are added
+    ScoreHistogramBucket = apps.get_model('quiz', 'ScoreHistogramBucket')
+    duplicates = (
+        ScoreHistogramBucket.objects
+        .values('category_id', 'difficulty_id', 'question_count', 'score')
+        .annotate(rows=Count('id'), keep_id=Min('id'), total=Sum('sessions'))
+        .filter(rows__gt=1)
+    )
+    for duplicate in duplicates:
+        same = ScoreHistogramBucket.objects.filter(
+            category_id=duplicate['category_id'],
+            difficulty_id=duplicate['difficulty_id'],
+            question_count=duplicate['question_count'],
+            score=duplicate['score'],
+        )
+        same.exclude(id=duplicate['keep_id']).delete()
+        same.filter(id=duplicate['keep_id']).update(sessions=duplicate['total'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0029_question_is_curated'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='scorehistogrambucket',
+            unique_together=set(),
+        ),
+        migrations.RunPython(merge_duplicate_buckets, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='scorehistogrambucket',
+            index=models.Index(fields=['category', 'difficulty', 'question_count'], name='score_bucket_histogram_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='scorehistogrambucket',
+            constraint=models.UniqueConstraint(condition=models.Q(('category__isnull', False), ('difficulty__isnull', False)), fields=('category', 'difficulty', 'question_count', 'score'), name='score_bucket_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='scorehistogrambucket',
+            constraint=models.UniqueConstraint(condition=models.Q(('category__isnull', False), ('difficulty__isnull', True)), fields=('category', 'question_count', 'score'), name='score_bucket_no_difficulty_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='scorehistogrambucket',
+            constraint=models.UniqueConstraint(condition=models.Q(('category__isnull', True), ('difficulty__isnull', False)), fields=('difficulty', 'question_count', 'score'), name='score_bucket_no_category_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='scorehistogrambucket',
+            constraint=models.UniqueConstraint(condition=models.Q(('category__isnull', True), ('difficulty__isnull', True)), fields=('question_count', 'score'), name='score_bucket_no_dims_uniq'),
+        ),
+    ]
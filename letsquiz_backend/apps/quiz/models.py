@@ -1,7 +1,10 @@
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.conf import settings 
 
+from .seed_io import question_content_hash, question_seed_key
+
 # Define the User model extending Django's AbstractUser
 class User(AbstractUser):
     username = models.CharField(max_length=150, unique=True)
@@ -49,13 +52,38 @@ class User(AbstractUser):
 class Category(models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True, null=True)
+    # Sub-topics (Science -> Physics -> Optics); CategoryClosure holds the transitive links
+    # PROTECT: deleting a category with sub-topics must not silently delete them and their questions
+    parent = models.ForeignKey('self', on_delete=models.PROTECT, related_name='children', null=True, blank=True)
 
     def __str__(self):
         return self.name
 
+    def clean(self):
+        from .category_tree import would_create_cycle
+
+        if would_create_cycle(self.pk, self.parent_id):
+            raise ValidationError({'parent': 'A category cannot be moved under itself or one of its sub-topics.'})
+
     class Meta:
         verbose_name_plural = "Categories"
 
+
+# Every (ancestor, descendant) pair of the category tree, including each
+# category with itself at depth 0: "questions under X" is one indexed join
+class CategoryClosure(models.Model):
+    ancestor = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='descendant_links')
+    descendant = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='ancestor_links')
+    depth = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['ancestor', 'descendant'], name='category_closure_pair_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['descendant', 'depth'], name='category_closure_desc_idx'),
+        ]
+
 # Define the DifficultyLevel model
 class DifficultyLevel(models.Model):
     label = models.CharField(max_length=50, unique=True)
@@ -64,6 +92,23 @@ class DifficultyLevel(models.Model):
     def __str__(self):
         return self.label
 
+# Question tags ("space", "ancient rome"); names are stored normalized (tag_index.normalize_tag)
+class Tag(models.Model):
+    name = models.CharField(max_length=50, unique=True)
+
+    def __str__(self):
+        return self.name
+
+# Version stamps of in-memory indexes built from question data (tag_index.py). Kept in the
+# database so every process sees a bump, whatever the cache backend.
+class IndexVersion(models.Model):
+    name = models.CharField(max_length=50, unique=True)
+    version = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+
 # Define the Question model
 class Question(models.Model):
     category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='questions', null=True, blank=True)
@@ -74,6 +119,15 @@ class Question(models.Model):
     metadata_json = models.JSONField(blank=True, null=True) 
     is_seeded = models.BooleanField(default=False) 
     is_fallback = models.BooleanField(default=False) 
+    # Accepted output of the generation pipeline (generation.py); playable like seeded questions
+    is_generated = models.BooleanField(default=False)
+    # Created by content editors through the bulk API (bulk_questions.py); playable like seeded
+    # questions, but outside the seed file's scope, so seed runs never prune them
+    is_curated = models.BooleanField(default=False)
+    # Identity and content hashes (see seed_io.py) for incremental re-seeds and dedupe; kept current by save()
+    seed_key = models.CharField(max_length=40, blank=True, default='', db_index=True)
+    content_hash = models.CharField(max_length=64, blank=True, default='', db_index=True)
+    tags = models.ManyToManyField(Tag, related_name='questions', blank=True)
     created_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
@@ -82,14 +136,56 @@ class Question(models.Model):
         related_name='created_questions'
     )
 
+    # Fields that seed_key/content_hash are computed from
+    IDENTITY_FIELDS = {
+        'question_text', 'category', 'category_id', 'difficulty', 'difficulty_id',
+        'correct_answer', 'answer_options', 'metadata_json',
+    }
+
     def __str__(self):
         return f"{self.question_text[:50]}..." 
 
+    def stamp_seed_identity(self):
+        """Recompute seed_key/content_hash from the current field values."""
+        self.seed_key = question_seed_key(self.question_text, self.category_id, self.difficulty_id)
+        self.content_hash = question_content_hash(
+            self.seed_key, self.correct_answer, self.answer_options, self.metadata_json,
+        )
+
+    def save(self, *args, **kwargs):
+        # Admin and other ORM saves keep the hashes in step; bulk paths stamp explicitly
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            self.stamp_seed_identity()
+        elif self.IDENTITY_FIELDS.intersection(update_fields):
+            self.stamp_seed_identity()
+            kwargs['update_fields'] = {*update_fields, 'seed_key', 'content_hash'}
+        super().save(*args, **kwargs)
+
     class Meta:
         indexes = [
             models.Index(fields=['is_seeded', 'category', 'difficulty'], name='question_seed_cat_diff_idx'),
+            models.Index(fields=['is_generated', 'category', 'difficulty'], name='question_gen_cat_diff_idx'),
+            models.Index(fields=['is_curated', 'category', 'difficulty'], name='question_cur_cat_diff_idx'),
         ]
 
+# One row per completed seed_questions run; a run over the same file as the latest
+# manifest (same hash, unchanged seeded-row count) is skipped.
+class SeedManifest(models.Model):
+    data_file = models.CharField(max_length=500)
+    file_hash = models.CharField(max_length=64, db_index=True)
+    entries = models.IntegerField(default=0)
+    created = models.IntegerField(default=0)
+    updated = models.IntegerField(default=0)
+    unchanged = models.IntegerField(default=0)
+    removed = models.IntegerField(default=0)
+    skipped = models.IntegerField(default=0)
+    seeded_questions = models.IntegerField(default=0)
+    applied_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Seed of {self.data_file} at {self.applied_at}"
+
 # Define the QuizSession model
 class QuizSession(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='quiz_sessions', null=True, blank=True)
@@ -97,6 +193,20 @@ class QuizSession(models.Model):
     completed_at = models.DateTimeField(null=True, blank=True)
     score = models.IntegerField(default=0)
     is_group_session = models.BooleanField(default=False) 
+    # The requested category (NULL for mixed play) and the questions' shared difficulty (NULL when
+    # mixed), stored so history pages, leaderboards and histograms need no joins through questions
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True, related_name='quiz_sessions')
+    difficulty = models.ForeignKey(DifficultyLevel, on_delete=models.SET_NULL, null=True, blank=True, related_name='quiz_sessions')
+    # Adaptive sessions get one question at a time, chosen near the running ability estimate
+    is_adaptive = models.BooleanField(default=False)
+    target_question_count = models.PositiveIntegerField(null=True, blank=True)
+    ability = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of a user's history: (user, started_at, id) range scans
+            models.Index(fields=['user', 'started_at', 'id'], name='quiz_session_user_started_idx'),
+        ]
 
     def __str__(self):
         return f"Session {self.id} for {self.user.username if self.user else 'Guest'}"
@@ -110,6 +220,8 @@ class QuizSession(models.Model):
 class GroupPlayer(models.Model):
     quiz_session = models.ForeignKey(QuizSession, on_delete=models.CASCADE, related_name='group_players')
     name = models.CharField(max_length=100)
+    # Set when the player name is a registered user's email (indexed FK lookups for profiles)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='group_players')
     score = models.IntegerField(default=0)
     errors = models.JSONField(default=list, blank=True, null=True)
     answers = models.JSONField(default=list)
@@ -145,12 +257,156 @@ class LLMGenerationTask(models.Model):
     triggered_at = models.DateTimeField(auto_now_add=True)
     STATUS_CHOICES = [
         ('Pending', 'Pending'),
+        ('Running', 'Running'),
         ('Success', 'Success'),
         ('Failed', 'Failed'),
     ]
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='Pending')
     retry_count = models.IntegerField(default=0) 
     task_result = models.JSONField(blank=True, null=True) 
+    # Questions asked of the generator; a failed attempt is retried after next_attempt_at (see generation.py)
+    requested_count = models.IntegerField(default=0)
+    next_attempt_at = models.DateTimeField(null=True, blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='gen_task_status_next_idx'),
+        ]
 
     def __str__(self):
         return f"LLM Task {self.id} - Status: {self.status}"
+
+# Define incrementally maintained per-user stat aggregates.
+# Updated in the same transaction as session starts/saves and answer submits
+# (see stats_aggregates.py); rebuild with `manage.py rebuild_user_stats`.
+class UserStatTotals(models.Model):
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='stat_totals')
+    total_quizzes = models.IntegerField(default=0)
+    total_score = models.IntegerField(default=0)
+    total_questions = models.IntegerField(default=0)
+    correct_answers = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"Stats for user {self.user_id}"
+
+class UserCategoryStat(models.Model):
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='category_stats')
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='user_stats')
+    total_questions = models.IntegerField(default=0)
+    correct_answers = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('user', 'category')
+
+    def __str__(self):
+        return f"User {self.user_id} - Category {self.category_id}"
+
+class UserDifficultyStat(models.Model):
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='difficulty_stats')
+    difficulty = models.ForeignKey(DifficultyLevel, on_delete=models.CASCADE, related_name='user_stats')
+    total_questions = models.IntegerField(default=0)
+    correct_answers = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('user', 'difficulty')
+
+    def __str__(self):
+        return f"User {self.user_id} - Difficulty {self.difficulty_id}"
+
+# Daily per-user rollups (UTC day of the session start) for windowed stats.
+# quizzes/score are attributed to the session's category/difficulty.
+class UserDailyStat(models.Model):
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='daily_stats')
+    day = models.DateField()
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, null=True, blank=True, related_name='daily_user_stats')
+    difficulty = models.ForeignKey(DifficultyLevel, on_delete=models.CASCADE, null=True, blank=True, related_name='daily_user_stats')
+    quizzes = models.IntegerField(default=0)
+    score = models.IntegerField(default=0)
+    total_questions = models.IntegerField(default=0)
+    correct_answers = models.IntegerField(default=0)
+
+    class Meta:
+        # NULLs never compare equal in a unique index, so each combination of
+        # missing category/difficulty gets its own partial constraint
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'day', 'category', 'difficulty'],
+                condition=models.Q(category__isnull=False, difficulty__isnull=False),
+                name='user_daily_stat_uniq',
+            ),
+            models.UniqueConstraint(
+                fields=['user', 'day', 'category'],
+                condition=models.Q(category__isnull=False, difficulty__isnull=True),
+                name='user_daily_stat_no_difficulty_uniq',
+            ),
+            models.UniqueConstraint(
+                fields=['user', 'day', 'difficulty'],
+                condition=models.Q(category__isnull=True, difficulty__isnull=False),
+                name='user_daily_stat_no_category_uniq',
+            ),
+            models.UniqueConstraint(
+                fields=['user', 'day'],
+                condition=models.Q(category__isnull=True, difficulty__isnull=True),
+                name='user_daily_stat_no_dims_uniq',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'day'], name='user_daily_stat_user_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"User {self.user_id} on {self.day}"
+
+# Completed solo sessions per score, for each (category, difficulty, question count).
+# One row per score bucket; results pages read O(question_count) rows for percentiles.
+class ScoreHistogramBucket(models.Model):
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, null=True, blank=True, related_name='score_buckets')
+    difficulty = models.ForeignKey(DifficultyLevel, on_delete=models.CASCADE, null=True, blank=True, related_name='score_buckets')
+    question_count = models.PositiveIntegerField()
+    score = models.PositiveIntegerField()
+    sessions = models.IntegerField(default=0)
+
+    class Meta:
+        # As for UserDailyStat: one partial constraint per combination of missing
+        # category/difficulty (adaptive sessions have no difficulty), since NULLs never collide
+        constraints = [
+            models.UniqueConstraint(
+                fields=['category', 'difficulty', 'question_count', 'score'],
+                condition=models.Q(category__isnull=False, difficulty__isnull=False),
+                name='score_bucket_uniq',
+            ),
+            models.UniqueConstraint(
+                fields=['category', 'question_count', 'score'],
+                condition=models.Q(category__isnull=False, difficulty__isnull=True),
+                name='score_bucket_no_difficulty_uniq',
+            ),
+            models.UniqueConstraint(
+                fields=['difficulty', 'question_count', 'score'],
+                condition=models.Q(category__isnull=True, difficulty__isnull=False),
+                name='score_bucket_no_category_uniq',
+            ),
+            models.UniqueConstraint(
+                fields=['question_count', 'score'],
+                condition=models.Q(category__isnull=True, difficulty__isnull=True),
+                name='score_bucket_no_dims_uniq',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['category', 'difficulty', 'question_count'], name='score_bucket_histogram_idx'),
+        ]
+
+    def __str__(self):
+        return f"Cat {self.category_id} / Diff {self.difficulty_id} / {self.question_count}q: score {self.score}"
+
+# Global answer counters per question, flushed in bulk from the in-memory/Redis buffer
+# in apps/quiz/question_stats.py (answer endpoints never write these rows directly).
+class QuestionStat(models.Model):
+    question = models.OneToOneField(Question, on_delete=models.CASCADE, primary_key=True, related_name='stat')
+    attempts = models.IntegerField(default=0)
+    correct = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Question {self.question_id}: {self.correct}/{self.attempts}"
@@ -0,0 +1,283 @@
+"""
+Near-duplicate question detection.
+
+Exact dedupe (``seed_key``) only catches questions that normalize to the same
+text. Rephrasings such as "What is the largest continent on Earth?" and "Which
+continent is the largest on Earth?" are found with MinHash and
+locality-sensitive hashing instead of pairwise comparison:
+
+- A question is reduced to shingles: its content words (stopwords dropped,
+  plural ``s`` stripped) and their character trigrams, plus the same for the
+  correct answer, counted ``ANSWER_WEIGHT`` times under prefixes. Word order
+  does not matter, and the answer keeps "capital of France" apart from
+  "capital of Spain" and a question apart from its inverse.
+- ``NUM_PERM`` hash permutations turn the shingle set into a signature whose
+  positions agree with probability equal to the Jaccard similarity. Each
+  position keeps 16 bits.
+- The signature is cut into ``BANDS`` bands of ``ROWS`` values. Questions of
+  the same category sharing any band are candidates, and candidates are
+  confirmed with the exact Jaccard similarity of their shingle sets.
+
+Each question costs one signature and ``BANDS`` dictionary lookups, so a pass
+over the bank grows linearly with its size.
+"""
+import logging
+import random
+import re
+import threading
+import time
+import zlib
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+
+from .level1_config import normalize_question_key
+from .models import Question
+
+logger = logging.getLogger(__name__)
+
+NUM_PERM = 64
+BANDS = 16
+# 16-bit minhashes per band: four make one 64-bit band value
+ROWS = NUM_PERM // BANDS
+_SIGNATURE_BYTES = NUM_PERM * 2
+
+# A bucket member is confirmed against at most this many earlier members, so a
+# bucket of thousands of copies stays linear (clusters are merged transitively)
+MAX_BUCKET_COMPARISONS = 16
+
+DEFAULT_THRESHOLD = 0.75
+# Copies of the answer shingles in a question's set
+ANSWER_WEIGHT = 2
+
+STOPWORDS = frozenset(
+    'a an and are as at be by called can did do does for from has have how in into is it its known '
+    'of on or out same so that the their these this to was were what when where which who whom whose '
+    'why with'.split()
+)
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(0x5EED)
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(_MERSENNE_PRIME)) for _ in range(NUM_PERM)]
+
+# Per word (with its answer prefix): the element-wise minimum of the permuted
+# hashes of its shingles, and the shingle hashes themselves. Questions reuse a
+# limited vocabulary, so a signature is mostly a minimum over a few cached rows.
+_word_features: Dict[str, Tuple[array, Tuple[int, ...]]] = {}
+_WORD_CACHE_LIMIT = 250_000
+
+_WORD_RE = re.compile(r'[a-z0-9]+')
+
+
+def _words(text: str) -> List[str]:
+    words = _WORD_RE.findall(normalize_question_key(text))
+    content = [word for word in words if word not in STOPWORDS] or words
+    return [word[:-1] if len(word) > 3 and word.endswith('s') and not word.endswith('ss') else word for word in content]
+
+
+def _word_shingles(word: str, prefix: str = '') -> List[str]:
+    padded = f"#{word}#"
+    return [f"{prefix}{word}"] + [f"{prefix}{padded[start:start + 3]}" for start in range(len(padded) - 2)]
+
+
+def _prefixed_words(question_text: str, correct_answer: str) -> List[str]:
+    words = _words(question_text)
+    if correct_answer:
+        answer_words = _words(correct_answer)
+        for copy in range(ANSWER_WEIGHT):
+            words.extend(f"a{copy}:{word}" for word in answer_words)
+    return words
+
+
+def _features(word: str) -> Tuple[array, Tuple[int, ...]]:
+    features = _word_features.get(word)
+    if features is None:
+        if len(_word_features) >= _WORD_CACHE_LIMIT:
+            _word_features.clear()
+        prefix, _, bare = word.rpartition(':')
+        hashes = tuple({
+            zlib.crc32(shingle.encode()) for shingle in _word_shingles(bare, f"{prefix}:" if prefix else '')
+        })
+        # Top 16 bits of each 61-bit permutation value
+        minimums = array('H', [
+            min((a * value + b) % _MERSENNE_PRIME for value in hashes) >> 45
+            for a, b in _PERMUTATIONS
+        ])
+        features = _word_features[word] = (minimums, hashes)
+    return features
+
+
+def fingerprint(question_text: str, correct_answer: str = '') -> Tuple[bytes, frozenset]:
+    """(MinHash signature, shingle hashes) of a question."""
+    features = [_features(word) for word in _prefixed_words(question_text, correct_answer)]
+    if not features:
+        return bytes(_SIGNATURE_BYTES), frozenset()
+    if len(features) == 1:
+        minimums, hashes = features[0]
+        return minimums.tobytes(), frozenset(hashes)
+    signature = array('H', map(min, *(minimums for minimums, _ in features)))
+    return signature.tobytes(), frozenset().union(*(hashes for _, hashes in features))
+
+
+def jaccard(left: Iterable[int], right: Iterable[int]) -> float:
+    """Jaccard similarity of two collections of distinct shingle hashes."""
+    if not isinstance(left, (set, frozenset)):
+        left = set(left)
+    right_count = len(right)
+    if not left or not right_count:
+        return 0.0
+    shared = len(left.intersection(right))
+    return shared / (len(left) + right_count - shared)
+
+
+def _band_values(signature: bytes) -> array:
+    values = array('Q')
+    values.frombytes(signature)
+    return values
+
+
+def find_near_duplicate_groups(
+    rows: Iterable[Tuple[int, Optional[int], str, str]],
+    threshold: float = DEFAULT_THRESHOLD,
+) -> List[List[int]]:
+    """
+    Clusters of near-duplicate questions among ``(id, category_id, text,
+    correct_answer)`` rows, each as ascending ids; only groups of two or more.
+
+    Signatures and shingles are kept in flat arrays and the LSH buckets are
+    built one band at a time, so memory stays a few hundred bytes per question.
+    """
+    ids = array('Q')
+    scopes = array('I')
+    # BANDS 64-bit band values per question
+    bands = array('Q')
+    shingle_store = array('I')
+    offsets = array('Q', [0])
+    for question_id, category_id, question_text, correct_answer in rows:
+        signature, shingles = fingerprint(question_text, correct_answer)
+        ids.append(question_id)
+        scopes.append(category_id or 0)
+        bands.frombytes(signature)
+        shingle_store.extend(shingles)
+        offsets.append(len(shingle_store))
+
+    total = len(ids)
+    parent = array('Q', range(total))
+
+    def root(index: int) -> int:
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    def shingles_of(index: int):
+        return shingle_store[offsets[index]:offsets[index + 1]]
+
+    for band in range(BANDS):
+        buckets: Dict[int, object] = {}
+        for index, (scope, value) in enumerate(zip(scopes, bands[band::BANDS])):
+            # Questions of different categories never share a bucket
+            key = (scope << 64) | value
+            members = buckets.get(key)
+            if members is None:
+                # Most keys are unique: store the bare index until a second one arrives
+                buckets[key] = index
+                continue
+            if not isinstance(members, list):
+                members = buckets[key] = [members]
+            own_shingles = None
+            for other in members[:MAX_BUCKET_COMPARISONS]:
+                index_root, other_root = root(index), root(other)
+                if index_root == other_root:
+                    continue
+                if own_shingles is None:
+                    own_shingles = set(shingles_of(index))
+                if jaccard(own_shingles, shingles_of(other)) >= threshold:
+                    parent[max(index_root, other_root)] = min(index_root, other_root)
+            members.append(index)
+
+    groups: Dict[int, List[int]] = {}
+    for index in range(total):
+        groups.setdefault(root(index), []).append(ids[index])
+    return [sorted(group) for group in groups.values() if len(group) > 1]
+
+
+class NearDuplicateIndex:
+    """Incremental LSH index of one question pool, for checks before inserting."""
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self.buckets: List[Dict[int, List[int]]] = [{} for _ in range(BANDS)]
+        self.shingles: Dict[int, frozenset] = {}
+
+    def __len__(self):
+        return len(self.shingles)
+
+    def add(self, question_id: int, question_text: str, correct_answer: str = ''):
+        signature, shingles = fingerprint(question_text, correct_answer)
+        self.shingles[question_id] = shingles
+        for band, value in enumerate(_band_values(signature)):
+            self.buckets[band].setdefault(value, []).append(question_id)
+
+    def find(self, question_text: str, correct_answer: str = '') -> Optional[Tuple[int, float]]:
+        """(question_id, similarity) of the closest indexed question at or above the threshold."""
+        signature, shingles = fingerprint(question_text, correct_answer)
+        candidates = set()
+        for band, value in enumerate(_band_values(signature)):
+            candidates.update(self.buckets[band].get(value, ()))
+
+        best = None
+        for question_id in candidates:
+            similarity = jaccard(shingles, self.shingles[question_id])
+            if similarity >= self.threshold and (best is None or similarity > best[1]):
+                best = (question_id, similarity)
+        return best
+
+
+_local_indexes: Dict[Optional[int], Tuple[float, NearDuplicateIndex]] = {}
+_local_lock = threading.Lock()
+
+
+def get_near_duplicate_index(category_id: Optional[int]) -> NearDuplicateIndex:
+    """Index of a category's questions, kept in process memory for NEAR_DUPLICATE_INDEX_TTL seconds."""
+    ttl = getattr(settings, 'NEAR_DUPLICATE_INDEX_TTL', 300)
+    now = time.monotonic()
+    with _local_lock:
+        cached = _local_indexes.get(category_id)
+    if cached is not None and now - cached[0] < ttl:
+        return cached[1]
+
+    index = NearDuplicateIndex(getattr(settings, 'NEAR_DUPLICATE_THRESHOLD', DEFAULT_THRESHOLD))
+    queryset = Question.objects.filter(category_id=category_id) if category_id else Question.objects.all()
+    for question_id, question_text, correct_answer in (
+        queryset.values_list('id', 'question_text', 'correct_answer').iterator(chunk_size=2000)
+    ):
+        index.add(question_id, question_text, correct_answer)
+    logger.info(f"Built near-duplicate index for category {category_id}: {len(index)} questions")
+    with _local_lock:
+        _local_indexes[category_id] = (now, index)
+    return index
+
+
+def find_near_duplicate(
+    question_text: str,
+    correct_answer: str = '',
+    category_id: Optional[int] = None,
+) -> Optional[Tuple[int, float]]:
+    """(question_id, similarity) of an existing question the new one rephrases, or None."""
+    return get_near_duplicate_index(category_id).find(question_text, correct_answer)
+
+
+def remember_question(question: Question):
+    """Add a just-inserted question to the loaded indexes covering it."""
+    with _local_lock:
+        indexes = [_local_indexes.get(question.category_id), _local_indexes.get(None)]
+    for cached in indexes:
+        if cached is not None:
+            cached[1].add(question.id, question.question_text, question.correct_answer)
+
+
+def clear_local_indexes():
+    with _local_lock:
+        _local_indexes.clear()
@@ -0,0 +1,447 @@
+"""
+Memory-mapped, read-only question bank for the gameplay read path.
+
+When ``QUESTION_BANK_MMAP`` is enabled, question sampling, question payloads
+and answer checking are served from one file (``QUESTION_BANK_PATH``, in
+/dev/shm by default) that every worker maps read-only, so all processes on a
+host share the same page cache and the database is out of the quiz read path.
+
+Layout (little-endian):
+
+    header    magic, version stamp, question/group counts, section offsets
+    entries   one fixed-size entry per question, sorted by id:
+              id, category, difficulty, normalized-text hash, record offset/length
+    groups    (category, difficulty) -> slice of the members array
+    members   entry positions (u32) per group, for O(1) sampling by position
+    catalog   JSON: allowed categories, their sub-topic ids and difficulty labels
+    records   JSON payload per question (QuestionSerializer output)
+
+Request paths never build the bank. Commits that change questions (see
+``cache_utils.invalidate_question_data``) stamp a "changed at" time in the
+database (an ``IndexVersion`` row, so every process sees it) and request one
+debounced rebuild, which writes a new file and renames it over the old one.
+The rebuild runs as the ``rebuild_question_bank`` Celery task when a broker is
+configured (that worker must see the same ``QUESTION_BANK_PATH`` as the web
+workers), otherwise on a background thread of the web process (background.py);
+``manage.py build_question_bank`` builds it by hand. Until a build newer than
+the last change is published (or while no bank exists yet), readers get None
+and serve from the database. Readers notice the new inode within
+``QUESTION_BANK_CHECK_INTERVAL`` seconds and swap mappings; the version stamp
+in the header identifies which build a process is serving.
+"""
+import hashlib
+import json
+import logging
+import mmap
+import os
+import random
+import struct
+import tempfile
+import threading
+import time
+from array import array
+from collections import namedtuple
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - POSIX only, like SharedMemoryCache
+    fcntl = None
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+
+from core.redis_utils import cache_delete, cache_get, cache_set
+
+from .level1_config import normalize_label, normalize_question_key, playable_question_q
+
+logger = logging.getLogger(__name__)
+
+REBUILD_QUEUED_KEY = "question_bank:rebuild_queued"
+CHANGED_AT_NAME = "question_bank"  # IndexVersion row holding the last change time (ns)
+
+MAGIC = b'LQBANK01'
+# magic, version, questions, groups, groups offset, members offset, catalog offset, catalog length, records offset
+HEADER = struct.Struct('<8sQIIQQQIQ')
+HEADER_SIZE = 64
+# question id, category id, difficulty id, text hash, record offset, record length
+ENTRY = struct.Struct('<IIIQQI')
+# category id, difficulty id, first member, member count
+GROUP = struct.Struct('<IIII')
+
+BankEntry = namedtuple('BankEntry', ['id', 'category_id', 'difficulty_id'])
+
+
+def _text_hash(question_text: str) -> int:
+    digest = hashlib.blake2b(normalize_question_key(question_text).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+def default_bank_path() -> str:
+    configured = getattr(settings, 'QUESTION_BANK_PATH', '')
+    if configured:
+        return configured
+    directory = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    return os.path.join(directory, 'letsquiz-question-bank')
+
+
+class QuestionBank:
+    """Read-only view over one bank file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            self.identity = (stat.st_ino, stat.st_mtime_ns)
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (magic, self.version, self.question_count, group_count, groups_offset,
+         members_offset, catalog_offset, catalog_length, self._records_offset) = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self._mm.close()
+            raise ValueError(f'{path} is not a question bank file')
+
+        self._members = memoryview(self._mm)[members_offset:catalog_offset].cast('I')
+        self.groups: Dict[Tuple[int, int], Tuple[int, int]] = {}
+        for index in range(group_count):
+            category_id, difficulty_id, first, count = GROUP.unpack_from(self._mm, groups_offset + index * GROUP.size)
+            self.groups[(category_id, difficulty_id)] = (first, count)
+
+        catalog = json.loads(bytes(self._mm[catalog_offset:catalog_offset + catalog_length]))
+        self.categories = {int(category_id): name for category_id, name in catalog['categories'].items()}
+        self.difficulties = {int(difficulty_id): label for difficulty_id, label in catalog['difficulties'].items()}
+        self.descendants = {
+            int(category_id): frozenset(ids) for category_id, ids in catalog.get('descendants', {}).items()
+        }
+
+    def close(self):
+        self._members.release()
+        self._mm.close()
+
+    # Lookups
+
+    def _entry_at(self, position: int):
+        return ENTRY.unpack_from(self._mm, HEADER_SIZE + position * ENTRY.size)
+
+    def _find(self, question_id: int):
+        low, high = 0, self.question_count
+        while low < high:
+            middle = (low + high) // 2
+            entry = self._entry_at(middle)
+            if entry[0] == question_id:
+                return entry
+            if entry[0] < question_id:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def _record(self, entry) -> Dict:
+        offset, length = entry[4], entry[5]
+        start = self._records_offset + offset
+        return json.loads(self._mm[start:start + length])
+
+    def get_payload(self, question_id: int) -> Optional[Dict]:
+        entry = self._find(question_id)
+        return self._record(entry) if entry else None
+
+    def correct_answer(self, question_id: int) -> Optional[str]:
+        payload = self.get_payload(question_id)
+        return payload['correct_answer'] if payload else None
+
+    def has_category(self, category_id: int) -> bool:
+        return category_id in self.categories
+
+    def difficulty_ids(self, labels: Optional[Iterable[str]]) -> Optional[set]:
+        if labels is None:
+            return None
+        wanted = {normalize_label(label) for label in labels}
+        return {difficulty_id for difficulty_id, label in self.difficulties.items() if normalize_label(label) in wanted}
+
+    # Sampling
+
+    def _matching_groups(self, category_id: Optional[int], difficulty_labels) -> List[Tuple[int, int]]:
+        difficulty_ids = self.difficulty_ids(difficulty_labels)
+        category_ids = self.descendants.get(category_id, (category_id,)) if category_id else None
+        return [
+            span for (group_category, group_difficulty), span in self.groups.items()
+            if (category_ids is None or group_category in category_ids)
+            and (difficulty_ids is None or group_difficulty in difficulty_ids)
+        ]
+
+    def count(self, category_id: Optional[int] = None, difficulty_labels=None) -> int:
+        return sum(count for _, count in self._matching_groups(category_id, difficulty_labels))
+
+    def sample(self, category_id: Optional[int], difficulty_labels, count: int) -> List:
+        """Up to ``count`` random entries with distinct normalized text (no DB access)."""
+        spans = self._matching_groups(category_id, difficulty_labels)
+        total = sum(span_count for _, span_count in spans)
+        if total == 0 or count <= 0:
+            return []
+
+        def entry_for(virtual: int):
+            for first, span_count in spans:
+                if virtual < span_count:
+                    return self._entry_at(self._members[first + virtual])
+                virtual -= span_count
+
+        picked, seen_texts = [], set()
+        # Sample a few more ranks than needed so duplicate texts rarely force a second pass
+        first_pass = min(total, count * 2)
+        for virtual in random.sample(range(total), first_pass):
+            entry = entry_for(virtual)
+            if entry[3] in seen_texts:
+                continue
+            seen_texts.add(entry[3])
+            picked.append(entry)
+            if len(picked) == count:
+                return picked
+        if first_pass == total:
+            return picked
+
+        # Many duplicate texts: fall back to a full shuffled pass
+        picked_ids = {entry[0] for entry in picked}
+        for virtual in random.sample(range(total), total):
+            entry = entry_for(virtual)
+            if entry[0] in picked_ids or entry[3] in seen_texts:
+                continue
+            seen_texts.add(entry[3])
+            picked.append(entry)
+            if len(picked) == count:
+                break
+        return picked
+
+    def sample_entries(self, category_id: Optional[int], difficulty_labels, count: int) -> List[BankEntry]:
+        return [BankEntry(entry[0], entry[1] or None, entry[2] or None) for entry in self.sample(category_id, difficulty_labels, count)]
+
+    def sample_payloads(self, category_id: Optional[int], difficulty_labels, count: int) -> List[Dict]:
+        return [self._record(entry) for entry in self.sample(category_id, difficulty_labels, count)]
+
+
+def build_question_bank(path: Optional[str] = None) -> Dict:
+    """Write a new bank file and atomically rename it over ``path``."""
+    from .category_tree import load_category_tree
+    from .models import DifficultyLevel, Question
+    from .serializers import QuestionSerializer
+
+    path = path or default_bank_path()
+    started = time.monotonic()
+    version = time.time_ns()
+    tree = load_category_tree()
+    allowed_ids = tree.allowed_ids
+
+    entries = []
+    records = bytearray()
+    queryset = (
+        Question.objects
+        .filter(playable_question_q(), category_id__in=allowed_ids)
+        .select_related('category', 'difficulty')
+        .order_by('id')
+    )
+    for question in queryset.iterator(chunk_size=2000):
+        payload = json.dumps(QuestionSerializer(question).data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+        entries.append((
+            question.id,
+            question.category_id or 0,
+            question.difficulty_id or 0,
+            _text_hash(question.question_text),
+            len(records),
+            len(payload),
+        ))
+        records += payload
+
+    group_positions: Dict[Tuple[int, int], List[int]] = {}
+    for position, entry in enumerate(entries):
+        group_positions.setdefault((entry[1], entry[2]), []).append(position)
+    members = array('I')
+    groups = bytearray()
+    for (category_id, difficulty_id), positions in sorted(group_positions.items()):
+        groups += GROUP.pack(category_id, difficulty_id, len(members), len(positions))
+        members.extend(positions)
+
+    catalog = json.dumps({
+        'categories': {category_id: tree.names[category_id] for category_id in allowed_ids if category_id in tree.names},
+        # Categories with sub-topics: sampling a category covers its whole subtree
+        'descendants': {
+            category_id: sorted(tree.descendant_ids(category_id) & allowed_ids)
+            for category_id in allowed_ids
+            if len(tree.descendant_ids(category_id)) > 1
+        },
+        'difficulties': dict(DifficultyLevel.objects.values_list('id', 'label')),
+    }).encode('utf-8')
+
+    groups_offset = HEADER_SIZE + len(entries) * ENTRY.size
+    members_offset = groups_offset + len(groups)
+    members_offset += -members_offset % members.itemsize  # Align for memoryview.cast
+    catalog_offset = members_offset + len(members) * members.itemsize
+    records_offset = catalog_offset + len(catalog)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.question-bank-', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(HEADER.pack(
+                MAGIC, version, len(entries), len(group_positions), groups_offset,
+                members_offset, catalog_offset, len(catalog), records_offset,
+            ).ljust(HEADER_SIZE, b'\0'))
+            for entry in entries:
+                f.write(ENTRY.pack(*entry))
+            f.write(groups)
+            f.write(b'\0' * (members_offset - groups_offset - len(groups)))
+            f.write(members.tobytes())
+            f.write(catalog)
+            f.write(records)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+    report = {
+        'path': path,
+        'version': version,
+        'questions': len(entries),
+        'bytes': records_offset + len(records),
+        'elapsed_ms': round((time.monotonic() - started) * 1000, 1),
+    }
+    logger.info(f"Built question bank {report}")
+    return report
+
+
+# Per-process reader, swapped when the file on disk is replaced
+
+_bank: Optional[QuestionBank] = None
+_bank_current = False
+_bank_checked_at = 0.0
+_bank_lock = threading.Lock()
+
+
+def is_enabled() -> bool:
+    return bool(getattr(settings, 'QUESTION_BANK_MMAP', False))
+
+
+def _changed_at() -> int:
+    from .models import IndexVersion
+
+    return IndexVersion.objects.filter(name=CHANGED_AT_NAME).values_list('version', flat=True).first() or 0
+
+
+def _published_version(path: str) -> int:
+    """Version stamp in the header of the bank file at ``path`` (0 when there is none)."""
+    try:
+        with open(path, 'rb') as f:
+            magic, version = HEADER.unpack(f.read(HEADER.size))[:2]
+    except (OSError, struct.error):
+        return 0
+    return version if magic == MAGIC else 0
+
+
+def _build_locked(path: str) -> Optional[Dict]:
+    """
+    Build under the bank's file lock, so overlapping rebuilds run one after
+    another; skipped (None) when the published bank is already newer than the
+    last change, e.g. when several processes each requested the same rebuild.
+    """
+    if fcntl is None:
+        return build_question_bank(path)
+    with open(f'{path}.lock', 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            if _published_version(path) > _changed_at():
+                return None
+            return build_question_bank(path)
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def get_question_bank() -> Optional[QuestionBank]:
+    """
+    The current bank, or None when disabled, not built yet, or older than the
+    last question change (callers fall back to the DB).
+    """
+    global _bank, _bank_current, _bank_checked_at
+    if not is_enabled():
+        return None
+
+    interval = getattr(settings, 'QUESTION_BANK_CHECK_INTERVAL', 2)
+    now = time.monotonic()
+    bank = _bank
+    if bank is not None and now - _bank_checked_at < interval:
+        return bank if _bank_current else None
+
+    with _bank_lock:
+        _bank_checked_at = now
+        path = default_bank_path()
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            # Built by a worker, never here; the database serves until it is published
+            _bank_current = False
+            request_rebuild()
+            return None
+
+        if _bank is None or _bank.identity != (stat.st_ino, stat.st_mtime_ns):
+            try:
+                new_bank = QuestionBank(path)
+            except Exception as e:
+                logger.error(f"Failed to open question bank {path}: {e}")
+                new_bank = None
+            if new_bank is not None:
+                # The old mapping is released once no request holds it any more
+                previous, _bank = _bank, new_bank
+                if previous is not None:
+                    logger.info(f"Question bank swapped: version {previous.version} -> {new_bank.version}")
+        if _bank is None:
+            return None
+
+        # A build started before the last change may still serve removed or edited questions
+        try:
+            _bank_current = _bank.version > _changed_at()
+        except DatabaseError as e:
+            # Keep the last answer: the bank is what serves while the database is down
+            logger.warning(f"Could not read the question bank change stamp: {e}")
+        return _bank if _bank_current else None
+
+
+def request_rebuild():
+    """
+    Rebuild in the background (a Celery worker, or a thread of this process
+    without a broker). Requests within ``QUESTION_BANK_REBUILD_DELAY`` seconds
+    of a requested rebuild share it.
+    """
+    if cache_get(REBUILD_QUEUED_KEY):
+        return
+    from .background import run_in_background
+    from .tasks import rebuild_question_bank as rebuild_question_bank_task
+
+    delay = getattr(settings, 'QUESTION_BANK_REBUILD_DELAY', 5)
+    # Cleared when the rebuild starts; the TTL covers a rebuild that never runs
+    cache_set(REBUILD_QUEUED_KEY, True, timeout=delay + 60)
+    run_in_background(rebuild_question_bank_task, rebuild_question_bank, 'question-bank-rebuild', countdown=delay)
+
+
+def rebuild_question_bank() -> Optional[Dict]:
+    """Build and publish the bank unless already current (Celery task / background thread body)."""
+    # Cleared first, so changes committed during this build queue another one
+    cache_delete(REBUILD_QUEUED_KEY)
+    try:
+        return _build_locked(default_bank_path())
+    except Exception as e:
+        logger.error(f"Question bank rebuild failed; readers keep using the database: {e}", exc_info=True)
+        return None
+
+
+def _mark_changed():
+    from .models import IndexVersion
+
+    IndexVersion.objects.update_or_create(name=CHANGED_AT_NAME, defaults={'version': time.time_ns()})
+    request_rebuild()
+
+
+def rebuild_on_commit():
+    """Once the current transaction commits, stop serving the bank and queue a rebuild (no-op when disabled)."""
+    if is_enabled():
+        transaction.on_commit(_mark_changed)
@@ -0,0 +1,276 @@
+"""
+Per-question attempt/correct counters.
+
+Answer endpoints only bump counters in a buffer: Redis hash increments when
+Redis is enabled, otherwise an in-process dict. Recording never touches the
+database. The buffer is flushed to QuestionStat in bulk - one ``bulk_update``
+of ``F() + delta`` expressions per batch - by a per-process background thread
+every ``QUESTION_STATS_FLUSH_INTERVAL`` seconds (sooner once the local buffer
+holds ``QUESTION_STATS_FLUSH_THRESHOLD`` questions), by the
+``flush_question_stats`` beat task, and at process exit.
+"""
+import atexit
+import logging
+import os
+import threading
+import uuid
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, FloatField, ExpressionWrapper
+from django.utils import timezone
+
+from core.redis_utils import get_redis_client
+
+from .category_tree import questions_under_q
+from .models import Question, QuestionStat
+
+logger = logging.getLogger(__name__)
+
+REDIS_PENDING_KEY = "question_stats:pending"
+
+# {question_id: (attempts_delta, correct_delta)}
+Deltas = Dict[int, Tuple[int, int]]
+
+
+class QuestionStatsBuffer:
+    """Collects answer counters and periodically flushes them to the database."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending: Dict[int, List[int]] = {}
+        self._wake = threading.Event()
+        self._flusher_pid = None
+
+    def record(self, question_id: int, is_correct: bool):
+        self.record_many([(question_id, is_correct)])
+
+    def record_many(self, answers: Iterable[Tuple[int, bool]]):
+        """Count (question_id, is_correct) answers: one Redis round trip or one lock hold."""
+        answers = list(answers)
+        if not answers:
+            return
+        self._ensure_flusher()
+        client = get_redis_client()
+        if client is not None:
+            try:
+                pipe = client.pipeline(transaction=False)
+                for question_id, is_correct in answers:
+                    pipe.hincrby(REDIS_PENDING_KEY, f"{question_id}:a", 1)
+                    if is_correct:
+                        pipe.hincrby(REDIS_PENDING_KEY, f"{question_id}:c", 1)
+                pipe.execute()
+                return
+            except Exception as e:
+                logger.warning(f"Failed to buffer question stats in Redis, using local buffer: {e}")
+
+        with self._lock:
+            for question_id, is_correct in answers:
+                counters = self._pending.get(question_id)
+                if counters is None:
+                    counters = self._pending[question_id] = [0, 0]
+                counters[0] += 1
+                if is_correct:
+                    counters[1] += 1
+            size = len(self._pending)
+        if size >= getattr(settings, 'QUESTION_STATS_FLUSH_THRESHOLD', 500):
+            self._wake.set()
+
+    def _ensure_flusher(self):
+        # Threads don't survive fork; each worker process starts its own
+        pid = os.getpid()
+        if self._flusher_pid == pid:
+            return
+        with self._lock:
+            if self._flusher_pid == pid:
+                return
+            self._flusher_pid = pid
+            self._wake = threading.Event()
+            threading.Thread(target=self._run_flusher, name='question-stats-flush', daemon=True).start()
+
+    def _run_flusher(self):
+        wake = self._wake
+        while True:
+            wake.wait(getattr(settings, 'QUESTION_STATS_FLUSH_INTERVAL', 30))
+            wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Background question stats flush failed: {e}")
+
+    def _take_local(self) -> Deltas:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return {question_id: (attempts, correct) for question_id, (attempts, correct) in pending.items()}
+
+    def _restore_local(self, deltas: Deltas):
+        with self._lock:
+            for question_id, (attempts, correct) in deltas.items():
+                counters = self._pending.setdefault(question_id, [0, 0])
+                counters[0] += attempts
+                counters[1] += correct
+
+    def _take_redis(self, client) -> Deltas:
+        # Move the hash aside atomically so increments during the flush land in a new one
+        flushing_key = f"question_stats:flushing:{uuid.uuid4().hex}"
+        try:
+            client.rename(REDIS_PENDING_KEY, flushing_key)
+        except Exception:
+            return {}  # Nothing pending (RENAME of a missing key fails)
+        raw = client.hgetall(flushing_key)
+        client.delete(flushing_key)
+
+        deltas: Dict[int, List[int]] = {}
+        for field, value in raw.items():
+            question_id, kind = field.split(':')
+            counters = deltas.setdefault(int(question_id), [0, 0])
+            counters[0 if kind == 'a' else 1] += int(value)
+        return {question_id: tuple(counters) for question_id, counters in deltas.items()}
+
+    def _restore_redis(self, client, deltas: Deltas):
+        pipe = client.pipeline(transaction=False)
+        for question_id, (attempts, correct) in deltas.items():
+            pipe.hincrby(REDIS_PENDING_KEY, f"{question_id}:a", attempts)
+            pipe.hincrby(REDIS_PENDING_KEY, f"{question_id}:c", correct)
+        pipe.execute()
+
+    def flush(self) -> int:
+        """Write buffered counters to the database; returns questions updated."""
+        if not self._flush_lock.acquire(blocking=False):
+            return 0  # Another thread is flushing
+        try:
+            flushed = 0
+
+            deltas = self._take_local()
+            if deltas:
+                try:
+                    flushed += apply_question_stat_deltas(deltas)
+                except Exception as e:
+                    logger.error(f"Failed to flush local question stats, keeping them buffered: {e}")
+                    self._restore_local(deltas)
+
+            client = get_redis_client()
+            if client is not None:
+                deltas = self._take_redis(client)
+                if deltas:
+                    try:
+                        flushed += apply_question_stat_deltas(deltas)
+                    except Exception as e:
+                        logger.error(f"Failed to flush Redis question stats, re-buffering them: {e}")
+                        self._restore_redis(client, deltas)
+            return flushed
+        finally:
+            self._flush_lock.release()
+
+
+def apply_question_stat_deltas(deltas: Deltas, batch_size: int = 500) -> int:
+    """
+    Add deltas to QuestionStat rows: create missing rows, then bulk F() updates.
+    Deltas for questions deleted since they were recorded are dropped (their
+    rows would violate the foreign key and fail every later flush).
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        existing = set(Question.objects.filter(id__in=list(deltas)).values_list('id', flat=True))
+        missing = [question_id for question_id in deltas if question_id not in existing]
+        if missing:
+            logger.warning(f"Dropping question stats for {len(missing)} deleted questions: {missing[:20]}")
+            deltas = {question_id: delta for question_id, delta in deltas.items() if question_id in existing}
+        question_ids = list(deltas)
+        if not question_ids:
+            return 0
+        QuestionStat.objects.bulk_create(
+            [QuestionStat(question_id=question_id) for question_id in question_ids],
+            ignore_conflicts=True,
+            batch_size=batch_size,
+        )
+        QuestionStat.objects.bulk_update(
+            [
+                QuestionStat(
+                    question_id=question_id,
+                    attempts=F('attempts') + attempts,
+                    correct=F('correct') + correct,
+                    updated_at=now,
+                )
+                for question_id, (attempts, correct) in deltas.items()
+            ],
+            ['attempts', 'correct', 'updated_at'],
+            batch_size=batch_size,
+        )
+    logger.info(f"Flushed question stats for {len(question_ids)} questions")
+    return len(question_ids)
+
+
+# Global buffer
+buffer = QuestionStatsBuffer()
+atexit.register(buffer.flush)
+
+
+def record_question_attempt(question_id: int, is_correct: bool):
+    """Count one answer to a question (buffered; no database write)."""
+    try:
+        buffer.record(question_id, is_correct)
+    except Exception as e:
+        # Counters are best-effort; never fail an answer over them
+        logger.warning(f"Failed to record question stats for question {question_id}: {e}")
+
+
+def record_question_attempts(answers: Iterable[Tuple[int, bool]]):
+    """Count several (question_id, is_correct) answers at once (buffered; no database write)."""
+    answers = list(answers)
+    try:
+        buffer.record_many(answers)
+    except Exception as e:
+        logger.warning(f"Failed to record question stats for {len(answers)} answers: {e}")
+
+
+def flush_question_stats() -> int:
+    return buffer.flush()
+
+
+def get_question_correct_rates(question_ids: Iterable[int]) -> Dict[int, Dict]:
+    """{question_id: {'attempts', 'correct_rate'}} for questions with recorded attempts."""
+    return {
+        question_id: {
+            'attempts': attempts,
+            'correct_rate': round(correct / attempts * 100, 1),
+        }
+        for question_id, attempts, correct in (
+            QuestionStat.objects
+            .filter(question_id__in=list(question_ids), attempts__gt=0)
+            .values_list('question_id', 'attempts', 'correct')
+        )
+    }
+
+
+def question_difficulty_report(
+    order: str = 'hardest',
+    min_attempts: int = 20,
+    limit: int = 20,
+    category_id: Optional[int] = None,
+) -> List[Dict]:
+    """Questions with at least ``min_attempts`` answers, sorted by correct rate."""
+    rate = ExpressionWrapper(F('correct') * 1.0 / F('attempts'), output_field=FloatField())
+    stats = (
+        QuestionStat.objects
+        .filter(attempts__gte=max(1, min_attempts))
+        .annotate(rate=rate)
+        .select_related('question__category', 'question__difficulty')
+        .order_by('rate' if order == 'hardest' else '-rate', '-attempts')
+    )
+    if category_id:
+        stats = stats.filter(questions_under_q(category_id, prefix='question__'))
+    return [
+        {
+            'question_id': stat.question_id,
+            'question': stat.question.question_text,
+            'category': stat.question.category.name if stat.question.category else None,
+            'difficulty': stat.question.difficulty.label if stat.question.difficulty else None,
+            'attempts': stat.attempts,
+            'correct': stat.correct,
+            'correct_rate': round(stat.rate * 100, 1),
+        }
+        for stat in stats[:limit]
+    ]
@@ -4,8 +4,10 @@ import hashlib
 import json
 import re
 from typing import Iterable, List
+from django.http import Http404
 from django.shortcuts import get_object_or_404
-from django.db.models import Q, Count
+from django.db import transaction
+from django.db.models import Count
 from django.utils import timezone
 from django.core.cache import cache
 
@@ -13,12 +15,14 @@ from rest_framework.decorators import api_view, permission_classes, authenticati
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import AllowAny, IsAuthenticated 
+from rest_framework_simplejwt.models import TokenUser
 
-from core.redis_utils import cache_set, cache_get, cache_delete
+from core.redis_utils import cache_set, cache_get
 from .level1_config import (
     canonicalize_difficulty_label,
     get_allowed_category_names,
     normalize_label,
+    playable_question_q,
 )
 
 from .serializers import (
@@ -29,6 +33,34 @@ from .serializers import (
     CategorySerializer,
     QuizSessionSaveSerializer,
     QuizSessionSerializer,
+    shared_difficulty_id,
+)
+from .adaptive import get_ability_index, prior_rate, update_ability
+from .category_tree import get_allowed_category_ids, get_descendant_ids
+from .degraded import (
+    DB_UNAVAILABLE_ERRORS,
+    DatabaseUnavailable,
+    DegradedJWTAuthentication,
+    call_with_deadline,
+    ensure_database_responsive,
+    get_fallback_pool,
+    health,
+    is_synthetic_question_id,
+    queue_quiz_save,
+)
+from .bitmaps import Bitmap
+from .generation import request_pool_refill
+from .group_players import link_players
+from .question_bank import get_question_bank
+from .leaderboard import record_session_completed, record_session_removed
+from .question_stats import get_question_correct_rates, record_question_attempt
+from .score_histograms import get_score_percentile, record_session_score, remove_session_score
+from .tag_index import get_tag_index, parse_tags
+from .stats_aggregates import (
+    record_answer,
+    record_session_deleted,
+    record_question_added,
+    record_session_started,
 )
 from .models import (
     Question,
@@ -46,11 +78,16 @@ CACHE_TIMEOUT_QUESTIONS = 30 * 60  # 30 minutes
 CACHE_TIMEOUT_CATEGORIES = 60 * 60  # 1 hour
 CACHE_TIMEOUT_SESSION_RESULTS = 30 * 60  # 30 minutes for completed session results
 
+CATEGORIES_CACHE_KEY = "categories:with_questions"
+
 
 def is_allowed_level1_category_id(category_id: int) -> bool:
     if category_id is None:
         return True
-    return Category.objects.filter(id=category_id, name__in=get_allowed_category_names()).exists()
+    bank = get_question_bank()
+    if bank is not None:
+        return bank.has_category(category_id)
+    return category_id in call_with_deadline(get_allowed_category_ids)
 
 
 def resolve_difficulty_filter_values(raw_difficulty: str):
@@ -151,37 +188,29 @@ def get_session_questions_queryset(quiz_session: QuizSession) -> Iterable[QuizSe
         'question__difficulty',
     ).all()
 
-def get_questions_from_cache_or_db(category_id=None, difficulty=None, count=10):
-    """Get questions from cache or database with Redis caching"""
-    allowed_categories = sorted(get_allowed_category_names())
-
-    # Generate cache key
-    cache_key = generate_cache_key(
-        "questions", 
-        category_id=category_id, 
-        difficulty=difficulty, 
+def get_questions_cache_key(category_id=None, difficulty=None, count=10) -> str:
+    """Build the cache key for a question sample request."""
+    return generate_cache_key(
+        "questions",
+        category_id=category_id,
+        difficulty=difficulty,
         count=count,
-        allowed_categories=allowed_categories,
+        allowed_categories=sorted(get_allowed_category_names()),
     )
-    
-    # Try to get from cache first
-    cached_data = cache_get(cache_key)
-    if cached_data:
-        logger.info(f"Cache HIT for questions: {cache_key}")
-        return cached_data
-    
-    logger.info(f"Cache MISS for questions: {cache_key}")
-    
-    # Cache miss - fetch from database
+
+
+def load_questions_from_db(category_id=None, difficulty=None, count=10):
+    """Sample and serialize questions from the database, bypassing the cache."""
     queryset = Question.objects.filter(
-        is_seeded=True,
-        category__name__in=allowed_categories,
+        playable_question_q(),
+        category_id__in=get_allowed_category_ids(),
     )
     
     if category_id:
         if not is_allowed_level1_category_id(category_id):
             return None
-        queryset = queryset.filter(category__id=category_id)
+        # The category and its sub-topics
+        queryset = queryset.filter(category_id__in=get_descendant_ids(category_id))
     
     if difficulty:
         difficulty_values = resolve_difficulty_filter_values(difficulty)
@@ -206,20 +235,132 @@ def get_questions_from_cache_or_db(category_id=None, difficulty=None, count=10):
         )
         random.shuffle(options)
         q['answer_options'] = options
+
+    return data
+
+
+def load_questions_from_bank(bank, category_id=None, difficulty=None, count=10):
+    """Sample and serialize questions from the memory-mapped bank (no DB, no cache)."""
+    if category_id and not bank.has_category(category_id):
+        return None
+
+    difficulty_labels = None
+    if difficulty:
+        canonical = canonicalize_difficulty_label(difficulty)
+        if not canonical:
+            return None  # Invalid difficulty
+        difficulty_labels = [canonical]
+
+    data = bank.sample_payloads(category_id, difficulty_labels, count)
+    for q in data:
+        options = ensure_correct_option_present(q.get('correct_answer'), q.get('answer_options'))
+        random.shuffle(options)
+        q['answer_options'] = options
+    return data
+
+
+TAG_FILTER_FIELDS = ('tags', 'any_tags', 'exclude_tags')
+
+
+def get_tag_filter(source):
+    """Normalized ``tags`` (all of), ``any_tags`` (one of) and ``exclude_tags`` (none of), or None when unfiltered."""
+    tag_filter = {field: parse_tags(source.get(field)) for field in TAG_FILTER_FIELDS}
+    return tag_filter if any(tag_filter.values()) else None
+
+
+def load_tagged_questions(tag_filter, category_id=None, difficulty=None, count=10):
+    """Sample and serialize questions matching a tag filter, resolved on the in-memory tag index."""
+    difficulty_labels = None
+    if difficulty:
+        canonical = canonicalize_difficulty_label(difficulty)
+        if not canonical:
+            return None  # Invalid difficulty
+        difficulty_labels = [canonical]
+
+    index = get_tag_index()
+    candidates = index.resolve(
+        category_ids=get_descendant_ids(category_id) if category_id else None,
+        difficulty_labels=difficulty_labels,
+        **tag_filter,
+    )
+    # A few spares for questions dropped as duplicate wording
+    question_ids = index.sample_ids(candidates, count * 2)
+
+    bank = get_question_bank()
+    if bank is not None:
+        payloads = [bank.get_payload(question_id) for question_id in question_ids]
+        payloads = [payload for payload in payloads if payload is not None]
+    else:
+        questions = Question.objects.filter(id__in=question_ids).select_related('category', 'difficulty')
+        payloads = list(QuestionSerializer(questions, many=True).data)
+
+    data = []
+    seen_question_texts = set()
+    for q in payloads:
+        normalized_text = normalize_question_text(q['question_text'])
+        if normalized_text in seen_question_texts:
+            continue
+        seen_question_texts.add(normalized_text)
+        options = ensure_correct_option_present(q.get('correct_answer'), q.get('answer_options'))
+        random.shuffle(options)
+        q['answer_options'] = options
+        data.append(q)
+        if len(data) == count:
+            break
+    return data
+
+
+def get_questions_from_cache_or_db(category_id=None, difficulty=None, count=10):
+    """Get questions from cache or database with Redis caching"""
+    # Every worker shares the mapped bank, so a fresh sample costs no query
+    bank = get_question_bank()
+    if bank is not None:
+        return load_questions_from_bank(bank, category_id=category_id, difficulty=difficulty, count=count)
+
+    cache_key = get_questions_cache_key(category_id=category_id, difficulty=difficulty, count=count)
+    
+    # Try to get from cache first
+    cached_data = cache_get(cache_key)
+    if cached_data:
+        return cached_data
+    
+    # Cache miss - fetch from database (DatabaseUnavailable past the deadline)
+    data = call_with_deadline(load_questions_from_db, category_id=category_id, difficulty=difficulty, count=count)
+    if data is None:
+        return None
     
     # Cache the result
     cache_set(cache_key, data, CACHE_TIMEOUT_QUESTIONS)
-    logger.info(f"Cached questions: {cache_key}")
     
     return data
 
+def queued_save_response(request, serializer):
+    """Spool a save the database cannot take now; it is replayed once the database answers."""
+    queue_quiz_save(request.user, serializer.validated_data)
+    return Response(
+        {
+            'message': 'Quiz session queued and will be saved shortly.',
+            'id': None,
+            'queued': True,
+        },
+        status=status.HTTP_202_ACCEPTED,
+    )
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@authentication_classes([DegradedJWTAuthentication])
 def save_quiz_session_view(request):
     """API endpoint for saving a completed quiz session."""
     serializer = QuizSessionSaveSerializer(data=request.data, context={'request': request})
     if serializer.is_valid():
-        quiz_session = serializer.save()
+        # A TokenUser means the user lookup already failed: the database is down
+        if health.is_open() or isinstance(request.user, TokenUser):
+            return queued_save_response(request, serializer)
+        try:
+            quiz_session = serializer.save()
+        except DB_UNAVAILABLE_ERRORS as e:
+            health.record_failure(f"{type(e).__name__}: {e}")
+            return queued_save_response(request, serializer)
         return Response(
             {
                 'message': 'Quiz session saved successfully.',
@@ -248,7 +389,11 @@ def fetch_seeded_questions_view(request):
                 'error': 'Invalid category ID.', 
                 'code': 'invalid_category'
             }, status=status.HTTP_400_BAD_REQUEST)
-        if not is_allowed_level1_category_id(category_id):
+        try:
+            category_allowed = is_allowed_level1_category_id(category_id)
+        except DatabaseUnavailable:
+            category_allowed = True  # The fallback pool only holds Level 1 categories
+        if not category_allowed:
             return Response({
                 'error': 'Category is outside current Level 1 scope.',
                 'code': 'invalid_category'
@@ -268,12 +413,25 @@ def fetch_seeded_questions_view(request):
             'code': 'invalid_count'
         }, status=status.HTTP_400_BAD_REQUEST)
 
-    # Get questions from cache or database
-    data = get_questions_from_cache_or_db(
-        category_id=category_id,
-        difficulty=difficulty,
-        count=count
-    )
+    tag_filter = get_tag_filter(request.query_params)
+
+    # Get questions from cache or database, or from the fallback pool when the database is unavailable
+    degraded = False
+    try:
+        if tag_filter:
+            data = call_with_deadline(
+                load_tagged_questions, tag_filter, category_id=category_id, difficulty=difficulty, count=count
+            )
+        else:
+            data = get_questions_from_cache_or_db(
+                category_id=category_id,
+                difficulty=difficulty,
+                count=count
+            )
+    except DatabaseUnavailable:
+        # The fallback pool carries no tags; it serves the unfiltered criteria
+        data = get_fallback_pool().sample(category_id, difficulty, count)
+        degraded = True
     
     if data is None:
         return Response({
@@ -289,7 +447,10 @@ def fetch_seeded_questions_view(request):
             'requested': count,
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    return Response(data, status=status.HTTP_200_OK)
+    response = Response(data, status=status.HTTP_200_OK)
+    if degraded:
+        response['X-Degraded-Mode'] = '1'
+    return response
 
 
 @api_view(['POST'])
@@ -302,46 +463,166 @@ def validate_answer_view(request, questionId):
         error_detail = next(iter(serializer.errors.values()))[0] if serializer.errors else 'Invalid request data'
         return Response({'error': error_detail, 'code': 'validation_error'}, status=status.HTTP_400_BAD_REQUEST)
 
-    question = get_object_or_404(Question, id=questionId)
+    bank = get_question_bank()
+    correct_answer = bank.correct_answer(questionId) if bank is not None else None
+    if correct_answer is None and is_synthetic_question_id(questionId):
+        # Bundled fallback questions have no database row
+        correct_answer = get_fallback_pool().correct_answer(questionId)
+    if correct_answer is None:
+        try:
+            correct_answer = call_with_deadline(
+                Question.objects.filter(id=questionId).values_list('correct_answer', flat=True).first
+            )
+        except DatabaseUnavailable:
+            correct_answer = get_fallback_pool().correct_answer(questionId)
+            if correct_answer is None:
+                return Response({
+                    'error': 'This question cannot be checked right now. Please try again shortly.',
+                    'code': 'degraded_mode',
+                }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        if correct_answer is None:
+            raise Http404
     selected_answer = serializer.validated_data['selected_answer']
-    is_correct = normalize_answer_text(selected_answer) == normalize_answer_text(question.correct_answer)
+    is_correct = normalize_answer_text(selected_answer) == normalize_answer_text(correct_answer)
 
+    # Not counted in question stats: this check is stateless and repeatable, persisted answers are counted
     return Response({'is_correct': is_correct}, status=status.HTTP_200_OK)
 
 
+def load_categories_from_db():
+    """Serialize Level 1 categories that have playable questions, bypassing the cache."""
+    # Playable questions in the category or any sub-topic, through the closure table
+    categories = Category.objects.filter(id__in=get_allowed_category_ids()).annotate(
+        question_count=Count(
+            'descendant_links__descendant__questions',
+            filter=playable_question_q('descendant_links__descendant__questions__'),
+        )
+    ).filter(
+        question_count__gt=0,
+    ).order_by('id')
+    
+    serializer = CategorySerializer(categories, many=True)
+    # Convert ReturnList to regular list for JSON serialization
+    return list(serializer.data)
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 @authentication_classes([])
 def fetch_categories_view(request):
     """API endpoint for fetching quiz categories with Redis caching."""
-    cache_key = "categories:with_questions"
-    
     # Try cache first
-    cached_data = cache_get(cache_key)
+    cached_data = cache_get(CATEGORIES_CACHE_KEY)
     if cached_data:
-        logger.info("Cache HIT for categories")
         return Response(cached_data, status=status.HTTP_200_OK)
     
-    logger.info("Cache MISS for categories")
-    
     # Cache miss - fetch from database
-    categories = Category.objects.annotate(
-        question_count=Count('questions', filter=Q(questions__is_seeded=True))
-    ).filter(
-        question_count__gt=0,
-        name__in=get_allowed_category_names(),
-    ).order_by('id')
-    
-    serializer = CategorySerializer(categories, many=True)
-    # Convert ReturnList to regular list for JSON serialization
-    data = list(serializer.data)
+    data = load_categories_from_db()
     
     # Cache the result
-    cache_set(cache_key, data, CACHE_TIMEOUT_CATEGORIES)
-    logger.info("Cached categories data")
+    cache_set(CATEGORIES_CACHE_KEY, data, CACHE_TIMEOUT_CATEGORIES)
     
     return Response(data, status=status.HTTP_200_OK)
 
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@authentication_classes([])
+def fetch_tags_view(request):
+    """API endpoint for listing tags with their playable question counts (from the tag index)."""
+    tag_counts = get_tag_index().tag_counts()
+    data = [
+        {'name': name, 'question_count': question_count}
+        for name, question_count in sorted(tag_counts.items(), key=lambda item: (-item[1], item[0]))
+    ]
+    return Response(data, status=status.HTTP_200_OK)
+
+def serialize_adaptive_question(question: Question):
+    """Payload for a question handed out one at a time in an adaptive session."""
+    options = ensure_correct_option_present(question.correct_answer, question.answer_options)
+    random.shuffle(options)
+    return {
+        'id': question.id,
+        'text': question.question_text,
+        'options': options,
+        'category': question.category.name if question.category else None,
+        'difficulty': question.difficulty.label if question.difficulty else None,
+    }
+
+
+def pick_adaptive_question(index, ability: float, exclude: Iterable[int] = ()):
+    """Next question near ``ability`` from the bucket index; None when the pool is exhausted."""
+    exclude = set(exclude)
+    # The index may be a few minutes old; skip questions deleted since it was built
+    for _ in range(3):
+        question_id = index.pick(ability, exclude)
+        if question_id is None:
+            return None
+        question = Question.objects.select_related('category', 'difficulty').filter(id=question_id).first()
+        if question is not None:
+            return question
+        exclude.add(question_id)
+    return None
+
+
+def start_adaptive_session(request, category_id, count):
+    """Create an adaptive session holding only its first question."""
+    index = get_ability_index(category_id)
+    if category_id and len(index) == 0:
+        return Response({'error': 'No questions available for the selected category.', 'code': 'invalid_category'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(index) < count:
+        return Response({'error': 'Insufficient questions available for the selected criteria.', 'code': 'insufficient_questions'}, status=status.HTTP_400_BAD_REQUEST)
+
+    ability = 0.0
+    question = pick_adaptive_question(index, ability)
+    if question is None:
+        return Response({'error': 'Insufficient questions available for the selected criteria.', 'code': 'insufficient_questions'}, status=status.HTTP_400_BAD_REQUEST)
+
+    with transaction.atomic():
+        quiz_session = QuizSession.objects.create(
+            score=0,
+            user=request.user if request.user.is_authenticated else None,
+            is_adaptive=True,
+            target_question_count=count,
+            ability=ability,
+            # The index is per requested category; difficulty varies question to question
+            category_id=category_id,
+        )
+        QuizSessionQuestion.objects.create(quiz_session=quiz_session, question=question)
+        record_session_started(quiz_session, [question])
+
+    response_data = QuizSessionSerializer(quiz_session).data
+    response_data['totalQuestions'] = count
+    response_data['next_question'] = serialize_adaptive_question(question)
+    return Response(response_data, status=status.HTTP_201_CREATED)
+
+
+def advance_adaptive_session(quiz_session: QuizSession, session_question: QuizSessionQuestion):
+    """
+    Update the ability estimate from an answer and attach the next question.
+    Returns the next question's payload, or None when the session is full.
+    """
+    rows = list(quiz_session.session_questions.values_list('question_id', 'answered_at'))
+    answered = sum(1 for _, answered_at in rows if answered_at is not None)
+
+    question = session_question.question
+    index = get_ability_index(quiz_session.category_id)
+    rate = index.rate_of(question.id, prior_rate(question.difficulty.label if question.difficulty else None))
+    quiz_session.ability = update_ability(quiz_session.ability or 0.0, rate, session_question.is_correct, answered)
+    quiz_session.save(update_fields=['ability'])
+
+    if answered >= (quiz_session.target_question_count or 0) or answered < len(rows):
+        return None
+
+    next_question = pick_adaptive_question(index, quiz_session.ability, exclude=(question_id for question_id, _ in rows))
+    if next_question is None:
+        logger.info(f"Adaptive session {quiz_session.id} ran out of questions after {answered}")
+        return None
+    QuizSessionQuestion.objects.create(quiz_session=quiz_session, question=next_question)
+    record_question_added(quiz_session, next_question)
+    return serialize_adaptive_question(next_question)
+
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
 @authentication_classes([])
@@ -352,21 +633,100 @@ def start_quiz_session_view(request):
         error_detail = next(iter(serializer.errors.values()))[0] if serializer.errors else 'Invalid request data'
         return Response({'error': error_detail, 'code': 'validation_error'}, status=status.HTTP_400_BAD_REQUEST)
 
-    category_id = serializer.validated_data.get('category_id')
-    difficulty_id = serializer.validated_data.get('difficulty_id')
-    difficulty_label = serializer.validated_data.get('difficulty')
-    count = serializer.validated_data['count']
-    mode = serializer.validated_data['mode']
-    players_data = serializer.validated_data.get('players', [])
+    # Bounded wait for the database; past the deadline the quiz comes from the fallback pool
+    try:
+        ensure_database_responsive()
+        return create_quiz_session(request, serializer.validated_data)
+    except DatabaseUnavailable:
+        return start_degraded_session(serializer.validated_data)
+    except DB_UNAVAILABLE_ERRORS as e:
+        health.record_failure(f"{type(e).__name__}: {e}")
+        return start_degraded_session(serializer.validated_data)
+
+
+def start_degraded_session(validated_data):
+    """A session-shaped payload from the fallback pool; nothing is stored (``id`` is None)."""
+    count = validated_data['count']
+    mode = validated_data['mode']
+    difficulty = validated_data.get('difficulty')
+    questions = get_fallback_pool().sample(validated_data.get('category_id'), difficulty, count)
+    if questions is None:
+        return Response({'error': 'Invalid difficulty for Level 1.', 'code': 'invalid_difficulty'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(questions) < count:
+        return Response({'error': 'Insufficient questions available for the selected criteria.', 'code': 'insufficient_questions'}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({
+        'id': None,
+        'user': None,
+        'started_at': timezone.now(),
+        'completed_at': None,
+        'score': 0,
+        'is_group_session': mode == 'group',
+        'session_questions': [
+            {'id': None, 'question': question, 'selected_answer': None, 'is_correct': None, 'answered_at': None}
+            for question in questions
+        ],
+        'group_players': [
+            {'id': None, 'name': name, 'score': 0, 'errors': [], 'answers': [], 'correct_answers': {}}
+            for name in validated_data.get('players', []) if mode == 'group'
+        ],
+        'total_questions': count,
+        'is_adaptive': False,
+        'ability': None,
+        'totalQuestions': count,
+        'is_degraded': True,
+    }, status=status.HTTP_200_OK)
+
+
+def pick_tagged_questions(index, candidates: Bitmap, count: int) -> List[Question]:
+    """
+    Sample up to ``count`` tag index candidates with distinct question texts.
+
+    Draws twice what is still missing, drops repeated wording, and draws
+    again from the untried candidates until ``count`` is met or they run out.
+    """
+    selected: List[Question] = []
+    seen_question_texts = set()
+    remaining = candidates
+    while remaining and len(selected) < count:
+        ordinals = remaining.sample((count - len(selected)) * 2)
+        remaining = remaining - Bitmap.from_sorted(sorted(ordinals))
+        question_ids = [index.question_ids[ordinal] for ordinal in ordinals]
+        questions_by_id = Question.objects.only('id', 'category_id', 'difficulty_id', 'question_text').in_bulk(question_ids)
+        for question_id in question_ids:
+            question = questions_by_id.get(question_id)
+            if question is None:
+                continue
+            normalized_text = normalize_question_text(question.question_text)
+            if normalized_text in seen_question_texts:
+                continue
+            seen_question_texts.add(normalized_text)
+            selected.append(question)
+            if len(selected) == count:
+                break
+    return selected
+
+
+def create_quiz_session(request, validated_data):
+    """Create a solo, group or adaptive session from validated start data."""
+    category_id = validated_data.get('category_id')
+    difficulty_id = validated_data.get('difficulty_id')
+    difficulty_label = validated_data.get('difficulty')
+    count = validated_data['count']
+    mode = validated_data['mode']
+    players_data = validated_data.get('players', [])
 
     queryset = Question.objects.filter(
-        is_seeded=True,
-        category__name__in=get_allowed_category_names(),
+        playable_question_q(),
+        category_id__in=get_allowed_category_ids(),
     )
     if category_id:
         if not is_allowed_level1_category_id(category_id):
             return Response({'error': 'Invalid category for Level 1.', 'code': 'invalid_category'}, status=status.HTTP_400_BAD_REQUEST)
-        queryset = queryset.filter(category_id=category_id)
+        queryset = queryset.filter(category_id__in=get_descendant_ids(category_id))
+
+    if mode == 'adaptive':
+        return start_adaptive_session(request, category_id, count)
 
     difficulty_values = None
     if difficulty_label:
@@ -387,30 +747,61 @@ def start_quiz_session_view(request):
     if difficulty_values:
         queryset = queryset.filter(difficulty__label__in=difficulty_values)
 
-    available_questions = queryset.count()
+    # The mapped bank (when enabled) hands out lightweight entries with id/category_id/difficulty_id
+    bank = get_question_bank()
+    tag_filter = get_tag_filter(validated_data)
+    if tag_filter:
+        index = get_tag_index()
+        tag_candidates = index.resolve(
+            category_ids=get_descendant_ids(category_id) if category_id else None,
+            difficulty_labels=difficulty_values,
+            **tag_filter,
+        )
+        available_questions = len(tag_candidates)
+    elif bank is not None:
+        available_questions = bank.count(category_id, difficulty_values)
+    else:
+        available_questions = queryset.count()
     if category_id and available_questions == 0:
         return Response({'error': 'No questions available for the selected category.', 'code': 'invalid_category'}, status=status.HTTP_400_BAD_REQUEST)
 
     if available_questions < count:
+        # Top up low pools in the background so a later attempt can succeed
+        request_pool_refill()
         return Response({'error': 'Insufficient questions available for the selected criteria.', 'code': 'insufficient_questions'}, status=status.HTTP_400_BAD_REQUEST)
 
-    quiz_session = QuizSession.objects.create(
-        score=0,
-        user=request.user if request.user.is_authenticated else None,
-        is_group_session=(mode == 'group')
-    )
+    if tag_filter:
+        selected_questions = pick_tagged_questions(index, tag_candidates, count)
+        if len(selected_questions) < count:
+            # Enough candidates, but too few distinct question texts among them
+            request_pool_refill()
+            return Response({'error': 'Insufficient questions available for the selected criteria.', 'code': 'insufficient_questions'}, status=status.HTTP_400_BAD_REQUEST)
+    elif bank is not None:
+        selected_questions = bank.sample_entries(category_id, difficulty_values, count)
+    else:
+        selected_questions = pick_random_questions(queryset, count=count, enforce_unique_text=True)
+
+    with transaction.atomic():
+        quiz_session = QuizSession.objects.create(
+            score=0,
+            user=request.user if request.user.is_authenticated else None,
+            is_group_session=(mode == 'group'),
+            # The requested category, not a sub-topic of the first question; NULL for mixed sessions
+            category_id=category_id or None,
+            difficulty_id=shared_difficulty_id(selected_questions),
+        )
 
-    if mode == 'group' and players_data:
-        GroupPlayer.objects.bulk_create([
-            GroupPlayer(quiz_session=quiz_session, name=name)
-            for name in players_data
-        ])
+        if mode == 'group' and players_data:
+            GroupPlayer.objects.bulk_create(link_players(
+                GroupPlayer(quiz_session=quiz_session, name=name)
+                for name in players_data
+            ))
 
-    selected_questions = pick_random_questions(queryset, count=count, enforce_unique_text=True)
-    QuizSessionQuestion.objects.bulk_create([
-        QuizSessionQuestion(quiz_session=quiz_session, question=q)
-        for q in selected_questions
-    ])
+        QuizSessionQuestion.objects.bulk_create([
+            QuizSessionQuestion(quiz_session=quiz_session, question_id=q.id)
+            for q in selected_questions
+        ])
+        record_session_started(quiz_session, selected_questions)
 
     session_serializer = QuizSessionSerializer(quiz_session)
     response_data = session_serializer.data
@@ -528,12 +919,40 @@ def submit_answer_view(request, sessionId):
         normalize_answer_text(selected_answer)
         == normalize_answer_text(session_question.question.correct_answer)
     )
-    if session_question.is_correct:
-        quiz_session.score += 1
-        quiz_session.save()
-    session_question.save()
+    with transaction.atomic():
+        if session_question.is_correct:
+            quiz_session.score += 1
+            quiz_session.save()
+        session_question.save()
+        record_answer(quiz_session, session_question.question, session_question.is_correct)
+
+        next_question = None
+        if quiz_session.is_adaptive:
+            next_question = advance_adaptive_session(quiz_session, session_question)
+
+        # Last unanswered question: the session is complete
+        if quiz_session.completed_at is None and not quiz_session.session_questions.filter(answered_at__isnull=True).exists():
+            quiz_session.completed_at = session_question.answered_at
+            quiz_session.save(update_fields=['completed_at'])
+            record_session_completed(quiz_session)
+            record_session_score(quiz_session, quiz_session.session_questions.count())
+
+    record_question_attempt(session_question.question_id, session_question.is_correct)
+
+    response_data = {'message': 'Answer submitted successfully.', 'is_correct': session_question.is_correct, 'updated_score': quiz_session.score}
+    if quiz_session.is_adaptive:
+        response_data['next_question'] = next_question
+        response_data['ability'] = round(quiz_session.ability, 3)
+    return Response(response_data, status=status.HTTP_200_OK)
+
+def add_global_correct_rates(questions_data):
+    """Attach "X% of players got this right" to result questions (one query, not cached)."""
+    rates = get_question_correct_rates(q['question_id'] for q in questions_data if q.get('question_id'))
+    for question_data in questions_data:
+        stat = rates.get(question_data.get('question_id'))
+        question_data['global_correct_rate'] = stat['correct_rate'] if stat else None
+        question_data['global_attempts'] = stat['attempts'] if stat else 0
 
-    return Response({'message': 'Answer submitted successfully.', 'is_correct': session_question.is_correct, 'updated_score': quiz_session.score}, status=status.HTTP_200_OK)
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
@@ -550,12 +969,12 @@ def get_quiz_session_results_view(request, sessionId):
         # Try cache first
         cached_data = cache_get(cache_key)
         if cached_data:
-            logger.info(f"Cache HIT for session results: {sessionId}")
             # Update is_guest field for current request context
             cached_data['is_guest'] = not request.user.is_authenticated
+            # Percentile moves as other players finish; read it fresh from the histogram
+            cached_data['percentile'] = get_score_percentile(quiz_session, cached_data['total_questions'])
+            add_global_correct_rates(cached_data['questions'])
             return Response(cached_data, status=status.HTTP_200_OK)
-        
-        logger.info(f"Cache MISS for session results: {sessionId}")
 
     # Cache miss or incomplete session - process from database
     questions_data = []
@@ -566,6 +985,7 @@ def get_quiz_session_results_view(request, sessionId):
         if sq.is_correct:
             correct_answers += 1
         question_data = {
+            'question_id': sq.question_id,
             'question_text': sq.question.question_text,
             'selected_answer': sq.selected_answer,
             'correct_answer': sq.question.correct_answer,
@@ -591,8 +1011,9 @@ def get_quiz_session_results_view(request, sessionId):
     # Cache completed sessions only (immutable data)
     if quiz_session.is_completed:
         cache_set(cache_key, response_data, CACHE_TIMEOUT_SESSION_RESULTS)
-        logger.info(f"Cached session results: {sessionId}")
-    
+
+    response_data['percentile'] = get_score_percentile(quiz_session, total_questions)
+    add_global_correct_rates(response_data['questions'])
     return Response(response_data, status=status.HTTP_200_OK)
 
 @api_view(['DELETE'])
@@ -603,22 +1024,19 @@ def delete_quiz_session_view(request, sessionId):
     if quiz_session.user != request.user:
         return Response({'error': 'Not authorized to delete this session.', 'code': 'permission_denied'}, status=status.HTTP_403_FORBIDDEN)
     
-    # Invalidate caches before deletion
-    from .cache_utils import invalidate_session_cache, invalidate_all_user_cache
-    invalidate_session_cache(sessionId)  # Remove session details cache
-    
-    # Invalidate session results cache
-    results_cache_key = f"session_results:{sessionId}"
-    cache_delete(results_cache_key)
-    
-    # Invalidate user caches
-    invalidate_all_user_cache(request.user.id)
+    # Invalidate session details/results and user caches in one round trip before deletion
+    from .cache_utils import invalidate_deleted_session_cache
+    invalidate_deleted_session_cache(sessionId, request.user.id)
     
-    # Delete the session
-    QuizSessionQuestion.objects.filter(quiz_session=quiz_session).delete()
-    if quiz_session.is_group_session:
-        GroupPlayer.objects.filter(quiz_session=quiz_session).delete()
-    quiz_session.delete()
+    # Delete the session and remove its contribution to the user's stat aggregates
+    with transaction.atomic():
+        record_session_deleted(quiz_session)
+        record_session_removed(quiz_session)
+        remove_session_score(quiz_session, quiz_session.session_questions.count())
+        QuizSessionQuestion.objects.filter(quiz_session=quiz_session).delete()
+        if quiz_session.is_group_session:
+            GroupPlayer.objects.filter(quiz_session=quiz_session).delete()
+        quiz_session.delete()
     
     logger.info(f"delete_quiz_session_view: Quiz session {sessionId} deleted by user {request.user.id}")
     return Response({'message': 'Quiz session deleted successfully.'}, status=status.HTTP_200_OK)
\ No newline at end of file
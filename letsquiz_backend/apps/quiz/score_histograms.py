@@ -0,0 +1,111 @@
+"""
+Score histograms for "you beat X% of players" on the results page.
+
+Every completed solo session (guest or registered) increments one bucket,
+keyed by the session's category, difficulty and question count with the
+score (correct answers) as the bucket. Percentile lookups read the buckets of
+one histogram - at most question_count + 1 rows - instead of scanning sessions.
+"""
+import logging
+from typing import Dict, Optional
+
+from django.db import transaction
+from django.db.models import Count
+
+from .models import QuizSession, ScoreHistogramBucket
+from .stats_aggregates import increment_counter
+
+logger = logging.getLogger(__name__)
+
+
+def _bucket_lookup(quiz_session: QuizSession, question_count: int) -> Dict:
+    return {
+        'category_id': quiz_session.category_id,
+        'difficulty_id': quiz_session.difficulty_id,
+        'question_count': question_count,
+        'score': max(0, min(quiz_session.score, question_count)),
+    }
+
+
+def _counts(quiz_session: QuizSession) -> bool:
+    return not quiz_session.is_group_session and quiz_session.completed_at is not None
+
+
+def record_session_score(quiz_session: QuizSession, question_count: int):
+    """Add a completed session to its histogram (one row increment)."""
+    if not _counts(quiz_session) or question_count <= 0:
+        return
+    increment_counter(ScoreHistogramBucket, _bucket_lookup(quiz_session, question_count), {'sessions': 1})
+
+
+def remove_session_score(quiz_session: QuizSession, question_count: int):
+    """Take a deleted completed session back out of its histogram."""
+    if not _counts(quiz_session) or question_count <= 0:
+        return
+    increment_counter(ScoreHistogramBucket, _bucket_lookup(quiz_session, question_count), {'sessions': -1})
+
+
+def get_score_percentile(quiz_session: QuizSession, question_count: int) -> Optional[Dict]:
+    """
+    Share of other completed sessions on the same category/difficulty/length
+    that scored lower than this one. None when there is nobody to compare with.
+    """
+    if quiz_session.is_group_session or question_count <= 0:
+        return None
+    lookup = _bucket_lookup(quiz_session, question_count)
+    score = lookup.pop('score')
+
+    below = total = 0
+    for bucket_score, sessions in (
+        ScoreHistogramBucket.objects.filter(**lookup).values_list('score', 'sessions')
+    ):
+        total += sessions
+        if bucket_score < score:
+            below += sessions
+
+    # The session itself is in the histogram once completed
+    others = total - 1 if _counts(quiz_session) else total
+    if others <= 0:
+        return None
+    return {
+        'beat_percent': round(below / others * 100, 1),
+        'compared_sessions': others,
+        'question_count': question_count,
+    }
+
+
+def rebuild_score_histograms(models=None) -> int:
+    """
+    Recompute all histograms from completed solo sessions and replace the
+    stored buckets. ``models`` lets data migrations pass historical models.
+    Returns the number of buckets written.
+    """
+    session_model = (models or {}).get('QuizSession', QuizSession)
+    bucket_model = (models or {}).get('ScoreHistogramBucket', ScoreHistogramBucket)
+
+    buckets: Dict[tuple, int] = {}
+    sessions = (
+        session_model.objects
+        .filter(is_group_session=False, completed_at__isnull=False)
+        .annotate(question_count=Count('session_questions'))
+        .filter(question_count__gt=0)
+        .values_list('category_id', 'difficulty_id', 'question_count', 'score')
+    )
+    for category_id, difficulty_id, question_count, score in sessions.iterator(chunk_size=2000):
+        key = (category_id, difficulty_id, question_count, max(0, min(score, question_count)))
+        buckets[key] = buckets.get(key, 0) + 1
+
+    with transaction.atomic():
+        bucket_model.objects.all().delete()
+        bucket_model.objects.bulk_create([
+            bucket_model(
+                category_id=category_id,
+                difficulty_id=difficulty_id,
+                question_count=question_count,
+                score=score,
+                sessions=count,
+            )
+            for (category_id, difficulty_id, question_count, score), count in buckets.items()
+        ], batch_size=1000)
+    logger.info(f"Rebuilt score histograms: {len(buckets)} buckets")
+    return len(buckets)
@@ -0,0 +1,155 @@
+"""
+Streaming readers for question seed files.
+
+Seed files are JSON arrays of question objects, optionally gzip-compressed
+(detected from the magic bytes, not the extension). ``iter_seed_entries``
+decodes one array element at a time from fixed-size reads, so memory stays
+bounded by the largest single entry rather than the file size.
+
+Seeded questions carry two hashes: ``seed_key`` identifies the question
+(normalized text, category, difficulty) and ``content_hash`` covers the key
+plus every seeded field, so a re-seed can find unchanged entries with one
+indexed ``content_hash IN (...)`` query per batch.
+"""
+import gzip
+import hashlib
+import io
+import json
+from pathlib import Path
+from typing import Any, Iterator, Optional, TextIO
+
+from .level1_config import normalize_question_key
+
+GZIP_MAGIC = b'\x1f\x8b'
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+class SeedFormatError(ValueError):
+    """The seed file is not a JSON array of entries."""
+
+
+def open_seed_file(path: Path) -> TextIO:
+    """Open a seed file for text reading, transparently decompressing gzip."""
+    with open(path, 'rb') as probe:
+        compressed = probe.read(2) == GZIP_MAGIC
+    if compressed:
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return io.open(path, 'r', encoding='utf-8')
+
+
+def iter_json_array(stream: TextIO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Any]:
+    """Yield the elements of a top-level JSON array without loading the whole document."""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+    eof = False
+
+    def fill() -> bool:
+        nonlocal buffer, pos, eof
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            eof = True
+            return False
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        return True
+
+    def skip_whitespace() -> bool:
+        """Advance to the next significant character; False at end of input."""
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos].isspace():
+                pos += 1
+            if pos < len(buffer):
+                return True
+            if not fill():
+                return False
+
+    if not skip_whitespace() or buffer[pos] != '[':
+        raise SeedFormatError('Seed data must be a JSON array of question objects.')
+    pos += 1
+
+    expect_item = True
+    first = True
+    while True:
+        if not skip_whitespace():
+            raise SeedFormatError('Unexpected end of seed file inside the array.')
+        char = buffer[pos]
+        if char == ']' and (first or not expect_item):
+            return
+        if not expect_item:
+            if char != ',':
+                raise SeedFormatError(f"Expected ',' or ']' in seed file, found {char!r}.")
+            pos += 1
+            expect_item = True
+            continue
+
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError as e:
+            if eof:
+                raise SeedFormatError(f'Invalid JSON in seed file: {e}') from e
+            fill()  # Entry spans the read boundary
+            continue
+        if end == len(buffer) and not eof and fill():
+            continue  # A bare scalar may continue in the next chunk; decode it again
+        pos = end
+        first = False
+        expect_item = False
+        yield item
+
+
+def iter_seed_entries(path: Path, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Any]:
+    with open_seed_file(path) as stream:
+        yield from iter_json_array(stream, chunk_size)
+
+
+def file_sha256(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def question_seed_key(question_text: str, category_id: Optional[int], difficulty_id: Optional[int]) -> str:
+    """Identity of a seeded question: normalized text + category + difficulty."""
+    raw = f"{normalize_question_key(question_text)}\x1f{category_id}\x1f{difficulty_id}"
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def question_content_hash(seed_key: str, correct_answer: str, answer_options, metadata) -> str:
+    """Hash of everything a seed entry sets on its question."""
+    payload = json.dumps(
+        [seed_key, correct_answer, answer_options or [], metadata or {}],
+        sort_keys=True,
+        separators=(',', ':'),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def backfill_question_hashes(batch_size: int = 1000, models=None) -> int:
+    """Compute seed_key/content_hash for seeded questions that lack them."""
+    if models is None:
+        from .models import Question
+    else:
+        Question = models['Question']
+
+    updated = 0
+    queryset = Question.objects.filter(is_seeded=True, content_hash='').order_by('id')
+    batch = []
+    for question in queryset.iterator(chunk_size=batch_size):
+        question.seed_key = question_seed_key(question.question_text, question.category_id, question.difficulty_id)
+        question.content_hash = question_content_hash(
+            question.seed_key, question.correct_answer, question.answer_options, question.metadata_json,
+        )
+        batch.append(question)
+        if len(batch) >= batch_size:
+            Question.objects.bulk_update(batch, ['seed_key', 'content_hash'])
+            updated += len(batch)
+            batch = []
+    if batch:
+        Question.objects.bulk_update(batch, ['seed_key', 'content_hash'])
+        updated += len(batch)
+    return updated
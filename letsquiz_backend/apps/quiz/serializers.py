@@ -1,7 +1,9 @@
+from django.conf import settings
 from django.contrib.auth import authenticate, get_user_model
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
 from django.utils.http import urlsafe_base64_decode
 from django.utils.encoding import force_str
+from django.db import transaction
 from django.utils import timezone
 import re
 
@@ -16,6 +18,7 @@ from apps.quiz.models import (
     QuizSessionQuestion,
     GroupPlayer 
 )
+from apps.quiz.group_players import link_players
 
 User = get_user_model()
 
@@ -29,6 +32,12 @@ def normalize_answer_text(value: str) -> str:
     normalized = re.sub(r'\s+', ' ', normalized)
     return normalized
 
+
+def shared_difficulty_id(questions):
+    """The difficulty every question has, or None for a mixed (or empty) set."""
+    difficulty_ids = {question.difficulty_id for question in questions}
+    return difficulty_ids.pop() if len(difficulty_ids) == 1 else None
+
 MIN_GROUP_PLAYERS = 2
 # Level 1 cap: keep group sessions at 2-6 players for stable local gameplay.
 # If Level 3+ expands this, update frontend and backend caps together.
@@ -97,7 +106,7 @@ class UserProfileSerializer(serializers.ModelSerializer):
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
-        fields = ('id', 'name')
+        fields = ('id', 'name', 'parent')
 
 class DifficultyLevelSerializer(serializers.ModelSerializer):
     class Meta:
@@ -113,13 +122,66 @@ class QuestionSerializer(serializers.ModelSerializer):
         fields = ('id', 'category', 'difficulty', 'question_text', 'correct_answer', 'answer_options', 'metadata_json')
 
 
+class BulkQuestionUpsertSerializer(serializers.Serializer):
+    """One upsert entry: with ``id`` the given fields are updated, without it a question is created."""
+    id = serializers.IntegerField(required=False, min_value=1)
+    category_id = serializers.IntegerField(required=False)
+    difficulty = serializers.CharField(required=False, max_length=50)
+    question_text = serializers.CharField(required=False)
+    correct_answer = serializers.CharField(required=False, max_length=255)
+    answer_options = serializers.ListField(child=serializers.CharField(max_length=255), required=False)
+    metadata_json = serializers.DictField(required=False)
+    tags = serializers.ListField(child=serializers.CharField(max_length=50), required=False)
+    is_curated = serializers.BooleanField(required=False)
+    is_fallback = serializers.BooleanField(required=False)
+
+    def validate(self, data):
+        if 'id' not in data:
+            missing = [
+                field for field in ('category_id', 'difficulty', 'question_text', 'correct_answer')
+                if field not in data
+            ]
+            if missing:
+                raise ValidationError({field: ["This field is required for new questions."] for field in missing})
+        return data
+
+
+class BulkRecategorizeSerializer(serializers.Serializer):
+    question_ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False)
+    category_id = serializers.IntegerField()
+
+
+class BulkQuestionChangesSerializer(serializers.Serializer):
+    upsert = BulkQuestionUpsertSerializer(many=True, required=False)
+    recategorize = BulkRecategorizeSerializer(many=True, required=False)
+    delete = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False)
+    batch_size = serializers.IntegerField(required=False, min_value=1, max_value=5000)
+
+    def validate(self, data):
+        total = (
+            len(data.get('upsert', []))
+            + sum(len(move['question_ids']) for move in data.get('recategorize', []))
+            + len(data.get('delete', []))
+        )
+        if total == 0:
+            raise ValidationError({'non_field_errors': ["Nothing to change."]})
+        max_items = settings.BULK_QUESTION_MAX_ITEMS
+        if total > max_items:
+            raise ValidationError({'non_field_errors': [f"At most {max_items} changes per request."]})
+        return data
+
+
 class QuizSessionStartSerializer(serializers.Serializer):
     category_id = serializers.IntegerField(required=False, allow_null=True)
     difficulty_id = serializers.IntegerField(required=False, allow_null=True)
     difficulty = serializers.CharField(required=False, allow_blank=False, max_length=50)
     count = serializers.IntegerField(min_value=1)
-    mode = serializers.ChoiceField(choices=['solo', 'group'])
+    mode = serializers.ChoiceField(choices=['solo', 'group', 'adaptive'])
     players = serializers.ListField(child=serializers.CharField(max_length=100), required=False)
+    # Tag filters (ignored in adaptive mode)
+    tags = serializers.ListField(child=serializers.CharField(max_length=50), required=False)
+    any_tags = serializers.ListField(child=serializers.CharField(max_length=50), required=False)
+    exclude_tags = serializers.ListField(child=serializers.CharField(max_length=50), required=False)
 
     def validate(self, data):
         mode = data.get('mode')
@@ -157,13 +219,15 @@ class QuizSessionSerializer(serializers.ModelSerializer):
     total_questions = serializers.SerializerMethodField()
 
     def get_total_questions(self, obj):
+        if obj.is_adaptive and obj.target_question_count:
+            return obj.target_question_count
         return obj.session_questions.count()
 
     class Meta:
         model = QuizSession
         fields = ('id', 'user', 'started_at', 'completed_at', 'score', 
                  'is_group_session', 'session_questions', 'group_players',
-                 'total_questions')
+                 'total_questions', 'is_adaptive', 'ability')
 
 class QuizSessionQuestionSaveSerializer(serializers.Serializer):
     id = serializers.IntegerField()
@@ -194,7 +258,13 @@ class QuizSessionSaveSerializer(serializers.Serializer):
                         })
         return data
 
+    @transaction.atomic
     def create(self, validated_data):
+        from apps.quiz.leaderboard import record_session_completed
+        from apps.quiz.question_stats import record_question_attempts
+        from apps.quiz.score_histograms import record_session_score
+        from apps.quiz.stats_aggregates import record_session_saved
+
         user = self.context['request'].user if self.context['request'].user.is_authenticated else None
         questions_data = validated_data.pop('questions')
         score = validated_data.pop('score')
@@ -210,6 +280,7 @@ class QuizSessionSaveSerializer(serializers.Serializer):
         )
 
         questions_in_order = []
+        answered = []
         for question_data in questions_data:
             try:
                 question = Question.objects.get(id=question_data['id'])
@@ -218,6 +289,7 @@ class QuizSessionSaveSerializer(serializers.Serializer):
                     normalize_answer_text(question.correct_answer)
                     == normalize_answer_text(question_data['selected_answer'])
                 )
+                answered.append((question, is_correct))
                 QuizSessionQuestion.objects.create(
                     quiz_session=quiz_session,
                     question=question,
@@ -228,6 +300,14 @@ class QuizSessionSaveSerializer(serializers.Serializer):
             except Question.DoesNotExist:
                 pass
 
+        # The category the player picked (a sub-topic's questions would say otherwise); NULL for mixed play
+        category_id = validated_data.get('category_id')
+        if category_id and Category.objects.filter(id=category_id).exists():
+            quiz_session.category_id = category_id
+        quiz_session.difficulty_id = shared_difficulty_id(questions_in_order)
+        if quiz_session.category_id or quiz_session.difficulty_id:
+            quiz_session.save(update_fields=['category', 'difficulty'])
+
         if is_group_session and players_data:
             # Delete any existing group players to avoid duplicates and ensure clean state
             existing_players = GroupPlayer.objects.filter(quiz_session=quiz_session)
@@ -259,7 +339,13 @@ class QuizSessionSaveSerializer(serializers.Serializer):
                     correct_answers=correct_answers_dict
                 )
                 group_players_to_create.append(group_player)
-            GroupPlayer.objects.bulk_create(group_players_to_create)
+            GroupPlayer.objects.bulk_create(link_players(group_players_to_create))
+
+        record_session_saved(quiz_session, answered)
+        attempts = [(question.id, is_correct) for question, is_correct in answered]
+        transaction.on_commit(lambda: record_question_attempts(attempts))
+        record_session_completed(quiz_session)
+        record_session_score(quiz_session, len(questions_in_order))
 
         return quiz_session
 
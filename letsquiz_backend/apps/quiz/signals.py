@@ -2,13 +2,17 @@
 Django signals for automatic cache invalidation
 """
 import logging
-from django.db.models.signals import post_save, post_delete
+from django.core.exceptions import ValidationError
+from django.db.models.signals import m2m_changed, post_save, post_delete, pre_save
 from django.dispatch import receiver
-from .models import Question, Category, QuizSession
+from .models import Question, Category, QuizSession, Tag
+from .category_tree import clear_category_tree, link_category, move_category, would_create_cycle
+from .tag_index import normalize_tag
 from .cache_utils import (
     on_question_created_or_updated,
     on_question_deleted,
     on_category_updated,
+    on_question_tags_changed,
     invalidate_session_cache
 )
 
@@ -30,11 +34,55 @@ def question_post_delete(sender, instance, **kwargs):
     on_question_deleted(instance)
 
 
+@receiver(m2m_changed, sender=Question.tags.through)
+def question_tags_changed(sender, instance, action, reverse, **kwargs):
+    """Invalidate question data (and the tag index) when tags are added or removed"""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    # reverse: tag.questions changed, so several categories may be affected
+    on_question_tags_changed(None if reverse else instance.category_id)
+
+
+@receiver(pre_save, sender=Tag)
+def normalize_tag_name(sender, instance, **kwargs):
+    """Tags entered in the admin match the names filters are parsed into"""
+    instance.name = normalize_tag(instance.name)
+
+
+@receiver(post_delete, sender=Tag)
+def tag_deleted(sender, instance, **kwargs):
+    """A deleted tag's links cascade without m2m signals"""
+    on_question_tags_changed(None)
+
+
+@receiver(pre_save, sender=Category)
+def category_pre_save(sender, instance, **kwargs):
+    """Remember the stored parent so post_save can tell a move from an edit"""
+    instance._stored_parent_id = (
+        Category.objects.filter(pk=instance.pk).values_list('parent_id', flat=True).first() if instance.pk else None
+    )
+    if instance.parent_id != instance._stored_parent_id and would_create_cycle(instance.pk, instance.parent_id):
+        raise ValidationError('A category cannot be moved under itself or one of its sub-topics.')
+
+
 @receiver(post_save, sender=Category)
 def category_post_save(sender, instance, created, **kwargs):
-    """Invalidate cache when category is created or updated"""
+    """Maintain the closure table and invalidate cache when category is created or updated"""
     action = "created" if created else "updated"
     logger.info(f"Category {action}: {instance.id} - invalidating cache")
+    if created:
+        link_category(instance)
+    elif instance.parent_id != getattr(instance, '_stored_parent_id', instance.parent_id):
+        move_category(instance)
+    clear_category_tree()
+    on_category_updated(instance)
+
+
+@receiver(post_delete, sender=Category)
+def category_post_delete(sender, instance, **kwargs):
+    """Only childless categories get here (parent is PROTECT); closure rows cascade, drop the cached tree"""
+    logger.info(f"Category deleted: {instance.id} - invalidating cache")
+    clear_category_tree()
     on_category_updated(instance)
 
 
@@ -0,0 +1,413 @@
+"""
+Question-bank snapshots for cold starts.
+
+A snapshot is a standalone SQLite file holding categories, difficulty levels,
+questions, tags and question-tag links, plus a ``meta`` table (format version, creation time, source)
+and a ``checksums`` table with a row count and SHA-256 per table. Checksums
+are computed over the rows in id order, so the importer verifies them while
+streaming the rows in and rolls back on any mismatch.
+
+Import keeps snapshot question ids and bypasses the ORM for the question and link rows:
+``COPY ... FROM STDIN`` on PostgreSQL, ``executemany`` with relaxed pragmas on
+SQLite, plain ``executemany`` elsewhere. Categories, difficulty levels and tags
+are matched by name/label (they may already exist from migrations); categories are
+matched or created first and given their snapshot parents in a second pass,
+then the category closure table is rebuilt from the parent links. The tag
+index is marked stale with the rest of the question data once the load commits.
+"""
+import hashlib
+import io
+import json
+import logging
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .cache_utils import deferred_question_invalidation, invalidate_question_data
+from .category_tree import rebuild_closure
+from .models import Category, DifficultyLevel, Question, Tag
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT_VERSION = 5
+SNAPSHOT_BATCH_SIZE = 20000
+
+CATEGORY_FIELDS = ('id', 'name', 'description', 'parent_id')
+DIFFICULTY_FIELDS = ('id', 'label', 'description')
+QUESTION_FIELDS = (
+    'id', 'category_id', 'difficulty_id', 'question_text', 'correct_answer',
+    'answer_options', 'metadata_json', 'is_seeded', 'is_fallback', 'is_generated', 'is_curated',
+    'seed_key', 'content_hash',
+)
+TAG_FIELDS = ('id', 'name')
+QUESTION_TAG_FIELDS = ('id', 'question_id', 'tag_id')
+JSON_FIELDS = {'answer_options', 'metadata_json'}
+BOOLEAN_FIELDS = {'is_seeded', 'is_fallback', 'is_generated', 'is_curated'}  # Stored as 0/1; accepted as-is by every backend
+
+SNAPSHOT_TABLES = {
+    'categories': CATEGORY_FIELDS,
+    'difficulties': DIFFICULTY_FIELDS,
+    'questions': QUESTION_FIELDS,
+    'tags': TAG_FIELDS,
+    'question_tags': QUESTION_TAG_FIELDS,
+}
+
+
+class SnapshotError(Exception):
+    """The snapshot is unreadable, of an unsupported version, or fails its checksums."""
+
+
+class _TableDigest:
+    def __init__(self):
+        self.rows = 0
+        self._sha = hashlib.sha256()
+
+    def add_many(self, rows: Sequence[Tuple]):
+        # Rows are tuples of ints, strings and None on both sides, so repr() is canonical
+        if not rows:
+            return
+        self.rows += len(rows)
+        self._sha.update(('\n'.join(map(repr, rows)) + '\n').encode('utf-8'))
+
+    def hexdigest(self) -> str:
+        return self._sha.hexdigest()
+
+
+def _snapshot_row(row: Sequence) -> Tuple:
+    """Driver values -> snapshot storage (JSON as text)."""
+    return tuple(
+        (value if isinstance(value, str) else json.dumps(value, separators=(',', ':'), ensure_ascii=False))
+        if field in JSON_FIELDS and value is not None
+        else value
+        for field, value in zip(QUESTION_FIELDS, row)
+    )
+
+
+def _iter_table_batches(model, fields: Sequence[str], batch_size: int) -> Iterator[List[Tuple]]:
+    """Raw rows of a model table in id order, skipping ORM field conversion."""
+    quote = connection.ops.quote_name
+    columns = ', '.join(
+        # Booleans as plain 0/1 (drivers would otherwise hand back True/False)
+        f"CASE WHEN {quote(model._meta.get_field(field).column)} THEN 1 ELSE 0 END" if field in BOOLEAN_FIELDS
+        else quote(model._meta.get_field(field).column)
+        for field in fields
+    )
+    sql = f"SELECT {columns} FROM {quote(model._meta.db_table)} ORDER BY {quote(model._meta.pk.column)}"
+    with connection.chunked_cursor() as cursor:
+        cursor.execute(sql)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield [tuple(row) for row in rows]
+
+
+def export_snapshot(path: Path, batch_size: int = SNAPSHOT_BATCH_SIZE) -> Dict[str, int]:
+    """Write the question bank to a new snapshot file; returns row counts per table."""
+    path = Path(path)
+    tmp_path = path.with_name(path.name + '.tmp')
+    if tmp_path.exists():
+        tmp_path.unlink()
+
+    # SQLite already returns JSON as text
+    question_convert = None if connection.vendor == 'sqlite' else _snapshot_row
+    sources = {
+        'categories': (Category, None),
+        'difficulties': (DifficultyLevel, None),
+        'questions': (Question, question_convert),
+        'tags': (Tag, None),
+        'question_tags': (Question.tags.through, None),
+    }
+
+    snapshot = sqlite3.connect(str(tmp_path))
+    try:
+        snapshot.execute('PRAGMA journal_mode = OFF')
+        snapshot.execute('PRAGMA synchronous = OFF')
+        snapshot.execute('CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)')
+        snapshot.execute('CREATE TABLE checksums (table_name TEXT PRIMARY KEY, rows INTEGER NOT NULL, sha256 TEXT NOT NULL)')
+        for table, fields in SNAPSHOT_TABLES.items():
+            snapshot.execute(f"CREATE TABLE {table} ({', '.join(fields)})")
+
+        counts = {}
+        for table, (model, convert) in sources.items():
+            digest = _TableDigest()
+            insert = f"INSERT INTO {table} VALUES ({', '.join('?' * len(SNAPSHOT_TABLES[table]))})"
+            for rows in _iter_table_batches(model, SNAPSHOT_TABLES[table], batch_size):
+                if convert:
+                    rows = [convert(row) for row in rows]
+                digest.add_many(rows)
+                snapshot.executemany(insert, rows)
+            snapshot.execute('INSERT INTO checksums VALUES (?, ?, ?)', (table, digest.rows, digest.hexdigest()))
+            counts[table] = digest.rows
+
+        snapshot.executemany('INSERT INTO meta VALUES (?, ?)', [
+            ('format_version', str(SNAPSHOT_FORMAT_VERSION)),
+            ('created_at', timezone.now().isoformat()),
+            ('source_vendor', connection.vendor),
+        ])
+        snapshot.commit()
+    finally:
+        snapshot.close()
+
+    tmp_path.replace(path)
+    return counts
+
+
+def read_snapshot_meta(snapshot: sqlite3.Connection) -> Tuple[Dict[str, str], Dict[str, Tuple[int, str]]]:
+    try:
+        meta = dict(snapshot.execute('SELECT key, value FROM meta'))
+        checksums = {
+            table: (rows, sha256)
+            for table, rows, sha256 in snapshot.execute('SELECT table_name, rows, sha256 FROM checksums')
+        }
+    except sqlite3.DatabaseError as e:
+        raise SnapshotError(f'Not a question-bank snapshot: {e}') from e
+
+    version = meta.get('format_version')
+    if version != str(SNAPSHOT_FORMAT_VERSION):
+        raise SnapshotError(f'Unsupported snapshot format version {version!r} (expected {SNAPSHOT_FORMAT_VERSION}).')
+    missing = set(SNAPSHOT_TABLES) - set(checksums)
+    if missing:
+        raise SnapshotError(f"Snapshot has no checksums for: {', '.join(sorted(missing))}")
+    return meta, checksums
+
+
+def _verify(table: str, digest: _TableDigest, checksums: Dict[str, Tuple[int, str]]):
+    rows, sha256 = checksums[table]
+    if digest.rows != rows or digest.hexdigest() != sha256:
+        raise SnapshotError(
+            f'Checksum mismatch for {table}: read {digest.rows} rows ({digest.hexdigest()[:12]}), '
+            f'expected {rows} rows ({sha256[:12]}).'
+        )
+
+
+def _iter_batches(snapshot: sqlite3.Connection, table: str, batch_size: int) -> Iterator[List[Tuple]]:
+    cursor = snapshot.execute(f"SELECT {', '.join(SNAPSHOT_TABLES[table])} FROM {table} ORDER BY id")
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield rows
+
+
+def _match_lookup_rows(snapshot, table: str, model, name_field: str, checksums) -> Dict[int, int]:
+    """Map snapshot ids of difficulty levels to local ids, creating missing rows."""
+    digest = _TableDigest()
+    local = {getattr(obj, name_field): obj.id for obj in model.objects.all()}
+    id_map = {}
+    for rows in _iter_batches(snapshot, table, SNAPSHOT_BATCH_SIZE):
+        digest.add_many(rows)
+        for snapshot_id, name, description in rows:
+            if name not in local:
+                local[name] = model.objects.create(**{name_field: name, 'description': description}).id
+            id_map[snapshot_id] = local[name]
+    _verify(table, digest, checksums)
+    return id_map
+
+
+def _match_categories(snapshot, checksums) -> Dict[int, int]:
+    """
+    Map snapshot category ids to local ids, creating missing categories, then
+    give every matched category its snapshot parent (a child may come before
+    its parent in id order, so parents are set once all ids are known).
+    """
+    digest = _TableDigest()
+    local = {name: category_id for category_id, name in Category.objects.values_list('id', 'name')}
+    id_map = {}
+    snapshot_parents = {}
+    for rows in _iter_batches(snapshot, 'categories', SNAPSHOT_BATCH_SIZE):
+        digest.add_many(rows)
+        for snapshot_id, name, description, parent_id in rows:
+            if name not in local:
+                local[name] = Category.objects.create(name=name, description=description).id
+            id_map[snapshot_id] = local[name]
+            snapshot_parents[snapshot_id] = parent_id
+    _verify('categories', digest, checksums)
+
+    current_parents = dict(Category.objects.filter(id__in=id_map.values()).values_list('id', 'parent_id'))
+    for snapshot_id, parent_id in snapshot_parents.items():
+        category_id = id_map[snapshot_id]
+        local_parent_id = id_map.get(parent_id) if parent_id is not None else None
+        if current_parents.get(category_id) != local_parent_id:
+            # Queryset update: the closure table is rebuilt once afterwards instead of per move
+            Category.objects.filter(id=category_id).update(parent_id=local_parent_id)
+    return id_map
+
+
+def _match_tags(snapshot, checksums) -> Dict[int, int]:
+    """Map snapshot tag ids to local ids, creating missing tags in bulk."""
+    digest = _TableDigest()
+    local = dict(Tag.objects.values_list('name', 'id'))
+    snapshot_names = {}
+    for rows in _iter_batches(snapshot, 'tags', SNAPSHOT_BATCH_SIZE):
+        digest.add_many(rows)
+        snapshot_names.update(rows)
+    _verify('tags', digest, checksums)
+
+    missing = set(snapshot_names.values()) - set(local)
+    if missing:
+        Tag.objects.bulk_create([Tag(name=name) for name in missing], ignore_conflicts=True)
+        local.update(Tag.objects.filter(name__in=missing).values_list('name', 'id'))
+    return {snapshot_id: local[name] for snapshot_id, name in snapshot_names.items()}
+
+
+def _copy_text_value(value) -> str:
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    return (
+        str(value)
+        .replace('\\', '\\\\')
+        .replace('\n', '\\n')
+        .replace('\r', '\\r')
+        .replace('\t', '\\t')
+    )
+
+
+def _secondary_indexes(cursor, table: str) -> List[Tuple[str, str]]:
+    """(name, CREATE statement) of the table's droppable indexes (not PK/unique constraints)."""
+    if connection.vendor == 'sqlite':
+        cursor.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = %s AND sql IS NOT NULL",
+            [table],
+        )
+        return list(cursor.fetchall())
+    if connection.vendor == 'postgresql':
+        cursor.execute(
+            "SELECT indexname, indexdef FROM pg_indexes WHERE tablename = %s "
+            "AND indexname NOT IN (SELECT conname FROM pg_constraint)",
+            [table],
+        )
+        return list(cursor.fetchall())
+    return []
+
+
+def _load_rows_postgres(cursor, table: str, columns: List[str], batches: Iterable[List[Tuple]]):
+    sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN"
+    for rows in batches:
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write('\t'.join(_copy_text_value(value) for value in row))
+            buffer.write('\n')
+        buffer.seek(0)
+        cursor.copy_expert(sql, buffer)
+
+
+def _load_rows_executemany(cursor, table: str, columns: List[str], batches: Iterable[List[Tuple]]):
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+    for rows in batches:
+        cursor.executemany(sql, rows)
+
+
+def import_snapshot(path: Path, replace: bool = False, batch_size: int = SNAPSHOT_BATCH_SIZE) -> Dict[str, object]:
+    """
+    Bulk-load a snapshot into an empty question table (or replace the current
+    bank with ``replace=True``). Everything runs in one transaction that is
+    rolled back if any checksum fails.
+    """
+    path = Path(path)
+    if not path.exists():
+        raise SnapshotError(f'Snapshot not found: {path}')
+
+    started = time.monotonic()
+    snapshot = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+    restore_synchronous = None
+    try:
+        meta, checksums = read_snapshot_meta(snapshot)
+
+        if connection.vendor == 'sqlite':
+            # Durability is irrelevant for a load that is either complete or rolled back
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA synchronous')
+                restore_synchronous = cursor.fetchone()[0]
+                cursor.execute('PRAGMA synchronous = OFF')
+                cursor.execute('PRAGMA temp_store = MEMORY')
+                cursor.execute('PRAGMA cache_size = -200000')
+
+        with deferred_question_invalidation(), transaction.atomic():
+            if Question.objects.exists():
+                if not replace:
+                    raise SnapshotError('The question table is not empty; use --replace to overwrite it.')
+                deleted, _ = Question.objects.all().delete()
+                logger.warning(f'Deleted {deleted} rows before loading snapshot {path}')
+
+            category_ids = _match_categories(snapshot, checksums)
+            try:
+                rebuild_closure()
+            except ValueError as e:
+                raise SnapshotError(f'Invalid category tree in snapshot: {e}') from e
+            difficulty_ids = _match_lookup_rows(snapshot, 'difficulties', DifficultyLevel, 'label', checksums)
+            tag_ids = _match_tags(snapshot, checksums)
+
+            digest = _TableDigest()
+            category_index = QUESTION_FIELDS.index('category_id')
+            difficulty_index = QUESTION_FIELDS.index('difficulty_id')
+            remap = any(old != new for old, new in category_ids.items()) or any(
+                old != new for old, new in difficulty_ids.items()
+            )
+
+            def snapshot_batches():
+                for rows in _iter_batches(snapshot, 'questions', batch_size):
+                    digest.add_many(rows)
+                    if remap:
+                        rows = [
+                            row[:category_index]
+                            + (category_ids.get(row[category_index]), difficulty_ids.get(row[difficulty_index]))
+                            + row[difficulty_index + 1:]
+                            for row in rows
+                        ]
+                    yield rows
+
+            link_digest = _TableDigest()
+            tag_column = QUESTION_TAG_FIELDS.index('tag_id')
+
+            def link_batches():
+                # The question table was empty or emptied above, and links cascade with questions
+                for rows in _iter_batches(snapshot, 'question_tags', batch_size):
+                    link_digest.add_many(rows)
+                    yield [row[:tag_column] + (tag_ids.get(row[tag_column]),) + row[tag_column + 1:] for row in rows]
+
+            Link = Question.tags.through
+            load_rows = _load_rows_postgres if connection.vendor == 'postgresql' else _load_rows_executemany
+            with connection.cursor() as cursor:
+                for model, fields, batches, table_digest, table_name in (
+                    (Question, QUESTION_FIELDS, snapshot_batches(), digest, 'questions'),
+                    (Link, QUESTION_TAG_FIELDS, link_batches(), link_digest, 'question_tags'),
+                ):
+                    table = model._meta.db_table
+                    columns = [connection.ops.quote_name(model._meta.get_field(field).column) for field in fields]
+                    # Building indexes once after the load beats maintaining them row by row
+                    indexes = _secondary_indexes(cursor, table)
+                    for name, _ in indexes:
+                        cursor.execute(f'DROP INDEX {connection.ops.quote_name(name)}')
+
+                    load_rows(cursor, connection.ops.quote_name(table), columns, batches)
+                    _verify(table_name, table_digest, checksums)
+
+                    for _, create_sql in indexes:
+                        cursor.execute(create_sql)
+                for sql in connection.ops.sequence_reset_sql(no_style(), [Category, DifficultyLevel, Question, Tag, Link]):
+                    cursor.execute(sql)
+
+            invalidate_question_data(None)
+    finally:
+        snapshot.close()
+        if restore_synchronous is not None:
+            with connection.cursor() as cursor:
+                cursor.execute(f'PRAGMA synchronous = {int(restore_synchronous)}')
+
+    return {
+        'questions': digest.rows,
+        'categories': len(category_ids),
+        'difficulties': len(difficulty_ids),
+        'tags': len(tag_ids),
+        'question_tags': link_digest.rows,
+        'snapshot_created_at': meta.get('created_at'),
+        'elapsed_s': round(time.monotonic() - started, 2),
+    }
@@ -0,0 +1,540 @@
+"""
+Incrementally maintained per-user stat aggregates.
+
+Counters live in UserStatTotals / UserCategoryStat / UserDifficultyStat and
+are adjusted with F() increments inside the transactions that start, answer,
+save or delete quiz sessions, so the stats endpoint reads O(categories) rows
+instead of walking the user's whole history.
+
+Semantics match the original history scan: every question attached to a
+user's session counts towards ``total_questions`` (answered or not), and
+``correct_answers`` counts questions answered correctly.
+
+The same deltas also land in UserDailyStat rows (user x UTC day of the
+session start x category x difficulty), which back the windowed
+``window=7d|30d`` stats by summing at most one row per day and dimension.
+"""
+import logging
+from collections import defaultdict
+from datetime import date, timedelta, timezone as dt_timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Min, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from core.redis_utils import cache_delete_many
+
+from .models import (
+    QuizSession,
+    QuizSessionQuestion,
+    UserCategoryStat,
+    UserDailyStat,
+    UserDifficultyStat,
+    UserStatTotals,
+)
+
+logger = logging.getLogger(__name__)
+
+# (category_id, difficulty_id, total_delta, correct_delta)
+QuestionDelta = Tuple[Optional[int], Optional[int], int, int]
+
+STATS_WINDOWS = {'7d': 7, '30d': 30}
+
+
+def increment_counter(model, lookup: Dict, deltas: Dict[str, int]):
+    """Atomically add deltas to the row matching lookup, creating it if missing."""
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    updates = {field: F(field) + delta for field, delta in deltas.items()}
+    if model.objects.filter(**lookup).update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **deltas)
+    except IntegrityError:
+        # Created concurrently by another request; apply the increment to it
+        model.objects.filter(**lookup).update(**updates)
+
+
+def session_day(quiz_session: QuizSession) -> date:
+    """UTC day a session's activity is bucketed under."""
+    started_at = quiz_session.started_at or timezone.now()
+    return timezone.localtime(started_at, dt_timezone.utc).date()
+
+
+def apply_user_stat_deltas(
+    user_id: int,
+    quizzes: int = 0,
+    score: int = 0,
+    questions: Iterable[QuestionDelta] = (),
+    day: Optional[date] = None,
+    session_dims: Tuple[Optional[int], Optional[int]] = (None, None),
+):
+    """
+    Apply quiz/score/question deltas for a user in as few row updates as possible.
+    When ``day`` is given the daily rollup is updated too, with quizzes/score
+    attributed to ``session_dims`` (the session's category/difficulty).
+    """
+    category_deltas = defaultdict(lambda: [0, 0])
+    difficulty_deltas = defaultdict(lambda: [0, 0])
+    daily_deltas = defaultdict(lambda: [0, 0, 0, 0])  # quizzes, score, total, correct
+    total_questions = correct_answers = 0
+    for category_id, difficulty_id, total_delta, correct_delta in questions:
+        total_questions += total_delta
+        correct_answers += correct_delta
+        if category_id:
+            category_deltas[category_id][0] += total_delta
+            category_deltas[category_id][1] += correct_delta
+        if difficulty_id:
+            difficulty_deltas[difficulty_id][0] += total_delta
+            difficulty_deltas[difficulty_id][1] += correct_delta
+        daily_deltas[(category_id, difficulty_id)][2] += total_delta
+        daily_deltas[(category_id, difficulty_id)][3] += correct_delta
+    if quizzes or score:
+        daily_deltas[session_dims][0] += quizzes
+        daily_deltas[session_dims][1] += score
+
+    with transaction.atomic():
+        increment_counter(UserStatTotals, {'user_id': user_id}, {
+            'total_quizzes': quizzes,
+            'total_score': score,
+            'total_questions': total_questions,
+            'correct_answers': correct_answers,
+        })
+        for category_id, (total_delta, correct_delta) in category_deltas.items():
+            increment_counter(UserCategoryStat, {'user_id': user_id, 'category_id': category_id}, {
+                'total_questions': total_delta,
+                'correct_answers': correct_delta,
+            })
+        for difficulty_id, (total_delta, correct_delta) in difficulty_deltas.items():
+            increment_counter(UserDifficultyStat, {'user_id': user_id, 'difficulty_id': difficulty_id}, {
+                'total_questions': total_delta,
+                'correct_answers': correct_delta,
+            })
+        if day is not None:
+            for (category_id, difficulty_id), (quiz_delta, score_delta, total_delta, correct_delta) in daily_deltas.items():
+                increment_counter(UserDailyStat, {
+                    'user_id': user_id,
+                    'day': day,
+                    'category_id': category_id,
+                    'difficulty_id': difficulty_id,
+                }, {
+                    'quizzes': quiz_delta,
+                    'score': score_delta,
+                    'total_questions': total_delta,
+                    'correct_answers': correct_delta,
+                })
+
+    _invalidate_stats_on_commit(user_id)
+
+
+def _dims(questions) -> Tuple[Optional[int], Optional[int]]:
+    for question in questions:
+        return question.category_id, question.difficulty_id
+    return None, None
+
+
+def _session_dims(quiz_session: QuizSession) -> Tuple[Optional[int], Optional[int]]:
+    """The session's category/difficulty: its first question's, as rebuild_daily_stats credits it."""
+    row = (
+        QuizSessionQuestion.objects
+        .filter(quiz_session=quiz_session)
+        .order_by('id')
+        .values_list('question__category_id', 'question__difficulty_id')
+        .first()
+    )
+    return row or (None, None)
+
+
+def record_session_started(quiz_session: QuizSession, questions: Iterable):
+    """A user started a session with the given (unanswered) questions."""
+    if not quiz_session.user_id:
+        return
+    questions = list(questions)
+    apply_user_stat_deltas(
+        quiz_session.user_id,
+        quizzes=1,
+        score=quiz_session.score,
+        questions=[(q.category_id, q.difficulty_id, 1, 0) for q in questions],
+        day=session_day(quiz_session),
+        session_dims=_dims(questions),
+    )
+
+
+def record_question_added(quiz_session: QuizSession, question):
+    """An adaptive session was given one more (unanswered) question."""
+    if not quiz_session.user_id:
+        return
+    apply_user_stat_deltas(
+        quiz_session.user_id,
+        questions=[(question.category_id, question.difficulty_id, 1, 0)],
+        day=session_day(quiz_session),
+    )
+
+
+def record_answer(quiz_session: QuizSession, question, is_correct: bool):
+    """A question already counted at session start was answered."""
+    if not quiz_session.user_id or not is_correct:
+        return
+    apply_user_stat_deltas(
+        quiz_session.user_id,
+        score=1,
+        questions=[(question.category_id, question.difficulty_id, 0, 1)],
+        day=session_day(quiz_session),
+        session_dims=_session_dims(quiz_session),
+    )
+
+
+def record_session_saved(quiz_session: QuizSession, answered: Iterable[Tuple[object, bool]]):
+    """A completed session was saved in one go with (question, is_correct) pairs."""
+    if not quiz_session.user_id:
+        return
+    answered = list(answered)
+    apply_user_stat_deltas(
+        quiz_session.user_id,
+        quizzes=1,
+        score=quiz_session.score,
+        questions=[(q.category_id, q.difficulty_id, 1, 1 if is_correct else 0) for q, is_correct in answered],
+        day=session_day(quiz_session),
+        session_dims=_dims(q for q, _ in answered),
+    )
+
+
+def record_session_deleted(quiz_session: QuizSession):
+    """Subtract a session's contribution; call before its rows are deleted."""
+    if not quiz_session.user_id:
+        return
+    rows = list(
+        QuizSessionQuestion.objects
+        .filter(quiz_session=quiz_session)
+        .order_by('id')
+        .values_list('question__category_id', 'question__difficulty_id', 'is_correct')
+    )
+    apply_user_stat_deltas(
+        quiz_session.user_id,
+        quizzes=-1,
+        score=-quiz_session.score,
+        questions=[(category_id, difficulty_id, -1, -1 if is_correct else 0) for category_id, difficulty_id, is_correct in rows],
+        day=session_day(quiz_session),
+        session_dims=(rows[0][0], rows[0][1]) if rows else (None, None),
+    )
+
+
+def _invalidate_stats_on_commit(user_id: int):
+    from .cache_utils import invalidate_user_stats_cache
+    transaction.on_commit(lambda: invalidate_user_stats_cache(user_id))
+
+
+def _lock_user_totals(totals_model, user_ids: Optional[List[int]]) -> set:
+    """Lock the users' totals rows for the rest of the transaction; returns their user ids."""
+    locked = totals_model.objects.select_for_update()
+    if user_ids is not None:
+        locked = locked.filter(user_id__in=user_ids)
+    return set(locked.values_list('user_id', flat=True))
+
+
+def _invalidate_user_caches_on_commit(user_ids: Iterable[int]):
+    """Drop cached profile/stats/history (and so dashboard sections) of rebuilt users."""
+    from .cache_utils import get_user_cache_keys
+    keys = [key for user_id in user_ids for key in get_user_cache_keys(user_id)]
+    if keys:
+        transaction.on_commit(lambda: cache_delete_many(keys))
+
+
+def _accuracy(correct: int, total: int) -> float:
+    return round((correct / total * 100), 1) if total > 0 else 0
+
+
+def read_user_stats(user_id: int) -> Dict:
+    """Build the stats payload from aggregate rows (O(categories + difficulties))."""
+    totals = UserStatTotals.objects.filter(user_id=user_id).first()
+    total_questions = totals.total_questions if totals else 0
+    correct_answers = totals.correct_answers if totals else 0
+
+    category_rows = (
+        UserCategoryStat.objects
+        .filter(user_id=user_id, total_questions__gt=0)
+        .select_related('category')
+        .order_by('category_id')
+    )
+    difficulty_rows = (
+        UserDifficultyStat.objects
+        .filter(user_id=user_id, total_questions__gt=0)
+        .select_related('difficulty')
+        .order_by('difficulty_id')
+    )
+
+    return {
+        'overall_stats': {
+            'total_quizzes': totals.total_quizzes if totals else 0,
+            'total_score': totals.total_score if totals else 0,
+            'total_questions': total_questions,
+            'correct_answers': correct_answers,
+            'accuracy': _accuracy(correct_answers, total_questions),
+        },
+        'category_stats': {
+            row.category.name: {
+                'correct': row.correct_answers,
+                'total': row.total_questions,
+                'accuracy': _accuracy(row.correct_answers, row.total_questions),
+            } for row in category_rows
+        },
+        'difficulty_stats': {
+            row.difficulty.label: {
+                'correct': row.correct_answers,
+                'total': row.total_questions,
+                'accuracy': _accuracy(row.correct_answers, row.total_questions),
+            } for row in difficulty_rows
+        },
+    }
+
+
+def rebuild_user_stats(user_ids: Optional[List[int]] = None, models=None) -> int:
+    """
+    Recompute aggregates from history with grouped queries and replace the
+    stored rows. ``models`` lets data migrations pass historical models.
+    Returns the number of users rebuilt.
+    """
+    live_models = models is None
+    if models is None:
+        models = {
+            'QuizSession': QuizSession,
+            'QuizSessionQuestion': QuizSessionQuestion,
+            'UserStatTotals': UserStatTotals,
+            'UserCategoryStat': UserCategoryStat,
+            'UserDifficultyStat': UserDifficultyStat,
+        }
+    session_model = models['QuizSession']
+    session_question_model = models['QuizSessionQuestion']
+    totals_model = models['UserStatTotals']
+    category_model = models['UserCategoryStat']
+    difficulty_model = models['UserDifficultyStat']
+
+    # Read and replace in one transaction. Increments update the totals row first
+    # (apply_user_stat_deltas), so locking those rows holds them back until the
+    # rebuilt rows are committed instead of losing them in between.
+    with transaction.atomic():
+        stale_user_ids = _lock_user_totals(totals_model, user_ids)
+        sessions = session_model.objects.filter(user__isnull=False)
+        answers = session_question_model.objects.filter(quiz_session__user__isnull=False)
+        if user_ids is not None:
+            sessions = sessions.filter(user_id__in=user_ids)
+            answers = answers.filter(quiz_session__user_id__in=user_ids)
+
+        totals = {
+            row['user_id']: totals_model(
+                user_id=row['user_id'],
+                total_quizzes=row['quizzes'],
+                total_score=row['score'] or 0,
+            )
+            for row in sessions.values('user_id').annotate(quizzes=Count('id'), score=Sum('score'))
+        }
+
+        correct_filter = Count('id', filter=Q(is_correct=True))
+        category_rows = []
+        for row in (
+            answers.filter(question__category__isnull=False)
+            .values('quiz_session__user_id', 'question__category_id')
+            .annotate(total=Count('id'), correct=correct_filter)
+        ):
+            category_rows.append(category_model(
+                user_id=row['quiz_session__user_id'],
+                category_id=row['question__category_id'],
+                total_questions=row['total'],
+                correct_answers=row['correct'],
+            ))
+
+        difficulty_rows = []
+        for row in (
+            answers.filter(question__difficulty__isnull=False)
+            .values('quiz_session__user_id', 'question__difficulty_id')
+            .annotate(total=Count('id'), correct=correct_filter)
+        ):
+            difficulty_rows.append(difficulty_model(
+                user_id=row['quiz_session__user_id'],
+                difficulty_id=row['question__difficulty_id'],
+                total_questions=row['total'],
+                correct_answers=row['correct'],
+            ))
+
+        for row in answers.values('quiz_session__user_id').annotate(total=Count('id'), correct=correct_filter):
+            user_totals = totals.get(row['quiz_session__user_id'])
+            if user_totals is not None:
+                user_totals.total_questions = row['total']
+                user_totals.correct_answers = row['correct']
+
+        for model in (totals_model, category_model, difficulty_model):
+            stale = model.objects.all()
+            if user_ids is not None:
+                stale = stale.filter(user_id__in=user_ids)
+            stale.delete()
+        totals_model.objects.bulk_create(totals.values(), batch_size=1000)
+        category_model.objects.bulk_create(category_rows, batch_size=1000)
+        difficulty_model.objects.bulk_create(difficulty_rows, batch_size=1000)
+
+        if live_models:
+            _invalidate_user_caches_on_commit(stale_user_ids | set(totals))
+
+    return len(totals)
+
+
+def read_windowed_user_stats(user_id: int, window: str, today: Optional[date] = None) -> Dict:
+    """
+    Build the stats payload for the last ``window`` days from daily rollups,
+    plus a zero-filled per-day series and the accuracy change versus the
+    preceding window of the same length. Touches at most 2 x days x dimensions rows.
+    """
+    days = STATS_WINDOWS[window]
+    today = today or timezone.now().date()
+    start = today - timedelta(days=days - 1)
+    previous_start = start - timedelta(days=days)
+
+    rows = (
+        UserDailyStat.objects
+        .filter(user_id=user_id, day__gte=previous_start, day__lte=today)
+        .values('day', 'category__name', 'difficulty__label', 'quizzes', 'score', 'total_questions', 'correct_answers')
+    )
+
+    overall = {'total_quizzes': 0, 'total_score': 0, 'total_questions': 0, 'correct_answers': 0}
+    previous = {'total_questions': 0, 'correct_answers': 0}
+    category_stats = defaultdict(lambda: {'correct': 0, 'total': 0})
+    difficulty_stats = defaultdict(lambda: {'correct': 0, 'total': 0})
+    daily = {
+        start + timedelta(days=offset): {'quizzes': 0, 'score': 0, 'total_questions': 0, 'correct_answers': 0}
+        for offset in range(days)
+    }
+
+    for row in rows:
+        if row['day'] < start:
+            previous['total_questions'] += row['total_questions']
+            previous['correct_answers'] += row['correct_answers']
+            continue
+        overall['total_quizzes'] += row['quizzes']
+        overall['total_score'] += row['score']
+        overall['total_questions'] += row['total_questions']
+        overall['correct_answers'] += row['correct_answers']
+        bucket = daily[row['day']]
+        for field in ('quizzes', 'score', 'total_questions', 'correct_answers'):
+            bucket[field] += row[field]
+        if row['category__name']:
+            category_stats[row['category__name']]['total'] += row['total_questions']
+            category_stats[row['category__name']]['correct'] += row['correct_answers']
+        if row['difficulty__label']:
+            difficulty_stats[row['difficulty__label']]['total'] += row['total_questions']
+            difficulty_stats[row['difficulty__label']]['correct'] += row['correct_answers']
+
+    accuracy = _accuracy(overall['correct_answers'], overall['total_questions'])
+    previous_accuracy = (
+        _accuracy(previous['correct_answers'], previous['total_questions'])
+        if previous['total_questions'] else None
+    )
+
+    return {
+        'window': window,
+        'start_date': start.isoformat(),
+        'end_date': today.isoformat(),
+        'overall_stats': {**overall, 'accuracy': accuracy},
+        'category_stats': {
+            name: {**stats, 'accuracy': _accuracy(stats['correct'], stats['total'])}
+            for name, stats in category_stats.items() if stats['total'] > 0
+        },
+        'difficulty_stats': {
+            label: {**stats, 'accuracy': _accuracy(stats['correct'], stats['total'])}
+            for label, stats in difficulty_stats.items() if stats['total'] > 0
+        },
+        'accuracy_trend': {
+            'current': accuracy,
+            'previous': previous_accuracy,
+            'change': round(accuracy - previous_accuracy, 1) if previous_accuracy is not None else None,
+        },
+        'daily': [
+            {
+                'date': day.isoformat(),
+                **bucket,
+                'accuracy': _accuracy(bucket['correct_answers'], bucket['total_questions']),
+            }
+            for day, bucket in sorted(daily.items())
+        ],
+    }
+
+
+def rebuild_daily_stats(user_ids: Optional[List[int]] = None, since: Optional[date] = None, models=None) -> int:
+    """
+    Recompute daily rollups from history (optionally only days >= ``since``)
+    and replace the stored rows. ``models`` lets data migrations pass
+    historical models. Returns the number of rows written.
+    """
+    live_models = models is None
+    if models is None:
+        models = {
+            'QuizSession': QuizSession,
+            'QuizSessionQuestion': QuizSessionQuestion,
+            'UserDailyStat': UserDailyStat,
+        }
+    session_question_model = models['QuizSessionQuestion']
+    daily_model = models['UserDailyStat']
+
+    with transaction.atomic():
+        if live_models:
+            stale_user_ids = _lock_user_totals(UserStatTotals, user_ids)
+        sessions = models['QuizSession'].objects.filter(user__isnull=False)
+        answers = session_question_model.objects.filter(quiz_session__user__isnull=False)
+        stale = daily_model.objects.all()
+        if user_ids is not None:
+            sessions = sessions.filter(user_id__in=user_ids)
+            answers = answers.filter(quiz_session__user_id__in=user_ids)
+            stale = stale.filter(user_id__in=user_ids)
+        if since is not None:
+            sessions = sessions.filter(started_at__date__gte=since)
+            answers = answers.filter(quiz_session__started_at__date__gte=since)
+            stale = stale.filter(day__gte=since)
+
+        buckets = defaultdict(lambda: [0, 0, 0, 0])  # quizzes, score, total, correct
+        for row in (
+            answers
+            .annotate(day=TruncDate('quiz_session__started_at', tzinfo=dt_timezone.utc))
+            .values('quiz_session__user_id', 'day', 'question__category_id', 'question__difficulty_id')
+            .annotate(total=Count('id'), correct=Count('id', filter=Q(is_correct=True)))
+        ):
+            key = (row['quiz_session__user_id'], row['day'], row['question__category_id'], row['question__difficulty_id'])
+            buckets[key][2] += row['total']
+            buckets[key][3] += row['correct']
+
+        # quizzes/score go to each session's first question's category/difficulty
+        first_question_ids = dict(
+            answers.values('quiz_session_id').annotate(first_id=Min('id')).values_list('quiz_session_id', 'first_id')
+        )
+        first_dims = {
+            row['id']: (row['question__category_id'], row['question__difficulty_id'])
+            for row in session_question_model.objects.filter(id__in=first_question_ids.values())
+            .values('id', 'question__category_id', 'question__difficulty_id')
+        }
+        for session in sessions.values('id', 'user_id', 'started_at', 'score').iterator(chunk_size=2000):
+            day = timezone.localtime(session['started_at'], dt_timezone.utc).date()
+            dims = first_dims.get(first_question_ids.get(session['id']), (None, None))
+            key = (session['user_id'], day, *dims)
+            buckets[key][0] += 1
+            buckets[key][1] += session['score']
+
+        rows = [
+            daily_model(
+                user_id=user_id,
+                day=day,
+                category_id=category_id,
+                difficulty_id=difficulty_id,
+                quizzes=quizzes,
+                score=score,
+                total_questions=total,
+                correct_answers=correct,
+            )
+            for (user_id, day, category_id, difficulty_id), (quizzes, score, total, correct) in buckets.items()
+        ]
+        stale.delete()
+        daily_model.objects.bulk_create(rows, batch_size=1000)
+        if live_models:
+            _invalidate_user_caches_on_commit(stale_user_ids | {row.user_id for row in rows})
+
+    return len(rows)
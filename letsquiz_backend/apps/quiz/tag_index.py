@@ -0,0 +1,252 @@
+"""
+Question tags and their in-memory bitmap index.
+
+Tags are ``Tag`` rows linked through ``Question.tags``. For filtering, every
+playable Level 1 question gets an ordinal (its position in id order) and
+``TagIndex`` keeps one compressed bitmap (bitmaps.py) per tag, per category and
+per difficulty over those ordinals. A filter such as "space AND history, NOT
+easy-math" is a handful of bitmap AND/OR/AND NOT operations, and sampling
+picks random members of the result, so no JSON is parsed and no per-row scan
+runs at request time.
+
+The index is built with two queries and kept in process memory. Question or
+tag changes go through ``cache_utils.invalidate_question_data``, which bumps a
+version stamp (an ``IndexVersion`` row, so every process sees it) once the
+change commits; each process compares stamps at most every
+``TAG_INDEX_CHECK_INTERVAL`` seconds and rebuilds in the background, serving
+the previous index meanwhile.
+"""
+import logging
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, transaction
+from django.db.models import F
+
+from .bitmaps import Bitmap, union_all
+from .category_tree import get_allowed_category_ids
+from .level1_config import normalize_label, playable_question_q
+from .models import IndexVersion, Question, Tag
+
+logger = logging.getLogger(__name__)
+
+TAG_INDEX_VERSION_NAME = "tag_index"
+TAG_NAME_MAX_LENGTH = Tag._meta.get_field('name').max_length
+_EMPTY = Bitmap()
+
+
+def normalize_tag(value) -> str:
+    return normalize_label(str(value))[:TAG_NAME_MAX_LENGTH].strip()
+
+
+def parse_tags(raw) -> List[str]:
+    """Unique normalized tags from a list or a comma-separated string."""
+    if not raw:
+        return []
+    values = raw.split(',') if isinstance(raw, str) else raw
+    tags = []
+    for value in values:
+        tag = normalize_tag(value)
+        if tag and tag not in tags:
+            tags.append(tag)
+    return tags
+
+
+def set_question_tags(tags_by_question: Dict[int, Iterable[str]]):
+    """Replace the tags of each question (bulk; sends no m2m signals, so the tag index is marked stale here)."""
+    if not tags_by_question:
+        return
+    names_by_question = {question_id: set(parse_tags(list(tags))) for question_id, tags in tags_by_question.items()}
+    all_names = set().union(*names_by_question.values())
+    Through = Question.tags.through
+    with transaction.atomic():
+        if all_names:
+            Tag.objects.bulk_create([Tag(name=name) for name in all_names], ignore_conflicts=True)
+        tag_ids = dict(Tag.objects.filter(name__in=all_names).values_list('name', 'id'))
+        Through.objects.filter(question_id__in=list(names_by_question)).delete()
+        Through.objects.bulk_create(
+            [
+                Through(question_id=question_id, tag_id=tag_ids[name])
+                for question_id, names in names_by_question.items()
+                for name in names
+            ],
+            batch_size=1000,
+        )
+    mark_tag_index_stale()
+
+
+class TagIndex:
+    """Bitmaps over question ordinals; ``question_ids[ordinal]`` maps back to ids."""
+
+    def __init__(self, question_ids: array, tags: Dict[str, Bitmap], categories: Dict[int, Bitmap],
+                 difficulties: Dict[str, Bitmap], version=None):
+        self.question_ids = question_ids
+        self.tags = tags
+        self.categories = categories
+        self.difficulties = difficulties
+        self.version = version
+        self.all = Bitmap.from_sorted(range(len(question_ids)))
+
+    def __len__(self):
+        return len(self.question_ids)
+
+    def resolve(
+        self,
+        tags: Iterable[str] = (),
+        any_tags: Iterable[str] = (),
+        exclude_tags: Iterable[str] = (),
+        category_ids: Optional[Iterable[int]] = None,
+        difficulty_labels: Optional[Iterable[str]] = None,
+    ) -> Bitmap:
+        """
+        Ordinals carrying every tag in ``tags``, at least one of ``any_tags``
+        (when given) and none of ``exclude_tags``, within the categories and
+        difficulties when given.
+        """
+        required = sorted((self.tags.get(tag, _EMPTY) for tag in tags), key=len)
+        # Smallest first: every later AND works on an already narrow set
+        candidates = required[0] if required else self.all
+        for bitmap in required[1:]:
+            if not candidates:
+                return _EMPTY
+            candidates = candidates & bitmap
+        any_tags = list(any_tags)
+        if any_tags:
+            candidates = candidates & union_all(self.tags.get(tag, _EMPTY) for tag in any_tags)
+        if category_ids is not None:
+            candidates = candidates & union_all(self.categories.get(category_id, _EMPTY) for category_id in category_ids)
+        if difficulty_labels:
+            candidates = candidates & union_all(
+                self.difficulties.get(normalize_label(label), _EMPTY) for label in difficulty_labels
+            )
+        exclude_tags = list(exclude_tags)
+        if exclude_tags and candidates:
+            candidates = candidates - union_all(self.tags.get(tag, _EMPTY) for tag in exclude_tags)
+        return candidates
+
+    def sample_ids(self, candidates: Bitmap, count: int) -> List[int]:
+        return [self.question_ids[ordinal] for ordinal in candidates.sample(count)]
+
+    def tag_counts(self) -> Dict[str, int]:
+        return {tag: len(bitmap) for tag, bitmap in self.tags.items()}
+
+    def nbytes(self) -> int:
+        bitmaps = list(self.tags.values()) + list(self.categories.values()) + list(self.difficulties.values())
+        return sum(bitmap.nbytes() for bitmap in bitmaps) + self.question_ids.itemsize * len(self.question_ids)
+
+
+def _group_ordinals(pairs) -> Dict:
+    grouped: Dict = {}
+    for key, ordinal in pairs:
+        grouped.setdefault(key, []).append(ordinal)
+    return {key: Bitmap.from_sorted(sorted(ordinals)) for key, ordinals in grouped.items()}
+
+
+def build_tag_index(version=None) -> TagIndex:
+    """Index every playable Level 1 question: one query for questions, one for their tags."""
+    started = time.monotonic()
+    question_ids = array('Q')
+    category_pairs, difficulty_pairs = [], []
+    rows = (
+        Question.objects
+        .filter(playable_question_q(), category_id__in=get_allowed_category_ids())
+        .order_by('id')
+        .values_list('id', 'category_id', 'difficulty__label')
+    )
+    for ordinal, (question_id, category_id, difficulty_label) in enumerate(rows.iterator(chunk_size=5000)):
+        question_ids.append(question_id)
+        category_pairs.append((category_id, ordinal))
+        difficulty_pairs.append((normalize_label(difficulty_label or ''), ordinal))
+
+    tag_pairs = []
+    links = Question.tags.through.objects.values_list('tag__name', 'question_id')
+    for tag, question_id in links.iterator(chunk_size=5000):
+        ordinal = bisect_left(question_ids, question_id)
+        if ordinal < len(question_ids) and question_ids[ordinal] == question_id:
+            tag_pairs.append((tag, ordinal))
+
+    index = TagIndex(
+        question_ids,
+        _group_ordinals(tag_pairs),
+        _group_ordinals(category_pairs),
+        _group_ordinals(difficulty_pairs),
+        version=version,
+    )
+    logger.info(
+        f"Built tag index: {len(index)} questions, {len(index.tags)} tags, "
+        f"{index.nbytes()} bytes in {(time.monotonic() - started) * 1000:.0f}ms"
+    )
+    return index
+
+
+def mark_tag_index_stale():
+    """Tell every process to rebuild its index on its next check, once the current transaction commits."""
+    transaction.on_commit(_bump_tag_index_version)
+
+
+def _bump_tag_index_version():
+    versions = IndexVersion.objects.filter(name=TAG_INDEX_VERSION_NAME)
+    if not versions.update(version=F('version') + 1):
+        _, created = IndexVersion.objects.get_or_create(name=TAG_INDEX_VERSION_NAME, defaults={'version': 1})
+        if not created:
+            # Another process created the row first; still count this change
+            versions.update(version=F('version') + 1)
+
+
+def _tag_index_version():
+    return IndexVersion.objects.filter(name=TAG_INDEX_VERSION_NAME).values_list('version', flat=True).first()
+
+
+_index: Optional[TagIndex] = None
+_index_lock = threading.Lock()
+_last_check = 0.0
+_rebuilding = threading.Event()
+
+
+def _rebuild(version):
+    global _index
+    try:
+        index = build_tag_index(version)
+        with _index_lock:
+            _index = index
+    except Exception as e:
+        logger.error(f"Tag index rebuild failed: {e}", exc_info=True)
+    finally:
+        _rebuilding.clear()
+        close_old_connections()
+
+
+def get_tag_index() -> TagIndex:
+    """This process's index; built on first use, then rebuilt in the background when the version stamp moves."""
+    global _index, _last_check
+    with _index_lock:
+        index = _index
+    if index is None:
+        index = build_tag_index(_tag_index_version())
+        with _index_lock:
+            _index = index
+        _last_check = time.monotonic()
+        return index
+
+    now = time.monotonic()
+    if now - _last_check >= getattr(settings, 'TAG_INDEX_CHECK_INTERVAL', 2):
+        _last_check = now
+        try:
+            version = _tag_index_version()
+        except DatabaseError as e:
+            logger.warning(f"Could not read the tag index version, keeping the current index: {e}")
+            return index
+        if version != index.version and not _rebuilding.is_set():
+            _rebuilding.set()
+            threading.Thread(target=_rebuild, args=(version,), name='tag-index-rebuild', daemon=True).start()
+    return index
+
+
+def clear_tag_index():
+    global _index
+    with _index_lock:
+        _index = None
@@ -0,0 +1,59 @@
+import logging
+from datetime import timedelta
+
+from celery import shared_task
+from django.utils import timezone
+
+from .generation import check_pool_depths, claim_generation_tasks
+from .generation import run_generation_task as run_generation_batch
+from .question_bank import rebuild_question_bank as rebuild_question_bank_file
+from .question_stats import flush_question_stats as flush_question_stats_buffer
+from .stats_aggregates import rebuild_daily_stats
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def reconcile_daily_stats(days: int = 2):
+    """
+    Recompute the most recent daily stat rollups from history. Rows are kept
+    current by the session/answer hooks; this nightly pass repairs any drift
+    (e.g. writes that bypassed the API) for days that can still change.
+    """
+    since = timezone.now().date() - timedelta(days=max(1, days) - 1)
+    rows = rebuild_daily_stats(since=since)
+    logger.info(f"Reconciled daily stat rollups since {since}: {rows} rows")
+    return rows
+
+
+@shared_task
+def flush_question_stats():
+    """Flush buffered per-question answer counters (Redis-buffered ones from every worker)."""
+    return flush_question_stats_buffer()
+
+
+@shared_task
+def check_question_pools():
+    """Enqueue generation tasks for playable pools below GENERATION_POOL_MIN."""
+    return len(check_pool_depths())
+
+
+@shared_task
+def dispatch_generation_tasks():
+    """Claim due generation tasks (within the concurrency limit) and run each on a worker."""
+    task_ids = claim_generation_tasks()
+    for task_id in task_ids:
+        run_generation_task.delay(task_id)
+    return task_ids
+
+
+@shared_task
+def run_generation_task(task_id: int):
+    return run_generation_batch(task_id)
+
+
+@shared_task
+def rebuild_question_bank():
+    """Rebuild the memory-mapped question bank after question changes (queued by question_bank.request_rebuild)."""
+    report = rebuild_question_bank_file()
+    return report['questions'] if report else None
@@ -0,0 +1,66 @@
+import random
+
+from django.test import SimpleTestCase
+
+from apps.quiz.bitmaps import ARRAY_LIMIT, CHUNK_SIZE, Bitmap, union_all
+
+
+def random_members(rng, dense_chunks, sparse_chunks):
+    members = set()
+    for high in dense_chunks:
+        members.update(high * CHUNK_SIZE + low for low in rng.sample(range(CHUNK_SIZE), ARRAY_LIMIT * 3))
+    for high in sparse_chunks:
+        members.update(high * CHUNK_SIZE + low for low in rng.sample(range(CHUNK_SIZE), 300))
+    return members
+
+
+class BitmapTests(SimpleTestCase):
+    def setUp(self):
+        rng = random.Random(11)
+        # Chunk 0 is dense in both, chunk 1 mixes a bitset with an array, chunk 2 is sparse in
+        # both, and chunks 3 and 4 exist on one side only
+        self.left = random_members(rng, dense_chunks=[0, 1], sparse_chunks=[2, 3])
+        self.right = random_members(rng, dense_chunks=[0], sparse_chunks=[1, 2, 4])
+        self.left_bitmap = Bitmap.from_sorted(sorted(self.left))
+        self.right_bitmap = Bitmap.from_sorted(sorted(self.right))
+
+    def test_dense_chunks_become_bitsets(self):
+        self.assertIsInstance(self.left_bitmap.chunks[0], int)
+        self.assertNotIsInstance(self.left_bitmap.chunks[2], int)
+        self.assertEqual(len(self.left_bitmap), len(self.left))
+        self.assertEqual(self.left_bitmap.to_list(), sorted(self.left))
+
+    def test_set_operations_match_python_sets(self):
+        self.assertEqual((self.left_bitmap & self.right_bitmap).to_list(), sorted(self.left & self.right))
+        self.assertEqual((self.left_bitmap | self.right_bitmap).to_list(), sorted(self.left | self.right))
+        self.assertEqual((self.left_bitmap - self.right_bitmap).to_list(), sorted(self.left - self.right))
+        self.assertEqual((self.right_bitmap - self.left_bitmap).to_list(), sorted(self.right - self.left))
+
+    def test_empty_results_store_no_chunks(self):
+        self.assertFalse(self.left_bitmap - self.left_bitmap)
+        self.assertEqual((self.left_bitmap - self.left_bitmap).chunks, {})
+        self.assertFalse(Bitmap.from_sorted([1, 2]) & Bitmap.from_sorted([3]))
+
+    def test_membership(self):
+        for ordinal in list(self.left)[:200]:
+            self.assertIn(ordinal, self.left_bitmap)
+        missing = next(ordinal for ordinal in range(CHUNK_SIZE * 5) if ordinal not in self.left)
+        self.assertNotIn(missing, self.left_bitmap)
+        self.assertNotIn(CHUNK_SIZE * 9, self.left_bitmap)
+
+    def test_union_all(self):
+        parts = [Bitmap.from_sorted([1, 5]), Bitmap.from_sorted([5, CHUNK_SIZE + 2]), Bitmap()]
+
+        self.assertEqual(union_all(parts).to_list(), [1, 5, CHUNK_SIZE + 2])
+        self.assertFalse(union_all([]))
+
+    def test_sample_draws_distinct_members(self):
+        picked = self.left_bitmap.sample(500)
+
+        self.assertEqual(len(picked), 500)
+        self.assertEqual(len(set(picked)), 500)
+        self.assertTrue(set(picked) <= self.left)
+        # Asking for more than there is returns everything once
+        small = Bitmap.from_sorted([3, 9, CHUNK_SIZE * 2 + 1])
+        self.assertEqual(sorted(small.sample(10)), [3, 9, CHUNK_SIZE * 2 + 1])
+        self.assertEqual(Bitmap().sample(5), [])
@@ -0,0 +1,62 @@
+import json
+import os
+import tempfile
+
+from django.contrib.auth.models import AnonymousUser
+from django.test import TestCase, override_settings
+
+from apps.quiz.degraded import SYNTHETIC_ID_BASE, queue_quiz_save, replay_queued_saves
+from apps.quiz.models import Category, Question, QuizSession
+
+
+class QueuedSaveReplayTests(TestCase):
+    def setUp(self):
+        self.spool_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.spool_dir.cleanup)
+        self.spool = os.path.join(self.spool_dir.name, 'saves.jsonl')
+        settings_override = override_settings(DEGRADED_SAVE_SPOOL=self.spool)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        category, _ = Category.objects.get_or_create(name='History')
+        self.category = category
+        self.questions = [
+            Question.objects.create(
+                category=category, question_text=f'Question {n}?', correct_answer='A',
+                answer_options=['A', 'B'], is_seeded=True,
+            )
+            for n in range(2)
+        ]
+
+    def save_data(self, question_ids):
+        return {
+            'questions': [{'id': question_id, 'selected_answer': 'A'} for question_id in question_ids],
+            'score': len(question_ids),
+            'category_id': self.category.id,
+            'difficulty': 'Easy',
+        }
+
+    def test_saves_replay_in_order(self):
+        queue_quiz_save(AnonymousUser(), self.save_data([question.id for question in self.questions]))
+
+        result = replay_queued_saves()
+
+        self.assertEqual((result['replayed'], result['rejected'], result['pending']), (1, 0, 0))
+        session = QuizSession.objects.get()
+        self.assertEqual((session.score, session.session_questions.count()), (2, 2))
+        self.assertFalse(os.path.exists(f'{self.spool}.replaying'))
+
+    def test_save_with_fallback_only_questions_is_set_aside(self):
+        queue_quiz_save(AnonymousUser(), self.save_data([self.questions[0].id, SYNTHETIC_ID_BASE + 3]))
+        queue_quiz_save(AnonymousUser(), self.save_data([self.questions[1].id]))
+
+        result = replay_queued_saves()
+
+        self.assertEqual((result['replayed'], result['rejected']), (1, 1))
+        # Only the complete save became a session; nothing partial was written
+        session = QuizSession.objects.get()
+        self.assertEqual(list(session.session_questions.values_list('question_id', flat=True)), [self.questions[1].id])
+        with open(f'{self.spool}.rejected', encoding='utf-8') as handle:
+            rejected = [json.loads(line) for line in handle]
+        self.assertEqual(len(rejected), 1)
+        self.assertIn(str(SYNTHETIC_ID_BASE + 3), rejected[0]['rejected_reason'])
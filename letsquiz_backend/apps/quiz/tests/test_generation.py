@@ -0,0 +1,98 @@
+from django.test import TestCase, override_settings
+
+from apps.quiz.generation import (
+    QuestionGenerator,
+    StubQuestionGenerator,
+    check_pool_depths,
+    run_pending_generation_tasks,
+)
+from apps.quiz.models import Category, DifficultyLevel, LLMGenerationTask, Question
+from apps.quiz.near_duplicates import clear_local_indexes
+
+
+class RepeatingStubGenerator(StubQuestionGenerator):
+    """Stub that returns one fixed batch twice over, whatever the task."""
+    name = 'repeating-stub'
+
+    def generate(self, category, difficulty, count, seed):
+        batch = super().generate(category, difficulty, count, seed='fixed')
+        return batch + batch
+
+
+class FailingGenerator(QuestionGenerator):
+    name = 'failing'
+
+    def generate(self, category, difficulty, count, seed):
+        raise RuntimeError('generator unavailable')
+
+
+@override_settings(
+    LEVEL1_ALLOWED_CATEGORIES=['History'],
+    LEVEL1_ALLOWED_DIFFICULTIES=['Easy'],
+    GENERATION_POOL_MIN=5,
+    GENERATION_BATCH_SIZE=5,
+    GENERATION_MAX_CONCURRENCY=2,
+    GENERATION_MAX_RETRIES=1,
+    QUESTION_BANK_MMAP=False,
+)
+class GenerationPipelineTests(TestCase):
+    def setUp(self):
+        clear_local_indexes()
+        self.category, _ = Category.objects.get_or_create(name='History')
+        self.difficulty, _ = DifficultyLevel.objects.get_or_create(label='Easy')
+
+    def generated(self):
+        return Question.objects.filter(is_generated=True, category=self.category, difficulty=self.difficulty)
+
+    def test_generator_must_implement_generate(self):
+        with self.assertRaises(TypeError):
+            QuestionGenerator()
+
+    @override_settings(QUESTION_GENERATOR='apps.quiz.generation.StubQuestionGenerator')
+    def test_stub_pipeline_fills_a_low_pool(self):
+        tasks = check_pool_depths()
+        self.assertEqual([(task.category_id, task.difficulty_id, task.requested_count) for task in tasks],
+                         [(self.category.id, self.difficulty.id, 5)])
+        # An open task blocks a second one for the same pool
+        self.assertEqual(check_pool_depths(), [])
+
+        results = run_pending_generation_tasks()
+
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]['accepted'], 5)
+        task = LLMGenerationTask.objects.get()
+        self.assertEqual(task.status, 'Success')
+        self.assertIsNotNone(task.completed_at)
+        questions = list(self.generated())
+        self.assertEqual(sorted(q.id for q in questions), sorted(results[0]['question_ids']))
+        for question in questions:
+            self.assertFalse(question.is_seeded)
+            self.assertEqual(question.metadata_json['generation_task'], task.id)
+            self.assertIn(question.correct_answer, question.answer_options)
+            self.assertTrue(question.seed_key and question.content_hash)
+        # The pool is full now
+        self.assertEqual(check_pool_depths(), [])
+
+    @override_settings(QUESTION_GENERATOR='apps.quiz.tests.test_generation.RepeatingStubGenerator')
+    def test_duplicates_are_dropped_within_a_batch_and_against_the_bank(self):
+        check_pool_depths()
+        first = run_pending_generation_tasks()[0]
+        self.assertEqual((first['generated'], first['accepted'], first['duplicates']), (10, 5, 5))
+
+        # Same batch again for a new task: everything already exists
+        LLMGenerationTask.objects.create(category=self.category, difficulty=self.difficulty, requested_count=5)
+        second = run_pending_generation_tasks()[0]
+        self.assertEqual((second['accepted'], second['duplicates']), (0, 10))
+        self.assertEqual(LLMGenerationTask.objects.filter(status='Success').count(), 2)
+        self.assertEqual(self.generated().count(), 5)
+
+    @override_settings(QUESTION_GENERATOR='apps.quiz.tests.test_generation.FailingGenerator')
+    def test_failed_pool_cools_down(self):
+        check_pool_depths()
+        results = run_pending_generation_tasks()
+
+        self.assertEqual(results[0]['attempts'], 1)
+        self.assertEqual(LLMGenerationTask.objects.get().status, 'Failed')
+        self.assertFalse(self.generated().exists())
+        # A recent failure keeps the pool from getting a new task right away
+        self.assertEqual(check_pool_depths(), [])
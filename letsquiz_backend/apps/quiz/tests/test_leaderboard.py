@@ -0,0 +1,60 @@
+import random
+
+from django.test import SimpleTestCase
+
+from apps.quiz.leaderboard import IndexableSkiplist, _LocalBoard
+
+
+class IndexableSkiplistTests(SimpleTestCase):
+    def test_rank_and_slice_match_a_sorted_list(self):
+        rng = random.Random(7)
+        skiplist = IndexableSkiplist()
+        expected = set()
+        for _ in range(2000):
+            key = rng.randrange(500)
+            if key in expected and rng.random() < 0.5:
+                self.assertTrue(skiplist.remove(key))
+                expected.discard(key)
+            elif key not in expected:
+                skiplist.insert(key)
+                expected.add(key)
+
+        ordered = sorted(expected)
+        self.assertEqual(len(skiplist), len(ordered))
+        self.assertEqual(skiplist.slice(0, len(ordered)), ordered)
+        for position, key in enumerate(ordered):
+            self.assertEqual(skiplist.rank(key), position + 1)
+        for start in (0, 1, len(ordered) // 2, len(ordered) - 3):
+            self.assertEqual(skiplist.slice(start, 10), ordered[start:start + 10])
+
+    def test_missing_keys_and_out_of_range_slices(self):
+        skiplist = IndexableSkiplist()
+        for key in (10, 20, 30):
+            skiplist.insert(key)
+
+        self.assertIsNone(skiplist.rank(15))
+        self.assertFalse(skiplist.remove(15))
+        self.assertEqual(skiplist.slice(3, 5), [])
+        self.assertEqual(skiplist.slice(0, 0), [])
+        self.assertEqual(skiplist.slice(2, 5), [30])
+
+        self.assertTrue(skiplist.remove(10))
+        self.assertEqual((skiplist.rank(20), skiplist.rank(30)), (1, 2))
+
+
+class LocalBoardTests(SimpleTestCase):
+    def test_highest_score_first_ties_by_member(self):
+        board = _LocalBoard({1: 50, 2: 80, 3: 50})
+
+        self.assertEqual(board.top(3), [(2, 80), (1, 50), (3, 50)])
+        self.assertEqual(board.rank(3), (3, 50))
+        self.assertIsNone(board.rank(4))
+
+    def test_incr_moves_a_member(self):
+        board = _LocalBoard({1: 50, 2: 80, 3: 50})
+
+        board.incr(3, 40)
+        board.incr(4, 10)
+
+        self.assertEqual(board.top(10), [(3, 90), (2, 80), (1, 50), (4, 10)])
+        self.assertEqual(board.rank(2), (2, 80))
@@ -0,0 +1,41 @@
+from django.test import TestCase
+
+from apps.quiz.models import Category, DifficultyLevel, Question, QuestionStat
+from apps.quiz.question_stats import QuestionStatsBuffer, apply_question_stat_deltas
+
+
+class QuestionStatsFlushTests(TestCase):
+    def setUp(self):
+        category, _ = Category.objects.get_or_create(name='History')
+        difficulty, _ = DifficultyLevel.objects.get_or_create(label='Easy')
+        self.kept, self.deleted = [
+            Question.objects.create(
+                category=category, difficulty=difficulty, question_text=f'Question {n}?',
+                correct_answer='A', answer_options=['A', 'B'], is_seeded=True,
+            )
+            for n in range(2)
+        ]
+
+    def test_deltas_add_up_across_flushes(self):
+        apply_question_stat_deltas({self.kept.id: (3, 1)})
+        apply_question_stat_deltas({self.kept.id: (2, 2)})
+
+        stat = QuestionStat.objects.get(question=self.kept)
+        self.assertEqual((stat.attempts, stat.correct), (5, 3))
+
+    def test_question_deleted_before_flush_is_dropped(self):
+        buffer = QuestionStatsBuffer()
+        buffer._ensure_flusher = lambda: None  # No background flusher thread during the test
+        buffer.record_many([(self.kept.id, True), (self.deleted.id, False), (self.deleted.id, True)])
+        self.deleted.delete()
+
+        self.assertEqual(buffer.flush(), 1)
+
+        stat = QuestionStat.objects.get(question=self.kept)
+        self.assertEqual((stat.attempts, stat.correct), (1, 1))
+        self.assertFalse(QuestionStat.objects.filter(question_id=self.deleted.id).exists())
+        # Nothing was put back, so later flushes have nothing left to fail on
+        self.assertEqual(buffer._pending, {})
+        buffer.record(self.kept.id, False)
+        self.assertEqual(buffer.flush(), 1)
+        self.assertEqual(QuestionStat.objects.get(question=self.kept).attempts, 2)
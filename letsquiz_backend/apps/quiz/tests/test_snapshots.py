@@ -0,0 +1,81 @@
+import os
+import sqlite3
+import tempfile
+
+from django.test import TransactionTestCase
+
+from apps.quiz.models import Category, DifficultyLevel, Question, Tag
+from apps.quiz.snapshots import SnapshotError, export_snapshot, import_snapshot
+
+
+# The importer changes SQLite pragmas, which is not allowed inside the test case transaction
+class SnapshotRoundTripTests(TransactionTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'bank.sqlite3')
+
+        science = Category.objects.create(name='Science')
+        physics = Category.objects.create(name='Physics', parent=science)
+        easy, _ = DifficultyLevel.objects.get_or_create(label='Easy')
+        self.tag = Tag.objects.create(name='space')
+        self.questions = [
+            Question.objects.create(
+                category=physics, difficulty=easy, question_text=f'Question {n}?', correct_answer='A',
+                answer_options=['A', 'B'], metadata_json={'source': 'test'}, is_curated=True,
+            )
+            for n in range(3)
+        ]
+        self.questions[0].tags.add(self.tag)
+
+    def test_export_then_import_restores_the_bank(self):
+        counts = export_snapshot(self.path)
+        self.assertEqual((counts['questions'], counts['question_tags']), (3, 1))
+
+        Question.objects.all().delete()
+        Tag.objects.all().delete()
+        Category.objects.filter(parent__isnull=False).delete()
+        Category.objects.all().delete()
+
+        result = import_snapshot(self.path)
+
+        self.assertEqual((result['questions'], result['question_tags'], result['tags']), (3, 1, 1))
+        restored = Question.objects.get(id=self.questions[0].id)
+        self.assertEqual(restored.question_text, 'Question 0?')
+        self.assertEqual(restored.answer_options, ['A', 'B'])
+        self.assertEqual(restored.metadata_json, {'source': 'test'})
+        self.assertTrue(restored.is_curated)
+        self.assertEqual(restored.difficulty.label, 'Easy')
+        self.assertEqual((restored.category.name, restored.category.parent.name), ('Physics', 'Science'))
+        self.assertEqual(list(restored.tags.values_list('name', flat=True)), ['space'])
+        # Sequences were reset past the imported ids
+        self.assertGreater(
+            Question.objects.create(category=restored.category, question_text='New?', correct_answer='A').id,
+            max(question.id for question in self.questions),
+        )
+
+    def test_import_into_a_non_empty_bank_needs_replace(self):
+        export_snapshot(self.path)
+
+        with self.assertRaises(SnapshotError):
+            import_snapshot(self.path)
+
+        result = import_snapshot(self.path, replace=True)
+        self.assertEqual(result['questions'], 3)
+        self.assertEqual(Question.objects.count(), 3)
+
+    def test_checksum_mismatch_rolls_back(self):
+        export_snapshot(self.path)
+        snapshot = sqlite3.connect(self.path)
+        snapshot.execute("UPDATE questions SET question_text = 'Tampered?' WHERE id = ?", (self.questions[1].id,))
+        snapshot.commit()
+        snapshot.close()
+
+        with self.assertRaises(SnapshotError):
+            import_snapshot(self.path, replace=True)
+
+        self.assertEqual(
+            sorted(Question.objects.values_list('question_text', flat=True)),
+            ['Question 0?', 'Question 1?', 'Question 2?'],
+        )
+        self.assertEqual(Question.objects.get(id=self.questions[0].id).tags.count(), 1)
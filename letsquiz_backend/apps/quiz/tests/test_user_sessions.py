@@ -0,0 +1,69 @@
+import base64
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.quiz.models import Category, QuizSession, User
+from apps.quiz.user_stats_views import decode_sessions_cursor, get_user_sessions_page
+
+
+class SessionsKeysetCursorTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='alice', email='alice@example.com')
+        self.category, _ = Category.objects.get_or_create(name='History')
+        base = timezone.now() - timedelta(days=1)
+        # Pairs of sessions share a start time, so the id has to break the tie
+        self.sessions = []
+        for n in range(7):
+            session = QuizSession.objects.create(user=self.user, score=n, category=self.category)
+            QuizSession.objects.filter(id=session.id).update(started_at=base + timedelta(minutes=n // 2))
+            self.sessions.append(session)
+        self.newest_first = [
+            session.id for session in sorted(
+                QuizSession.objects.filter(user=self.user), key=lambda s: (s.started_at, s.id), reverse=True,
+            )
+        ]
+
+    def page_through(self, limit):
+        ids, cursor = [], None
+        while True:
+            page = get_user_sessions_page(self.user.id, cursor=cursor, limit=limit)
+            ids.extend(row['id'] for row in page['results'])
+            if not page['has_more']:
+                self.assertIsNone(page['next_cursor'])
+                return ids
+            cursor = page['next_cursor']
+
+    def test_pages_cover_every_session_once_in_order(self):
+        for limit in (1, 2, 3, 7, 10):
+            self.assertEqual(self.page_through(limit), self.newest_first)
+
+    def test_new_sessions_do_not_shift_later_pages(self):
+        first = get_user_sessions_page(self.user.id, limit=3)
+        QuizSession.objects.create(user=self.user, score=99)
+
+        second = get_user_sessions_page(self.user.id, cursor=first['next_cursor'], limit=3)
+
+        self.assertEqual([row['id'] for row in second['results']], self.newest_first[3:6])
+
+    def test_rows_read_category_from_the_session(self):
+        page = get_user_sessions_page(self.user.id, limit=1)
+
+        self.assertEqual(page['results'][0]['category'], 'History')
+
+    def test_malformed_cursors_are_rejected(self):
+        naive = base64.urlsafe_b64encode(b'2024-01-01T00:00:00|5').decode().rstrip('=')
+        for cursor in ('not a cursor', naive, base64.urlsafe_b64encode(b'no separator').decode()):
+            with self.assertRaises(ValueError):
+                decode_sessions_cursor(cursor)
+
+    def test_view_reports_invalid_cursor(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        response = client.get(f'/users/{self.user.id}/sessions/', {'cursor': 'garbage'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['code'], 'invalid_cursor')
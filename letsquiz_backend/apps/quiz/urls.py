@@ -2,6 +2,9 @@ from django.urls import path
 from . import auth_views
 from . import quiz_views
 from . import user_stats_views
+from . import internal_views
+from . import dashboard_views
+from . import leaderboard_views
 from .auth_views import (
     create_guest_session,
     get_guest_session
@@ -27,13 +30,22 @@ urlpatterns = [
     path('questions/', quiz_views.fetch_seeded_questions_view, name='fetch_seeded_questions'),
     path('questions/<int:questionId>/validate/', quiz_views.validate_answer_view, name='validate_answer'),
     path('categories/', quiz_views.fetch_categories_view, name='fetch_categories'),
+    path('tags/', quiz_views.fetch_tags_view, name='fetch_tags'),
     path('sessions/', quiz_views.start_quiz_session_view, name='start_quiz_session'),
     path('sessions/<int:sessionId>/', quiz_views.get_quiz_session_view, name='get_quiz_session'),
     path('sessions/<int:sessionId>/answer/', quiz_views.submit_answer_view, name='submit_answer'),
     path('sessions/<int:sessionId>/results/', quiz_views.get_quiz_session_results_view, name='get_quiz_session_results'),
+    path('leaderboard/', leaderboard_views.get_leaderboard_view, name='get_leaderboard'),
     path('quiz-sessions/', quiz_views.save_quiz_session_view, name='save_quiz_session'), # New endpoint for saving quiz sessions
     # User profile and stats URLs
+    path('users/<int:userId>/dashboard/', dashboard_views.get_user_dashboard_view, name='get_user_dashboard'),
     path('users/<int:userId>/sessions/', user_stats_views.get_user_sessions_view, name='get_user_sessions'),
+    path('users/<int:userId>/sessions/export/', user_stats_views.export_user_history_view, name='export_user_history'),
     path('users/<int:userId>/stats/', user_stats_views.get_user_stats_view, name='get_user_stats'),
     path('quiz-sessions/<int:sessionId>/', quiz_views.delete_quiz_session_view, name='delete_quiz_session'),
+
+    # Internal (staff-only) operations URLs
+    path('internal/cache-stats/', internal_views.cache_stats_view, name='internal_cache_stats'),
+    path('internal/question-stats/', internal_views.question_difficulty_report_view, name='internal_question_stats'),
+    path('internal/questions/bulk/', internal_views.bulk_question_changes_view, name='internal_bulk_questions'),
 ]
\ No newline at end of file
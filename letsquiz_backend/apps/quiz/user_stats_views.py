@@ -1,5 +1,12 @@
+import base64
+import binascii
 import logging
+from datetime import datetime
+from typing import Optional
+
 from django.db.models import Sum, Count, Q
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
@@ -13,10 +20,13 @@ from core.redis_utils import cache_set, cache_get, cache_delete
 
 from .models import (
     QuizSession,
+    QuizSessionQuestion,
     DifficultyLevel,
     GroupPlayer
 )
+from .history_export import iter_user_history_ndjson
 from .serializers import UserStatsSerializer
+from .stats_aggregates import STATS_WINDOWS, read_user_stats, read_windowed_user_stats
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
@@ -26,6 +36,63 @@ CACHE_TIMEOUT_USER_PROFILE = 15 * 60  # 15 minutes
 CACHE_TIMEOUT_USER_STATS = 30 * 60    # 30 minutes  
 CACHE_TIMEOUT_USER_SESSIONS = 10 * 60  # 10 minutes
 
+SESSIONS_PAGE_SIZE = 20
+SESSIONS_MAX_PAGE_SIZE = 100
+
+
+def load_solo_aggregates(user_id: int) -> dict:
+    """Solo session count/score and per-category answer totals (grouped queries)."""
+    solo_sessions = QuizSession.objects.filter(user_id=user_id, is_group_session=False)
+    totals = solo_sessions.aggregate(sessions=Count('id'), score=Sum('score'))
+
+    category_stats = {}
+    for row in (
+        QuizSessionQuestion.objects
+        .filter(quiz_session__in=solo_sessions, question__category__isnull=False)
+        .values('question__category__name')
+        .annotate(total=Count('id'), correct=Count('id', filter=Q(is_correct=True)))
+        .order_by('question__category__name')
+    ):
+        category_stats[row['question__category__name']] = {
+            'total_questions': row['total'],
+            'correct_answers': row['correct'],
+        }
+
+    return {
+        'sessions': totals['sessions'],
+        'score': totals['score'] or 0,
+        'category_stats': category_stats,
+    }
+
+
+def load_group_participation(user_id: int) -> dict:
+    """Group sessions played and score earned via the indexed GroupPlayer.user link."""
+    totals = GroupPlayer.objects.filter(user_id=user_id).aggregate(
+        sessions=Count('quiz_session', distinct=True),
+        score=Sum('score'),
+    )
+    return {'sessions': totals['sessions'], 'score': totals['score'] or 0}
+
+
+def assemble_user_profile(user, solo: dict, group: dict) -> dict:
+    """Profile payload from precomputed solo and group aggregates."""
+    return {
+        'user_id': user.id,
+        'email': user.email,
+        'total_score': solo['score'] + group['score'],
+        'total_quizzes': solo['sessions'] + group['sessions'],
+        # Category stats only cover solo sessions for now
+        'category_stats': solo['category_stats'],
+        'is_premium': user.is_premium,
+        'joined_date': user.date_joined
+    }
+
+
+def build_user_profile(user) -> dict:
+    """Aggregate profile totals for a user from solo sessions and linked group players."""
+    return assemble_user_profile(user, load_solo_aggregates(user.id), load_group_participation(user.id))
+
+
 class UserProfileView(APIView):
     """API endpoint for user profile operations."""
     permission_classes = [IsAuthenticated]
@@ -44,59 +111,12 @@ class UserProfileView(APIView):
             cache_key = f"user_profile:{userId}"
             cached_data = cache_get(cache_key)
             if cached_data:
-                logger.info(f"Cache HIT for user profile: {userId}")
                 return Response(cached_data, status=status.HTTP_200_OK)
 
-            logger.info(f"Cache MISS for user profile: {userId}")
-            user = request.user
-
-            # Get solo sessions owned by the user
-            solo_sessions = QuizSession.objects.filter(user=user, is_group_session=False)
-
-            # Get GroupPlayer instances for the user (assuming name matches user.email)
-            user_group_players = GroupPlayer.objects.filter(name=user.email)
-
-            # Get QuizSession objects associated with these group players
-            group_sessions_as_player = QuizSession.objects.filter(group_players__in=user_group_players).distinct()
-
-            # Calculate total quizzes
-            total_quizzes = solo_sessions.count() + group_sessions_as_player.count()
-
-            # Calculate total score
-            solo_score_sum = solo_sessions.aggregate(Sum('score'))['score__sum'] or 0
-            group_score_sum = user_group_players.aggregate(Sum('score'))['score__sum'] or 0
-            total_score = solo_score_sum + group_score_sum
-
-            # Get category stats (only from solo sessions for now)
-            category_stats = {}
-            for session in solo_sessions:
-                questions = session.session_questions.all()
-                for question in questions:
-                    # Ensure question and category exist before accessing name
-                    if question.question and question.question.category:
-                        category = question.question.category
-                        if category.name not in category_stats:
-                            category_stats[category.name] = {
-                                'total_questions': 0,
-                                'correct_answers': 0
-                            }
-                        category_stats[category.name]['total_questions'] += 1
-                        if question.is_correct:
-                            category_stats[category.name]['correct_answers'] += 1
-
-            profile_data = {
-                'user_id': user.id,
-                'email': user.email,
-                'total_score': total_score,
-                'total_quizzes': total_quizzes,
-                'category_stats': category_stats,
-                'is_premium': user.is_premium,
-                'joined_date': user.date_joined
-            }
+            profile_data = build_user_profile(request.user)
 
             # Cache the result for future requests
             cache_set(cache_key, profile_data, CACHE_TIMEOUT_USER_PROFILE)
-            logger.info(f"Cached user profile: {userId}")
 
             return Response(profile_data, status=status.HTTP_200_OK)
 
@@ -112,10 +132,97 @@ class UserProfileView(APIView):
                 'code': 'server_error'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+def encode_sessions_cursor(session: QuizSession) -> str:
+    """Opaque keyset cursor pointing just past ``session`` in newest-first order."""
+    raw = f"{session.started_at.isoformat()}|{session.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_sessions_cursor(cursor: str):
+    """Return (started_at, id) from a cursor, raising ValueError if malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        started_at, session_id = raw.rsplit('|', 1)
+        parsed = datetime.fromisoformat(started_at)
+        if parsed.tzinfo is None:
+            raise ValueError('cursor timestamp has no timezone')
+        return parsed, int(session_id)
+    except (ValueError, UnicodeDecodeError, binascii.Error) as e:
+        raise ValueError(f"Invalid cursor: {e}") from e
+
+
+def get_user_sessions_page(user_id: int, cursor: Optional[str] = None, limit: int = SESSIONS_PAGE_SIZE) -> dict:
+    """
+    One page of a user's history, newest first. Keyset pagination on
+    (started_at, id) served by quiz_session_user_started_idx, with category/
+    difficulty read from the session row; question counts and group players
+    are fetched for the page's ids only.
+    """
+    quiz_sessions = (
+        QuizSession.objects
+        .filter(user_id=user_id)
+        .select_related('category', 'difficulty')
+        .order_by('-started_at', '-id')
+    )
+    if cursor:
+        started_at, session_id = decode_sessions_cursor(cursor)
+        quiz_sessions = quiz_sessions.filter(
+            Q(started_at__lt=started_at) | Q(started_at=started_at, id__lt=session_id)
+        )
+
+    page = list(quiz_sessions[:limit + 1])
+    has_more = len(page) > limit
+    page = page[:limit]
+
+    question_counts = dict(
+        QuizSessionQuestion.objects
+        .filter(quiz_session_id__in=[session.id for session in page])
+        .values('quiz_session_id')
+        .annotate(total=Count('id'))
+        .values_list('quiz_session_id', 'total')
+    )
+
+    group_session_ids = [session.id for session in page if session.is_group_session]
+    players_by_session = {}
+    if group_session_ids:
+        for player in GroupPlayer.objects.filter(quiz_session_id__in=group_session_ids).order_by('id'):
+            players_by_session.setdefault(player.quiz_session_id, []).append({
+                'id': player.id,
+                'name': player.name,
+                'score': player.score,
+                'errors': player.errors,
+                'answers': player.answers,
+                'correct_answers': player.correct_answers
+            })
+
+    return {
+        'results': [
+            {
+                'id': session.id,
+                'score': session.score,
+                'total_questions': question_counts.get(session.id, 0),
+                'started_at': session.started_at,
+                'completed_at': session.completed_at,
+                'category': session.category.name if session.category else None,
+                'difficulty': session.difficulty.label if session.difficulty else None,
+                'is_group_session': session.is_group_session,
+                'group_players': players_by_session.get(session.id, []) if session.is_group_session else None
+            }
+            for session in page
+        ],
+        'next_cursor': encode_sessions_cursor(page[-1]) if has_more else None,
+        'has_more': has_more,
+    }
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_user_sessions_view(request, userId):
-    """API endpoint for retrieving paginated quiz history with Redis caching."""
+    """
+    API endpoint for retrieving cursor-paginated quiz history.
+    Query params: ``limit`` (default 20, max 100) and ``cursor`` (the previous
+    page's ``next_cursor``). Only the default first page is cached.
+    """
     try:
         # Only allow users to access their own sessions
         if request.user.id != userId:
@@ -124,65 +231,37 @@ def get_user_sessions_view(request, userId):
                 'code': 'permission_denied'
             }, status=status.HTTP_403_FORBIDDEN)
 
-        # Try cache first
-        cache_key = f"user_sessions:{userId}"
-        cached_data = cache_get(cache_key)
-        if cached_data:
-            logger.info(f"Cache HIT for user sessions: {userId}")
-            return Response(cached_data, status=status.HTTP_200_OK)
+        cursor = request.query_params.get('cursor') or None
+        try:
+            limit = int(request.query_params.get('limit', SESSIONS_PAGE_SIZE))
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= SESSIONS_MAX_PAGE_SIZE:
+            return Response({
+                'error': f'limit must be between 1 and {SESSIONS_MAX_PAGE_SIZE}.',
+                'code': 'invalid_limit'
+            }, status=status.HTTP_400_BAD_REQUEST)
 
-        logger.info(f"Cache MISS for user sessions: {userId}")
+        # Try cache first (first page with the default size only)
+        cacheable = cursor is None and limit == SESSIONS_PAGE_SIZE
+        cache_key = f"user_sessions:{userId}"
+        if cacheable:
+            cached_data = cache_get(cache_key)
+            if cached_data:
+                return Response(cached_data, status=status.HTTP_200_OK)
 
-        # Get quiz sessions with pagination
         try:
-            quiz_sessions = QuizSession.objects.filter(user_id=userId).annotate(
-                total_questions=Count('session_questions')
-            ).order_by('-started_at')
-            logger.info(f"Quiz sessions count: {quiz_sessions.count()}")
-
-            sessions_data = []
-            for session in quiz_sessions:
-                first_question = session.session_questions.first()
-                
-                # Include group players data for group sessions
-                group_players_data = []
-                if session.is_group_session:
-                    group_players_data = [
-                        {
-                            'id': player.id,
-                            'name': player.name,
-                            'score': player.score,
-                            'errors': player.errors,
-                            'answers': player.answers,
-                            'correct_answers': player.correct_answers
-                        }
-                        for player in session.group_players.all()
-                    ]
-                
-                session_data = {
-                    'id': session.id,
-                    'score': session.score,
-                    'total_questions': session.total_questions,
-                    'started_at': session.started_at,
-                    'completed_at': session.completed_at,
-                    'category': first_question.question.category.name if first_question else None,
-                    'difficulty': first_question.question.difficulty.label if first_question else None,
-                    'is_group_session': session.is_group_session,
-                    'group_players': group_players_data if session.is_group_session else None
-                }
-                sessions_data.append(session_data)
+            page_data = get_user_sessions_page(userId, cursor=cursor, limit=limit)
+        except ValueError:
+            return Response({
+                'error': 'Invalid cursor.',
+                'code': 'invalid_cursor'
+            }, status=status.HTTP_400_BAD_REQUEST)
 
-            # Cache the result for future requests
-            cache_set(cache_key, sessions_data, CACHE_TIMEOUT_USER_SESSIONS)
-            logger.info(f"Cached user sessions: {userId}")
+        if cacheable:
+            cache_set(cache_key, page_data, CACHE_TIMEOUT_USER_SESSIONS)
 
-            return Response(sessions_data, status=status.HTTP_200_OK)
-        except Exception as e:
-            logger.error(f"Error retrieving user sessions: {e}", exc_info=True)
-            return Response({
-                'error': 'Error retrieving user sessions.',
-                'code': 'server_error'
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return Response(page_data, status=status.HTTP_200_OK)
 
     except Exception as e:
         logger.error(f"Error retrieving user sessions: {e}", exc_info=True)
@@ -191,10 +270,36 @@ def get_user_sessions_view(request, userId):
             'code': 'server_error'
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_user_history_view(request, userId):
+    """
+    API endpoint streaming the user's complete quiz history as NDJSON
+    (one session per line, questions and players nested). Not cached.
+    """
+    # Only allow users to export their own history
+    if request.user.id != userId:
+        return Response({
+            'error': 'Not authorized to access this data.',
+            'code': 'permission_denied'
+        }, status=status.HTTP_403_FORBIDDEN)
+
+    logger.info(f"Streaming quiz history export for user {userId}")
+    response = StreamingHttpResponse(iter_user_history_ndjson(userId), content_type='application/x-ndjson')
+    filename = f"letsquiz-history-{userId}-{timezone.now():%Y%m%d}.ndjson"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_user_stats_view(request, userId):
-    """API endpoint for retrieving aggregate statistics with Redis caching."""
+    """
+    API endpoint for retrieving aggregate statistics with Redis caching.
+    ``?window=7d|30d`` restricts stats to recent days (from daily rollups) and
+    adds a per-day series and accuracy trend; ``all`` (default) is lifetime.
+    """
     try:
         # Only allow users to access their own stats
         if request.user.id != userId:
@@ -203,87 +308,30 @@ def get_user_stats_view(request, userId):
                 'code': 'permission_denied'
             }, status=status.HTTP_403_FORBIDDEN)
 
+        window = request.query_params.get('window', 'all')
+        if window != 'all' and window not in STATS_WINDOWS:
+            return Response({
+                'error': f"Invalid window. Use one of: all, {', '.join(STATS_WINDOWS)}.",
+                'code': 'invalid_window'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
         # Try cache first
-        cache_key = f"user_stats:{userId}"
+        cache_key = f"user_stats:{userId}" if window == 'all' else f"user_stats:{userId}:{window}"
         cached_data = cache_get(cache_key)
         if cached_data:
-            logger.info(f"Cache HIT for user stats: {userId}")
             return Response(cached_data, status=status.HTTP_200_OK)
 
-        logger.info(f"Cache MISS for user stats: {userId}")
-
-        quiz_sessions = QuizSession.objects.filter(user_id=userId)
-
-        # Calculate overall stats
-        total_quizzes = quiz_sessions.count()
-        total_score = quiz_sessions.aggregate(Sum('score'))['score__sum'] or 0
-        total_questions = 0
-        correct_answers = 0
-
-        # Calculate category and difficulty stats
-        category_stats = {}
-        difficulty_stats = {}
-
-        for session in quiz_sessions:
-            session_questions = session.session_questions.all()
-            total_questions += session_questions.count()
-
-            for question in session_questions:
-                if question.is_correct:
-                    correct_answers += 1
-
-                # Update category stats
-                category = question.question.category.name
-                if category not in category_stats:
-                    category_stats[category] = {
-                        'total_questions': 0,
-                        'correct_answers': 0
-                    }
-                category_stats[category]['total_questions'] += 1
-                if question.is_correct:
-                    category_stats[category]['correct_answers'] += 1
-
-                # Update difficulty stats
-                difficulty = question.question.difficulty.label
-                if difficulty not in difficulty_stats:
-                    difficulty_stats[difficulty] = {
-                        'total_questions': 0,
-                        'correct_answers': 0
-                    }
-                difficulty_stats[difficulty]['total_questions'] += 1
-                if question.is_correct:
-                    difficulty_stats[difficulty]['correct_answers'] += 1
-
-        response_data = {
-            'overall_stats': {
-                'total_quizzes': total_quizzes,
-                'total_score': total_score,
-                'total_questions': total_questions,
-                'correct_answers': correct_answers,
-                'accuracy': round((correct_answers / total_questions * 100), 1) if total_questions > 0 else 0
-            },
-            'category_stats': {
-                category: {
-                    'correct': stats['correct_answers'],
-                    'total': stats['total_questions'],
-                    'accuracy': round((stats['correct_answers'] / stats['total_questions'] * 100), 1) if stats['total_questions'] > 0 else 0
-                } for category, stats in category_stats.items()
-            },
-            'difficulty_stats': {
-                difficulty: {
-                    'correct': stats['correct_answers'],
-                    'total': stats['total_questions'],
-                    'accuracy': round((stats['correct_answers'] / stats['total_questions'] * 100), 1) if stats['total_questions'] > 0 else 0
-                } for difficulty, stats in difficulty_stats.items()
-            }
-        }
+        # Read incrementally maintained aggregates instead of scanning history
+        if window == 'all':
+            response_data = read_user_stats(userId)
+        else:
+            response_data = read_windowed_user_stats(userId, window)
 
         serializer = UserStatsSerializer(data=response_data)
         serializer.is_valid(raise_exception=True)
 
         # Cache the result for future requests
         cache_set(cache_key, response_data, CACHE_TIMEOUT_USER_STATS)
-        logger.info(f"Cached user stats: {userId}")
 
         return Response(response_data, status=status.HTTP_200_OK)
 
@@ -0,0 +1,658 @@
+"""
+Custom Django cache backends for LetsQuiz backend.
+
+ByteBudgetLRUCache is a drop-in replacement for LocMemCache that bounds memory
+by serialized bytes instead of entry count. Entries are evicted in true LRU
+order, first within their namespace budget and then against the global
+budget, and eviction/occupancy counters are exposed through ``get_stats()``.
+
+Example:
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'core.cache_backends.ByteBudgetLRUCache',
+            'LOCATION': 'letsquiz-level1-prod',
+            'TIMEOUT': 300,
+            'OPTIONS': {
+                'MAX_BYTES': 64 * 1024 * 1024,
+                'NAMESPACE_BUDGETS': {'questions': 32 * 1024 * 1024},
+            },
+        }
+    }
+
+Namespaces are the cache key prefix before the first ``:`` (``questions``,
+``user_stats``, ...). Keys whose prefix has no configured budget share the
+``default`` namespace, which is only bounded by MAX_BYTES.
+
+SharedMemoryCache keeps entries in a memory-mapped file (``/dev/shm`` when
+available) so every worker process on a host shares one copy. See its
+docstring for the on-disk layout.
+"""
+import hashlib
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+import time
+import zlib
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows has no fcntl; SharedMemoryCache is POSIX-only
+    fcntl = None
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.exceptions import ImproperlyConfigured
+
+DEFAULT_NAMESPACE = 'default'
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024  # 64 MiB per worker
+
+# Global in-process stores, keyed by LOCATION, so every thread's cache
+# instance shares the same data (as LocMemCache does).
+_stores = {}
+_stores_lock = Lock()
+
+
+def _empty_counters() -> Dict[str, int]:
+    return {
+        'hits': 0,
+        'misses': 0,
+        'sets': 0,
+        'evictions': 0,  # live entries dropped to stay within budget
+        'expirations': 0,  # expired entries removed
+        'rejected': 0,  # values larger than their whole budget
+    }
+
+
+class _Entry:
+    __slots__ = ('namespace', 'value', 'expires_at', 'size')
+
+    def __init__(self, namespace, value, expires_at, size):
+        self.namespace = namespace
+        self.value = value
+        self.expires_at = expires_at
+        self.size = size
+
+
+class _Store:
+    """LRU data shared by every cache instance with the same LOCATION"""
+
+    def __init__(self):
+        self.lock = Lock()
+        # Global LRU order: least recently used first
+        self.entries: 'OrderedDict[str, _Entry]' = OrderedDict()
+        # Per-namespace LRU order (values unused)
+        self.namespace_order: Dict[str, 'OrderedDict[str, None]'] = {}
+        self.namespace_bytes: Dict[str, int] = {}
+        self.total_bytes = 0
+        self.counters: Dict[str, Dict[str, int]] = {}
+
+
+class ByteBudgetLRUCache(BaseCache):
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, name, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._max_bytes = int(options.get('MAX_BYTES', DEFAULT_MAX_BYTES))
+        self._namespace_budgets = {
+            namespace: int(budget)
+            for namespace, budget in options.get('NAMESPACE_BUDGETS', {}).items()
+        }
+        with _stores_lock:
+            self._store = _stores.setdefault(name, _Store())
+
+    # Public API
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        namespace = self._namespace_for(key)
+        key = self.make_and_validate_key(key, version=version)
+        pickled = pickle.dumps(value, self.pickle_protocol)
+        with self._store.lock:
+            if self._live_entry(key) is not None:
+                return False
+            self._set(key, namespace, pickled, timeout)
+            return True
+
+    def get(self, key, default=None, version=None):
+        namespace = self._namespace_for(key)
+        key = self.make_and_validate_key(key, version=version)
+        with self._store.lock:
+            entry = self._live_entry(key)
+            if entry is None:
+                self._counters(namespace)['misses'] += 1
+                return default
+            self._touch_lru(key, entry)
+            self._counters(namespace)['hits'] += 1
+            pickled = entry.value
+        return pickle.loads(pickled)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        namespace = self._namespace_for(key)
+        key = self.make_and_validate_key(key, version=version)
+        pickled = pickle.dumps(value, self.pickle_protocol)
+        with self._store.lock:
+            self._set(key, namespace, pickled, timeout)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._store.lock:
+            entry = self._live_entry(key)
+            if entry is None:
+                return False
+            entry.expires_at = self.get_backend_timeout(timeout)
+            return True
+
+    def incr(self, key, delta=1, version=None):
+        namespace = self._namespace_for(key)
+        key = self.make_and_validate_key(key, version=version)
+        with self._store.lock:
+            entry = self._live_entry(key)
+            if entry is None:
+                raise ValueError("Key '%s' not found" % key)
+            new_value = pickle.loads(entry.value) + delta
+            pickled = pickle.dumps(new_value, self.pickle_protocol)
+            self._replace(key, namespace, pickled, entry.expires_at)
+        return new_value
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._store.lock:
+            return self._live_entry(key) is not None
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._store.lock:
+            return self._delete(key)
+
+    def clear(self):
+        store = self._store
+        with store.lock:
+            store.entries.clear()
+            store.namespace_order.clear()
+            store.namespace_bytes.clear()
+            store.total_bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Occupancy and eviction counters, overall and per namespace"""
+        store = self._store
+        with store.lock:
+            namespaces = set(store.counters) | set(store.namespace_order) | set(self._namespace_budgets)
+            per_namespace = {}
+            for namespace in sorted(namespaces):
+                per_namespace[namespace] = {
+                    **store.counters.get(namespace, _empty_counters()),
+                    'entries': len(store.namespace_order.get(namespace, ())),
+                    'bytes': store.namespace_bytes.get(namespace, 0),
+                    'budget_bytes': self._namespace_budgets.get(namespace),
+                }
+            return {
+                'backend': self.__class__.__name__,
+                'entries': len(store.entries),
+                'bytes': store.total_bytes,
+                'max_bytes': self._max_bytes,
+                'namespaces': per_namespace,
+            }
+
+    # Internals (callers hold the store lock)
+
+    def _namespace_for(self, raw_key) -> str:
+        prefix = str(raw_key).split(':', 1)[0]
+        return prefix if prefix in self._namespace_budgets else DEFAULT_NAMESPACE
+
+    def _counters(self, namespace) -> Dict[str, int]:
+        counters = self._store.counters.get(namespace)
+        if counters is None:
+            counters = self._store.counters[namespace] = _empty_counters()
+        return counters
+
+    def _live_entry(self, key):
+        entry = self._store.entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at is not None and entry.expires_at <= time.time():
+            self._delete(key)
+            self._counters(entry.namespace)['expirations'] += 1
+            return None
+        return entry
+
+    def _touch_lru(self, key, entry):
+        self._store.entries.move_to_end(key)
+        self._store.namespace_order[entry.namespace].move_to_end(key)
+
+    def _set(self, key, namespace, pickled, timeout):
+        self._replace(key, namespace, pickled, self.get_backend_timeout(timeout))
+
+    def _replace(self, key, namespace, pickled, expires_at):
+        store = self._store
+        size = len(pickled) + len(key)
+        self._delete(key)
+
+        budget = self._namespace_budgets.get(namespace, self._max_bytes)
+        if size > min(budget, self._max_bytes):
+            self._counters(namespace)['rejected'] += 1
+            return
+
+        store.entries[key] = _Entry(namespace, pickled, expires_at, size)
+        store.namespace_order.setdefault(namespace, OrderedDict())[key] = None
+        store.namespace_bytes[namespace] = store.namespace_bytes.get(namespace, 0) + size
+        store.total_bytes += size
+        self._counters(namespace)['sets'] += 1
+
+        if namespace in self._namespace_budgets:
+            self._enforce(budget, namespace)
+        self._enforce(self._max_bytes)
+
+    def _enforce(self, budget, namespace=None):
+        """Evict until the namespace (or the whole store) fits its budget"""
+        store = self._store
+
+        def used():
+            return store.namespace_bytes.get(namespace, 0) if namespace else store.total_bytes
+
+        # Pop from the LRU end only; expired entries elsewhere are dropped lazily
+        # when read (_live_entry), so an over-budget set never scans the store
+        now = time.time()
+        while used() > budget:
+            order = store.namespace_order.get(namespace) if namespace else store.entries
+            if not order:
+                break
+            victim = next(iter(order))
+            entry = store.entries[victim]
+            expired = entry.expires_at is not None and entry.expires_at <= now
+            self._counters(entry.namespace)['expirations' if expired else 'evictions'] += 1
+            self._delete(victim)
+
+    def _delete(self, key):
+        store = self._store
+        entry = store.entries.pop(key, None)
+        if entry is None:
+            return False
+        order = store.namespace_order.get(entry.namespace)
+        if order is not None:
+            order.pop(key, None)
+        store.namespace_bytes[entry.namespace] -= entry.size
+        store.total_bytes -= entry.size
+        return True
+
+
+class SharedMemoryCache(BaseCache):
+    """
+    Cross-process cache backed by a memory-mapped file.
+
+    The file is a header followed by ``BUCKETS`` buckets of ``ASSOCIATIVITY``
+    fixed-size slots each (a set-associative hash table). A key hashes to one
+    bucket, so lookups probe at most ``ASSOCIATIVITY`` slots, and each bucket
+    is guarded by its own fcntl byte-range lock (shared for reads, exclusive
+    for writes) plus an in-process lock stripe for threads. When a bucket is
+    full, expired slots are reused first, then the least recently accessed.
+
+    Values are pickled and zlib-compressed when that helps; values that still
+    do not fit in a slot are not cached (counted as ``rejected``).
+
+    OPTIONS: PATH (default: /dev/shm/letsquiz-cache-<LOCATION>), BUCKETS
+    (default 512), ASSOCIATIVITY (default 8), SLOT_SIZE (default 8192 bytes).
+    A process whose layout differs from the file at PATH refuses to start
+    (ImproperlyConfigured): replacing a file other workers have mapped would
+    split them into separate caches. To change the layout, stop every worker
+    and delete the file.
+    """
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    MAGIC = b'LQSHMC01'
+    # magic, buckets, associativity, slot size
+    HEADER = struct.Struct('<8sIII')
+    HEADER_SIZE = 64
+    # state, key hash, expires_at (0 = never), last access, key length, value length
+    SLOT_HEADER = struct.Struct('<B3xQddH2xI')
+
+    STATE_EMPTY = 0
+    STATE_USED = 1
+    STATE_COMPRESSED = 2
+
+    LOCK_STRIPES = 64
+
+    def __init__(self, name, params):
+        super().__init__(params)
+        if fcntl is None:
+            raise RuntimeError('SharedMemoryCache requires a POSIX platform with fcntl')
+        options = params.get('OPTIONS', {})
+        self._buckets = int(options.get('BUCKETS', 512))
+        self._associativity = int(options.get('ASSOCIATIVITY', 8))
+        self._slot_size = int(options.get('SLOT_SIZE', 8192))
+        self._path = options.get('PATH') or self._default_path(name)
+        self._bucket_bytes = self._associativity * self._slot_size
+        self._size = self.HEADER_SIZE + self._buckets * self._bucket_bytes
+        self._segment_pid = None
+        self._segment_handle = None
+
+    @property
+    def _segment(self) -> '_Segment':
+        # Opened lazily per process: a worker forked after settings were loaded maps its own handle
+        pid = os.getpid()
+        if self._segment_pid != pid:
+            self._segment_handle = _open_segment(self)
+            self._segment_pid = pid
+        return self._segment_handle
+
+    @staticmethod
+    def _default_path(name) -> str:
+        directory = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+        safe_name = ''.join(ch if ch.isalnum() or ch in '-_' else '_' for ch in (name or 'default'))
+        return os.path.join(directory, f'letsquiz-cache-{safe_name}')
+
+    # Public API
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._store(key, value, self.get_backend_timeout(timeout), only_if_missing=True)
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        key_bytes, key_hash, bucket = self._locate(key)
+        with self._bucket_lock(bucket, exclusive=False):
+            found = self._find(bucket, key_hash, key_bytes, time.time())
+            if found is None:
+                self._segment.count('misses')
+                return default
+            offset, header = found
+            payload = self._read_value(offset, header)
+            # Access time is advisory LRU metadata; a racy write under the shared lock is harmless
+            self._write_access_time(offset, time.time())
+        self._segment.count('hits')
+        return payload
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._store(key, value, self.get_backend_timeout(timeout))
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        key_bytes, key_hash, bucket = self._locate(key)
+        with self._bucket_lock(bucket, exclusive=True):
+            found = self._find(bucket, key_hash, key_bytes, time.time())
+            if found is None:
+                return False
+            offset, header = found
+            expires_at = self.get_backend_timeout(timeout)
+            self._write_slot_header(offset, header[0], key_hash, expires_at, time.time(), header[4], header[5])
+            return True
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        key_bytes, key_hash, bucket = self._locate(key)
+        with self._bucket_lock(bucket, exclusive=True):
+            now = time.time()
+            found = self._find(bucket, key_hash, key_bytes, now)
+            if found is None:
+                raise ValueError("Key '%s' not found" % key)
+            offset, header = found
+            new_value = self._read_value(offset, header) + delta
+            expires_at = header[2] or None
+            self._write(bucket, key_bytes, key_hash, new_value, expires_at, now)
+        return new_value
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        key_bytes, key_hash, bucket = self._locate(key)
+        with self._bucket_lock(bucket, exclusive=False):
+            return self._find(bucket, key_hash, key_bytes, time.time()) is not None
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        key_bytes, key_hash, bucket = self._locate(key)
+        with self._bucket_lock(bucket, exclusive=True):
+            found = self._find(bucket, key_hash, key_bytes, time.time())
+            if found is None:
+                return False
+            self._segment.mm[found[0]] = self.STATE_EMPTY
+            return True
+
+    def clear(self):
+        for bucket in range(self._buckets):
+            with self._bucket_lock(bucket, exclusive=True):
+                for offset in self._slot_offsets(bucket):
+                    self._segment.mm[offset] = self.STATE_EMPTY
+
+    def close(self, **kwargs):
+        # The mapping is shared by every cache instance in this process; keep it open.
+        pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Occupancy of the shared segment plus this process's hit/miss counters"""
+        now = time.time()
+        entries = expired = used_bytes = 0
+        for bucket in range(self._buckets):
+            with self._bucket_lock(bucket, exclusive=False):
+                for offset in self._slot_offsets(bucket):
+                    header = self._read_slot_header(offset)
+                    if header[0] == self.STATE_EMPTY:
+                        continue
+                    if header[2] and header[2] <= now:
+                        expired += 1
+                        continue
+                    entries += 1
+                    used_bytes += header[4] + header[5]
+        return {
+            'backend': self.__class__.__name__,
+            'path': self._path,
+            'entries': entries,
+            'expired_slots': expired,
+            'slots': self._buckets * self._associativity,
+            'bytes': used_bytes,
+            'max_bytes': self._size,
+            'namespaces': {},
+            'process_counters': dict(self._segment.counters),
+        }
+
+    # Internals
+
+    def _locate(self, key):
+        key_bytes = key.encode('utf-8')
+        key_hash = int.from_bytes(hashlib.blake2b(key_bytes, digest_size=8).digest(), 'little')
+        return key_bytes, key_hash, key_hash % self._buckets
+
+    def _slot_offsets(self, bucket):
+        start = self.HEADER_SIZE + bucket * self._bucket_bytes
+        return range(start, start + self._bucket_bytes, self._slot_size)
+
+    def _bucket_lock(self, bucket, exclusive):
+        return _BucketLock(self, bucket, exclusive)
+
+    def _read_slot_header(self, offset):
+        return self.SLOT_HEADER.unpack_from(self._segment.mm, offset)
+
+    def _write_slot_header(self, offset, state, key_hash, expires_at, accessed, key_len, value_len):
+        self.SLOT_HEADER.pack_into(
+            self._segment.mm, offset, state, key_hash, expires_at or 0.0, accessed, key_len, value_len
+        )
+
+    def _write_access_time(self, offset, accessed):
+        # last-access field sits after state(1) + pad(3) + hash(8) + expires(8)
+        struct.pack_into('<d', self._segment.mm, offset + 20, accessed)
+
+    def _find(self, bucket, key_hash, key_bytes, now):
+        mm = self._segment.mm
+        for offset in self._slot_offsets(bucket):
+            header = self._read_slot_header(offset)
+            if header[0] == self.STATE_EMPTY or header[1] != key_hash:
+                continue
+            key_start = offset + self.SLOT_HEADER.size
+            if mm[key_start:key_start + header[4]] != key_bytes:
+                continue
+            if header[2] and header[2] <= now:
+                return None
+            return offset, header
+        return None
+
+    def _read_value(self, offset, header):
+        value_start = offset + self.SLOT_HEADER.size + header[4]
+        payload = self._segment.mm[value_start:value_start + header[5]]
+        if header[0] == self.STATE_COMPRESSED:
+            payload = zlib.decompress(payload)
+        return pickle.loads(payload)
+
+    def _store(self, key, value, expires_at, only_if_missing=False):
+        key_bytes, key_hash, bucket = self._locate(key)
+        with self._bucket_lock(bucket, exclusive=True):
+            now = time.time()
+            if only_if_missing and self._find(bucket, key_hash, key_bytes, now) is not None:
+                return False
+            return self._write(bucket, key_bytes, key_hash, value, expires_at, now)
+
+    def _write(self, bucket, key_bytes, key_hash, value, expires_at, now):
+        """Write a value into its bucket; caller holds the exclusive bucket lock"""
+        mm = self._segment.mm
+        payload = pickle.dumps(value, self.pickle_protocol)
+        state = self.STATE_USED
+        capacity = self._slot_size - self.SLOT_HEADER.size - len(key_bytes)
+        if len(payload) > capacity:
+            compressed = zlib.compress(payload)
+            if len(compressed) < len(payload):
+                payload, state = compressed, self.STATE_COMPRESSED
+
+        existing = self._find(bucket, key_hash, key_bytes, float('-inf'))
+        if len(payload) > capacity:
+            if existing is not None:
+                mm[existing[0]] = self.STATE_EMPTY
+            self._segment.count('rejected')
+            return False
+
+        if existing is not None:
+            target = existing[0]
+        else:
+            target = self._choose_victim(bucket, now)
+
+        key_start = target + self.SLOT_HEADER.size
+        mm[key_start:key_start + len(key_bytes)] = key_bytes
+        value_start = key_start + len(key_bytes)
+        mm[value_start:value_start + len(payload)] = payload
+        self._write_slot_header(target, state, key_hash, expires_at, now, len(key_bytes), len(payload))
+        self._segment.count('sets')
+        return True
+
+    def _choose_victim(self, bucket, now):
+        """Pick an empty slot, else an expired one, else the least recently accessed"""
+        victim = None
+        victim_accessed = None
+        for offset in self._slot_offsets(bucket):
+            header = self._read_slot_header(offset)
+            if header[0] == self.STATE_EMPTY:
+                return offset
+            if header[2] and header[2] <= now:
+                return offset
+            if victim is None or header[3] < victim_accessed:
+                victim, victim_accessed = offset, header[3]
+        self._segment.count('evictions')
+        return victim
+
+
+class _Segment:
+    """A process-local handle on the shared mapping"""
+
+    def __init__(self, fd, mm):
+        self.fd = fd
+        self.mm = mm
+        self.thread_locks = [Lock() for _ in range(SharedMemoryCache.LOCK_STRIPES)]
+        self.counters = {'hits': 0, 'misses': 0, 'sets': 0, 'evictions': 0, 'rejected': 0}
+
+    def count(self, name):
+        # Best-effort per-process counters; not worth a lock on the hot path
+        self.counters[name] += 1
+
+
+# Mappings keyed by (path, pid, size): re-opened after fork so thread locks are never inherited held
+_segments = {}
+
+
+def _open_segment(cache: SharedMemoryCache) -> _Segment:
+    segment_key = (cache._path, os.getpid(), cache._size)
+    with _stores_lock:
+        segment = _segments.get(segment_key)
+        if segment is not None:
+            return segment
+
+        expected = cache.HEADER.pack(cache.MAGIC, cache._buckets, cache._associativity, cache._slot_size)
+        mm = None
+        while mm is None:
+            fd = os.open(cache._path, os.O_RDWR | os.O_CREAT, 0o600)
+            fcntl.lockf(fd, fcntl.LOCK_EX, cache.HEADER_SIZE, 0)
+            try:
+                # The path may have been replaced while we waited for the lock: then start over
+                stat = os.fstat(fd)
+                if stat.st_ino == os.stat(cache._path).st_ino:
+                    current = os.pread(fd, cache.HEADER.size, 0) if stat.st_size >= cache.HEADER.size else b''
+                    if current == expected and stat.st_size >= cache._size:
+                        mm = mmap.mmap(fd, cache._size, mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE)
+                    elif current.startswith(cache.MAGIC):
+                        # Workers already mapping it would keep the old table while new ones used a
+                        # replacement: two caches that never see each other's writes
+                        raise ImproperlyConfigured(
+                            f"{cache._path} holds a SharedMemoryCache with another layout (buckets, "
+                            f"associativity or slot size). Stop every worker using it and delete the "
+                            f"file to change the layout."
+                        )
+                    else:
+                        # New (empty) file. Never resize a file other processes may have mapped
+                        # (they would fault on the truncated pages): publish a fresh one instead
+                        _publish_empty_segment(cache, expected)
+            finally:
+                fcntl.lockf(fd, fcntl.LOCK_UN, cache.HEADER_SIZE, 0)
+                if mm is None:
+                    os.close(fd)
+
+        segment = _segments[segment_key] = _Segment(fd, mm)
+        return segment
+
+
+def _publish_empty_segment(cache: SharedMemoryCache, header: bytes):
+    """Write an empty table of the configured layout to a temp file and rename it over the (new, empty) path."""
+    temp_path = f'{cache._path}.{os.getpid()}.tmp'
+    fd = os.open(temp_path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o600)
+    try:
+        os.ftruncate(fd, cache._size)
+        os.pwrite(fd, header, 0)
+    finally:
+        os.close(fd)
+    os.replace(temp_path, cache._path)
+
+
+class _BucketLock:
+    """In-process stripe lock plus an fcntl byte-range lock on one bucket"""
+    __slots__ = ('cache', 'bucket', 'exclusive', 'thread_lock')
+
+    def __init__(self, cache, bucket, exclusive):
+        self.cache = cache
+        self.bucket = bucket
+        self.exclusive = exclusive
+        self.thread_lock = cache._segment.thread_locks[bucket % SharedMemoryCache.LOCK_STRIPES]
+
+    def __enter__(self):
+        self.thread_lock.acquire()
+        try:
+            fcntl.lockf(
+                self.cache._segment.fd,
+                fcntl.LOCK_EX if self.exclusive else fcntl.LOCK_SH,
+                self.cache._bucket_bytes,
+                self.cache.HEADER_SIZE + self.bucket * self.cache._bucket_bytes,
+            )
+        except Exception:
+            self.thread_lock.release()
+            raise
+        return self
+
+    def __exit__(self, *exc_info):
+        try:
+            fcntl.lockf(
+                self.cache._segment.fd,
+                fcntl.LOCK_UN,
+                self.cache._bucket_bytes,
+                self.cache.HEADER_SIZE + self.bucket * self.cache._bucket_bytes,
+            )
+        finally:
+            self.thread_lock.release()
+        return False
@@ -0,0 +1,325 @@
+"""
+In-process cache instrumentation for LetsQuiz backend.
+
+Counts hits/misses/writes and records latency histograms for cache reads and
+writes, keyed by namespace (the key prefix before the first ``:``, e.g.
+``questions``, ``categories``, ``user_stats``). Each worker keeps its own
+counters and a background thread periodically publishes a snapshot so stats
+can be aggregated across gunicorn workers: to Redis when it is available, otherwise to a
+per-host snapshot directory.
+"""
+import json
+import logging
+import os
+import socket
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (milliseconds) of the latency histogram buckets; a final
+# overflow bucket catches everything slower.
+LATENCY_BUCKETS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500)
+
+REDIS_SNAPSHOT_PREFIX = "cache_metrics:worker:"
+
+
+def get_namespace(key: str) -> str:
+    """Return the metrics namespace for a cache key."""
+    return key.split(':', 1)[0] if key else "unknown"
+
+
+def _empty_op() -> Dict[str, Any]:
+    return {
+        'count': 0,
+        'total_ms': 0.0,
+        'max_ms': 0.0,
+        'buckets': [0] * (len(LATENCY_BUCKETS_MS) + 1),
+    }
+
+
+def _empty_namespace() -> Dict[str, Any]:
+    return {
+        'hits': 0,
+        'misses': 0,
+        'sets': 0,
+        'set_failures': 0,
+        'get': _empty_op(),
+        'set': _empty_op(),
+    }
+
+
+def _observe(op: Dict[str, Any], elapsed_ms: float):
+    op['count'] += 1
+    op['total_ms'] += elapsed_ms
+    if elapsed_ms > op['max_ms']:
+        op['max_ms'] = elapsed_ms
+    for index, bound in enumerate(LATENCY_BUCKETS_MS):
+        if elapsed_ms <= bound:
+            op['buckets'][index] += 1
+            return
+    op['buckets'][-1] += 1
+
+
+def _merge_op(target: Dict[str, Any], source: Dict[str, Any]):
+    target['count'] += source.get('count', 0)
+    target['total_ms'] += source.get('total_ms', 0.0)
+    target['max_ms'] = max(target['max_ms'], source.get('max_ms', 0.0))
+    for index, value in enumerate(source.get('buckets', [])[:len(target['buckets'])]):
+        target['buckets'][index] += value
+
+
+def merge_snapshots(snapshots) -> Dict[str, Dict[str, Any]]:
+    """Sum several per-worker namespace snapshots into one."""
+    merged: Dict[str, Dict[str, Any]] = {}
+    for snapshot in snapshots:
+        for namespace, data in snapshot.items():
+            target = merged.setdefault(namespace, _empty_namespace())
+            for counter in ('hits', 'misses', 'sets', 'set_failures'):
+                target[counter] += data.get(counter, 0)
+            _merge_op(target['get'], data.get('get', {}))
+            _merge_op(target['set'], data.get('set', {}))
+    return merged
+
+
+def summarize(snapshot: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Add derived hit ratio and average latencies to a namespace snapshot."""
+    summary = {}
+    for namespace, data in sorted(snapshot.items()):
+        lookups = data['hits'] + data['misses']
+        summary[namespace] = {
+            **data,
+            'hit_ratio': round(data['hits'] / lookups, 4) if lookups else None,
+            'avg_get_ms': round(data['get']['total_ms'] / data['get']['count'], 3) if data['get']['count'] else None,
+            'avg_set_ms': round(data['set']['total_ms'] / data['set']['count'], 3) if data['set']['count'] else None,
+        }
+    return summary
+
+
+class CacheMetrics:
+    """
+    Thread-safe per-process cache counters, published periodically off the request thread
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._namespaces: Dict[str, Dict[str, Any]] = {}
+        self._publisher_pid = None
+
+    @property
+    def worker_id(self) -> str:
+        # Resolved per call so workers forked from a preloaded master get their own id
+        return f"{socket.gethostname()}-{os.getpid()}"
+
+    @property
+    def enabled(self) -> bool:
+        return getattr(settings, 'CACHE_METRICS_ENABLED', True)
+
+    def record_get(self, key: str, hit: bool, elapsed_s: float):
+        """Record a cache read for the key's namespace"""
+        if not self.enabled:
+            return
+        with self._lock:
+            data = self._namespace(key)
+            if hit:
+                data['hits'] += 1
+            else:
+                data['misses'] += 1
+            _observe(data['get'], elapsed_s * 1000)
+        self._ensure_publisher()
+
+    def record_set(self, key: str, ok: bool, elapsed_s: float):
+        """Record a cache write for the key's namespace"""
+        if not self.enabled:
+            return
+        with self._lock:
+            data = self._namespace(key)
+            if ok:
+                data['sets'] += 1
+            else:
+                data['set_failures'] += 1
+            _observe(data['set'], elapsed_s * 1000)
+        self._ensure_publisher()
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Return a deep copy of this worker's counters"""
+        with self._lock:
+            return json.loads(json.dumps(self._namespaces))
+
+    def reset(self):
+        """Clear this worker's counters"""
+        with self._lock:
+            self._namespaces = {}
+
+    def publish(self):
+        """Publish this worker's snapshot to the shared store"""
+        payload = json.dumps({
+            'worker': self.worker_id,
+            'published_at': time.time(),
+            'namespaces': self.snapshot(),
+            'backend': get_backend_stats(),
+        })
+        redis_client = _get_redis_client()
+        try:
+            if redis_client:
+                redis_client.setex(f"{REDIS_SNAPSHOT_PREFIX}{self.worker_id}", _retention_seconds(), payload)
+                return
+            directory = _snapshot_dir()
+            directory.mkdir(parents=True, exist_ok=True)
+            target = directory / f"{self.worker_id}.json"
+            tmp_path = directory / f".{self.worker_id}.tmp"
+            tmp_path.write_text(payload, encoding='utf-8')
+            os.replace(tmp_path, target)
+        except Exception as e:
+            logger.warning(f"Failed to publish cache metrics snapshot: {e}")
+
+    def _namespace(self, key: str) -> Dict[str, Any]:
+        namespace = get_namespace(key)
+        data = self._namespaces.get(namespace)
+        if data is None:
+            data = self._namespaces[namespace] = _empty_namespace()
+        return data
+
+    def _ensure_publisher(self):
+        # Publishing does file or Redis I/O, so it runs on a daemon thread rather
+        # than on whichever request happens to cross the interval. Threads don't
+        # survive fork; each worker process starts its own.
+        pid = os.getpid()
+        if self._publisher_pid == pid:
+            return
+        with self._lock:
+            if self._publisher_pid == pid:
+                return
+            self._publisher_pid = pid
+            threading.Thread(target=self._run_publisher, name='cache-metrics-publish', daemon=True).start()
+
+    def _run_publisher(self):
+        while True:
+            time.sleep(getattr(settings, 'CACHE_METRICS_FLUSH_INTERVAL', 10))
+            try:
+                self.publish()
+            except Exception as e:
+                logger.error(f"Background cache metrics publish failed: {e}")
+
+
+def get_backend_stats():
+    """Occupancy/eviction stats of the default cache backend, if it exposes them"""
+    from django.core.cache import cache
+    get_stats = getattr(cache, 'get_stats', None)
+    if get_stats is None:
+        return None
+    try:
+        return get_stats()
+    except Exception as e:
+        logger.warning(f"Failed to read cache backend stats: {e}")
+        return None
+
+
+def _get_redis_client():
+    from core.redis_utils import get_redis_client
+    return get_redis_client()
+
+
+def _retention_seconds() -> int:
+    return getattr(settings, 'CACHE_METRICS_RETENTION', 24 * 60 * 60)
+
+
+def _snapshot_dir() -> Path:
+    configured = getattr(settings, 'CACHE_METRICS_DIR', '')
+    if configured:
+        return Path(configured)
+    return Path(tempfile.gettempdir()) / 'letsquiz-cache-metrics'
+
+
+def load_worker_snapshots() -> Dict[str, Dict[str, Any]]:
+    """Load the latest published snapshot payload of every live worker, keyed by worker id"""
+    snapshots = {}
+    redis_client = _get_redis_client()
+    if redis_client:
+        try:
+            for key in redis_client.scan_iter(f"{REDIS_SNAPSHOT_PREFIX}*"):
+                raw = redis_client.get(key)
+                if raw:
+                    payload = json.loads(raw)
+                    snapshots[payload['worker']] = payload
+        except Exception as e:
+            logger.warning(f"Failed to load cache metrics from Redis: {e}")
+        return snapshots
+
+    directory = _snapshot_dir()
+    if not directory.exists():
+        return snapshots
+    cutoff = time.time() - _retention_seconds()
+    for path in directory.glob('*.json'):
+        try:
+            if path.stat().st_mtime < cutoff:
+                continue
+            payload = json.loads(path.read_text(encoding='utf-8'))
+            snapshots[payload['worker']] = payload
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Skipping unreadable cache metrics snapshot {path}: {e}")
+    return snapshots
+
+
+def get_aggregated_stats(include_workers: bool = False) -> Dict[str, Any]:
+    """
+    Aggregate cache metrics across all workers on this deployment.
+    The current worker's live counters replace its last published snapshot.
+    """
+    workers = load_worker_snapshots()
+    workers[metrics.worker_id] = {
+        'namespaces': metrics.snapshot(),
+        'backend': get_backend_stats(),
+    }
+    result = {
+        'latency_buckets_ms': list(LATENCY_BUCKETS_MS),
+        'worker_count': len(workers),
+        'namespaces': summarize(merge_snapshots(payload['namespaces'] for payload in workers.values())),
+        'backends': {
+            worker: payload['backend']
+            for worker, payload in workers.items()
+            if payload.get('backend')
+        },
+    }
+    if include_workers:
+        result['workers'] = {
+            worker: summarize(payload['namespaces'])
+            for worker, payload in workers.items()
+        }
+    return result
+
+
+# Global instance
+metrics = CacheMetrics()
+
+
+def record_get(key: str, hit: bool, started: float):
+    """Record a cache read that started at ``started`` (a perf_counter value)"""
+    metrics.record_get(key, hit, time.perf_counter() - started)
+
+
+def record_set(key: str, ok: bool, started: float):
+    """Record a cache write that started at ``started`` (a perf_counter value)"""
+    metrics.record_set(key, ok, time.perf_counter() - started)
+
+
+def record_get_many(hits: Dict[str, bool], started: float):
+    """Record a batched read; each key is charged an equal share of the round trip"""
+    if hits:
+        share = (time.perf_counter() - started) / len(hits)
+        for key, hit in hits.items():
+            metrics.record_get(key, hit, share)
+
+
+def record_set_many(keys, ok: bool, started: float):
+    """Record a batched write; each key is charged an equal share of the round trip"""
+    keys = list(keys)
+    if keys:
+        share = (time.perf_counter() - started) / len(keys)
+        for key in keys:
+            metrics.record_set(key, ok, share)
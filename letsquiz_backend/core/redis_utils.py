@@ -3,9 +3,12 @@ Redis utility functions for LetsQuiz backend
 """
 import logging
 import json
+import time
 from django.conf import settings
 from django.core.cache import cache
-from typing import Optional, Any
+from typing import Optional, Any, Dict, Iterable
+
+from core.cache_metrics import record_get, record_get_many, record_set, record_set_many
 
 try:
     import redis
@@ -60,25 +63,37 @@ class RedisConnection:
         """Check if Redis is available"""
         return self._redis_client is not None
 
+    @staticmethod
+    def _serialize(key: str, value: Any) -> str:
+        """Serialize a value for storage in Redis"""
+        # Serialize complex data structures to JSON for Redis
+        if isinstance(value, (dict, list)):
+            return json.dumps(value)
+        if hasattr(value, '__iter__') and not isinstance(value, (str, bytes)):
+            # Handle Django REST Framework ReturnList and similar iterables
+            try:
+                return json.dumps(list(value))
+            except (TypeError, ValueError) as e:
+                logger.warning(f"Failed to serialize iterable for key {key}: {e}")
+                # Try converting to string as fallback
+                return str(value)
+        return str(value) if value is not None else ""
+
+    @staticmethod
+    def _deserialize(value: str) -> Any:
+        """Deserialize a value read from Redis"""
+        # Try to deserialize JSON data
+        try:
+            return json.loads(value)
+        except (json.JSONDecodeError, TypeError):
+            # Return as-is if not JSON
+            return value
+
     def set_with_fallback(self, key: str, value: Any, timeout: int = 300) -> bool:
         """Set value with Redis fallback to Django cache"""
         try:
             if self._redis_client:
-                # Serialize complex data structures to JSON for Redis
-                if isinstance(value, (dict, list)):
-                    serialized_value = json.dumps(value)
-                elif hasattr(value, '__iter__') and not isinstance(value, (str, bytes)):
-                    # Handle Django REST Framework ReturnList and similar iterables
-                    try:
-                        serialized_value = json.dumps(list(value))
-                    except (TypeError, ValueError) as e:
-                        logger.warning(f"Failed to serialize iterable for key {key}: {e}")
-                        # Try converting to string as fallback
-                        serialized_value = str(value)
-                else:
-                    serialized_value = str(value) if value is not None else ""
-                
-                self._redis_client.setex(key, timeout, serialized_value)
+                self._redis_client.setex(key, timeout, self._serialize(key, value))
                 return True
         except Exception as e:
             logger.warning(f"Redis set failed for key {key}: {e}")
@@ -97,12 +112,7 @@ class RedisConnection:
             if self._redis_client:
                 value = self._redis_client.get(key)
                 if value is not None:
-                    # Try to deserialize JSON data
-                    try:
-                        return json.loads(value)
-                    except (json.JSONDecodeError, TypeError):
-                        # Return as-is if not JSON
-                        return value
+                    return self._deserialize(value)
         except Exception as e:
             logger.warning(f"Redis get failed for key {key}: {e}")
         
@@ -130,6 +140,86 @@ class RedisConnection:
             logger.error(f"Cache delete failed for key {key}: {e}")
             return False
 
+    def get_many_with_fallback(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """
+        Get several values in one round trip (MGET) with Redis fallback to Django cache.
+        Missing keys are omitted from the returned dict.
+        """
+        keys = list(keys)
+        if not keys:
+            return {}
+
+        try:
+            if self._redis_client:
+                values = self._redis_client.mget(keys)
+                found = {
+                    key: self._deserialize(value)
+                    for key, value in zip(keys, values)
+                    if value is not None
+                }
+                if len(found) == len(keys):
+                    return found
+                # Keys written through the Django cache fallback are not visible in Redis
+                missing = [key for key in keys if key not in found]
+                found.update(cache.get_many(missing))
+                return found
+        except Exception as e:
+            logger.warning(f"Redis get_many failed for {len(keys)} keys: {e}")
+
+        # Fallback to Django cache
+        try:
+            return cache.get_many(keys)
+        except Exception as e:
+            logger.error(f"Cache get_many failed for {len(keys)} keys: {e}")
+            return {}
+
+    def set_many_with_fallback(self, mapping: Dict[str, Any], timeout: int = 300) -> bool:
+        """Set several values in one pipelined round trip with Redis fallback to Django cache"""
+        if not mapping:
+            return True
+
+        try:
+            if self._redis_client:
+                pipe = self._redis_client.pipeline(transaction=False)
+                for key, value in mapping.items():
+                    pipe.setex(key, timeout, self._serialize(key, value))
+                pipe.execute()
+                return True
+        except Exception as e:
+            logger.warning(f"Redis set_many failed for {len(mapping)} keys: {e}")
+
+        # Fallback to Django cache
+        try:
+            failed_keys = cache.set_many(mapping, timeout)
+            if failed_keys:
+                logger.error(f"Cache set_many failed for keys: {failed_keys}")
+                return False
+            return True
+        except Exception as e:
+            logger.error(f"Cache set_many failed for {len(mapping)} keys: {e}")
+            return False
+
+    def delete_many_with_fallback(self, keys: Iterable[str]) -> bool:
+        """Delete several values in one round trip with Redis fallback to Django cache"""
+        keys = list(keys)
+        if not keys:
+            return True
+
+        try:
+            if self._redis_client:
+                self._redis_client.delete(*keys)
+                return True
+        except Exception as e:
+            logger.warning(f"Redis delete_many failed for {len(keys)} keys: {e}")
+
+        # Fallback to Django cache
+        try:
+            cache.delete_many(keys)
+            return True
+        except Exception as e:
+            logger.error(f"Cache delete_many failed for {len(keys)} keys: {e}")
+            return False
+
 
 # Global instance
 redis_conn = RedisConnection()
@@ -140,14 +230,24 @@ def get_redis_client() -> Optional[redis.Redis]:
     return redis_conn.get_client()
 
 
+_MISSING = object()
+
+
 def cache_set(key: str, value: Any, timeout: int = 300) -> bool:
     """Set cache value with fallback"""
-    return redis_conn.set_with_fallback(key, value, timeout)
+    started = time.perf_counter()
+    ok = redis_conn.set_with_fallback(key, value, timeout)
+    record_set(key, ok, started)
+    return ok
 
 
 def cache_get(key: str, default: Any = None) -> Any:
     """Get cache value with fallback"""
-    return redis_conn.get_with_fallback(key, default)
+    started = time.perf_counter()
+    value = redis_conn.get_with_fallback(key, _MISSING)
+    hit = value is not _MISSING and value is not None
+    record_get(key, hit, started)
+    return value if value is not _MISSING else default
 
 
 def cache_delete(key: str) -> bool:
@@ -155,6 +255,28 @@ def cache_delete(key: str) -> bool:
     return redis_conn.delete_with_fallback(key)
 
 
+def cache_get_many(keys: Iterable[str]) -> Dict[str, Any]:
+    """Get several cache values in one round trip with fallback"""
+    keys = list(keys)
+    started = time.perf_counter()
+    found = redis_conn.get_many_with_fallback(keys)
+    record_get_many({key: found.get(key) is not None for key in keys}, started)
+    return found
+
+
+def cache_set_many(mapping: Dict[str, Any], timeout: int = 300) -> bool:
+    """Set several cache values in one round trip with fallback"""
+    started = time.perf_counter()
+    ok = redis_conn.set_many_with_fallback(mapping, timeout)
+    record_set_many(mapping, ok, started)
+    return ok
+
+
+def cache_delete_many(keys: Iterable[str]) -> bool:
+    """Delete several cache values in one round trip with fallback"""
+    return redis_conn.delete_many_with_fallback(keys)
+
+
 def is_redis_available() -> bool:
     """Check if Redis is available"""
     return redis_conn.is_available()
@@ -1,6 +1,7 @@
 import os
 from pathlib import Path
 import environ
+from celery.schedules import crontab
 from corsheaders.defaults import default_headers
 
 env = environ.Env()
@@ -217,9 +218,121 @@ LEVEL1_SEED_FILE = env(
     default=str(BASE_DIR.parent / 'data' / 'questions.json'),
 )
 
+# Cache instrumentation: per-worker counters are published every
+# CACHE_METRICS_FLUSH_INTERVAL seconds (to Redis, or CACHE_METRICS_DIR when
+# Redis is disabled) so `manage_cache --action stats` can aggregate them.
+CACHE_METRICS_ENABLED = env.bool('CACHE_METRICS_ENABLED', default=True)
+CACHE_METRICS_FLUSH_INTERVAL = env.int('CACHE_METRICS_FLUSH_INTERVAL', default=10)
+CACHE_METRICS_DIR = env('CACHE_METRICS_DIR', default='')
+
+# Cache warm-up engine (see apps/quiz/cache_warmup.py). Runs from
+# `manage_cache --action warm`, after `migrate` when CACHE_WARMUP_ON_MIGRATE
+# is set, and in the gunicorn master before fork when CACHE_WARMUP_ON_BOOT is set.
+CACHE_WARMUP_ON_MIGRATE = env.bool('CACHE_WARMUP_ON_MIGRATE', default=False)
+CACHE_WARMUP_NAMESPACES = env_list('CACHE_WARMUP_NAMESPACES', 'questions,categories')
+CACHE_WARMUP_TIME_BUDGET = env.float('CACHE_WARMUP_TIME_BUDGET', default=30.0)
+CACHE_WARMUP_CONCURRENCY = env.int('CACHE_WARMUP_CONCURRENCY', default=4)
+
+# Seconds a per-process leaderboard (used when Redis is off) is served before reloading from the DB
+LEADERBOARD_LOCAL_REFRESH = env.int('LEADERBOARD_LOCAL_REFRESH', default=60)
+
+# Per-question answer counters are buffered and flushed in bulk by a background
+# thread every interval (seconds), or sooner once this many questions are buffered
+QUESTION_STATS_FLUSH_INTERVAL = env.int('QUESTION_STATS_FLUSH_INTERVAL', default=30)
+QUESTION_STATS_FLUSH_THRESHOLD = env.int('QUESTION_STATS_FLUSH_THRESHOLD', default=500)
+
+# Serve question sampling/payloads/answer checks from a memory-mapped bank file
+# shared by all workers on the host (rebuilt after question changes)
+QUESTION_BANK_MMAP = env.bool('QUESTION_BANK_MMAP', default=False)
+QUESTION_BANK_PATH = env('QUESTION_BANK_PATH', default='')  # Default: /dev/shm/letsquiz-question-bank
+QUESTION_BANK_CHECK_INTERVAL = env.int('QUESTION_BANK_CHECK_INTERVAL', default=2)
+# Seconds a queued bank rebuild waits, so a burst of question changes shares one build
+QUESTION_BANK_REBUILD_DELAY = env.int('QUESTION_BANK_REBUILD_DELAY', default=5)
+
+# Adaptive sessions: correct-rate buckets per category index and seconds an index is reused
+ADAPTIVE_BUCKET_COUNT = env.int('ADAPTIVE_BUCKET_COUNT', default=20)
+ADAPTIVE_INDEX_TTL = env.int('ADAPTIVE_INDEX_TTL', default=300)
+
+# Seconds a process reuses its copy of the category tree (closure-table snapshot)
+CATEGORY_TREE_TTL = env.int('CATEGORY_TREE_TTL', default=60)
+
+# Seconds between a process's checks for a newer tag index version (rebuilt in the background)
+TAG_INDEX_CHECK_INTERVAL = env.int('TAG_INDEX_CHECK_INTERVAL', default=2)
+
+# Near-duplicate detection: minimum shingle Jaccard similarity of two questions
+# and seconds a per-category index for pre-insert checks is reused
+NEAR_DUPLICATE_THRESHOLD = env.float('NEAR_DUPLICATE_THRESHOLD', default=0.75)
+NEAR_DUPLICATE_INDEX_TTL = env.int('NEAR_DUPLICATE_INDEX_TTL', default=300)
+
+# Question generation (generation.py): generator class path (empty disables it),
+# playable questions per (category, difficulty) below which a pool is topped up,
+# questions per task, tasks running at once, attempts per task, first retry
+# delay (seconds, doubled per attempt) and seconds before a Running task is presumed dead
+QUESTION_GENERATOR = env('QUESTION_GENERATOR', default='')
+GENERATION_POOL_MIN = env.int('GENERATION_POOL_MIN', default=30)
+GENERATION_BATCH_SIZE = env.int('GENERATION_BATCH_SIZE', default=20)
+GENERATION_MAX_CONCURRENCY = env.int('GENERATION_MAX_CONCURRENCY', default=2)
+GENERATION_MAX_RETRIES = env.int('GENERATION_MAX_RETRIES', default=3)
+GENERATION_RETRY_BACKOFF = env.int('GENERATION_RETRY_BACKOFF', default=60)
+GENERATION_TASK_TIMEOUT = env.int('GENERATION_TASK_TIMEOUT', default=600)
+# Seconds a pool whose task ended Failed waits before a new task, doubled per
+# further failure in the last day (capped at a day)
+GENERATION_FAILED_COOLDOWN = env.int('GENERATION_FAILED_COOLDOWN', default=1800)
+
+# Staff bulk question API (bulk_questions.py): rows per transaction (a request may
+# override it with batch_size) and changes accepted per request
+BULK_QUESTION_BATCH_SIZE = env.int('BULK_QUESTION_BATCH_SIZE', default=200)
+BULK_QUESTION_MAX_ITEMS = env.int('BULK_QUESTION_MAX_ITEMS', default=10000)
+
+# Degraded mode (degraded.py): gameplay queries slower than DEGRADED_DB_DEADLINE
+# seconds or failing open a breaker for DEGRADED_COOLDOWN seconds, during which
+# questions and answer checks come from the in-memory fallback pool (is_fallback
+# questions + FALLBACK_POOL_PER_GROUP per pool from FALLBACK_QUESTIONS_FILE,
+# default LEVEL1_SEED_FILE) and quiz saves are spooled to DEGRADED_SAVE_SPOOL
+# (default <temp dir>/letsquiz-degraded-saves.jsonl) for replay
+DEGRADED_MODE_ENABLED = env.bool('DEGRADED_MODE_ENABLED', default=True)
+DEGRADED_DB_DEADLINE = env.float('DEGRADED_DB_DEADLINE', default=2.0)
+DEGRADED_COOLDOWN = env.int('DEGRADED_COOLDOWN', default=15)
+DEGRADED_PROBE_INTERVAL = env.float('DEGRADED_PROBE_INTERVAL', default=5.0)
+DEGRADED_DB_WORKERS = env.int('DEGRADED_DB_WORKERS', default=8)
+DEGRADED_SAVE_SPOOL = env('DEGRADED_SAVE_SPOOL', default='')
+DEGRADED_REPLAY_INTERVAL = env.int('DEGRADED_REPLAY_INTERVAL', default=30)
+FALLBACK_QUESTIONS_FILE = env('FALLBACK_QUESTIONS_FILE', default='')
+FALLBACK_POOL_PER_GROUP = env.int('FALLBACK_POOL_PER_GROUP', default=50)
+FALLBACK_POOL_REFRESH = env.int('FALLBACK_POOL_REFRESH', default=600)
+
+# Thread pool size for concurrent section loading in /users/<id>/dashboard/
+DASHBOARD_MAX_WORKERS = env.int('DASHBOARD_MAX_WORKERS', default=4)
+
+# Whether a Celery broker (REDIS_URL) and worker run alongside the web processes. Level 1
+# runs without one: background work (question bank rebuilds, pool refills) then runs on a
+# daemon thread in the web process, as it also does when publishing to the broker fails
+TASK_BROKER_ENABLED = env.bool('TASK_BROKER_ENABLED', default=False)
+
 CELERY_BROKER_URL = env('REDIS_URL', default='redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = env('REDIS_URL', default='redis://localhost:6379/0')
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
-CELERY_TIMEZONE = 'UTC' 
+CELERY_TIMEZONE = 'UTC'
+CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
+CELERY_BEAT_SCHEDULE = {
+    # Repair drift in the last two days of per-user daily stat rollups
+    'reconcile-daily-stats': {
+        'task': 'apps.quiz.tasks.reconcile_daily_stats',
+        'schedule': crontab(hour=0, minute=15),
+        'kwargs': {'days': 2},
+    },
+    'flush-question-stats': {
+        'task': 'apps.quiz.tasks.flush_question_stats',
+        'schedule': 60.0,
+    },
+    'check-question-pools': {
+        'task': 'apps.quiz.tasks.check_question_pools',
+        'schedule': 300.0,
+    },
+    'dispatch-generation-tasks': {
+        'task': 'apps.quiz.tasks.dispatch_generation_tasks',
+        'schedule': 30.0,
+    },
+}
@@ -12,15 +12,46 @@ DATABASES = {
 }
 
 # Level 1 keeps Redis disabled by default to minimize cost and operational complexity.
+# The in-process cache is bounded by serialized bytes (per worker) with LRU
+# eviction and per-namespace budgets instead of LocMem's 300-entry cap.
+_MB = 1024 * 1024
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.cache_backends.ByteBudgetLRUCache',
         'LOCATION': 'letsquiz-level1-prod',
         'KEY_PREFIX': 'letsquiz_prod',
         'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_BYTES': env.int('CACHE_MAX_BYTES', default=64 * _MB),
+            'NAMESPACE_BUDGETS': {
+                'questions': 24 * _MB,
+                'categories': 1 * _MB,
+                'session_results': 8 * _MB,
+                'user_profile': 4 * _MB,
+                'user_stats': 4 * _MB,
+                'user_sessions': 8 * _MB,
+            },
+        },
     }
 }
 
+# Single-host deployments without Redis can share one cache across all gunicorn
+# workers (question pools, categories and guest sessions) by setting
+# CACHE_BACKEND=shared. The segment lives in /dev/shm by default.
+if env('CACHE_BACKEND', default='lru') == 'shared':
+    CACHES['default'] = {
+        'BACKEND': 'core.cache_backends.SharedMemoryCache',
+        'LOCATION': 'letsquiz-level1-prod',
+        'KEY_PREFIX': 'letsquiz_prod',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'PATH': env('CACHE_SHARED_PATH', default=''),
+            'BUCKETS': env.int('CACHE_SHARED_BUCKETS', default=512),
+            'ASSOCIATIVITY': env.int('CACHE_SHARED_ASSOCIATIVITY', default=8),
+            'SLOT_SIZE': env.int('CACHE_SHARED_SLOT_SIZE', default=8192),
+        },
+    }
+
 # Session configuration (Redis-free for Level 1)
 SESSION_ENGINE = 'django.contrib.sessions.backends.cache'
 SESSION_CACHE_ALIAS = 'default'
@@ -0,0 +1,162 @@
+import os
+import tempfile
+import time
+import uuid
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase
+
+from core import cache_backends
+from core.cache_backends import ByteBudgetLRUCache, SharedMemoryCache
+
+VALUE = b'x' * 400  # Roughly 430 bytes per entry once pickled and keyed
+
+
+class ByteBudgetLRUCacheTests(SimpleTestCase):
+    def make_cache(self, max_bytes=10_000, budgets=None):
+        # Stores are shared per LOCATION, so every test gets its own
+        return ByteBudgetLRUCache(f'test-{uuid.uuid4().hex}', {
+            'TIMEOUT': 300,
+            'OPTIONS': {'MAX_BYTES': max_bytes, 'NAMESPACE_BUDGETS': budgets or {}},
+        })
+
+    def test_namespace_budget_evicts_least_recently_used(self):
+        cache = self.make_cache(budgets={'questions': 1000})
+        cache.set('questions:a', VALUE)
+        cache.set('questions:b', VALUE)
+        cache.get('questions:a')  # a is now the most recently used
+
+        cache.set('questions:c', VALUE)
+
+        self.assertEqual(cache.get('questions:a'), VALUE)
+        self.assertIsNone(cache.get('questions:b'))
+        self.assertEqual(cache.get('questions:c'), VALUE)
+        self.assertEqual(cache.get_stats()['namespaces']['questions']['evictions'], 1)
+
+    def test_namespace_budget_leaves_other_namespaces_alone(self):
+        cache = self.make_cache(budgets={'questions': 1000})
+        cache.set('user_stats:1', VALUE)
+        for n in range(5):
+            cache.set(f'questions:{n}', VALUE)
+
+        self.assertEqual(cache.get('user_stats:1'), VALUE)
+        stats = cache.get_stats()['namespaces']
+        self.assertEqual(stats['questions']['entries'], 2)
+        self.assertLessEqual(stats['questions']['bytes'], 1000)
+        self.assertEqual(stats['default']['evictions'], 0)
+
+    def test_global_budget_evicts_across_namespaces(self):
+        cache = self.make_cache(max_bytes=1000, budgets={'questions': 1000})
+        cache.set('user_stats:1', VALUE)
+        cache.set('questions:a', VALUE)
+
+        cache.set('questions:b', VALUE)
+
+        self.assertIsNone(cache.get('user_stats:1'))
+        self.assertEqual(cache.get('questions:a'), VALUE)
+        stats = cache.get_stats()
+        self.assertLessEqual(stats['bytes'], 1000)
+        self.assertEqual(stats['namespaces']['default']['evictions'], 1)
+
+    def test_value_larger_than_its_budget_is_rejected(self):
+        cache = self.make_cache(budgets={'questions': 300})
+        cache.set('questions:a', VALUE)
+
+        self.assertIsNone(cache.get('questions:a'))
+        stats = cache.get_stats()['namespaces']['questions']
+        self.assertEqual((stats['rejected'], stats['entries'], stats['bytes']), (1, 0, 0))
+
+    def test_byte_accounting_follows_replace_and_delete(self):
+        cache = self.make_cache(budgets={'questions': 5000})
+        cache.set('questions:a', VALUE)
+        one_entry = cache.get_stats()['bytes']
+
+        cache.set('questions:a', VALUE)  # Replacing must not count the key twice
+        cache.set('user_stats:1', VALUE)
+        stats = cache.get_stats()
+        self.assertEqual(stats['namespaces']['questions']['bytes'], one_entry)
+        self.assertEqual(stats['bytes'], stats['namespaces']['questions']['bytes'] + stats['namespaces']['default']['bytes'])
+
+        cache.delete('questions:a')
+        cache.delete('user_stats:1')
+        stats = cache.get_stats()
+        self.assertEqual((stats['entries'], stats['bytes']), (0, 0))
+        self.assertEqual(stats['namespaces']['questions']['bytes'], 0)
+
+
+class SharedMemoryCacheTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'cache')
+        self.addCleanup(self.close_segments)
+
+    def close_segments(self):
+        for segment_key in [segment_key for segment_key in cache_backends._segments if segment_key[0] == self.path]:
+            segment = cache_backends._segments.pop(segment_key)
+            segment.mm.close()
+            os.close(segment.fd)
+
+    def make_cache(self, buckets=1, associativity=2, slot_size=1024):
+        return SharedMemoryCache('test', {
+            'TIMEOUT': 300,
+            'OPTIONS': {
+                'PATH': self.path,
+                'BUCKETS': buckets,
+                'ASSOCIATIVITY': associativity,
+                'SLOT_SIZE': slot_size,
+            },
+        })
+
+    def test_full_bucket_evicts_least_recently_accessed(self):
+        cache = self.make_cache()
+        cache.set('a', 1)
+        cache.set('b', 2)
+        time.sleep(0.01)
+        cache.get('a')  # b is now the least recently accessed
+
+        cache.set('c', 3)
+
+        self.assertEqual((cache.get('a'), cache.get('b'), cache.get('c')), (1, None, 3))
+        self.assertEqual(cache.get_stats()['process_counters']['evictions'], 1)
+
+    def test_rewrite_and_expired_slots_are_reused_before_evicting(self):
+        cache = self.make_cache()
+        cache.set('a', 1)
+        cache.set('a', 2)  # Same slot, not a second one
+        cache.set('b', 3, timeout=0)  # Expires immediately
+
+        cache.set('c', 4)
+
+        self.assertEqual((cache.get('a'), cache.get('b'), cache.get('c')), (2, None, 4))
+        stats = cache.get_stats()
+        self.assertEqual((stats['entries'], stats['process_counters']['evictions']), (2, 0))
+
+    def test_value_bigger_than_a_slot_is_compressed(self):
+        cache = self.make_cache(slot_size=512)
+        value = 'quiz ' * 1000
+
+        cache.set('big', value)
+
+        self.assertEqual(cache.get('big'), value)
+        counters = cache.get_stats()['process_counters']
+        self.assertEqual((counters['sets'], counters['rejected']), (1, 0))
+
+    def test_value_that_does_not_fit_is_rejected_and_replaces_the_old_one(self):
+        cache = self.make_cache(slot_size=512)
+        cache.set('key', 'small')
+
+        cache.set('key', os.urandom(4000))  # Incompressible
+
+        self.assertIsNone(cache.get('key'))
+        self.assertEqual(cache.get_stats()['process_counters']['rejected'], 1)
+
+    def test_file_of_another_layout_is_refused(self):
+        self.make_cache(buckets=4).set('key', 'value')
+
+        with self.assertRaises(ImproperlyConfigured):
+            self.make_cache(buckets=8).get('key')
+
+        # The original file is untouched and a matching layout maps it again
+        self.close_segments()
+        self.assertEqual(self.make_cache(buckets=4).get('key'), 'value')
@@ -0,0 +1,37 @@
+"""
+Gunicorn configuration for LetsQuiz backend.
+
+Command-line flags (see Dockerfile) still set bind/workers/timeout. When
+CACHE_WARMUP_ON_BOOT is enabled the app is preloaded in the master and caches
+are warmed before workers are forked, so every worker starts with the warm
+LocMem contents (copy-on-write) instead of warming separately.
+
+Every worker loads the degraded-mode fallback question pool when it starts, so
+it can serve quizzes even if the database is unreachable later.
+"""
+import os
+
+_warmup_on_boot = os.environ.get('CACHE_WARMUP_ON_BOOT', '').lower() in ('1', 'true', 'yes')
+
+preload_app = _warmup_on_boot
+
+
+def when_ready(server):
+    if not _warmup_on_boot:
+        return
+    from apps.quiz.cache_warmup import warm_on_boot
+
+    report = warm_on_boot()
+    if report is not None:
+        server.log.info(f"Cache warm-up before fork: {report['totals']} in {report['elapsed_ms']}ms")
+
+
+def post_worker_init(worker):
+    from apps.quiz.degraded import warm_fallback_pool
+
+    try:
+        pool = warm_fallback_pool()
+        worker.log.info(f"Fallback question pool loaded: {len(pool)} questions")
+    except Exception as e:
+        # The pool is also built on first use; never keep a worker from starting
+        worker.log.error(f"Fallback question pool failed to load: {e}")
@@ -7,7 +7,6 @@ import { useAppDispatch, useAppSelector } from '../../hooks/reduxHooks';
 import {
   fetchSingleDetailedQuizSession,
   clearSelectedDetailedSession,
-  fetchUserProfile,
   cleanExpiredCache,
 } from '../../store/slices/userSlice';
 import ActivityDetailContent from './ActivityDetailContent';
@@ -17,7 +16,7 @@ import StatsPanel from './StatsPanel';
 import GroupQuizzes from './GroupQuizzes';
 import { UserProfile } from '../../types/api.types';
 import { calculateCategoryStats } from '../../utils/dashboardUtils';
-import { fetchQuizHistoryThunk } from '../../store/slices/quizSlice';
+import { fetchDashboardThunk, fetchMoreQuizHistoryThunk } from '../../store/slices/quizSlice';
 
 import styles from './DashboardContent.module.css';
 
@@ -35,6 +34,8 @@ const DashboardContent: React.FC<DashboardContentProps> = ({ profile }) => {
   const {
     sessions: reduxSessions,
     historyLoading,
+    historyLoadingMore,
+    historyHasMore,
     historyError,
     lastHistoryFetch: quizLastHistoryFetch,
   } = useAppSelector((state) => state.quiz);
@@ -47,7 +48,7 @@ const DashboardContent: React.FC<DashboardContentProps> = ({ profile }) => {
   useEffect(() => {
     if (isAuthenticated && userId && !historyFetchAttempted.current) {
       historyFetchAttempted.current = true;
-      dispatch(fetchQuizHistoryThunk());
+      dispatch(fetchDashboardThunk());
     }
   }, [dispatch, isAuthenticated, userId]);
 
@@ -100,27 +101,19 @@ const DashboardContent: React.FC<DashboardContentProps> = ({ profile }) => {
   const handleSmartRefresh = useCallback(() => {
     const now = Date.now();
 
-    // Force refresh quiz history if it's stale (older than 5 minutes)
+    // Profile and history come back together; refresh both if either is stale
     const historyAge = quizLastHistoryFetch ? now - quizLastHistoryFetch : Infinity;
-    if (historyAge > 5 * 60 * 1000) {
-      console.log('[Cache] Refreshing stale quiz history');
-      dispatch(fetchQuizHistoryThunk());
-    } else {
-      console.log('[Cache] Quiz history is fresh, skipping refresh');
-    }
-
-    // Force refresh user profile if it's stale (older than 8 minutes)
     const profileAge = lastProfileFetch ? now - lastProfileFetch : Infinity;
-    if (profileAge > 8 * 60 * 1000 && userId) {
-      console.log('[Cache] Refreshing stale user profile');
-      dispatch(fetchUserProfile(userId.toString()));
+    if (historyAge > 5 * 60 * 1000 || profileAge > 8 * 60 * 1000) {
+      console.log('[Cache] Refreshing stale dashboard');
+      dispatch(fetchDashboardThunk({ force: true }));
     } else {
-      console.log('[Cache] User profile is fresh, skipping refresh');
+      console.log('[Cache] Dashboard is fresh, skipping refresh');
     }
 
     // Clean expired session cache
     dispatch(cleanExpiredCache());
-  }, [dispatch, userId, quizLastHistoryFetch, lastProfileFetch]);
+  }, [dispatch, quizLastHistoryFetch, lastProfileFetch]);
 
   if (!isAuthenticated) {
     return (
@@ -172,6 +165,18 @@ const DashboardContent: React.FC<DashboardContentProps> = ({ profile }) => {
               onQuizCardClick={(session) => openDetail(session.id)}
             />
           )}
+          {historyHasMore && (
+            <div className={styles.loadMore}>
+              <Button
+                onClick={() => dispatch(fetchMoreQuizHistoryThunk())}
+                variant="secondary"
+                size="small"
+                disabled={historyLoadingMore}
+              >
+                {historyLoadingMore ? 'Loading...' : 'Load more'}
+              </Button>
+            </div>
+          )}
         </div>
         <div className={styles.recentActivityContainer}>
           <RecentActivity
@@ -180,10 +185,7 @@ const DashboardContent: React.FC<DashboardContentProps> = ({ profile }) => {
             onDeleteSuccess={() => {
               // Force refresh after deletion since data has changed
               console.log('[Cache] Session deleted, forcing data refresh');
-              dispatch(fetchQuizHistoryThunk());
-              if (userId) {
-                dispatch(fetchUserProfile(userId.toString()));
-              }
+              dispatch(fetchDashboardThunk({ force: true }));
             }}
           />
         </div>
@@ -0,0 +1,69 @@
+import apiClient from '../apiClient';
+import userService from '../userService';
+
+jest.mock('../apiClient');
+
+const session = (id: number) => ({
+  id,
+  score: 3,
+  started_at: '2026-01-01T10:00:00Z',
+  completed_at: '2026-01-01T10:05:00Z',
+  category: 'History',
+  difficulty: 'Easy',
+  is_group_session: false,
+  details: [],
+  total_questions: 5,
+});
+
+describe('userService history paging', () => {
+  const mockGet = apiClient.get as jest.Mock;
+
+  beforeEach(() => {
+    jest.clearAllMocks();
+  });
+
+  it('requests the first page without a limit so the cached page size is used', async () => {
+    mockGet.mockResolvedValueOnce({
+      data: { results: [session(2), session(1)], next_cursor: 'abc', has_more: true },
+    });
+
+    const page = await userService.fetchSessionPage(7);
+
+    expect(mockGet).toHaveBeenCalledTimes(1);
+    expect(mockGet).toHaveBeenCalledWith('/users/7/sessions/', { params: {} });
+    expect(page.results.map((s) => s.id)).toEqual([2, 1]);
+    expect(page.next_cursor).toBe('abc');
+    expect(page.has_more).toBe(true);
+  });
+
+  it('passes the cursor for the next page and does not follow next_cursor itself', async () => {
+    mockGet.mockResolvedValueOnce({
+      data: { results: [session(1)], next_cursor: 'def', has_more: true },
+    });
+
+    await userService.fetchSessionPage(7, 'abc');
+
+    expect(mockGet).toHaveBeenCalledTimes(1);
+    expect(mockGet).toHaveBeenCalledWith('/users/7/sessions/', { params: { cursor: 'abc' } });
+  });
+
+  it('returns one history page with totalQuestions filled in', async () => {
+    mockGet.mockResolvedValueOnce({
+      data: { results: [session(1)], next_cursor: null, has_more: false },
+    });
+
+    const page = await userService.fetchUserQuizHistory('7');
+
+    expect(page.results[0]).toMatchObject({ id: 1, totalQuestions: 5 });
+    expect(page.next_cursor).toBeNull();
+    expect(page.has_more).toBe(false);
+  });
+
+  it('returns an empty last page when the request fails', async () => {
+    mockGet.mockRejectedValueOnce(new Error('Network error'));
+
+    const page = await userService.fetchUserQuizHistory('7', 'abc');
+
+    expect(page).toEqual({ results: [], next_cursor: null, has_more: false });
+  });
+});
@@ -11,8 +11,9 @@ import {
 } from '../types/api.types';
 import { GroupQuizSession } from '../types/quiz.types';
 import AuthService from './authService';
+import UserService from './userService';
 import { AES, enc } from 'crypto-js';
-import { QuizSession } from '../types/dashboard.types';
+import { QuizSessionPage } from '../types/dashboard.types';
 import { removeDuplicateQuestions } from '../utils/quizUtils';
 
 import {
@@ -471,9 +472,8 @@ class QuizService {
     return detail.questions.length;
   }
 
-  async fetchUserSessions(userId: number): Promise<QuizSession[]> {
-    const resp = await apiClient.get<QuizSession[]>(`/users/${userId}/sessions/`);
-    return resp.data;
+  async fetchUserSessions(userId: number, cursor: string | null = null): Promise<QuizSessionPage> {
+    return UserService.fetchSessionPage(userId, cursor);
   }
 
   /* Error handling with specific error messages */
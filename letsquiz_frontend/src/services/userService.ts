@@ -1,8 +1,19 @@
 import apiClient from './apiClient';
 import { UserProfile, BackendQuizSessionResponse } from '../types/api.types';
-import { QuizSession } from '../types/dashboard.types';
+import { QuizSessionPage, UserDashboard } from '../types/dashboard.types';
 
 class UserService {
+  /* Backend profile payload (profile endpoint or dashboard section) to UserProfile */
+  toUserProfile(data: Record<string, any>): UserProfile {
+    return {
+      id: data.user_id,
+      email: data.email,
+      is_premium: data.is_premium,
+      date_joined: data.joined_date,
+      quiz_history: [], // Quiz history comes from separate endpoint
+    };
+  }
+
   async fetchUserProfile(userId: string): Promise<UserProfile> {
     try {
       const response = await apiClient.get<any>(`/users/${userId}/`);
@@ -20,36 +31,51 @@ class UserService {
         throw new Error('User ID mismatch in profile response');
       }
 
-      const userProfile: UserProfile = {
-        id: response.data.user_id,
-        email: response.data.email,
-        is_premium: response.data.is_premium,
-        date_joined: response.data.joined_date,
-        quiz_history: [], // Quiz history comes from separate endpoint
-      };
-
-      return userProfile;
+      return this.toUserProfile(response.data);
     } catch (error: any) {
       console.error('[UserService] Error fetching user profile:', error);
       throw error;
     }
   }
 
-  async fetchUserQuizHistory(userId: string): Promise<QuizSession[]> {
+  /* One history page; pass the previous page's next_cursor to load more */
+  async fetchUserQuizHistory(
+    userId: string,
+    cursor: string | null = null
+  ): Promise<QuizSessionPage> {
     try {
-      const response = await apiClient.get<QuizSession[]>(`/users/${userId}/sessions/`);
-
-      if (!response.data) {
-        return [];
-      }
-      return response.data.map((session) => ({
-        ...session,
-        // Add totalQuestions if missing in response
-        totalQuestions: session.total_questions || 0,
-      }));
+      const page = await this.fetchSessionPage(userId, cursor);
+      return {
+        ...page,
+        results: page.results.map((session) => ({
+          ...session,
+          // Add totalQuestions if missing in response
+          totalQuestions: session.total_questions || 0,
+        })),
+      };
     } catch (error: any) {
-      return [];
+      return { results: [], next_cursor: null, has_more: false };
+    }
+  }
+
+  /* Profile, stats and first history page in one request */
+  async fetchUserDashboard(userId: string | number): Promise<UserDashboard> {
+    const response = await apiClient.get<UserDashboard>(`/users/${userId}/dashboard/`);
+    return response.data;
+  }
+
+  /* History is cursor-paginated; the default page size (20) is the page the backend caches */
+  async fetchSessionPage(
+    userId: string | number,
+    cursor: string | null = null
+  ): Promise<QuizSessionPage> {
+    const response = await apiClient.get<QuizSessionPage>(`/users/${userId}/sessions/`, {
+      params: cursor ? { cursor } : {},
+    });
+    if (!response.data) {
+      return { results: [], next_cursor: null, has_more: false };
     }
+    return response.data;
   }
 
   async fetchQuizSessionDetails(sessionId: number): Promise<BackendQuizSessionResponse> {
@@ -3,12 +3,13 @@ import { QuizSettings, GroupQuizSession } from '../../types/quiz.types';
 import QuizService from '../../services/quizService';
 import UserService from '../../services/userService';
 import { QUIZ_SETTINGS_STORAGE_KEY } from '../../constants/storageKeys';
-import { QuizSession } from '../../types/dashboard.types';
+import { QuizSession, QuizSessionPage } from '../../types/dashboard.types';
 import {
   FetchQuestionsRequest,
   Question,
   FetchQuestionsResponse,
   Category,
+  UserProfile,
 } from '../../types/api.types';
 import { setGroupSession, setGroupMode, setCurrentPlayer } from './groupQuizSlice';
 import { RootState } from '../store';
@@ -46,7 +47,10 @@ interface QuizState {
   guestQuizCount: number;
   sessions: QuizSession[];
   historyLoading: boolean;
+  historyLoadingMore: boolean;
   historyError: string | null;
+  historyCursor: string | null;
+  historyHasMore: boolean;
   lastHistoryFetch: number | null;
   categories: Category[];
   loadingCategories: boolean;
@@ -98,7 +102,10 @@ const initialState: QuizState = {
   guestQuizCount: savedGuestCount ? parseInt(savedGuestCount) : 0,
   sessions: [],
   historyLoading: false,
+  historyLoadingMore: false,
   historyError: null,
+  historyCursor: null,
+  historyHasMore: false,
   lastHistoryFetch: null,
   categories: [],
   loadingCategories: false,
@@ -107,34 +114,41 @@ const initialState: QuizState = {
   savedSessionId: null,
 };
 
-// Load past quiz sessions for the current user
-export const fetchQuizHistoryThunk = createAsyncThunk<
-  QuizSession[],
-  void,
+// Load profile, stats and the first history page for the dashboard in one request
+export const fetchDashboardThunk = createAsyncThunk<
+  { profile: UserProfile; history: QuizSessionPage },
+  { force?: boolean } | void,
   { state: { quiz: QuizState; auth: any }; rejectValue: string }
 >(
-  'quiz/fetchHistory',
+  'quiz/fetchDashboard',
   async (_, { getState, rejectWithValue }) => {
     const userId = getState().auth.userId;
     if (!userId) return rejectWithValue('Not authenticated');
     try {
-      const sessions = await UserService.fetchUserQuizHistory(userId.toString());
-      return sessions.map((session: QuizSession) => ({
-        ...session,
-        total_questions: session.total_questions,
-      }));
+      const dashboard = await UserService.fetchUserDashboard(userId);
+      return {
+        profile: UserService.toUserProfile(dashboard.profile),
+        history: {
+          ...dashboard.history,
+          results: dashboard.history.results.map((session: QuizSession) => ({
+            ...session,
+            // Add totalQuestions if missing in response
+            totalQuestions: session.total_questions || 0,
+          })),
+        },
+      };
     } catch (err: any) {
       return rejectWithValue(err.message || 'Failed to load history');
     }
   },
   {
-    condition: (_, { getState }) => {
+    condition: (arg, { getState }) => {
       const { quiz, auth } = getState();
       // Don't fetch if already loading or not authenticated
       if (quiz.historyLoading || !auth.userId) return false;
 
-      // Don't fetch if we have recent data
-      if (quiz.sessions.length > 0 && quiz.lastHistoryFetch) {
+      // Don't fetch if we have recent data, unless the caller knows it changed
+      if (!arg?.force && quiz.sessions.length > 0 && quiz.lastHistoryFetch) {
         if (Date.now() - quiz.lastHistoryFetch < HISTORY_CACHE_DURATION_MS) {
           return false;
         }
@@ -145,6 +159,30 @@ export const fetchQuizHistoryThunk = createAsyncThunk<
   }
 );
 
+// Load the next history page after the ones already in state
+export const fetchMoreQuizHistoryThunk = createAsyncThunk<
+  QuizSessionPage,
+  void,
+  { state: { quiz: QuizState; auth: any }; rejectValue: string }
+>(
+  'quiz/fetchMoreHistory',
+  async (_, { getState, rejectWithValue }) => {
+    const { quiz, auth } = getState();
+    if (!auth.userId) return rejectWithValue('Not authenticated');
+    try {
+      return await UserService.fetchUserQuizHistory(auth.userId.toString(), quiz.historyCursor);
+    } catch (err: any) {
+      return rejectWithValue(err.message || 'Failed to load history');
+    }
+  },
+  {
+    condition: (_, { getState }) => {
+      const { quiz } = getState();
+      return quiz.historyHasMore && !!quiz.historyCursor && !quiz.historyLoadingMore;
+    },
+  }
+);
+
 // Async thunk for fetching categories
 export const fetchCategoriesThunk = createAsyncThunk<
   Category[],
@@ -561,19 +599,36 @@ export const quizSlice = createSlice({
         state.loading = false;
         state.error = action.payload || 'Failed to save session';
       })
-      .addCase(fetchQuizHistoryThunk.pending, (state) => {
+      .addCase(fetchDashboardThunk.pending, (state) => {
         state.historyLoading = true;
         state.historyError = null;
       })
-      .addCase(fetchQuizHistoryThunk.fulfilled, (state, action) => {
+      .addCase(fetchDashboardThunk.fulfilled, (state, action) => {
+        const { history } = action.payload;
         state.historyLoading = false;
-        state.sessions = action.payload;
+        state.sessions = history.results;
+        state.historyCursor = history.next_cursor;
+        state.historyHasMore = history.has_more;
         state.lastHistoryFetch = Date.now();
       })
-      .addCase(fetchQuizHistoryThunk.rejected, (state, action) => {
+      .addCase(fetchDashboardThunk.rejected, (state, action) => {
         state.historyLoading = false;
         state.historyError = action.payload as string;
       })
+      .addCase(fetchMoreQuizHistoryThunk.pending, (state) => {
+        state.historyLoadingMore = true;
+        state.historyError = null;
+      })
+      .addCase(fetchMoreQuizHistoryThunk.fulfilled, (state, action) => {
+        state.historyLoadingMore = false;
+        state.sessions.push(...action.payload.results);
+        state.historyCursor = action.payload.next_cursor;
+        state.historyHasMore = action.payload.has_more;
+      })
+      .addCase(fetchMoreQuizHistoryThunk.rejected, (state, action) => {
+        state.historyLoadingMore = false;
+        state.historyError = action.payload as string;
+      })
       .addCase(fetchCategoriesThunk.pending, (state) => {
         state.loadingCategories = true;
         state.categoryError = null;
@@ -1,6 +1,7 @@
 import { createSlice, createAsyncThunk, PayloadAction } from '@reduxjs/toolkit';
 import { RootState } from '../store';
 import UserService from '../../services/userService';
+import { fetchDashboardThunk } from './quizSlice';
 import { UserProfile } from '../../types/api.types';
 import { SessionDetail } from '../../types/dashboard.types';
 
@@ -189,6 +190,11 @@ const userSlice = createSlice({
         state.loadingProfile = false;
         state.errorProfile = payload ?? error.message ?? 'Failed to fetch profile';
       })
+      // the dashboard response carries a fresh profile too
+      .addCase(fetchDashboardThunk.fulfilled, (state, { payload }) => {
+        state.profile = payload.profile;
+        state.lastProfileFetch = Date.now();
+      })
 
       // detailed session
       .addCase(fetchSingleDetailedQuizSession.pending, (state) => {
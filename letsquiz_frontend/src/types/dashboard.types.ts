@@ -20,6 +20,29 @@ export type QuizSession = {
   total_questions: number;
 };
 
+export type QuizSessionPage = {
+  results: QuizSession[];
+  next_cursor: string | null;
+  has_more: boolean;
+};
+
+export type UserDashboard = {
+  profile: Record<string, any>;
+  stats: {
+    overall_stats: Record<string, number>;
+    category_stats: Record<string, { correct: number; total: number; accuracy: number }>;
+    difficulty_stats?: Record<string, { correct: number; total: number; accuracy: number }>;
+  };
+  history: QuizSessionPage;
+  summary: {
+    total_quizzes: number;
+    total_score: number;
+    accuracy: number;
+    last_played_at: string | null;
+  };
+  cached_sections: string[];
+};
+
 export type CategoryStats = {
   category: string;
   totalQuizzes: number;